@@ -0,0 +1,83 @@
+"""
+Compare two benchmark result files
+
+Usage:
+    python -m benchmarks.compare old.json new.json
+"""
+
+import argparse
+import json
+import sys
+from typing import Optional
+
+
+def _key(result: dict) -> tuple:
+    return (result["pages"], result["concurrency"], result["dpi"], result["format"])
+
+
+def compare(old: dict, new: dict) -> list[dict]:
+    """
+    Match scenarios present in both documents and compute ratios
+
+    Args:
+        old: Baseline result document
+        new: Candidate result document
+
+    Returns:
+        One row per shared scenario
+    """
+    baseline = {_key(r): r for r in old["results"]}
+    rows = []
+    for result in new["results"]:
+        before = baseline.get(_key(result))
+        if before is None:
+            continue
+        rows.append(
+            {
+                "scenario": _key(result),
+                "pages_per_second": (
+                    before["pages_per_second"],
+                    result["pages_per_second"],
+                ),
+                "p50": (
+                    before["latency_seconds"]["p50"],
+                    result["latency_seconds"]["p50"],
+                ),
+                "peak_rss_mb": (before["peak_rss_mb"], result["peak_rss_mb"]),
+            }
+        )
+    return rows
+
+
+def _ratio(pair: tuple) -> str:
+    before, after = pair
+    if not before:
+        return "   n/a"
+    return f"{after / before:6.2f}x"
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compare")
+    parser.add_argument("old", help="Baseline result JSON")
+    parser.add_argument("new", help="Candidate result JSON")
+    args = parser.parse_args(argv)
+
+    with open(args.old, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+
+    print(f"{old['version']} -> {new['version']}")
+    print("pages conc  dpi fmt   pages/s          p50              rss")
+    for row in compare(old, new):
+        pages, concurrency, dpi, fmt = row["scenario"]
+        print(
+            f"{pages:<5} {concurrency:<4} {dpi:<4} {fmt:<4} "
+            f"{row['pages_per_second'][1]:8.2f} ({_ratio(row['pages_per_second'])}) "
+            f"{row['p50'][1]:7.3f} ({_ratio(row['p50'])}) "
+            f"{row['peak_rss_mb'][1]:7.1f} ({_ratio(row['peak_rss_mb'])})"
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
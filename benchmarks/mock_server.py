@@ -0,0 +1,311 @@
+"""
+Deterministic OpenAI-compatible stub server for offline benchmarking
+
+The server answers ``POST /v1/chat/completions`` with a canned Markdown page
+after a configurable delay, as one response or as a stream of server-sent
+events, and can inject server errors and 429 responses.
+All randomness comes from a seeded generator, so two runs with the same
+settings see the same latency and error sequence.
+"""
+
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+DEFAULT_CONTENT = """```markdown
+# Benchmark Page
+
+| Column A | Column B | Column C |
+| --- | --- | --- |
+| 1 | 2 | 3 |
+
+Lorem ipsum dolor sit amet, consectetur adipiscing elit. $E = mc^2$
+```"""
+
+
+@dataclass
+class MockServerSettings:
+    """Behaviour of the stub server"""
+
+    # Latency distribution: constant, uniform, normal or lognormal
+    latency: str = "constant"
+    latency_mean: float = 0.05
+    latency_stddev: float = 0.0
+    latency_min: float = 0.0
+    latency_max: float = 0.0
+
+    # Probability that a request fails with HTTP 500
+    error_rate: float = 0.0
+
+    # Probability that a request is rejected with HTTP 429
+    rate_limit_rate: float = 0.0
+
+    # Hard requests-per-second quota, 0 disables it
+    rate_limit_rps: float = 0.0
+
+    # Value of the Retry-After header sent with 429 responses
+    retry_after: float = 0.1
+
+    # Completion text returned for every successful request
+    content: str = DEFAULT_CONTENT
+
+    seed: int = 42
+
+    def to_dict(self) -> dict:
+        """Return settings as a JSON-serializable dict (without content)"""
+        data = dict(self.__dict__)
+        data.pop("content", None)
+        return data
+
+
+@dataclass
+class MockServerStats:
+    """Counters collected by the stub server"""
+
+    requests: int = 0
+    succeeded: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    prompt_bytes: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def to_dict(self) -> dict:
+        """Return counters as a JSON-serializable dict"""
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "succeeded": self.succeeded,
+                "errors": self.errors,
+                "rate_limited": self.rate_limited,
+                "prompt_bytes": self.prompt_bytes,
+            }
+
+
+class _Behaviour:
+    """
+    Seeded decision source shared by all handler threads
+    """
+
+    def __init__(self, settings: MockServerSettings):
+        self.settings = settings
+        self._rng = random.Random(settings.seed)
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_count = 0
+
+    def decide(self) -> tuple[int, float]:
+        """
+        Decide the outcome of the next request
+
+        Returns:
+            Tuple of (HTTP status, delay in seconds)
+        """
+        s = self.settings
+        with self._lock:
+            if s.rate_limit_rps > 0:
+                now = time.monotonic()
+                if now - self._window_start >= 1.0:
+                    self._window_start = now
+                    self._window_count = 0
+                self._window_count += 1
+                if self._window_count > s.rate_limit_rps:
+                    return 429, 0.0
+
+            roll = self._rng.random()
+            if roll < s.rate_limit_rate:
+                return 429, 0.0
+            if roll < s.rate_limit_rate + s.error_rate:
+                return 500, self._delay()
+            return 200, self._delay()
+
+    def _delay(self) -> float:
+        s = self.settings
+        if s.latency == "uniform":
+            delay = self._rng.uniform(s.latency_min, s.latency_max)
+        elif s.latency == "normal":
+            delay = self._rng.gauss(s.latency_mean, s.latency_stddev)
+        elif s.latency == "lognormal":
+            delay = self._rng.lognormvariate(s.latency_mean, s.latency_stddev)
+        else:
+            delay = s.latency_mean
+        if s.latency_max > 0:
+            delay = min(delay, s.latency_max)
+        return max(delay, s.latency_min, 0.0)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "MockLLMServer"
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this the body waits
+    # for the client's delayed ACK on kept-alive connections
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        stats = self.server.stats
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+
+        try:
+            request = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "Invalid JSON"}})
+            return
+
+        status, delay = self.server.behaviour.decide()
+        with stats.lock:
+            stats.requests += 1
+            stats.prompt_bytes += length
+
+        if delay:
+            time.sleep(delay)
+
+        settings = self.server.settings
+        if status == 429:
+            with stats.lock:
+                stats.rate_limited += 1
+            self._send_json(
+                429,
+                {"error": {"message": "Rate limit exceeded", "type": "rate_limit"}},
+                headers={"Retry-After": str(settings.retry_after)},
+            )
+            return
+
+        if status != 200:
+            with stats.lock:
+                stats.errors += 1
+            self._send_json(
+                status, {"error": {"message": "Injected failure", "type": "server"}}
+            )
+            return
+
+        with stats.lock:
+            stats.succeeded += 1
+        prompt_tokens = length // 4
+        completion_tokens = len(settings.content) // 4
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        if request.get("stream"):
+            self._send_stream(request, settings.content, usage)
+            return
+        self._send_json(
+            200,
+            {
+                "id": f"chatcmpl-mock-{stats.requests}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "mock"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": settings.content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": usage,
+            },
+        )
+
+    def _send_stream(self, request: dict, content: str, usage: dict) -> None:
+        # Server-sent events: the content in a few chunks, then the finish
+        # reason (with usage when asked for) and [DONE]
+        model = request.get("model", "mock")
+        step = max(1, len(content) // 4)
+        chunks = [
+            {"choices": [{"index": 0, "delta": {"content": piece}}]}
+            for piece in (content[i : i + step] for i in range(0, len(content), step))
+        ]
+        last = {"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+        if (request.get("stream_options") or {}).get("include_usage"):
+            last["usage"] = usage
+        chunks.append(last)
+        events = []
+        for chunk in chunks:
+            chunk.update(object="chat.completion.chunk", model=model)
+            for choice in chunk["choices"]:
+                choice.setdefault("finish_reason", None)
+            events.append(f"data: {json.dumps(chunk)}\n\n")
+        events.append("data: [DONE]\n\n")
+        data = "".join(events).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(
+        self, status: int, payload: dict, headers: Optional[dict] = None
+    ) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    """
+    Threaded OpenAI-compatible stub server
+
+    Usage:
+        with MockLLMServer(MockServerSettings(latency_mean=0.2)) as server:
+            os.environ["OPENAI_API_BASE"] = server.base_url
+            ...
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        settings: Optional[MockServerSettings] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        super().__init__((host, port), _Handler)
+        self.settings = settings or MockServerSettings()
+        self.behaviour = _Behaviour(self.settings)
+        self.stats = MockServerStats()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to use as OPENAI_API_BASE"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockLLMServer":
+        """Serve requests on a background thread"""
+        self._thread = threading.Thread(
+            target=self.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and release the socket"""
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "MockLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
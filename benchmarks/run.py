@@ -0,0 +1,313 @@
+"""
+Offline end-to-end benchmark for MarkPDFDown
+
+Runs the full pipeline (PDFWorker rendering through LLMClient) against the
+local stub server from ``benchmarks.mock_server`` on generated PDFs, over a
+grid of page counts, concurrency levels, DPI values and image formats.
+
+Usage:
+    python -m benchmarks.run
+    python -m benchmarks.run --pages 10 50 --concurrency 1 4 16 --dpi 150 300
+    python -m benchmarks.run --latency lognormal --latency-mean -1.5 \\
+        --latency-stddev 0.5 --rate-limit-rate 0.05 --output results.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from .mock_server import MockLLMServer, MockServerSettings
+
+MOCK_MODEL = "openai/markpdfdown-mock"
+
+
+def generate_pdf(path: str, pages: int, seed: int = 0) -> str:
+    """
+    Generate a synthetic PDF with text, a table grid and a formula per page
+
+    Args:
+        path: Output PDF path
+        pages: Number of pages
+        seed: Variation seed for page content
+
+    Returns:
+        Path to the generated PDF
+    """
+    import fitz  # PyMuPDF
+
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page(width=595, height=842)
+        page.insert_text((72, 72), f"Benchmark page {page_num + 1}", fontsize=18)
+        lines = 20 + (page_num + seed) % 20
+        for line in range(lines):
+            page.insert_text(
+                (72, 110 + line * 14),
+                f"Line {line + 1}: lorem ipsum dolor sit amet, consectetur "
+                f"adipiscing elit {page_num * lines + line}",
+                fontsize=10,
+            )
+        top = 110 + lines * 14 + 20
+        for row in range(6):
+            page.draw_line((72, top + row * 20), (523, top + row * 20))
+        for col in range(4):
+            x = 72 + col * 150.33
+            page.draw_line((x, top), (x, top + 100))
+        page.insert_text((72, top + 140), "E = mc^2,  a^2 + b^2 = c^2", fontsize=12)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+class RSSSampler:
+    """
+    Sample resident set size on a background thread and keep the peak
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def current_rss() -> int:
+        """Return current RSS in bytes (peak RSS where /proc is unavailable)"""
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError):
+            import resource
+
+            usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return usage if sys.platform == "darwin" else usage * 1024
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.current_rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "RSSSampler":
+        self.peak = self.current_rss()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.current_rss())
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Return the pct-th percentile of values using linear interpolation"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+def run_scenario(
+    pdf_path: str,
+    work_dir: str,
+    concurrency: int,
+    dpi: int,
+    fmt: str,
+) -> dict:
+    """
+    Render and transcribe one PDF with the given settings
+
+    Returns:
+        Dict of measurements for the scenario
+    """
+    from markpdfdown.core.file_worker import PDFWorker
+    from markpdfdown.core.llm_client import LLMClient
+    from markpdfdown.main import convert_image_to_markdown
+
+    scenario_dir = tempfile.mkdtemp(dir=work_dir)
+    input_path = os.path.join(scenario_dir, "input.pdf")
+    shutil.copyfile(pdf_path, input_path)
+
+    latencies: list[float] = []
+    failed = 0
+    lock = threading.Lock()
+    client = LLMClient(MOCK_MODEL)
+
+    def transcribe(img_path: str) -> None:
+        nonlocal failed
+        start = time.perf_counter()
+        content = convert_image_to_markdown(img_path, client)
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if not content:
+                failed += 1
+
+    with RSSSampler() as sampler:
+        wall_start = time.perf_counter()
+        worker = PDFWorker(input_path)
+        img_paths = worker.convert_to_images(dpi=dpi, fmt=fmt)
+        render_seconds = time.perf_counter() - wall_start
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(transcribe, img_paths))
+        wall_seconds = time.perf_counter() - wall_start
+
+    image_bytes = sum(os.path.getsize(p) for p in img_paths)
+    shutil.rmtree(scenario_dir, ignore_errors=True)
+
+    pages = len(img_paths)
+    return {
+        "pages": pages,
+        "concurrency": concurrency,
+        "dpi": dpi,
+        "format": fmt,
+        "wall_seconds": round(wall_seconds, 4),
+        "render_seconds": round(render_seconds, 4),
+        "pages_per_second": round(pages / wall_seconds, 3) if wall_seconds else 0.0,
+        "failed_pages": failed,
+        "avg_image_bytes": image_bytes // pages if pages else 0,
+        "peak_rss_mb": round(sampler.peak / (1024 * 1024), 1),
+        "latency_seconds": {
+            "mean": round(statistics.mean(latencies), 4) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50), 4),
+            "p90": round(percentile(latencies, 90), 4),
+            "p99": round(percentile(latencies, 99), 4),
+            "max": round(max(latencies), 4) if latencies else 0.0,
+        },
+    }
+
+
+def create_parser() -> argparse.ArgumentParser:
+    """
+    Create benchmark argument parser
+
+    Returns:
+        Configured ArgumentParser instance
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run",
+        description="Offline MarkPDFDown benchmark against a stub LLM server",
+    )
+    parser.add_argument("--pages", type=int, nargs="+", default=[5, 20])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--dpi", type=int, nargs="+", default=[150, 300])
+    parser.add_argument("--format", dest="formats", nargs="+", default=["jpg", "png"])
+    parser.add_argument(
+        "--latency",
+        choices=["constant", "uniform", "normal", "lognormal"],
+        default="constant",
+        help="Stub server latency distribution",
+    )
+    parser.add_argument("--latency-mean", type=float, default=0.05)
+    parser.add_argument("--latency-stddev", type=float, default=0.0)
+    parser.add_argument("--latency-min", type=float, default=0.0)
+    parser.add_argument("--latency-max", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rps", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--output",
+        "-o",
+        type=str,
+        default=None,
+        help="Result JSON path (default: benchmarks/results/<version>-<time>.json)",
+    )
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> dict:
+    """
+    Benchmark entry point
+
+    Returns:
+        The result document that was written to disk
+    """
+    args = create_parser().parse_args(argv)
+
+    # Keep LiteLLM fully offline
+    os.environ["LITELLM_LOCAL_MODEL_COST_MAP"] = "True"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-markpdfdown-benchmark")
+
+    from markpdfdown import __version__
+
+    settings = MockServerSettings(
+        latency=args.latency,
+        latency_mean=args.latency_mean,
+        latency_stddev=args.latency_stddev,
+        latency_min=args.latency_min,
+        latency_max=args.latency_max,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        rate_limit_rps=args.rate_limit_rps,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+
+    results = []
+    work_dir = tempfile.mkdtemp(prefix="markpdfdown-bench-")
+    try:
+        pdfs = {
+            pages: generate_pdf(os.path.join(work_dir, f"doc_{pages}.pdf"), pages)
+            for pages in args.pages
+        }
+        # Warm up LiteLLM so the first scenario does not pay for lazy setup
+        from markpdfdown.core.llm_client import LLMClient
+
+        with MockLLMServer(MockServerSettings(latency_mean=0.0)) as server:
+            os.environ["OPENAI_API_BASE"] = server.base_url
+            LLMClient(MOCK_MODEL).completion("warm up", retry_times=1)
+
+        grid = itertools.product(args.pages, args.concurrency, args.dpi, args.formats)
+        for pages, concurrency, dpi, fmt in grid:
+            with MockLLMServer(settings) as server:
+                os.environ["OPENAI_API_BASE"] = server.base_url
+                result = run_scenario(pdfs[pages], work_dir, concurrency, dpi, fmt)
+                result["server"] = server.stats.to_dict()
+            results.append(result)
+            print(
+                f"pages={pages:<5} concurrency={concurrency:<3} dpi={dpi:<4} "
+                f"fmt={fmt:<4} {result['pages_per_second']:>8.2f} pages/s  "
+                f"p50={result['latency_seconds']['p50']:.3f}s  "
+                f"p99={result['latency_seconds']['p99']:.3f}s  "
+                f"rss={result['peak_rss_mb']}MB",
+                file=sys.stderr,
+            )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    document = {
+        "version": __version__,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "server": settings.to_dict(),
+        "results": results,
+    }
+
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"{__version__}-{time.strftime('%Y%m%d%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+    print(f"Results saved to: {output}", file=sys.stderr)
+    return document
+
+
+if __name__ == "__main__":
+    main()
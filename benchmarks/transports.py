@@ -0,0 +1,188 @@
+"""
+Transport overhead benchmark for MarkPDFDown
+
+Compares the LiteLLM transport with the direct OpenAI-compatible transport
+against the local stub server answering without delay, so the timings are
+the client-side cost of a request:
+
+- startup: a fresh interpreter importing LLMClient and completing its first
+  request, which includes loading LiteLLM
+- per call: sequential requests from one warmed-up client, plain and
+  streaming
+
+Usage:
+    python -m benchmarks.transports
+    python -m benchmarks.transports --calls 500 --startup-runs 5 --output t.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Optional
+
+from .mock_server import MockLLMServer, MockServerSettings
+from .run import MOCK_MODEL, percentile
+
+TRANSPORT_NAMES = ("litellm", "openai")
+
+# Run in a fresh interpreter; prints the seconds to the first response
+_STARTUP_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+from markpdfdown.core.llm_client import LLMClient
+from markpdfdown.core.transport import get_transport
+client = LLMClient(sys.argv[2], transport=get_transport(sys.argv[1]))
+client.completion("Hello", retry_times=1)
+print(time.perf_counter() - start)
+"""
+
+
+def measure_startup(transport: str, runs: int) -> list[float]:
+    """
+    Time import plus first request of a transport in fresh interpreters
+
+    Args:
+        transport: Transport name
+        runs: Number of interpreters to start
+
+    Returns:
+        Seconds per run
+    """
+    seconds = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _STARTUP_SCRIPT, transport, MOCK_MODEL],
+            check=True,
+            capture_output=True,
+            text=True,
+            env=os.environ.copy(),
+        ).stdout
+        seconds.append(float(output.strip().splitlines()[-1]))
+    return seconds
+
+
+def measure_calls(transport: str, calls: int, stream: bool) -> list[float]:
+    """
+    Time sequential requests of one warmed-up client
+
+    Args:
+        transport: Transport name
+        calls: Number of timed requests
+        stream: Whether the requests stream
+
+    Returns:
+        Seconds per request
+    """
+    from markpdfdown.core.llm_client import LLMClient
+    from markpdfdown.core.transport import get_transport
+
+    client = LLMClient(MOCK_MODEL, transport=get_transport(transport))
+
+    def call() -> None:
+        if stream:
+            "".join(client.completion_stream("Hello", retry_times=1))
+        else:
+            client.completion("Hello", retry_times=1)
+
+    for _ in range(min(calls, 10)):
+        call()
+
+    seconds = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        call()
+        seconds.append(time.perf_counter() - start)
+    return seconds
+
+
+def summarize(values: list[float]) -> dict:
+    """Return mean and percentiles of timings in milliseconds"""
+    return {
+        "mean_ms": round(statistics.mean(values) * 1000, 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+    }
+
+
+def create_parser() -> argparse.ArgumentParser:
+    """
+    Create benchmark argument parser
+
+    Returns:
+        Configured ArgumentParser instance
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.transports",
+        description="Compare the startup time and per-call overhead of transports",
+    )
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--startup-runs", type=int, default=3)
+    parser.add_argument(
+        "--transports", nargs="+", choices=TRANSPORT_NAMES, default=TRANSPORT_NAMES
+    )
+    parser.add_argument(
+        "--output", "-o", type=str, default=None, help="Result JSON path"
+    )
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> dict:
+    """
+    Benchmark entry point
+
+    Returns:
+        The result document
+    """
+    args = create_parser().parse_args(argv)
+
+    # Keep LiteLLM fully offline
+    os.environ["LITELLM_LOCAL_MODEL_COST_MAP"] = "True"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-markpdfdown-benchmark")
+
+    from markpdfdown import __version__
+
+    results = []
+    with MockLLMServer(MockServerSettings(latency_mean=0.0)) as server:
+        os.environ["OPENAI_API_BASE"] = server.base_url
+        for transport in args.transports:
+            result = {
+                "transport": transport,
+                "startup_seconds": round(
+                    statistics.median(measure_startup(transport, args.startup_runs)),
+                    4,
+                ),
+                "call": summarize(measure_calls(transport, args.calls, False)),
+                "stream_call": summarize(measure_calls(transport, args.calls, True)),
+            }
+            results.append(result)
+            print(
+                f"{transport:<8} startup={result['startup_seconds']:.3f}s  "
+                f"call p50={result['call']['p50_ms']:.3f}ms  "
+                f"p99={result['call']['p99_ms']:.3f}ms  "
+                f"stream p50={result['stream_call']['p50_ms']:.3f}ms",
+                file=sys.stderr,
+            )
+
+    document = {
+        "version": __version__,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "calls": args.calls,
+        "results": results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+        print(f"Results saved to: {args.output}", file=sys.stderr)
+    return document
+
+
+if __name__ == "__main__":
+    main()
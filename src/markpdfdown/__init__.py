@@ -8,6 +8,13 @@ __author__ = "MarkPDFDown Team"
 __email__ = "jorbenzhu@gmail.com"
 __description__ = "Convert PDF and images to Markdown using multimodal LLMs"
 
-from .main import convert_to_markdown
+__all__ = ["convert_to_markdown", "convert_to_result", "__version__"]
 
-__all__ = ["convert_to_markdown", "__version__"]
+
+def __getattr__(name: str):
+    # Import the conversion pipeline on first use to keep CLI startup fast
+    if name in ("convert_to_markdown", "convert_to_result"):
+        from . import main
+
+        return getattr(main, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
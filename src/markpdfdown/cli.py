@@ -5,9 +5,22 @@ Command line interface for MarkPDFDown
 import argparse
 import logging
 import sys
+from typing import Optional
 
 from . import __version__
-from .main import convert_from_file, convert_from_stdin
+from .core.errors import IncompleteConversionError
+from .core.planner import format_plan
+from .core.progress import ProgressDisplay
+from .core.tracing import start_tracing, stop_tracing
+from .core.utils import parse_page_spec
+from .main import (
+    assemble_queue,
+    convert_from_stdin,
+    convert_to_file,
+    enqueue_file,
+    plan_files,
+    run_queue_worker,
+)
 
 # Configure logging
 logging.basicConfig(
@@ -17,6 +30,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Exit status when pages are missing from the output (deadline or failures)
+EXIT_INCOMPLETE = 3
+
 
 def create_parser() -> argparse.ArgumentParser:
     """
@@ -31,7 +47,15 @@ def create_parser() -> argparse.ArgumentParser:
         epilog="Examples:\n"
         "  markpdfdown --input file.pdf --output output.md\n"
         "  markpdfdown --input file.pdf --output output.md --start 1 --end 10\n"
+        "  markpdfdown --input file.pdf --output output.md --pages 1-3,17,40-\n"
         "  markpdfdown < input.pdf > output.md\n"
+        "  markpdfdown --input file.pdf --output output.md --incremental\n"
+        "  markpdfdown --stream < input.pdf\n"
+        "  markpdfdown --input file.pdf --output output.md --deadline 120\n"
+        "  markpdfdown --dry-run reports/*.pdf\n"
+        "  markpdfdown --input file.pdf --output output.md --trace trace.json\n"
+        "  markpdfdown --queue jobs.db --input file.pdf --output output.md\n"
+        "  markpdfdown --queue jobs.db --work --assemble\n"
         "  python -m markpdfdown --input image.png --output output.md",
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
@@ -55,6 +79,78 @@ def create_parser() -> argparse.ArgumentParser:
         help="Ending page number (default: 0, means last page)",
     )
 
+    parser.add_argument(
+        "--pages",
+        type=str,
+        default=None,
+        help='Pages to convert, e.g. "1-3,17,40-45,200-" (overrides --start/--end)',
+    )
+
+    parser.add_argument(
+        "--incremental",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="MANIFEST",
+        help="Only reconvert pages changed since the previous run, using a page "
+        "fingerprint manifest (default: <output>.pages.json)",
+    )
+
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Write Markdown to stdout as it is generated (pipe mode only)",
+    )
+
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Stop after this many seconds and output the pages finished so far, "
+        "with unfinished pages marked (default: DEADLINE, or no limit)",
+    )
+
+    parser.add_argument(
+        "--dry-run",
+        nargs="*",
+        default=None,
+        metavar="FILE",
+        help="Estimate pages, tokens, cost and time for --input and any FILEs "
+        "without converting them or calling the model",
+    )
+
+    parser.add_argument(
+        "--trace",
+        type=str,
+        default=None,
+        metavar="FILE",
+        help="Record timed spans of rendering, requests and waits to FILE as "
+        "Chrome trace-event JSON (open in chrome://tracing or Perfetto)",
+    )
+
+    # Distributed queue arguments
+    parser.add_argument(
+        "--queue",
+        type=str,
+        default=None,
+        metavar="DB",
+        help="SQLite job database shared by queue workers; with --input/--output "
+        "the file is enqueued instead of converted",
+    )
+
+    parser.add_argument(
+        "--work",
+        action="store_true",
+        help="Transcribe pages from the --queue database until it drains",
+    )
+
+    parser.add_argument(
+        "--assemble",
+        action="store_true",
+        help="Write the Markdown of every fully converted document in --queue",
+    )
+
     # Version argument
     parser.add_argument(
         "--version", action="version", version=f"markpdfdown {__version__}"
@@ -76,8 +172,16 @@ def validate_args(args: argparse.Namespace) -> None:
     # Check if both input and output are provided or both are missing
     has_input = args.input is not None
     has_output = args.output is not None
+    dry_run = getattr(args, "dry_run", None)
 
-    if has_input != has_output:
+    if dry_run is not None:
+        if not (has_input or dry_run):
+            logger.error("--dry-run needs --input or files to plan")
+            sys.exit(1)
+        if getattr(args, "queue", None) or getattr(args, "stream", False):
+            logger.error("--dry-run cannot be combined with --queue or --stream")
+            sys.exit(1)
+    elif has_input != has_output:
         if has_input and not has_output:
             logger.error("Output file must be specified when input file is provided")
             sys.exit(1)
@@ -94,6 +198,109 @@ def validate_args(args: argparse.Namespace) -> None:
         logger.error(f"End page ({args.end}) must be >= start page ({args.start})")
         sys.exit(1)
 
+    if getattr(args, "stream", False) and has_input:
+        logger.error("--stream is only supported in pipe mode")
+        sys.exit(1)
+
+    incremental = getattr(args, "incremental", None)
+    if incremental is not None and (not has_input or getattr(args, "queue", None)):
+        logger.error("--incremental is only supported in file mode")
+        sys.exit(1)
+
+    deadline = getattr(args, "deadline", None)
+    if deadline is not None and deadline <= 0:
+        logger.error("--deadline must be positive")
+        sys.exit(1)
+
+    # Validate queue mode
+    queue = getattr(args, "queue", None)
+    work = getattr(args, "work", False)
+    assemble = getattr(args, "assemble", False)
+    if (work or assemble) and not queue:
+        logger.error("--work and --assemble require --queue")
+        sys.exit(1)
+
+    if queue and not (has_input or work or assemble):
+        logger.error("--queue needs --input/--output, --work or --assemble")
+        sys.exit(1)
+
+    if queue and getattr(args, "stream", False):
+        logger.error("--stream cannot be combined with --queue")
+        sys.exit(1)
+
+    if queue and deadline is not None:
+        logger.error("--deadline cannot be combined with --queue")
+        sys.exit(1)
+
+    # Validate page specification
+    pages = getattr(args, "pages", None)
+    if pages is not None:
+        if args.start != 1 or args.end != 0:
+            logger.error("--pages cannot be combined with --start/--end")
+            sys.exit(1)
+
+        try:
+            parse_page_spec(pages)
+        except ValueError as e:
+            logger.error(str(e))
+            sys.exit(1)
+
+
+def run_queue_mode(args: argparse.Namespace) -> None:
+    """
+    Enqueue, work on and assemble documents of the distributed page queue
+
+    Args:
+        args: Parsed command line arguments
+
+    Raises:
+        PageConversionError: If assembled documents have failed pages, which
+            are written as markers
+    """
+    if args.input and args.output:
+        document_id = enqueue_file(
+            args.queue,
+            input_path=args.input,
+            output_path=args.output,
+            start_page=args.start,
+            end_page=args.end,
+            pages=args.pages,
+        )
+        logger.info(f"Enqueued {args.input} as document {document_id}")
+
+    if args.work:
+        logger.info(f"Working on queue {args.queue}")
+        run_queue_worker(args.queue)
+
+    if args.assemble:
+        for output_path in assemble_queue(args.queue):
+            logger.info(f"Output saved to: {output_path}")
+
+
+class _ClearProgress(logging.Filter):
+    """Log filter erasing the progress line before a record is written"""
+
+    def __init__(self, display: ProgressDisplay):
+        super().__init__()
+        self.display = display
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        self.display.clear()
+        return True
+
+
+def create_progress_display() -> Optional[ProgressDisplay]:
+    """
+    Create a progress line on stderr if it is a terminal
+
+    Returns:
+        ProgressDisplay instance, or None when stderr is not a terminal
+    """
+    isatty = getattr(sys.stderr, "isatty", None)
+    if isatty is None or not isatty():
+        return None
+    return ProgressDisplay(sys.stderr)
+
 
 def main() -> None:
     """
@@ -105,23 +312,64 @@ def main() -> None:
     # Validate arguments
     validate_args(args)
 
+    # Spans are only recorded when a trace is requested
+    trace_path = getattr(args, "trace", None)
+    if trace_path:
+        start_tracing()
+
+    # Log lines erase the progress line, which is redrawn on the next page
+    display = None
+    log_filter = None
+    if args.dry_run is None and not args.queue:
+        display = create_progress_display()
+    if display is not None:
+        log_filter = _ClearProgress(display)
+        for handler in logging.getLogger().handlers:
+            handler.addFilter(log_filter)
+
     try:
         # Determine operation mode
-        if args.input and args.output:
-            # File mode: read from input file, write to output file
+        if args.dry_run is not None:
+            # Plan mode: estimate only, nothing is rendered or sent
+            input_paths = ([args.input] if args.input else []) + args.dry_run
+            plan = plan_files(
+                input_paths, start_page=args.start, end_page=args.end, pages=args.pages
+            )
+            print(format_plan(plan))
+
+        elif args.queue:
+            # Queue mode: any combination of enqueue, work and assemble
+            run_queue_mode(args)
+
+        elif args.input and args.output:
+            # File mode: read from input file, stream to output file
             logger.info(f"Converting {args.input} to {args.output}")
-            if args.start != 1 or args.end != 0:
+            if args.pages:
+                logger.info(f"Pages: {args.pages}")
+            elif args.start != 1 or args.end != 0:
                 logger.info(
                     f"Page range: {args.start} to {args.end if args.end != 0 else 'last'}"
                 )
 
-            markdown_content = convert_from_file(
-                input_path=args.input, start_page=args.start, end_page=args.end
+            manifest_path = None
+            if args.incremental is not None:
+                manifest_path = args.incremental or f"{args.output}.pages.json"
+                logger.info(f"Incremental mode, manifest: {manifest_path}")
+
+            # Pages are streamed to a temporary file that replaces the
+            # output only once the whole document has been converted
+            convert_to_file(
+                input_path=args.input,
+                output_path=args.output,
+                start_page=args.start,
+                end_page=args.end,
+                pages=args.pages,
+                manifest_path=manifest_path,
+                deadline=args.deadline,
+                on_progress=display,
             )
-
-            # Write output
-            with open(args.output, "w", encoding="utf-8") as f:
-                f.write(markdown_content)
+            if display is not None:
+                display.close()
 
             logger.info(f"Conversion completed. Output saved to: {args.output}")
 
@@ -129,10 +377,29 @@ def main() -> None:
             # Pipe mode: read from stdin, write to stdout
             logger.info("Reading from stdin, writing to stdout")
 
-            markdown_content = convert_from_stdin()
-
-            # Write to stdout
-            print(markdown_content)
+            if args.stream:
+                # Pages are written to stdout as the model generates them
+                convert_from_stdin(
+                    stream=sys.stdout,
+                    pages=args.pages,
+                    deadline=args.deadline,
+                    on_progress=display,
+                )
+            else:
+                try:
+                    markdown_content = convert_from_stdin(
+                        pages=args.pages, deadline=args.deadline, on_progress=display
+                    )
+                except IncompleteConversionError as e:
+                    # Print the pages that did finish
+                    print(e.partial)
+                    raise
+
+                # Write to stdout
+                print(markdown_content)
+
+            if display is not None:
+                display.close()
 
             logger.info("Conversion completed")
 
@@ -140,10 +407,25 @@ def main() -> None:
         logger.info("Operation cancelled by user")
         sys.exit(1)
 
+    except IncompleteConversionError as e:
+        if args.output and not args.queue:
+            logger.error(f"{e}. Partial output saved to: {args.output}")
+        else:
+            logger.error(str(e))
+        sys.exit(EXIT_INCOMPLETE)
+
     except Exception as e:
         logger.error(f"Conversion failed: {e}")
         sys.exit(1)
 
+    finally:
+        if log_filter is not None:
+            for handler in logging.getLogger().handlers:
+                handler.removeFilter(log_filter)
+        tracer = stop_tracing()
+        if tracer is not None:
+            tracer.save(trace_path)
+
 
 if __name__ == "__main__":
     main()
@@ -3,13 +3,11 @@ Configuration management for MarkPDFDown
 """
 
 import os
+from functools import lru_cache
+from typing import Literal, Optional
 
-from dotenv import load_dotenv
 from pydantic import BaseModel, Field
 
-# Load environment variables from .env file
-load_dotenv()
-
 
 class Config(BaseModel):
     """Configuration settings for MarkPDFDown"""
@@ -20,6 +18,17 @@ class Config(BaseModel):
         description="LLM model name (e.g., gpt-4o, openrouter/anthropic/claude-3.5-sonnet)",
     )
 
+    fast_model_name: Optional[str] = Field(
+        default=None,
+        description="Fast, cheap model for simple pages; routing is off when unset",
+    )
+
+    transport: Literal["litellm", "openai"] = Field(
+        default="litellm",
+        description="How requests are sent: litellm for any provider, or openai "
+        "for a direct, pooled client of one OpenAI-compatible endpoint",
+    )
+
     # Generation parameters
     temperature: float = Field(
         default=0.3, ge=0.0, le=2.0, description="Temperature for text generation"
@@ -33,16 +42,204 @@ class Config(BaseModel):
         default=3, gt=0, description="Number of retries for API calls"
     )
 
+    max_continuations: int = Field(
+        default=2,
+        ge=0,
+        description="Continuation requests allowed when a response hits max_tokens",
+    )
+
+    schedule: Literal["in_order", "longest_first"] = Field(
+        default="in_order",
+        description="Page dispatch order: in_order, or longest_first to start "
+        "the most expensive pages first",
+    )
+
+    prompt_caching: bool = Field(
+        default=False,
+        description="Mark the constant prompt prefix as cacheable by the provider",
+    )
+
+    concurrency: int = Field(
+        default=1, gt=0, description="Number of pages transcribed at once"
+    )
+
+    adaptive_concurrency: bool = Field(
+        default=False,
+        description="Tune the pages in flight to latency and rate limits, "
+        "starting from concurrency",
+    )
+
+    max_concurrency: int = Field(
+        default=16, gt=0, description="Most pages in flight with adaptive concurrency"
+    )
+
+    page_retries: int = Field(
+        default=1,
+        ge=0,
+        description="Rounds of deferred retries for failed pages after the main pass",
+    )
+
+    page_retry_delay: float = Field(
+        default=10.0,
+        ge=0.0,
+        description="Seconds to wait before the first retry round, doubling per round",
+    )
+
+    # Limits shared by all processes on the host
+    requests_per_minute: Optional[float] = Field(
+        default=None,
+        gt=0,
+        description="Requests per minute per model across all processes on the host",
+    )
+
+    max_concurrent_requests: Optional[int] = Field(
+        default=None,
+        gt=0,
+        description="Requests in flight per model across all processes on the host",
+    )
+
+    rate_limit_db: Optional[str] = Field(
+        default=None,
+        description="SQLite file coordinating the host-wide limits "
+        "(default: markpdfdown-ratelimit.db in the temp directory)",
+    )
+
+    # Recorded responses for offline runs
+    cassette: Optional[str] = Field(
+        default=None, description="Cassette file of recorded LLM responses"
+    )
+
+    cassette_mode: Literal["record", "replay"] = Field(
+        default="replay",
+        description="record to save every response to the cassette, or replay "
+        "to answer requests from it without calling the provider",
+    )
+
+    cassette_latency: bool = Field(
+        default=False,
+        description="Make replayed responses take as long as when recorded",
+    )
+
+    # Time limits
+    request_timeout: Optional[float] = Field(
+        default=None, gt=0, description="Seconds allowed for a single API request"
+    )
+
+    deadline: Optional[float] = Field(
+        default=None,
+        gt=0,
+        description="Seconds allowed for a whole conversion; unfinished pages "
+        "are abandoned and marked once it passes",
+    )
+
+    # Tiling of dense or oversized PDF pages
+    tiling: bool = Field(
+        default=False,
+        description="Split dense or oversized PDF pages into overlapping tiles",
+    )
+
+    tile_max_pixels: int = Field(
+        default=4096,
+        gt=0,
+        description="Tile pages whose rendered side exceeds this many pixels",
+    )
+
+    tile_density_chars: int = Field(
+        default=6000,
+        ge=0,
+        description="Tile pages whose text layer exceeds this many characters (0 disables)",
+    )
+
+    tile_overlap: float = Field(
+        default=0.05,
+        ge=0.0,
+        lt=0.5,
+        description="Overlap between neighbouring tiles as a fraction of tile size",
+    )
+
+    tile_concurrency: int = Field(
+        default=4, gt=0, description="Number of tiles of one page transcribed at once"
+    )
+
     @classmethod
     def from_env(cls) -> "Config":
         """Create configuration from environment variables"""
         return cls(
             model_name=os.getenv("MODEL_NAME", "gpt-4o"),
+            fast_model_name=os.getenv("FAST_MODEL_NAME") or None,
+            transport=os.getenv("TRANSPORT", "litellm").strip().lower(),
             temperature=float(os.getenv("TEMPERATURE", "0.3")),
             max_tokens=int(os.getenv("MAX_TOKENS", "8192")),
             retry_times=int(os.getenv("RETRY_TIMES", "3")),
+            max_continuations=int(os.getenv("MAX_CONTINUATIONS", "2")),
+            prompt_caching=_env_bool("PROMPT_CACHING", False),
+            concurrency=int(os.getenv("CONCURRENCY", "1")),
+            adaptive_concurrency=_env_bool("ADAPTIVE_CONCURRENCY", False),
+            max_concurrency=int(os.getenv("MAX_CONCURRENCY", "16")),
+            page_retries=int(os.getenv("PAGE_RETRIES", "1")),
+            page_retry_delay=float(os.getenv("PAGE_RETRY_DELAY", "10")),
+            requests_per_minute=_env_float("REQUESTS_PER_MINUTE"),
+            max_concurrent_requests=_env_int("MAX_CONCURRENT_REQUESTS"),
+            rate_limit_db=os.getenv("RATE_LIMIT_DB") or None,
+            cassette=os.getenv("CASSETTE") or None,
+            cassette_mode=os.getenv("CASSETTE_MODE", "replay").strip().lower(),
+            cassette_latency=_env_bool("CASSETTE_LATENCY", False),
+            request_timeout=_env_float("REQUEST_TIMEOUT"),
+            deadline=_env_float("DEADLINE"),
+            schedule=os.getenv("SCHEDULE", "in_order")
+            .strip()
+            .lower()
+            .replace("-", "_"),
+            tiling=_env_bool("TILING", False),
+            tile_max_pixels=int(os.getenv("TILE_MAX_PIXELS", "4096")),
+            tile_density_chars=int(os.getenv("TILE_DENSITY_CHARS", "6000")),
+            tile_overlap=float(os.getenv("TILE_OVERLAP", "0.05")),
+            tile_concurrency=int(os.getenv("TILE_CONCURRENCY", "4")),
         )
 
 
-# Global configuration instance
-config = Config.from_env()
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_float(name: str) -> Optional[float]:
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return None
+    return float(value)
+
+
+def _env_int(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return None
+    return int(value)
+
+
+@lru_cache(maxsize=1)
+def get_config() -> Config:
+    """
+    Return the process-wide configuration
+
+    The .env file is loaded and the environment is read on first call rather
+    than at import time, so commands that never convert anything (such as
+    ``--version``) do not pay for it.
+
+    Returns:
+        Shared Config instance
+    """
+    from dotenv import load_dotenv
+
+    # Load environment variables from .env file
+    load_dotenv()
+    return Config.from_env()
+
+
+def __getattr__(name: str):
+    # Backwards compatible ``from markpdfdown.config import config``
+    if name == "config":
+        return get_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
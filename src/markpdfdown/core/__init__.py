@@ -2,17 +2,85 @@
 Core modules for MarkPDFDown
 """
 
+from .cassette import Cassette, CassetteMiss
+from .concurrency import AdaptiveConcurrency
+from .deadline import Deadline, DeadlineExceeded
+from .errors import IncompleteConversionError, PageConversionError
 from .file_worker import FileWorker, ImageWorker, PDFWorker, create_worker
-from .llm_client import LLMClient
-from .utils import detect_file_type, remove_markdown_wrap, validate_page_range
+from .llm_client import LLMClient, TokenUsage
+from .manifest import PageManifest
+from .output_writer import MarkdownWriter, OrderedStreamWriter
+from .page_queue import PageQueue, PageTask
+from .planner import ConversionPlan, format_plan, plan_conversion
+from .progress import ProgressDisplay, ProgressEvent, ProgressTracker
+from .rate_limit import HostRateLimiter
+from .results import ConversionResult, PageResult
+from .routing import PageFeatures, classify_page, extract_page_features
+from .tracing import Tracer, span, start_tracing, stop_tracing
+from .transport import (
+    LiteLLMTransport,
+    OpenAITransport,
+    Transport,
+    TransportError,
+    get_transport,
+)
+from .utils import (
+    MarkdownWrapStripper,
+    detect_file_type,
+    format_duration,
+    parse_page_spec,
+    remove_markdown_wrap,
+    select_pages,
+    stitch_tiles,
+    validate_page_range,
+)
 
 __all__ = [
     "LLMClient",
+    "TokenUsage",
+    "Transport",
+    "TransportError",
+    "LiteLLMTransport",
+    "OpenAITransport",
+    "get_transport",
+    "AdaptiveConcurrency",
+    "Cassette",
+    "CassetteMiss",
+    "Deadline",
+    "DeadlineExceeded",
+    "IncompleteConversionError",
+    "PageConversionError",
     "FileWorker",
     "PDFWorker",
     "ImageWorker",
     "create_worker",
+    "MarkdownWriter",
+    "PageManifest",
+    "OrderedStreamWriter",
+    "PageQueue",
+    "PageTask",
+    "HostRateLimiter",
+    "ConversionResult",
+    "PageResult",
+    "ConversionPlan",
+    "plan_conversion",
+    "format_plan",
+    "ProgressEvent",
+    "ProgressTracker",
+    "ProgressDisplay",
+    "PageFeatures",
+    "classify_page",
+    "extract_page_features",
+    "Tracer",
+    "span",
+    "start_tracing",
+    "stop_tracing",
     "remove_markdown_wrap",
+    "MarkdownWrapStripper",
     "detect_file_type",
+    "format_duration",
     "validate_page_range",
+    "parse_page_spec",
+    "select_pages",
+    "stitch_tiles",
 ]
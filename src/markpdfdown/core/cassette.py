@@ -0,0 +1,277 @@
+"""
+Record and replay of LLM requests for offline runs and benchmarks
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Iterator
+from types import SimpleNamespace
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Characters per chunk when a recorded response is streamed back
+REPLAY_CHUNK_CHARS = 16
+
+
+class CassetteMiss(LookupError):
+    """Raised when a replayed request was never recorded"""
+
+
+def request_fingerprint(request: dict) -> str:
+    """
+    Fingerprint the parts of a request that determine its response
+
+    The model, messages (including the page images), temperature and token
+    limit are hashed. Transport details such as timeouts, headers, streaming
+    and prompt-cache markers are not, so a request recorded with one of
+    these settings replays under another.
+
+    Args:
+        request: Keyword arguments of the completion call
+
+    Returns:
+        Hex digest identifying the request
+    """
+    key = {
+        "model": request.get("model"),
+        "messages": _normalize(request.get("messages", [])),
+        "temperature": request.get("temperature"),
+        "max_tokens": request.get("max_tokens"),
+    }
+    data = json.dumps(key, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def _normalize(value: Any) -> Any:
+    # Drop cache markers and unwrap single text parts, which are how prompt
+    # caching reshapes otherwise identical messages
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items() if k != "cache_control"}
+    if isinstance(value, list):
+        items = [_normalize(item) for item in value]
+        if len(items) == 1 and isinstance(items[0], dict):
+            if set(items[0]) == {"type", "text"} and items[0]["type"] == "text":
+                return items[0]["text"]
+        return items
+    return value
+
+
+class Cassette:
+    """
+    File of recorded LLM responses keyed by request fingerprint
+
+    In record mode every successful request is sent to the provider and its
+    response text, finish reason, token usage and latency are appended to a
+    gzip-compressed JSON lines file. In replay mode requests are answered
+    from that file without network access, optionally taking as long as
+    they took when recorded. Identical requests recorded several times are
+    replayed in recorded order.
+
+    Usage:
+        cassette = Cassette("run.cassette.gz", mode="record")
+        response = cassette.complete(litellm.completion, **request)
+    """
+
+    def __init__(self, path: str, mode: str = "replay", latency: bool = False):
+        """
+        Initialize cassette, loading its recordings in replay mode
+
+        Args:
+            path: Cassette file path
+            mode: "record" to call the provider and append responses, or
+                "replay" to answer from the file
+            latency: Whether replayed responses wait their recorded latency
+
+        Raises:
+            ValueError: If the mode is unknown
+            FileNotFoundError: If the file to replay does not exist
+        """
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self._entries: dict[str, list[dict]] = {}
+        self._served: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        if mode == "replay":
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries.setdefault(entry["key"], []).append(entry)
+            logger.info(
+                f"Replaying {sum(map(len, self._entries.values()))} "
+                f"recorded responses from {path}"
+            )
+        else:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            logger.info(f"Recording responses to {path}")
+
+    def complete(self, send: Callable[..., Any], **request) -> Any:
+        """
+        Answer a completion request, recording or replaying it
+
+        Args:
+            send: Function making the real request (litellm.completion)
+            **request: Keyword arguments of the completion call
+
+        Returns:
+            The completion response, or an iterator of chunks when the
+            request streams, shaped like LiteLLM's
+
+        Raises:
+            CassetteMiss: If a replayed request was never recorded
+            TimeoutError: If a replayed response takes longer than the
+                request's timeout
+        """
+        key = request_fingerprint(request)
+        if self.mode == "replay":
+            return self._replay(key, request)
+
+        started = time.monotonic()
+        response = send(**request)
+        if request.get("stream"):
+            return self._record_stream(key, started, response)
+
+        choice = response.choices[0] if response.choices else None
+        if choice is not None:
+            self._append(
+                key,
+                content=choice.message.content or "",
+                finish_reason=choice.finish_reason,
+                usage=getattr(response, "usage", None),
+                latency=time.monotonic() - started,
+            )
+        return response
+
+    def _record_stream(self, key: str, started: float, response) -> Iterator[Any]:
+        text = []
+        finish_reason = None
+        usage = None
+        first_token = None
+        completed = False
+        try:
+            for chunk in response:
+                usage = getattr(chunk, "usage", None) or usage
+                if chunk.choices:
+                    choice = chunk.choices[0]
+                    fragment = getattr(choice.delta, "content", None) or ""
+                    if fragment and first_token is None:
+                        first_token = time.monotonic() - started
+                    text.append(fragment)
+                    finish_reason = choice.finish_reason or finish_reason
+                yield chunk
+            completed = True
+        finally:
+            if completed:
+                self._append(
+                    key,
+                    content="".join(text),
+                    finish_reason=finish_reason,
+                    usage=usage,
+                    latency=time.monotonic() - started,
+                    first_token=first_token,
+                )
+            else:
+                close = getattr(response, "close", None)
+                if close is not None:
+                    close()
+
+    def _append(
+        self,
+        key: str,
+        content: str,
+        finish_reason: Optional[str],
+        usage: Any,
+        latency: float,
+        first_token: Optional[float] = None,
+    ) -> None:
+        from .llm_client import TokenUsage
+
+        tokens = TokenUsage()
+        if usage is not None:
+            tokens.add(usage)
+        entry = {
+            "key": key,
+            "content": content,
+            "finish_reason": finish_reason,
+            "prompt_tokens": tokens.prompt_tokens,
+            "completion_tokens": tokens.completion_tokens,
+            "cached_tokens": tokens.cached_tokens,
+            "cache_write_tokens": tokens.cache_write_tokens,
+            "latency": round(latency, 3),
+        }
+        if first_token is not None:
+            entry["first_token"] = round(first_token, 3)
+
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        # Each entry is a complete gzip member written at once, so recordings
+        # survive interrupted runs and several processes can share a cassette
+        member = gzip.compress(line.encode("utf-8"))
+        with self._lock:
+            with open(self.path, "ab") as f:
+                f.write(member)
+
+    def _replay(self, key: str, request: dict) -> Any:
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise CassetteMiss(
+                    f"No recorded response for request {key[:12]} "
+                    f"(model {request.get('model')}) in {self.path}"
+                )
+            served = self._served.get(key, 0)
+            self._served[key] = served + 1
+        # Repeated requests beyond the recordings get the last response
+        entry = entries[min(served, len(entries) - 1)]
+
+        usage = SimpleNamespace(
+            prompt_tokens=entry["prompt_tokens"],
+            completion_tokens=entry["completion_tokens"],
+            prompt_tokens_details=SimpleNamespace(cached_tokens=entry["cached_tokens"]),
+            cache_creation_input_tokens=entry["cache_write_tokens"],
+        )
+        if request.get("stream"):
+            include_usage = (request.get("stream_options") or {}).get("include_usage")
+            return self._replay_stream(entry, request, usage if include_usage else None)
+
+        self._wait(entry["latency"], request.get("timeout"))
+        message = SimpleNamespace(content=entry["content"])
+        choice = SimpleNamespace(message=message, finish_reason=entry["finish_reason"])
+        return SimpleNamespace(choices=[choice], usage=usage)
+
+    def _replay_stream(self, entry: dict, request: dict, usage) -> Iterator[Any]:
+        content = entry["content"]
+        pieces = [
+            content[i : i + REPLAY_CHUNK_CHARS]
+            for i in range(0, len(content), REPLAY_CHUNK_CHARS)
+        ]
+        first_token = entry.get("first_token") or 0.0
+        spacing = max(entry["latency"] - first_token, 0.0) / max(len(pieces), 1)
+
+        self._wait(first_token, request.get("timeout"))
+        for piece in pieces:
+            delta = SimpleNamespace(content=piece)
+            choice = SimpleNamespace(delta=delta, finish_reason=None)
+            yield SimpleNamespace(choices=[choice], usage=None)
+            self._wait(spacing)
+        delta = SimpleNamespace(content=None)
+        choice = SimpleNamespace(delta=delta, finish_reason=entry["finish_reason"])
+        yield SimpleNamespace(choices=[choice], usage=usage)
+
+    def _wait(self, seconds: float, timeout: Optional[float] = None) -> None:
+        if not self.latency:
+            return
+        if timeout is not None and seconds > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"Replayed request timed out after {timeout}s")
+        time.sleep(seconds)
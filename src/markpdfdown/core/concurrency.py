@@ -0,0 +1,164 @@
+"""
+Adaptive page concurrency driven by latency and rate-limit feedback
+"""
+
+import logging
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveConcurrency:
+    """
+    Additive-increase, multiplicative-decrease limit on pages in flight
+
+    Every completed page reports its latency and whether the provider
+    throttled or failed requests meanwhile. After a full window of healthy
+    pages (as many as the current limit) the limit grows by one; a
+    rate-limit response, a failed page or a latency spike above
+    latency_factor times the running average cuts it by decrease_factor.
+    Pages started before a cut do not cut it again, so one burst of 429s
+    only counts once.
+
+    Usage:
+        controller = AdaptiveConcurrency(initial=4, maximum=32)
+        started = time.monotonic()
+        ...
+        controller.record(started, time.monotonic(), throttles=client.throttled)
+        window = controller.limit
+    """
+
+    def __init__(
+        self,
+        initial: int = 1,
+        minimum: int = 1,
+        maximum: int = 16,
+        decrease_factor: float = 0.5,
+        latency_factor: float = 2.5,
+        min_samples: int = 5,
+        smoothing: float = 0.2,
+    ):
+        """
+        Initialize controller
+
+        Args:
+            initial: Limit to start from
+            minimum: Lowest limit
+            maximum: Highest limit
+            decrease_factor: Factor applied to the limit on a cut
+            latency_factor: Latency over the running average that counts as
+                a spike
+            min_samples: Pages measured before latency spikes are acted on
+            smoothing: Weight of the newest latency in the running average
+        """
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(max(initial, self.minimum), self.maximum)
+        self.decrease_factor = decrease_factor
+        self.latency_factor = latency_factor
+        self.min_samples = min_samples
+        self.smoothing = smoothing
+
+        self.peak = self.limit
+        self.increases = 0
+        self.decreases = 0
+        self.average_latency: Optional[float] = None
+        self._samples = 0
+        self._healthy = 0
+        self._throttles = 0
+        self._last_decrease = float("-inf")
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        started: float,
+        finished: Optional[float] = None,
+        throttles: int = 0,
+        failed: bool = False,
+    ) -> int:
+        """
+        Report a completed page and adjust the limit
+
+        Args:
+            started: time.monotonic() when the page was started
+            finished: time.monotonic() when it completed (default: now)
+            throttles: Running total of rate-limited requests of the clients
+            failed: Whether the page failed
+
+        Returns:
+            The new limit
+        """
+        finished = time.monotonic() if finished is None else finished
+        latency = finished - started
+
+        with self._lock:
+            throttled = throttles > self._throttles
+            self._throttles = max(self._throttles, throttles)
+
+            spike = (
+                self._samples >= self.min_samples
+                and self.average_latency is not None
+                and latency > self.latency_factor * self.average_latency
+            )
+            if not failed:
+                self._samples += 1
+                if self.average_latency is None:
+                    self.average_latency = latency
+                else:
+                    self.average_latency += self.smoothing * (
+                        latency - self.average_latency
+                    )
+
+            reason = None
+            if throttled:
+                reason = "rate limited"
+            elif failed:
+                reason = "page failed"
+            elif spike:
+                reason = f"latency spike ({latency:.1f}s)"
+            if reason is not None:
+                if started >= self._last_decrease:
+                    self._decrease(finished, reason)
+                return self.limit
+
+            if started < self._last_decrease:
+                # Launched under the old limit; says nothing about the new one
+                return self.limit
+            self._healthy += 1
+            if self._healthy >= self.limit and self.limit < self.maximum:
+                self._healthy = 0
+                self.limit += 1
+                self.increases += 1
+                self.peak = max(self.peak, self.limit)
+                logger.debug(f"Concurrency limit raised to {self.limit}")
+            return self.limit
+
+    def _decrease(self, now: float, reason: str) -> None:
+        previous = self.limit
+        self.limit = max(self.minimum, int(self.limit * self.decrease_factor))
+        self._healthy = 0
+        self._last_decrease = now
+        if self.limit < previous:
+            self.decreases += 1
+            logger.info(
+                f"Concurrency limit lowered from {previous} to {self.limit} ({reason})"
+            )
+
+    def summary(self) -> str:
+        """
+        Describe how the limit evolved, for the end-of-run log
+
+        Returns:
+            Human-readable summary
+        """
+        average = (
+            f", average page latency {self.average_latency:.1f}s"
+            if self.average_latency is not None
+            else ""
+        )
+        return (
+            f"Adaptive concurrency: final limit {self.limit}, peak {self.peak}, "
+            f"{self.increases} increases, {self.decreases} decreases{average}"
+        )
@@ -0,0 +1,101 @@
+"""
+Job deadlines shared by the requests of one conversion
+"""
+
+import threading
+import time
+from collections.abc import Sequence
+from typing import Optional
+
+from .errors import IncompleteConversionError
+
+
+class DeadlineExceeded(IncompleteConversionError, TimeoutError):
+    """
+    Raised when work is abandoned because its deadline passed
+
+    When raised by a conversion, it carries the Markdown of the pages that
+    did complete, in page order, with the unfinished pages marked.
+    """
+
+    def __init__(
+        self,
+        message: str = "Deadline exceeded",
+        partial: str = "",
+        unfinished_pages: Sequence[int] = (),
+    ):
+        super().__init__(message, partial, unfinished_pages)
+
+
+class Deadline:
+    """
+    Point in time after which outstanding work is abandoned
+
+    Every request made on behalf of a job is given the time left until the
+    job's deadline as its timeout, so a hung provider cannot hold the job
+    past it. A deadline can also be cancelled early, which expires it at
+    once for every thread sharing it.
+
+    Usage:
+        deadline = Deadline(120)
+        timeout = deadline.timeout(request_timeout)
+    """
+
+    def __init__(self, seconds: Optional[float] = None):
+        """
+        Initialize deadline
+
+        Args:
+            seconds: Time allowed from now, or None for no limit
+        """
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+        self._cancelled = threading.Event()
+
+    @property
+    def expired(self) -> bool:
+        """Whether the deadline passed or was cancelled"""
+        if self._cancelled.is_set():
+            return True
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def remaining(self) -> Optional[float]:
+        """
+        Time left until the deadline
+
+        Returns:
+            Seconds left (0 once expired), or None for no limit
+        """
+        if self._cancelled.is_set():
+            return 0.0
+        if self.expires_at is None:
+            return None
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def timeout(self, request_timeout: Optional[float] = None) -> Optional[float]:
+        """
+        Timeout for a request starting now
+
+        Args:
+            request_timeout: Timeout of a single request, or None for none
+
+        Returns:
+            The shorter of request_timeout and the time left, or None when
+            neither limits the request
+
+        Raises:
+            DeadlineExceeded: If the deadline already passed
+        """
+        if self.expired:
+            raise DeadlineExceeded()
+        remaining = self.remaining()
+        if remaining is None:
+            return request_timeout
+        if request_timeout is None:
+            return remaining
+        return min(request_timeout, remaining)
+
+    def cancel(self) -> None:
+        """
+        Expire the deadline now, abandoning all outstanding work
+        """
+        self._cancelled.set()
@@ -0,0 +1,41 @@
+"""
+Exceptions raised by conversions that could not convert every page
+"""
+
+from collections.abc import Sequence
+
+# Stands in for pages that were not converted
+UNFINISHED_PAGE = "<!-- page {page_num} not converted: {reason} -->"
+
+
+class IncompleteConversionError(Exception):
+    """
+    Raised when a conversion ended with pages missing from its output
+
+    It carries the Markdown of the pages that did complete, in page order,
+    with every missing page replaced by a marker.
+    """
+
+    def __init__(
+        self,
+        message: str = "Conversion incomplete",
+        partial: str = "",
+        unfinished_pages: Sequence[int] = (),
+    ):
+        """
+        Initialize exception
+
+        Args:
+            message: Error message
+            partial: Markdown of the completed pages
+            unfinished_pages: Page numbers that were not converted
+        """
+        super().__init__(message)
+        self.partial = partial
+        self.unfinished_pages = list(unfinished_pages)
+        # ConversionResult of every page, set by convert_to_file
+        self.result = None
+
+
+class PageConversionError(IncompleteConversionError):
+    """Raised when pages still failed after their deferred retries"""
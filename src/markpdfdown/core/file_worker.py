@@ -2,14 +2,23 @@
 Base file worker and factory for different file types
 """
 
+import hashlib
 import logging
+import math
 import os
 from abc import ABC, abstractmethod
+from collections.abc import Iterator, Sequence
+from typing import Optional
 
-from .utils import validate_page_range
+from .routing import PageFeatures, extract_page_features
+from .tracing import span
+from .utils import select_pages, validate_page_range
 
 logger = logging.getLogger(__name__)
 
+# Embedded image formats sent as stored, with the file extension used for them
+PASSTHROUGH_FORMATS = {"jpeg": "jpg", "png": "png"}
+
 
 class FileWorker(ABC):
     """
@@ -25,8 +34,76 @@ class FileWorker(ABC):
         """
         self.input_path = input_path
         self.output_dir = os.path.dirname(input_path)
+        # Original 1-based page numbers to convert, in output order
+        self.page_numbers: Sequence[int] = [1]
+
+    @abstractmethod
+    def iter_pages(self, **kwargs) -> Iterator[tuple[int, str]]:
+        """
+        Lazily convert input file to images, one page at a time
+
+        Yields:
+            Tuples of (original 1-based page number, image path) in page order
+        """
+        pass
 
     @abstractmethod
+    def page_fingerprints(self) -> list[tuple[int, str]]:
+        """
+        Fingerprint the selected pages without rendering them
+
+        A page keeps its fingerprint across document revisions as long as
+        its content is unchanged, even if it moved to another position.
+
+        Returns:
+            List of (original 1-based page number, hex digest) in page order
+        """
+        pass
+
+    def page_costs(self) -> list[tuple[int, float]]:
+        """
+        Estimate how expensive each selected page is to transcribe
+
+        Workers that cannot tell pages apart rate every page the same.
+
+        Returns:
+            List of (original 1-based page number, relative cost) in page order
+        """
+        return [(page_num, 0.0) for page_num in self.page_numbers]
+
+    def page_features(self) -> list[tuple[int, Optional[PageFeatures]]]:
+        """
+        Extract complexity signals of each selected page for model routing
+
+        Workers that cannot inspect page contents return None features,
+        which routes the page to the strong model.
+
+        Returns:
+            List of (original 1-based page number, features) in page order
+        """
+        return [(page_num, None) for page_num in self.page_numbers]
+
+    @abstractmethod
+    def page_image_sizes(self, **kwargs) -> list[tuple[int, list[tuple[int, int]]]]:
+        """
+        Compute the size of the images each selected page would be sent as
+
+        Returns:
+            List of (original 1-based page number, (width, height) in pixels
+            of each image or tile) in page order
+        """
+        pass
+
+    def iter_images(self, **kwargs) -> Iterator[str]:
+        """
+        Lazily convert input file to images, one page at a time
+
+        Yields:
+            Generated image paths in page order
+        """
+        for _, image_path in self.iter_pages(**kwargs):
+            yield image_path
+
     def convert_to_images(self, **kwargs) -> list[str]:
         """
         Convert input file to images
@@ -34,7 +111,20 @@ class FileWorker(ABC):
         Returns:
             List of generated image paths
         """
-        pass
+        return list(self.iter_images(**kwargs))
+
+    def iter_page_tiles(self, **kwargs) -> Iterator[tuple[int, list[str]]]:
+        """
+        Lazily convert input file to images, splitting pages into tiles
+
+        Workers that do not support tiling yield every page as a single tile.
+
+        Yields:
+            Tuples of (original 1-based page number, tile image paths in
+            reading order)
+        """
+        for page_num, image_path in self.iter_pages():
+            yield page_num, [image_path]
 
 
 class PDFWorker(FileWorker):
@@ -42,67 +132,266 @@ class PDFWorker(FileWorker):
     Worker for processing PDF files
     """
 
-    def __init__(self, input_path: str, start_page: int = 1, end_page: int = 0):
+    def __init__(
+        self,
+        input_path: str,
+        start_page: int = 1,
+        end_page: int = 0,
+        pages: Optional[str] = None,
+    ):
         super().__init__(input_path)
 
         try:
-            import PyPDF2
+            import fitz  # PyMuPDF
 
-            self.reader = PyPDF2.PdfReader(input_path)
-            self.total_pages = len(self.reader.pages)
+            # PyMuPDF only parses the xref here, the file is not read into memory
+            with fitz.open(input_path) as doc:
+                self.total_pages = len(doc)
         except Exception as e:
             logger.error(f"Failed to read PDF file: {e}")
             raise ValueError(f"Invalid PDF file: {input_path}") from e
 
-        # Validate and normalize page range
-        self.start_page, self.end_page = validate_page_range(
-            start_page, end_page, self.total_pages
-        )
+        if pages:
+            # Sparse selection, e.g. "1-3,17,40-45,200-"
+            self.page_numbers = select_pages(pages, self.total_pages)
+            self.start_page = self.page_numbers[0]
+            self.end_page = self.page_numbers[-1]
+            logger.info(f"Processing {len(self.page_numbers)} PDF pages: {pages}")
+        else:
+            # Validate and normalize page range
+            self.start_page, self.end_page = validate_page_range(
+                start_page, end_page, self.total_pages
+            )
+            self.page_numbers = range(self.start_page, self.end_page + 1)
+            logger.info(
+                f"Processing PDF from page {self.start_page} to page {self.end_page}"
+            )
+
+    def iter_pages(
+        self, dpi: int = 300, fmt: str = "jpg", passthrough: bool = True
+    ) -> Iterator[tuple[int, str]]:
+        """
+        Render the selected PDF pages to images using PyMuPDF
+
+        Pages are rendered straight from the original document in a single
+        pass, only when the consumer asks for the next one, so callers that
+        delete each image after use keep scratch disk usage constant
+        regardless of page count. Image files are named after the original
+        page numbers.
+
+        Args:
+            dpi: Output image resolution
+            fmt: Image format (jpg/png)
+            passthrough: Write the embedded image of pages that consist of
+                a single full-page image (typical for scans) as stored,
+                in its own format, instead of rendering the page
 
-        logger.info(
-            f"Processing PDF from page {self.start_page} to page {self.end_page}"
-        )
+        Yields:
+            Tuples of (original 1-based page number, image path)
+        """
+        import fitz  # PyMuPDF
+
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        with fitz.open(self.input_path) as doc:
+            for page_num in self.page_numbers:
+                with span("render page", page=page_num):
+                    page = doc.load_page(page_num - 1)
+                    name = f"page_{page_num:04d}"
+                    output_path = (
+                        _save_page_image(page, self.output_dir, name, dpi)
+                        if passthrough
+                        else None
+                    )
+                    if output_path is None:
+                        pix = page.get_pixmap(dpi=dpi)
+                        output_path = os.path.join(self.output_dir, f"{name}.{fmt}")
+                        pix.save(output_path)
+                        # Release the pixmap before handing control back
+                        del pix
+                yield page_num, output_path
+
+    def iter_page_tiles(
+        self,
+        dpi: int = 300,
+        fmt: str = "jpg",
+        max_pixels: int = 4096,
+        density_chars: int = 0,
+        overlap: float = 0.05,
+        passthrough: bool = True,
+    ) -> Iterator[tuple[int, list[str]]]:
+        """
+        Render the selected PDF pages, splitting dense or oversized ones
 
-        # Extract pages if needed
-        if self.start_page != 1 or self.end_page != self.total_pages:
-            extracted_path = self._extract_pages()
-            if extracted_path:
-                self.input_path = extracted_path
-                logger.info("Page extraction completed")
-            else:
-                logger.warning("Page extraction failed, using original file")
+        Pages whose rendered size or text-layer density exceeds the limits
+        are rendered as overlapping clip rectangles instead of one image.
+        Other pages are rendered whole, as in iter_pages.
 
-    def _extract_pages(self) -> str:
+        Args:
+            dpi: Output image resolution
+            fmt: Image format (jpg/png)
+            max_pixels: Maximum rendered tile side in pixels
+            density_chars: Text-layer character count above which a page is
+                split into horizontal bands (0 disables)
+            overlap: Overlap between neighbouring tiles as a fraction of
+                tile size
+            passthrough: Write the embedded image of untiled pages that
+                consist of a single full-page image as stored
+
+        Yields:
+            Tuples of (original 1-based page number, tile image paths in
+            reading order)
+        """
+        import fitz  # PyMuPDF
+
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        with fitz.open(self.input_path) as doc:
+            for page_num in self.page_numbers:
+                with span("render page", page=page_num):
+                    page = doc.load_page(page_num - 1)
+                    clips = plan_tiles(page, dpi, max_pixels, density_chars, overlap)
+                    paths = []
+                    if not clips and passthrough:
+                        output_path = _save_page_image(
+                            page, self.output_dir, f"page_{page_num:04d}", dpi
+                        )
+                        if output_path is not None:
+                            paths.append(output_path)
+
+                    if not paths:
+                        for index, clip in enumerate(clips or [None], 1):
+                            pix = page.get_pixmap(dpi=dpi, clip=clip)
+                            name = f"page_{page_num:04d}"
+                            if clip is not None:
+                                name += f"_tile_{index:02d}"
+                            output_path = os.path.join(self.output_dir, f"{name}.{fmt}")
+                            pix.save(output_path)
+                            del pix
+                            paths.append(output_path)
+
+                if len(paths) > 1:
+                    logger.info(f"Split page {page_num} into {len(paths)} tiles")
+                yield page_num, paths
+
+    def page_fingerprints(self) -> list[tuple[int, str]]:
         """
-        Extract specified page range from PDF
+        Fingerprint the selected PDF pages from their content streams
+
+        The digest covers the page geometry, its content stream and the
+        streams of the images and form XObjects it draws, so any visible
+        change to the page yields a new fingerprint.
 
         Returns:
-            Path to extracted PDF file, empty string on failure
+            List of (original 1-based page number, hex digest) in page order
         """
-        try:
-            import PyPDF2
+        import fitz  # PyMuPDF
+
+        fingerprints = []
+        with fitz.open(self.input_path) as doc:
+            for page_num in self.page_numbers:
+                page = doc.load_page(page_num - 1)
+                digest = hashlib.sha256()
+                digest.update(f"{tuple(page.rect)}:{page.rotation}".encode())
+                digest.update(page.read_contents())
+                xrefs = [image[0] for image in page.get_images(full=True)]
+                xrefs += [xobject[0] for xobject in page.get_xobjects()]
+                for xref in xrefs:
+                    digest.update(doc.xref_stream_raw(xref) or b"")
+                fingerprints.append((page_num, digest.hexdigest()))
+        return fingerprints
+
+    def page_costs(self, ink_chars: int = 5000) -> list[tuple[int, float]]:
+        """
+        Estimate the transcription cost of the selected PDF pages
 
-            writer = PyPDF2.PdfWriter()
+        The cost approximates the amount of text the model has to write:
+        the text-layer character count, or for scanned pages without a
+        usable text layer, the share of inked pixels in a thumbnail scaled
+        so that a fully inked page counts as ink_chars characters.
 
-            # Add pages (convert to 0-based index)
-            for page_num in range(self.start_page - 1, self.end_page):
-                writer.add_page(self.reader.pages[page_num])
+        Args:
+            ink_chars: Characters assumed for a completely inked page
 
-            # Generate output filename
-            base_name = os.path.basename(self.input_path).rsplit(".", 1)[0]
-            output_name = f"{base_name}_pages_{self.start_page}-{self.end_page}.pdf"
-            output_path = os.path.join(self.output_dir, output_name)
+        Returns:
+            List of (original 1-based page number, estimated characters)
+            in page order
+        """
+        import fitz  # PyMuPDF
 
-            # Write extracted PDF
-            os.makedirs(self.output_dir, exist_ok=True)
-            with open(output_path, "wb") as out_file:
-                writer.write(out_file)
+        # Byte values counted as ink in the grayscale thumbnail
+        light = bytes(range(128, 256))
 
-            return output_path
+        costs = []
+        with fitz.open(self.input_path) as doc:
+            for page_num in self.page_numbers:
+                page = doc.load_page(page_num - 1)
+                chars = len(page.get_text("text").strip())
 
-        except Exception as e:
-            logger.error(f"Page extraction failed: {e}")
-            return ""
+                pix = page.get_pixmap(dpi=12, colorspace=fitz.csGRAY)
+                samples = pix.samples
+                ink = len(samples.translate(None, light)) / max(len(samples), 1)
+                del pix
+
+                costs.append((page_num, max(float(chars), ink * ink_chars)))
+        return costs
+
+    def page_features(self) -> list[tuple[int, Optional[PageFeatures]]]:
+        """
+        Extract complexity signals of the selected PDF pages
+
+        Returns:
+            List of (original 1-based page number, features) in page order
+        """
+        import fitz  # PyMuPDF
+
+        with fitz.open(self.input_path) as doc:
+            return [
+                (page_num, extract_page_features(doc.load_page(page_num - 1)))
+                for page_num in self.page_numbers
+            ]
+
+    def page_image_sizes(
+        self,
+        dpi: int = 300,
+        max_pixels: int = 0,
+        density_chars: int = 0,
+        overlap: float = 0.05,
+    ) -> list[tuple[int, list[tuple[int, int]]]]:
+        """
+        Compute the rendered size of the selected PDF pages without rendering
+
+        Args:
+            dpi: Render resolution
+            max_pixels: Maximum rendered tile side when tiling (0 disables)
+            density_chars: Text-layer character threshold for tiling
+            overlap: Overlap between neighbouring tiles
+
+        Returns:
+            List of (original 1-based page number, (width, height) in pixels
+            of the page or each of its tiles) in page order
+        """
+        import fitz  # PyMuPDF
+
+        scale = dpi / 72
+        sizes = []
+        with fitz.open(self.input_path) as doc:
+            for page_num in self.page_numbers:
+                page = doc.load_page(page_num - 1)
+                clips = []
+                if max_pixels:
+                    clips = plan_tiles(page, dpi, max_pixels, density_chars, overlap)
+                rects = clips or [page.rect]
+                sizes.append(
+                    (
+                        page_num,
+                        [
+                            (round(rect.width * scale), round(rect.height * scale))
+                            for rect in rects
+                        ],
+                    )
+                )
+        return sizes
 
     def convert_to_images(self, dpi: int = 300, fmt: str = "jpg") -> list[str]:
         """
@@ -116,29 +405,138 @@ class PDFWorker(FileWorker):
             List of generated image paths
         """
         try:
-            import fitz  # PyMuPDF
-
-            os.makedirs(self.output_dir, exist_ok=True)
-            img_paths = []
-
-            doc = fitz.open(self.input_path)
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                pix = page.get_pixmap(dpi=dpi)
-                output_path = os.path.join(
-                    self.output_dir, f"page_{page_num + 1:04d}.{fmt}"
-                )
-                pix.save(output_path)
-                img_paths.append(output_path)
-
-            doc.close()
-            return img_paths
+            return list(self.iter_images(dpi=dpi, fmt=fmt))
 
         except Exception as e:
             logger.error(f"PDF to image conversion failed: {e}")
             return []
 
 
+def extract_page_image(
+    page, dpi: int = 300, min_coverage: float = 0.98
+) -> Optional[tuple[bytes, str]]:
+    """
+    Extract the embedded image of a page that is nothing but one image
+
+    Scanned pages usually consist of a single full-page JPEG. Sending it as
+    stored avoids decoding, rescaling and re-encoding it, and the
+    generation loss that comes with that. Pages with visible text, vector
+    drawings, annotations, more than one image, a rotation, or an image
+    that is transformed, masked or not plain gray/RGB JPEG or PNG are
+    left to rendering, as are images with more pixels than the page
+    rendered at dpi would have.
+
+    Args:
+        page: PyMuPDF page
+        dpi: Resolution the page would otherwise be rendered at
+        min_coverage: Share of the page the image has to cover
+
+    Returns:
+        Tuple of (image bytes, file extension), or None when the page has
+        to be rendered
+    """
+    if page.rotation or page.first_annot or page.first_widget:
+        return None
+
+    infos = page.get_image_info(xrefs=True)
+    if len(infos) != 1:
+        return None
+    info = infos[0]
+
+    # Only upright, unmirrored placements look the same as the stored image
+    a, b, c, d, _, _ = info["transform"]
+    if b or c or a <= 0 or d <= 0 or info["has-mask"] or not info["xref"]:
+        return None
+
+    rect = page.rect
+    if abs(rect & info["bbox"]) < min_coverage * abs(rect):
+        return None
+    if info["width"] > rect.width * dpi / 72 * 1.05:
+        return None
+
+    # Invisible text (an OCR layer) does not show in the rendered page
+    if any(span["type"] != 3 for span in page.get_texttrace()):
+        return None
+    get_drawings = getattr(page, "get_cdrawings", page.get_drawings)
+    if get_drawings():
+        return None
+
+    image = page.parent.extract_image(info["xref"])
+    ext = PASSTHROUGH_FORMATS.get(image.get("ext"))
+    if ext is None or image.get("smask") or image.get("colorspace") not in (1, 3):
+        return None
+    return image["image"], ext
+
+
+def _save_page_image(page, output_dir: str, name: str, dpi: int) -> Optional[str]:
+    # Write the page's embedded image, if it can be sent as stored
+    embedded = extract_page_image(page, dpi)
+    if embedded is None:
+        return None
+
+    data, ext = embedded
+    output_path = os.path.join(output_dir, f"{name}.{ext}")
+    with open(output_path, "wb") as f:
+        f.write(data)
+    logger.debug(f"Using embedded {ext} image of page {page.number + 1}")
+    return output_path
+
+
+def plan_tiles(
+    page, dpi: int, max_pixels: int, density_chars: int = 0, overlap: float = 0.05
+) -> list:
+    """
+    Plan overlapping clip rectangles for a dense or oversized PDF page
+
+    The page is split into full-width horizontal bands, top to bottom, so
+    the Markdown of the tiles can be joined one after another; side-by-side
+    tiles would split every table row and line of text. There are enough
+    bands that none is taller than max_pixels or holds more pixels than a
+    max_pixels square, so wide pages get more, flatter bands. Pages whose
+    text layer holds more than density_chars characters get at least one
+    band per density_chars.
+
+    Args:
+        page: PyMuPDF page
+        dpi: Render resolution
+        max_pixels: Maximum rendered tile side in pixels
+        density_chars: Text-layer character threshold (0 disables)
+        overlap: Overlap between neighbouring tiles as a fraction of tile size
+
+    Returns:
+        List of fitz.Rect clip rectangles, empty when the page needs no tiling
+    """
+    import fitz  # PyMuPDF
+
+    rect = page.rect
+    scale = dpi / 72
+    width = rect.width * scale
+    height = rect.height * scale
+    rows = max(
+        1,
+        math.ceil(height / max_pixels),
+        math.ceil(width * height / max_pixels**2),
+    )
+
+    if density_chars:
+        chars = len(page.get_text("text").strip())
+        rows = max(rows, math.ceil(chars / density_chars))
+
+    if rows == 1:
+        return []
+
+    tile_h = rect.height / rows
+    pad_y = tile_h * overlap
+
+    clips = []
+    for row in range(rows):
+        y0 = rect.y0 + row * tile_h
+        clip = fitz.Rect(rect.x0, y0 - pad_y, rect.x1, y0 + tile_h + pad_y)
+        clips.append(clip & rect)
+
+    return clips
+
+
 class ImageWorker(FileWorker):
     """
     Worker for processing image files
@@ -148,18 +546,47 @@ class ImageWorker(FileWorker):
         super().__init__(input_path)
         logger.info(f"Processing image file: {input_path}")
 
-    def convert_to_images(self) -> list[str]:
+    def iter_pages(self) -> Iterator[tuple[int, str]]:
+        """
+        For image files, just yield the original path as page 1
+
+        Yields:
+            Tuple of (1, original image path)
+        """
+        if 1 in self.page_numbers:
+            yield 1, self.input_path
+
+    def page_image_sizes(self, **kwargs) -> list[tuple[int, list[tuple[int, int]]]]:
+        """
+        Read the pixel size of the image, which is sent as is
+
+        Returns:
+            List holding (1, [(width, height)])
+        """
+        import fitz  # PyMuPDF
+
+        pix = fitz.Pixmap(self.input_path)
+        return [(1, [(pix.width, pix.height)])]
+
+    def page_fingerprints(self) -> list[tuple[int, str]]:
         """
-        For image files, just return the original path
+        Fingerprint the image from its file contents
 
         Returns:
-            List containing the original image path
+            List holding (1, hex digest of the image file)
         """
-        return [self.input_path]
+        digest = hashlib.sha256()
+        with open(self.input_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return [(1, digest.hexdigest())]
 
 
 def create_worker(
-    input_path: str, start_page: int = 1, end_page: int = 0
+    input_path: str,
+    start_page: int = 1,
+    end_page: int = 0,
+    pages: Optional[str] = None,
 ) -> FileWorker:
     """
     Create appropriate worker based on file extension
@@ -168,6 +595,8 @@ def create_worker(
         input_path: Path to input file
         start_page: Starting page number (for PDF)
         end_page: Ending page number (for PDF, 0 means last page)
+        pages: Page specification such as "1-3,17,40-" (for PDF, overrides
+            start_page and end_page)
 
     Returns:
         FileWorker instance
@@ -179,7 +608,7 @@ def create_worker(
     ext = ext.lower()
 
     if ext == ".pdf":
-        return PDFWorker(input_path, start_page, end_page)
+        return PDFWorker(input_path, start_page, end_page, pages)
     elif ext in [".jpg", ".jpeg", ".png", ".bmp", ".gif"]:
         return ImageWorker(input_path)
     else:
@@ -1,109 +1,566 @@
 """
-LLM client using LiteLLM for unified API access
+LLM client using LiteLLM, or a direct transport, for unified API access
 """
 
 import base64
 import logging
+import mimetypes
+import threading
 import time
-from typing import Optional
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import dataclass
+from typing import Any, Optional
 
-import litellm
-from litellm import completion
+from .cassette import Cassette, CassetteMiss
+from .deadline import Deadline, DeadlineExceeded
+from .rate_limit import HostRateLimiter
+from .tracing import span
+from .transport import Transport, get_transport
 
 logger = logging.getLogger(__name__)
 
+CONTINUE_PROMPT = (
+    "Your previous response was cut off. Continue exactly where it stopped, "
+    "without repeating any text and without wrapping it in a code block."
+)
+
+
+def completion(**kwargs):
+    """
+    Call ``litellm.completion``, importing LiteLLM on first use
+
+    LiteLLM takes seconds to import, so it is only loaded once a request is
+    actually made.
+    """
+    import litellm
+
+    # Configure LiteLLM logging
+    litellm.set_verbose = False
+    return litellm.completion(**kwargs)
+
+
+# Marks the end of a static prompt prefix for providers with prompt caching
+CACHE_CONTROL = {"type": "ephemeral"}
+
+# Request settings used when neither the call nor the client's config sets
+# them, and the Config field each is read from
+REQUEST_DEFAULTS = {
+    "temperature": 0.3,
+    "max_tokens": 8192,
+    "retry_times": 3,
+    "max_continuations": 0,
+    "cache_prompt": False,
+    "timeout": None,
+}
+CONFIG_FIELDS = {"cache_prompt": "prompt_caching", "timeout": "request_timeout"}
+
+
+@dataclass
+class TokenUsage:
+    """Token counts accumulated over the requests of a client"""
+
+    requests: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    # Prompt tokens served from the provider's prompt cache
+    cached_tokens: int = 0
+    # Prompt tokens written to the provider's prompt cache
+    cache_write_tokens: int = 0
+
+    def add(self, usage: Any) -> None:
+        """
+        Add the usage block of one provider response
+
+        Args:
+            usage: LiteLLM usage object (OpenAI or Anthropic style)
+        """
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = _token_count(getattr(details, "cached_tokens", None))
+        cached = cached or _token_count(getattr(usage, "cache_read_input_tokens", 0))
+
+        self.requests += 1
+        self.prompt_tokens += _token_count(getattr(usage, "prompt_tokens", 0))
+        self.completion_tokens += _token_count(getattr(usage, "completion_tokens", 0))
+        self.cached_tokens += cached
+        self.cache_write_tokens += _token_count(
+            getattr(usage, "cache_creation_input_tokens", 0)
+        )
+
+
+def _token_count(value: Any) -> int:
+    return value if isinstance(value, int) else 0
+
+
+def _image_mime_type(image_path: str) -> str:
+    # Rendered pages are JPEG; passed-through and input images keep theirs
+    mime_type, _ = mimetypes.guess_type(image_path)
+    if mime_type and mime_type.startswith("image/"):
+        return mime_type
+    return "image/jpeg"
+
 
 class LLMClient:
     """
     Unified LLM client using LiteLLM
     Supports OpenAI and OpenRouter automatically
+
+    Clients hold no process-wide state, so clients with different models
+    and configs can serve requests side by side in one process.
     """
 
-    def __init__(self, model_name: str):
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        rate_limiter: Optional[HostRateLimiter] = None,
+        cassette: Optional[Cassette] = None,
+        config: Any = None,
+        transport: Optional[Transport] = None,
+    ):
         """
         Initialize LLM client
 
         Args:
-            model_name: Model name (e.g., "gpt-4o", "openrouter/anthropic/claude-3.5-sonnet")
+            model_name: Model name (e.g., "gpt-4o", "openrouter/anthropic/claude-3.5-sonnet");
+                defaults to the model of config
+            rate_limiter: Host-wide limiter every request waits for
+            cassette: Cassette recording every response, or answering
+                requests from its recordings instead of the provider
+            config: Config whose temperature, token limit, retries,
+                continuations, prompt caching and timeout are used by
+                requests that do not set them
+            transport: Transport sending the requests (default: the shared
+                transport named by config, or LiteLLM without one)
+
+        Raises:
+            ValueError: If neither a model name nor a config is given, or
+                the config names an unknown transport
         """
+        if model_name is None:
+            if config is None:
+                raise ValueError("LLMClient needs a model name or a config")
+            model_name = config.model_name
         self.model_name = model_name
-
-        # Configure LiteLLM logging
-        litellm.set_verbose = False
+        self.config = config
+        self.rate_limiter = rate_limiter
+        self.cassette = cassette
+        if transport is None:
+            transport = get_transport(config.transport if config else "litellm")
+        self.transport = transport
+        self.usage = TokenUsage()
+        # Requests the provider rejected with a rate limit (HTTP 429)
+        self.throttled = 0
+        self._usage_lock = threading.Lock()
 
     def completion(
         self,
         user_message: str,
         system_prompt: Optional[str] = None,
         image_paths: Optional[list[str]] = None,
-        temperature: float = 0.3,
-        max_tokens: int = 8192,
-        retry_times: int = 3,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        retry_times: Optional[int] = None,
+        max_continuations: Optional[int] = None,
+        cache_prompt: Optional[bool] = None,
+        timeout: Optional[float] = None,
+        deadline: Optional[Deadline] = None,
+        usage: Optional[TokenUsage] = None,
     ) -> str:
         """
         Create chat completion with multimodal support
 
+        When the response is cut off by max_tokens, up to max_continuations
+        follow-up requests carrying the partial output ask the model to
+        resume where it stopped, and the pieces are joined. Settings left
+        as None are taken from the client's config, or REQUEST_DEFAULTS
+        without one.
+
         Args:
             user_message: User message content
             system_prompt: System prompt (optional)
             image_paths: List of image paths (optional)
             temperature: Generation temperature
-            max_tokens: Maximum number of tokens
+            max_tokens: Maximum number of tokens per request
             retry_times: Number of retries
+            max_continuations: Maximum number of continuation requests
+            cache_prompt: Mark the system prompt and instruction text as a
+                cacheable prefix for providers with prompt caching
+            timeout: Seconds allowed for each request
+            deadline: Deadline of the job; requests are given at most the
+                time left and are not retried once it has passed
+            usage: TokenUsage that the usage of this call's requests is
+                added to, besides the client's total
 
         Returns:
             Generated response content
+
+        Raises:
+            DeadlineExceeded: If the deadline passes before the response
+        """
+        temperature = self._option("temperature", temperature)
+        max_tokens = self._option("max_tokens", max_tokens)
+        retry_times = self._option("retry_times", retry_times)
+        max_continuations = self._option("max_continuations", max_continuations)
+        cache_prompt = self._option("cache_prompt", cache_prompt)
+        timeout = self._option("timeout", timeout)
+        messages = self._build_messages(
+            user_message, system_prompt, image_paths, cache_prompt
+        )
+
+        content, finish_reason = self._request(
+            messages, temperature, max_tokens, retry_times, timeout, deadline, usage
+        )
+
+        continuations = 0
+        while finish_reason == "length" and continuations < max_continuations:
+            continuations += 1
+            logger.info(
+                f"Response truncated at {max_tokens} tokens, continuing "
+                f"({continuations}/{max_continuations})"
+            )
+            continuation_messages = messages + [
+                {"role": "assistant", "content": content},
+                {"role": "user", "content": CONTINUE_PROMPT},
+            ]
+            more, finish_reason = self._request(
+                continuation_messages,
+                temperature,
+                max_tokens,
+                retry_times,
+                timeout,
+                deadline,
+                usage,
+            )
+            if not more:
+                break
+            content += more
+
+        if finish_reason == "length":
+            logger.warning(
+                f"Response still truncated after {continuations} continuation(s)"
+            )
+
+        return content
+
+    def completion_stream(
+        self,
+        user_message: str,
+        system_prompt: Optional[str] = None,
+        image_paths: Optional[list[str]] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        retry_times: Optional[int] = None,
+        max_continuations: Optional[int] = None,
+        cache_prompt: Optional[bool] = None,
+        timeout: Optional[float] = None,
+        deadline: Optional[Deadline] = None,
+        usage: Optional[TokenUsage] = None,
+    ) -> Iterator[str]:
+        """
+        Create chat completion, yielding text as the provider streams it
+
+        Failed requests are retried only until the first text has been
+        yielded; an error after that is raised to the caller. Truncated
+        responses are continued and settings left as None resolved as in
+        completion.
+
+        Args:
+            user_message: User message content
+            system_prompt: System prompt (optional)
+            image_paths: List of image paths (optional)
+            temperature: Generation temperature
+            max_tokens: Maximum number of tokens per request
+            retry_times: Number of retries
+            max_continuations: Maximum number of continuation requests
+            cache_prompt: Mark the system prompt and instruction text as a
+                cacheable prefix for providers with prompt caching
+            timeout: Seconds allowed for each request
+            deadline: Deadline of the job; requests are given at most the
+                time left and are not retried once it has passed
+            usage: TokenUsage that the usage of this call's requests is
+                added to, besides the client's total
+
+        Yields:
+            Response text fragments in order
+
+        Raises:
+            DeadlineExceeded: If the deadline passes before the response
+                is complete
+        """
+        temperature = self._option("temperature", temperature)
+        max_tokens = self._option("max_tokens", max_tokens)
+        retry_times = self._option("retry_times", retry_times)
+        max_continuations = self._option("max_continuations", max_continuations)
+        cache_prompt = self._option("cache_prompt", cache_prompt)
+        timeout = self._option("timeout", timeout)
+        messages = self._build_messages(
+            user_message, system_prompt, image_paths, cache_prompt
+        )
+
+        content = ""
+        request_messages = messages
+        continuations = 0
+        while True:
+            finish_reason = None
+            received = ""
+            for text, reason in self._stream_request(
+                request_messages,
+                temperature,
+                max_tokens,
+                retry_times,
+                include_usage=cache_prompt,
+                timeout=timeout,
+                deadline=deadline,
+                usage=usage,
+            ):
+                if text:
+                    received += text
+                    yield text
+                if reason:
+                    finish_reason = reason
+            content += received
+
+            if (
+                finish_reason != "length"
+                or continuations >= max_continuations
+                or not received
+            ):
+                break
+
+            continuations += 1
+            logger.info(
+                f"Response truncated at {max_tokens} tokens, continuing "
+                f"({continuations}/{max_continuations})"
+            )
+            request_messages = messages + [
+                {"role": "assistant", "content": content},
+                {"role": "user", "content": CONTINUE_PROMPT},
+            ]
+
+        if finish_reason == "length":
+            logger.warning(
+                f"Response still truncated after {continuations} continuation(s)"
+            )
+
+    def _build_messages(
+        self,
+        user_message: str,
+        system_prompt: Optional[str],
+        image_paths: Optional[list[str]],
+        cache_prompt: bool = False,
+    ) -> list[dict]:
+        """
+        Build the chat messages for a request
+
+        The static parts (system prompt, then instruction text) come before
+        the page images. With cache_prompt they carry cache-control markers
+        so providers that support prompt caching can reuse that prefix
+        across pages.
+
+        Returns:
+            List of chat messages
         """
         # Build user content with text and images
-        user_content = [{"type": "text", "text": user_message}]
+        text_part = {"type": "text", "text": user_message}
+        if cache_prompt:
+            text_part["cache_control"] = CACHE_CONTROL
+        user_content = [text_part]
 
         if image_paths:
             for img_path in image_paths:
                 base64_image = self._encode_image(img_path)
+                mime_type = _image_mime_type(img_path)
                 user_content.append(
                     {
                         "type": "image_url",
-                        "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"},
+                        "image_url": {"url": f"data:{mime_type};base64,{base64_image}"},
                     }
                 )
 
         # Build messages
         messages = []
-        if system_prompt:
+        if system_prompt and cache_prompt:
+            system_content = [
+                {"type": "text", "text": system_prompt, "cache_control": CACHE_CONTROL}
+            ]
+            messages.append({"role": "system", "content": system_content})
+        elif system_prompt:
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": user_content})
+        return messages
 
+    def _stream_request(
+        self,
+        messages: list[dict],
+        temperature: float,
+        max_tokens: int,
+        retry_times: int,
+        include_usage: bool = False,
+        timeout: Optional[float] = None,
+        deadline: Optional[Deadline] = None,
+        usage: Optional[TokenUsage] = None,
+    ) -> Iterator[tuple[str, Optional[str]]]:
+        """
+        Send one streaming chat completion request with retries
+
+        Yields:
+            Tuples of (text fragment, finish reason or None)
+        """
+        # Streams only report token usage when asked for it
+        extra = {"stream_options": {"include_usage": True}} if include_usage else {}
+
+        for attempt in range(retry_times):
+            started = False
+            try:
+                # The slot is held until the stream has been read
+                request_span = span(
+                    "request", model=self.model_name, attempt=attempt + 1
+                )
+                with request_span, self._rate_limit(deadline):
+                    response = self._completion(
+                        model=self.model_name,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        stream=True,
+                        timeout=deadline.timeout(timeout) if deadline else timeout,
+                        **extra,
+                        # Add custom headers for tracking
+                        extra_headers={
+                            "X-Title": "MarkPDFdown",
+                            "HTTP-Referer": "https://github.com/MarkPDFdown/markpdfdown.git",
+                        },
+                    )
+
+                    for chunk in response:
+                        if deadline is not None and deadline.expired:
+                            # Stop reading and drop the connection
+                            close = getattr(response, "close", None)
+                            if close is not None:
+                                close()
+                            raise DeadlineExceeded()
+                        chunk_usage = getattr(chunk, "usage", None)
+                        if chunk_usage:
+                            self._record_usage(chunk_usage, usage)
+                        if not chunk.choices:
+                            continue
+                        choice = chunk.choices[0]
+                        text = getattr(choice.delta, "content", None) or ""
+                        if text:
+                            started = True
+                        yield text, choice.finish_reason
+
+                return
+
+            except (DeadlineExceeded, CassetteMiss):
+                raise
+            except Exception as e:
+                if deadline is not None and deadline.expired:
+                    raise DeadlineExceeded() from e
+                self._record_failure(e)
+                logger.error(
+                    f"API request failed (attempt {attempt + 1}/{retry_times}): {str(e)}"
+                )
+                # Text already handed to the caller cannot be taken back
+                if started or attempt >= retry_times - 1:
+                    raise e
+                # Wait before retry
+                with span("retry sleep", attempt=attempt + 1):
+                    time.sleep(0.5 * (attempt + 1))
+
+    def _request(
+        self,
+        messages: list[dict],
+        temperature: float,
+        max_tokens: int,
+        retry_times: int,
+        timeout: Optional[float] = None,
+        deadline: Optional[Deadline] = None,
+        usage: Optional[TokenUsage] = None,
+    ) -> tuple[str, Optional[str]]:
+        """
+        Send one chat completion request with retries
+
+        Returns:
+            Tuple of (response content, finish reason)
+        """
         # Retry mechanism
         for attempt in range(retry_times):
             try:
-                response = completion(
-                    model=self.model_name,
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                    # Add custom headers for tracking
-                    extra_headers={
-                        "X-Title": "MarkPDFdown",
-                        "HTTP-Referer": "https://github.com/MarkPDFdown/markpdfdown.git",
-                    },
+                request_span = span(
+                    "request", model=self.model_name, attempt=attempt + 1
                 )
+                with request_span, self._rate_limit(deadline):
+                    response = self._completion(
+                        model=self.model_name,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        timeout=deadline.timeout(timeout) if deadline else timeout,
+                        # Add custom headers for tracking
+                        extra_headers={
+                            "X-Title": "MarkPDFdown",
+                            "HTTP-Referer": "https://github.com/MarkPDFdown/markpdfdown.git",
+                        },
+                    )
 
                 if not response.choices:
                     raise Exception("No response from API")
 
-                return response.choices[0].message.content
+                self._record_usage(getattr(response, "usage", None), usage)
+                choice = response.choices[0]
+                return choice.message.content or "", choice.finish_reason
 
+            except (DeadlineExceeded, CassetteMiss):
+                raise
             except Exception as e:
+                if deadline is not None and deadline.expired:
+                    raise DeadlineExceeded() from e
+                self._record_failure(e)
                 logger.error(
                     f"API request failed (attempt {attempt + 1}/{retry_times}): {str(e)}"
                 )
                 if attempt < retry_times - 1:
                     # Wait before retry
-                    time.sleep(0.5 * (attempt + 1))
+                    with span("retry sleep", attempt=attempt + 1):
+                        time.sleep(0.5 * (attempt + 1))
                 else:
                     raise e
 
-        return ""
+        return "", None
+
+    def _option(self, name: str, value: Any) -> Any:
+        # The call's value, else the client's config, else the default
+        if value is not None:
+            return value
+        if self.config is not None:
+            return getattr(self.config, CONFIG_FIELDS.get(name, name))
+        return REQUEST_DEFAULTS[name]
+
+    def _completion(self, **request) -> Any:
+        if self.cassette is None:
+            return self.transport.complete(**request)
+        return self.cassette.complete(self.transport.complete, **request)
+
+    def _rate_limit(self, deadline: Optional[Deadline]) -> AbstractContextManager:
+        # Wait for the host-wide limiter, if any, before each request
+        if self.rate_limiter is None:
+            return nullcontext()
+        return self.rate_limiter.slot(deadline)
+
+    def _record_usage(self, usage: Any, call_usage: Optional[TokenUsage]) -> None:
+        if usage is None:
+            return
+        with self._usage_lock:
+            self.usage.add(usage)
+            if call_usage is not None:
+                call_usage.add(usage)
+
+    def _record_failure(self, error: Exception) -> None:
+        if getattr(error, "status_code", None) != 429:
+            return
+        with self._usage_lock:
+            self.throttled += 1
 
     def _encode_image(self, image_path: str) -> str:
         """
@@ -115,5 +572,5 @@ class LLMClient:
         Returns:
             Base64 encoded image string
         """
-        with open(image_path, "rb") as image_file:
+        with span("encode image"), open(image_path, "rb") as image_file:
             return base64.b64encode(image_file.read()).decode("utf-8")
@@ -0,0 +1,125 @@
+"""
+Per-page fingerprint manifest for incremental reconversion
+"""
+
+import json
+import logging
+import os
+import secrets
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+class PageManifest:
+    """
+    Record of the Markdown produced for each page fingerprint
+
+    A conversion reads the manifest of the previous run, reuses the Markdown
+    of every page whose fingerprint it already knows and records all pages
+    of the current run, which replace the previous manifest when saved.
+    Pages are looked up by fingerprint rather than position, so pages that
+    merely moved because others were inserted or removed are reused too.
+
+    Usage:
+        manifest = PageManifest.load("manual.pages.json")
+        markdown = manifest.lookup(fingerprint)
+        manifest.record(page_num, fingerprint, markdown)
+        manifest.save()
+    """
+
+    def __init__(self, path: str, previous: Optional[dict[str, str]] = None):
+        """
+        Initialize manifest
+
+        Args:
+            path: Manifest file path
+            previous: Mapping of fingerprint to Markdown from the last run
+        """
+        self.path = path
+        self.previous = previous or {}
+        self.pages: list[dict] = []
+        self.reused = 0
+
+    @classmethod
+    def load(cls, path: str) -> "PageManifest":
+        """
+        Load the manifest of the previous run, if there is one
+
+        An unreadable manifest is ignored with a warning, which only means
+        every page is converted again.
+
+        Args:
+            path: Manifest file path
+
+        Returns:
+            PageManifest instance
+        """
+        if not os.path.exists(path):
+            return cls(path)
+
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != MANIFEST_VERSION:
+                raise ValueError(f"unsupported version {data.get('version')}")
+            previous = {page["fingerprint"]: page["markdown"] for page in data["pages"]}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable manifest {path}: {e}")
+            return cls(path)
+
+        logger.info(f"Loaded {len(previous)} page fingerprints from {path}")
+        return cls(path, previous)
+
+    def lookup(self, fingerprint: str) -> Optional[str]:
+        """
+        Find the Markdown of a page converted by the previous run
+
+        Args:
+            fingerprint: Page fingerprint
+
+        Returns:
+            Page Markdown, or None if the page is new or changed
+        """
+        return self.previous.get(fingerprint)
+
+    def record(self, page_num: int, fingerprint: str, markdown: str) -> None:
+        """
+        Record a page of the current run, in output order
+
+        Args:
+            page_num: Original 1-based page number
+            fingerprint: Page fingerprint
+            markdown: Page Markdown
+        """
+        self.pages.append(
+            {"page": page_num, "fingerprint": fingerprint, "markdown": markdown}
+        )
+
+    def save(self) -> None:
+        """
+        Atomically replace the manifest file with the current run
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        temp_path = os.path.join(
+            directory, f".{os.path.basename(self.path)}.{secrets.token_hex(4)}.tmp"
+        )
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"version": MANIFEST_VERSION, "pages": self.pages},
+                    f,
+                    ensure_ascii=False,
+                )
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        logger.info(
+            f"Saved {len(self.pages)} page fingerprints to {self.path} "
+            f"({self.reused} reused)"
+        )
@@ -0,0 +1,269 @@
+"""
+Crash-safe streaming Markdown output writer
+"""
+
+import logging
+import os
+import secrets
+import threading
+import time
+from typing import Optional, TextIO
+
+logger = logging.getLogger(__name__)
+
+
+class MarkdownWriter:
+    """
+    Stream converted pages to a temporary file and publish it atomically
+
+    Pages are appended to a temporary file next to the target as they
+    complete. Pages that finish out of order are held back until every
+    earlier page has been written, so only the out-of-order window is kept
+    in memory. The file is fsynced periodically and renamed over the target
+    on commit, so an interrupted run never leaves a partial or corrupt
+    output file behind.
+
+    Usage:
+        with MarkdownWriter("output.md") as writer:
+            writer.write_page(0, "# Page 1")
+            writer.write_page(1, "# Page 2")
+    """
+
+    def __init__(
+        self,
+        output_path: str,
+        separator: str = "\n\n",
+        fsync_pages: int = 10,
+        fsync_seconds: float = 5.0,
+    ):
+        """
+        Initialize output writer
+
+        Args:
+            output_path: Final Markdown file path
+            separator: Text inserted between non-empty pages
+            fsync_pages: Fsync after this many written pages (0 disables)
+            fsync_seconds: Fsync when this many seconds passed since the last
+                one (0 disables)
+        """
+        self.output_path = output_path
+        self.separator = separator
+        self.fsync_pages = fsync_pages
+        self.fsync_seconds = fsync_seconds
+
+        self.pages_written = 0
+        self._next_index = 0
+        self._pending: dict[int, str] = {}
+        self._has_content = False
+        self._unsynced_pages = 0
+        self._last_sync = time.monotonic()
+
+        # The temporary file lives next to the target so the final rename is
+        # atomic; creating it with os.open lets the umask apply as usual
+        self.temp_path = os.path.join(
+            os.path.dirname(os.path.abspath(output_path)),
+            f".{os.path.basename(output_path)}.{secrets.token_hex(4)}.tmp",
+        )
+        fd = os.open(self.temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        self._file: Optional[TextIO] = os.fdopen(fd, "w", encoding="utf-8")
+
+    def write_page(self, index: int, content: str) -> None:
+        """
+        Record the Markdown for one page
+
+        Args:
+            index: 0-based position of the page in the output
+            content: Page Markdown (empty pages are skipped but still count)
+        """
+        if self._file is None:
+            raise ValueError("Writer is already closed")
+        if index < self._next_index or index in self._pending:
+            raise ValueError(f"Page {index} was already written")
+
+        self._pending[index] = content
+        while self._next_index in self._pending:
+            self._append(self._pending.pop(self._next_index))
+            self._next_index += 1
+
+    def _append(self, content: str) -> None:
+        if content:
+            if self._has_content:
+                self._file.write(self.separator)
+            self._file.write(content)
+            self._has_content = True
+
+        self.pages_written += 1
+        self._unsynced_pages += 1
+        if (self.fsync_pages and self._unsynced_pages >= self.fsync_pages) or (
+            self.fsync_seconds
+            and time.monotonic() - self._last_sync >= self.fsync_seconds
+        ):
+            self._sync()
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced_pages = 0
+        self._last_sync = time.monotonic()
+
+    def commit(self) -> None:
+        """
+        Fsync the temporary file and atomically replace the target
+
+        Raises:
+            ValueError: If pages are missing from the sequence
+        """
+        if self._file is None:
+            raise ValueError("Writer is already closed")
+        if self._pending:
+            missing = self._next_index
+            self.abort()
+            raise ValueError(f"Cannot commit output, page {missing} is missing")
+
+        self._sync()
+        self._file.close()
+        self._file = None
+        os.replace(self.temp_path, self.output_path)
+        self._sync_directory()
+        logger.debug(f"Output committed to {self.output_path}")
+
+    def abort(self) -> None:
+        """
+        Discard the temporary file, leaving any existing target untouched
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        try:
+            os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
+
+    def _sync_directory(self) -> None:
+        # Persist the rename itself; not supported on every platform
+        try:
+            fd = os.open(
+                os.path.dirname(os.path.abspath(self.output_path)), os.O_RDONLY
+            )
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def __enter__(self) -> "MarkdownWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._file is None:
+            return
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+
+class OrderedStreamWriter:
+    """
+    Write page Markdown to a text stream as soon as it can be shown in order
+
+    Text of the page at the head of the order is written through as it
+    arrives. Pages further ahead, which are converted concurrently in the
+    background, are buffered until every earlier page has finished. Methods
+    may be called from several threads.
+
+    Usage:
+        writer = OrderedStreamWriter(sys.stdout)
+        writer.write_text(0, "# Page")
+        writer.finish_page(0, "# Page 1")
+        writer.close()
+    """
+
+    def __init__(self, stream: TextIO, separator: str = "\n\n"):
+        """
+        Initialize stream writer
+
+        Args:
+            stream: Text stream to write to
+            separator: Text inserted between non-empty pages
+        """
+        self.stream = stream
+        self.separator = separator
+
+        self.pages_written = 0
+        self._head = 0
+        self._buffers: dict[int, list[str]] = {}
+        self._finished: dict[int, str] = {}
+        self._head_has_text = False
+        self._has_content = False
+        self._lock = threading.Lock()
+
+    def write_text(self, index: int, text: str) -> None:
+        """
+        Record a fragment of one page's Markdown
+
+        Args:
+            index: 0-based position of the page in the output
+            text: Next fragment of the page
+        """
+        if not text:
+            return
+        with self._lock:
+            if index < self._head or index in self._finished:
+                raise ValueError(f"Page {index} was already finished")
+            if index == self._head:
+                self._emit(text)
+                self.stream.flush()
+            else:
+                self._buffers.setdefault(index, []).append(text)
+
+    def finish_page(self, index: int, content: str) -> None:
+        """
+        Mark a page as complete
+
+        Args:
+            index: 0-based position of the page in the output
+            content: Full page Markdown, written only if no fragments of the
+                page were recorded with write_text
+        """
+        with self._lock:
+            if index < self._head or index in self._finished:
+                raise ValueError(f"Page {index} was already finished")
+            self._finished[index] = content
+
+            while self._head in self._finished:
+                content = self._finished.pop(self._head)
+                if not self._head_has_text:
+                    self._emit(content)
+                self.pages_written += 1
+                self._head += 1
+                self._head_has_text = False
+                for text in self._buffers.pop(self._head, []):
+                    self._emit(text)
+            self.stream.flush()
+
+    def close(self) -> None:
+        """
+        Terminate the output with a newline
+
+        Raises:
+            ValueError: If pages are still unfinished
+        """
+        with self._lock:
+            if self._finished or self._buffers:
+                raise ValueError(f"Cannot close output, page {self._head} is missing")
+            if self._has_content:
+                self.stream.write("\n")
+            self.stream.flush()
+
+    def _emit(self, text: str) -> None:
+        if not text:
+            return
+        if not self._head_has_text and self._has_content:
+            self.stream.write(self.separator)
+        self.stream.write(text)
+        self._head_has_text = True
+        self._has_content = True
@@ -0,0 +1,454 @@
+"""
+Distributed page work queue backed by a shared SQLite database
+"""
+
+import logging
+import os
+import sqlite3
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional
+
+from .errors import UNFINISHED_PAGE
+from .output_writer import MarkdownWriter
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    input_path TEXT NOT NULL,
+    output_path TEXT NOT NULL,
+    page_count INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    assembled_at REAL
+);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    document_id INTEGER NOT NULL REFERENCES documents(id),
+    page_index INTEGER NOT NULL,
+    page_num INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    not_before REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    content TEXT,
+    error TEXT,
+    PRIMARY KEY (document_id, page_index)
+);
+
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, lease_expires);
+"""
+
+# Task states
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class PageTask:
+    """A page claimed from the queue"""
+
+    document_id: int
+    page_index: int
+    page_num: int
+    input_path: str
+    worker: str
+    attempts: int
+
+
+class PageQueue:
+    """
+    Page-level work queue shared by worker processes through SQLite
+
+    Documents are enqueued as one task per page. Workers claim tasks with a
+    time-limited lease, so a page held by a worker that died is handed to
+    another worker once its lease expires. All state lives in a single
+    database file, which may sit on a filesystem shared by several hosts.
+
+    Usage:
+        queue = PageQueue("jobs.db")
+        queue.enqueue("/data/doc.pdf", "/data/doc.md", [1, 2, 3])
+        task = queue.claim("worker-1")
+        queue.complete(task, "# Page 1")
+    """
+
+    def __init__(self, db_path: str, lease_seconds: float = 600.0):
+        """
+        Initialize page queue, creating the database if needed
+
+        Args:
+            db_path: Path to the SQLite database file
+            lease_seconds: How long a claimed page stays reserved for its
+                worker before other workers may reclaim it
+        """
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            # Databases created before retry backoff lack its column
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(tasks)")}
+            if "not_before" not in columns:
+                conn.execute("ALTER TABLE tasks ADD COLUMN not_before REAL")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Short-lived connections keep the queue safe to use from several
+        # threads; the rollback journal works on shared filesystems where
+        # WAL does not
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._connect() as conn:
+            # Take the write lock up front so concurrent claims serialize
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def enqueue(
+        self, input_path: str, output_path: str, page_numbers: Sequence[int]
+    ) -> int:
+        """
+        Add a document as one task per page
+
+        Args:
+            input_path: Path of the input file, readable by every worker
+            output_path: Markdown file written by assemble
+            page_numbers: Original 1-based page numbers in output order
+
+        Returns:
+            Document id
+
+        Raises:
+            ValueError: If no pages are given
+        """
+        if not page_numbers:
+            raise ValueError("No pages to enqueue")
+
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO documents (input_path, output_path, page_count, "
+                "created_at) VALUES (?, ?, ?, ?)",
+                (input_path, output_path, len(page_numbers), time.time()),
+            )
+            document_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO tasks (document_id, page_index, page_num) "
+                "VALUES (?, ?, ?)",
+                [(document_id, index, num) for index, num in enumerate(page_numbers)],
+            )
+
+        logger.info(
+            f"Enqueued document {document_id} ({len(page_numbers)} pages): {input_path}"
+        )
+        return document_id
+
+    def claim(
+        self, worker: str, max_attempts: Optional[int] = None
+    ) -> Optional[PageTask]:
+        """
+        Lease the next pending page, reclaiming expired leases
+
+        Pages released by fail are skipped until their retry delay has
+        passed. An expired lease whose page has already been attempted
+        max_attempts times is not handed out again: its worker most likely
+        died or hung on that page, so the page is marked as failed.
+
+        Args:
+            worker: Identifier of the claiming worker
+            max_attempts: Attempts allowed per page (default: unlimited)
+
+        Returns:
+            Claimed task, or None if no page is available right now
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            while True:
+                row = conn.execute(
+                    "SELECT t.document_id, t.page_index, t.page_num, t.attempts, "
+                    "t.status, t.worker, d.input_path FROM tasks t "
+                    "JOIN documents d ON d.id = t.document_id "
+                    "WHERE (t.status = ? AND (t.not_before IS NULL OR "
+                    "t.not_before <= ?)) OR (t.status = ? AND t.lease_expires < ?) "
+                    "ORDER BY t.document_id, t.page_index LIMIT 1",
+                    (PENDING, now, LEASED, now),
+                ).fetchone()
+                if row is None:
+                    return None
+                if row["status"] != LEASED:
+                    break
+
+                if max_attempts is None or row["attempts"] < max_attempts:
+                    logger.warning(
+                        f"Reclaiming page {row['page_num']} of document "
+                        f"{row['document_id']} from expired lease of "
+                        f"{row['worker']}"
+                    )
+                    break
+
+                error = f"Lease of {row['worker']} expired"
+                conn.execute(
+                    "UPDATE tasks SET status = ?, error = ?, worker = NULL, "
+                    "lease_expires = NULL WHERE document_id = ? AND page_index = ?",
+                    (FAILED, error, row["document_id"], row["page_index"]),
+                )
+                logger.warning(
+                    f"Page {row['page_num']} of document {row['document_id']} "
+                    f"failed (attempt {row['attempts']}/{max_attempts}): {error}"
+                )
+
+            conn.execute(
+                "UPDATE tasks SET status = ?, worker = ?, lease_expires = ?, "
+                "not_before = NULL, attempts = attempts + 1 "
+                "WHERE document_id = ? AND page_index = ?",
+                (
+                    LEASED,
+                    worker,
+                    now + self.lease_seconds,
+                    row["document_id"],
+                    row["page_index"],
+                ),
+            )
+
+        return PageTask(
+            document_id=row["document_id"],
+            page_index=row["page_index"],
+            page_num=row["page_num"],
+            input_path=row["input_path"],
+            worker=worker,
+            attempts=row["attempts"] + 1,
+        )
+
+    def renew(self, task: PageTask) -> bool:
+        """
+        Extend the lease of a task still being worked on
+
+        Returns:
+            False if the lease was lost to another worker
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET lease_expires = ? WHERE document_id = ? AND "
+                "page_index = ? AND status = ? AND worker = ?",
+                (
+                    time.time() + self.lease_seconds,
+                    task.document_id,
+                    task.page_index,
+                    LEASED,
+                    task.worker,
+                ),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, task: PageTask, content: str) -> bool:
+        """
+        Record the Markdown of a claimed page
+
+        Args:
+            task: Task returned by claim
+            content: Page Markdown
+
+        Returns:
+            False if the page was meanwhile completed or reclaimed by another
+            worker, in which case the result is discarded
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET status = ?, content = ?, lease_expires = NULL, "
+                "error = NULL WHERE document_id = ? AND page_index = ? AND "
+                "status = ? AND worker = ?",
+                (DONE, content, task.document_id, task.page_index, LEASED, task.worker),
+            )
+            return cursor.rowcount == 1
+
+    def fail(
+        self,
+        task: PageTask,
+        error: str,
+        max_attempts: int = 2,
+        retry_delay: float = 0.0,
+    ) -> None:
+        """
+        Release a claimed page after an error
+
+        The page goes back to the queue until it has been attempted
+        max_attempts times, after which it is marked as failed. A released
+        page may only be claimed again after retry_delay seconds, doubling
+        with every further attempt.
+
+        Args:
+            task: Task returned by claim
+            error: Error description
+            max_attempts: Attempts allowed per page
+            retry_delay: Seconds before the first retry of the page
+        """
+        status = FAILED if task.attempts >= max_attempts else PENDING
+        not_before = None
+        if status == PENDING:
+            not_before = time.time() + retry_delay * 2 ** (task.attempts - 1)
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE tasks SET status = ?, error = ?, worker = NULL, "
+                "lease_expires = NULL, not_before = ? WHERE document_id = ? AND "
+                "page_index = ? AND status = ? AND worker = ?",
+                (
+                    status,
+                    error,
+                    not_before,
+                    task.document_id,
+                    task.page_index,
+                    LEASED,
+                    task.worker,
+                ),
+            )
+        logger.warning(
+            f"Page {task.page_num} of document {task.document_id} failed "
+            f"(attempt {task.attempts}/{max_attempts}): {error}"
+        )
+
+    def counts(self) -> dict[str, int]:
+        """
+        Count tasks by state
+
+        Returns:
+            Mapping of state to number of tasks
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) AS n FROM tasks GROUP BY status"
+            ).fetchall()
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+    def has_unfinished(self) -> bool:
+        """
+        Check whether pages are still pending or being worked on
+
+        Returns:
+            True while any page is pending or leased
+        """
+        counts = self.counts()
+        return counts[PENDING] + counts[LEASED] > 0
+
+    def assemble(self, document_id: int) -> str:
+        """
+        Write the ordered Markdown of a document no page of which is left
+
+        Pages that failed all their attempts are replaced by a marker.
+
+        Args:
+            document_id: Document id returned by enqueue
+
+        Returns:
+            Path of the written Markdown file
+
+        Raises:
+            ValueError: If the document is unknown or has pages still pending
+                or leased
+        """
+        with self._connect() as conn:
+            document = conn.execute(
+                "SELECT output_path FROM documents WHERE id = ?", (document_id,)
+            ).fetchone()
+            if document is None:
+                raise ValueError(f"Unknown document: {document_id}")
+
+            unfinished = conn.execute(
+                "SELECT page_num, status FROM tasks WHERE document_id = ? "
+                "AND status IN (?, ?) ORDER BY page_index",
+                (document_id, PENDING, LEASED),
+            ).fetchall()
+            if unfinished:
+                pages = ", ".join(
+                    f"{row['page_num']} ({row['status']})" for row in unfinished
+                )
+                raise ValueError(
+                    f"Document {document_id} has unfinished pages: {pages}"
+                )
+
+            output_path = document["output_path"]
+            with MarkdownWriter(output_path) as writer:
+                rows = conn.execute(
+                    "SELECT page_index, page_num, status, content FROM tasks "
+                    "WHERE document_id = ? ORDER BY page_index",
+                    (document_id,),
+                )
+                for row in rows:
+                    content = row["content"] or ""
+                    if row["status"] == FAILED:
+                        content = UNFINISHED_PAGE.format(
+                            page_num=row["page_num"], reason="conversion failed"
+                        )
+                    writer.write_page(row["page_index"], content)
+
+            conn.execute(
+                "UPDATE documents SET assembled_at = ? WHERE id = ?",
+                (time.time(), document_id),
+            )
+
+        logger.info(f"Assembled document {document_id} into {output_path}")
+        return output_path
+
+    def ready_documents(self) -> list[int]:
+        """
+        List documents whose pages are all done or failed but that were not
+        assembled
+
+        Returns:
+            Document ids in enqueue order
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT d.id FROM documents d WHERE d.assembled_at IS NULL AND "
+                "NOT EXISTS (SELECT 1 FROM tasks t WHERE t.document_id = d.id "
+                "AND t.status IN (?, ?)) ORDER BY d.id",
+                (PENDING, LEASED),
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def failed_pages(self, document_id: int) -> list[int]:
+        """
+        List the pages of a document that failed all their attempts
+
+        Args:
+            document_id: Document id returned by enqueue
+
+        Returns:
+            Page numbers in output order
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT page_num FROM tasks WHERE document_id = ? AND status = ? "
+                "ORDER BY page_index",
+                (document_id, FAILED),
+            ).fetchall()
+        return [row["page_num"] for row in rows]
+
+
+def default_worker_id() -> str:
+    """
+    Identify the current process across hosts
+
+    Returns:
+        "<hostname>:<pid>"
+    """
+    import socket
+
+    return f"{socket.gethostname()}:{os.getpid()}"
@@ -0,0 +1,307 @@
+"""
+Dry-run estimates of the tokens, cost and time of a conversion
+"""
+
+import logging
+import math
+import os
+from dataclasses import dataclass, field
+from typing import Optional
+
+from .file_worker import create_worker
+from .routing import classify_page
+from .utils import format_duration
+
+logger = logging.getLogger(__name__)
+
+# Rough average for English text and Markdown
+CHARS_PER_TOKEN = 4
+
+# Output assumed for pages whose content cannot be estimated, such as
+# image inputs
+DEFAULT_PAGE_OUTPUT_TOKENS = 500
+
+# Latency model of one request: fixed overhead plus generation speed
+REQUEST_OVERHEAD_SECONDS = 2.0
+OUTPUT_TOKENS_PER_SECOND = 50.0
+
+
+def estimate_text_tokens(text: str) -> int:
+    """
+    Estimate the tokens of a prompt text
+
+    Args:
+        text: Prompt text
+
+    Returns:
+        Estimated token count
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def estimate_image_tokens(width: int, height: int, model: str) -> int:
+    """
+    Estimate the input tokens of an image as the provider would bill them
+
+    Anthropic models are billed by area after downscaling the long side to
+    1568 pixels. Other models are assumed to follow OpenAI's high-detail
+    scheme: fit within 2048 x 2048, scale the short side to 768 and bill
+    170 tokens per 512-pixel tile plus 85.
+
+    Args:
+        width: Image width in pixels
+        height: Image height in pixels
+        model: Model name, including any provider prefix
+
+    Returns:
+        Estimated token count
+    """
+    if width <= 0 or height <= 0:
+        return 0
+
+    if "claude" in model.lower() or "anthropic" in model.lower():
+        scale = min(1.0, 1568 / max(width, height))
+        return math.ceil(width * scale * height * scale / 750)
+
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    tiles = math.ceil(width / 512) * math.ceil(height / 512)
+    return 170 * tiles + 85
+
+
+def model_prices(model: str) -> Optional[tuple[float, float]]:
+    """
+    Look up the list price of a model from LiteLLM's model table
+
+    Args:
+        model: Model name, including any provider prefix
+
+    Returns:
+        Tuple of (input, output) dollars per token, or None if unknown
+    """
+    # Use the price table shipped with LiteLLM rather than fetching one
+    os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+    import litellm
+
+    # Unknown models are expected; keep LiteLLM from printing help for them
+    litellm.suppress_debug_info = True
+    try:
+        info = litellm.get_model_info(model)
+    except Exception:
+        return None
+    input_price = info.get("input_cost_per_token")
+    output_price = info.get("output_cost_per_token")
+    if input_price is None or output_price is None:
+        return None
+    return input_price, output_price
+
+
+@dataclass
+class ModelEstimate:
+    """Estimated work for one model"""
+
+    model: str
+    pages: int = 0
+    requests: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    # Seconds of request time, summed over all requests
+    request_seconds: float = 0.0
+    # Dollars at list price, or None when the price is unknown
+    cost: Optional[float] = None
+
+
+@dataclass
+class ConversionPlan:
+    """Estimated tokens, cost and wall time of converting a set of files"""
+
+    files: int = 0
+    pages: int = 0
+    concurrency: int = 1
+    requests_per_minute: Optional[float] = None
+    models: list[ModelEstimate] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+
+    @property
+    def requests(self) -> int:
+        """Requests over all models"""
+        return sum(estimate.requests for estimate in self.models)
+
+    @property
+    def input_tokens(self) -> int:
+        """Input tokens over all models"""
+        return sum(estimate.input_tokens for estimate in self.models)
+
+    @property
+    def output_tokens(self) -> int:
+        """Output tokens over all models"""
+        return sum(estimate.output_tokens for estimate in self.models)
+
+    @property
+    def cost(self) -> Optional[float]:
+        """Dollars over all models, or None if any price is unknown"""
+        costs = [estimate.cost for estimate in self.models if estimate.requests]
+        if any(cost is None for cost in costs):
+            return None
+        return sum(costs)
+
+    @property
+    def seconds(self) -> float:
+        """
+        Wall time with the configured concurrency and rate limit
+
+        The longer of the request time spread over the concurrent slots and
+        the time the rate limit needs to admit every request.
+        """
+        busy = sum(estimate.request_seconds for estimate in self.models)
+        seconds = busy / self.concurrency
+        if self.requests_per_minute:
+            seconds = max(seconds, self.requests / self.requests_per_minute * 60)
+        return seconds
+
+
+def plan_conversion(
+    input_paths: list[str],
+    config,
+    start_page: int = 1,
+    end_page: int = 0,
+    pages: Optional[str] = None,
+    prompt: str = "",
+) -> ConversionPlan:
+    """
+    Estimate a conversion without rendering pages or calling the model
+
+    Every input is opened to count the selected pages and compute the size
+    they would be rendered at (or tiled into). Input tokens are the prompt
+    plus the billed size of each image; output tokens are estimated from
+    each page's text layer, or its ink coverage for scans, capped at the
+    token limit. Pages are attributed to the fast model as routing would.
+
+    Args:
+        input_paths: PDF and image files to convert
+        config: Config instance
+        start_page: Starting page number (1-based)
+        end_page: Ending page number (1-based, 0 means last page)
+        pages: Page specification (overrides the range)
+        prompt: System prompt and instructions sent with every request
+
+    Returns:
+        ConversionPlan instance; files that cannot be opened are listed in
+        its errors
+    """
+    concurrency = config.concurrency
+    if config.max_concurrent_requests:
+        concurrency = min(concurrency, config.max_concurrent_requests)
+    plan = ConversionPlan(
+        concurrency=concurrency, requests_per_minute=config.requests_per_minute
+    )
+
+    estimates = {config.model_name: ModelEstimate(config.model_name)}
+    if config.fast_model_name:
+        estimates[config.fast_model_name] = ModelEstimate(config.fast_model_name)
+    plan.models = list(estimates.values())
+
+    prompt_tokens = estimate_text_tokens(prompt)
+    max_output = config.max_tokens * (config.max_continuations + 1)
+
+    for input_path in input_paths:
+        try:
+            worker = create_worker(input_path, start_page, end_page, pages)
+            if config.tiling:
+                sizes = worker.page_image_sizes(
+                    max_pixels=config.tile_max_pixels,
+                    density_chars=config.tile_density_chars,
+                    overlap=config.tile_overlap,
+                )
+            else:
+                sizes = worker.page_image_sizes()
+            costs = dict(worker.page_costs())
+            routes = {}
+            if config.fast_model_name:
+                for page_num, features in worker.page_features():
+                    simple = features is not None and not classify_page(features)[0]
+                    routes[page_num] = simple
+        except Exception as e:
+            plan.errors.append(f"{input_path}: {e}")
+            continue
+
+        plan.files += 1
+        for page_num, images in sizes:
+            model = (
+                config.fast_model_name if routes.get(page_num) else config.model_name
+            )
+            estimate = estimates[model]
+            plan.pages += 1
+            estimate.pages += 1
+
+            chars = costs.get(page_num, 0.0)
+            page_output = math.ceil(chars / CHARS_PER_TOKEN)
+            page_output = page_output or DEFAULT_PAGE_OUTPUT_TOKENS
+            # Tiles split the page's text between them
+            tile_output = min(max_output, math.ceil(page_output / len(images)))
+            for width, height in images:
+                estimate.requests += 1
+                estimate.input_tokens += prompt_tokens + estimate_image_tokens(
+                    width, height, model
+                )
+                estimate.output_tokens += tile_output
+                estimate.request_seconds += (
+                    REQUEST_OVERHEAD_SECONDS + tile_output / OUTPUT_TOKENS_PER_SECOND
+                )
+
+    for estimate in plan.models:
+        prices = model_prices(estimate.model)
+        if prices is not None:
+            estimate.cost = (
+                estimate.input_tokens * prices[0] + estimate.output_tokens * prices[1]
+            )
+
+    return plan
+
+
+def format_plan(plan: ConversionPlan) -> str:
+    """
+    Describe a conversion plan for the terminal
+
+    Args:
+        plan: ConversionPlan instance
+
+    Returns:
+        Multi-line report
+    """
+    lines = [
+        "Conversion plan (no requests were made)",
+        f"  Files:          {plan.files}",
+        f"  Pages:          {plan.pages:,}",
+        f"  Requests:       {plan.requests:,}",
+    ]
+    for estimate in plan.models:
+        if not estimate.requests:
+            continue
+        cost = _format_cost(estimate.cost)
+        lines.append(
+            f"  {estimate.model}: {estimate.pages:,} pages, "
+            f"{estimate.input_tokens:,} input + {estimate.output_tokens:,} "
+            f"output tokens, {cost}"
+        )
+    lines += [
+        f"  Input tokens:   {plan.input_tokens:,}",
+        f"  Output tokens:  {plan.output_tokens:,}",
+        f"  Cost:           {_format_cost(plan.cost)} "
+        "(list prices, before prompt cache discounts)",
+    ]
+
+    limits = f"concurrency {plan.concurrency}"
+    if plan.requests_per_minute:
+        limits += f", {plan.requests_per_minute:g} requests/minute"
+    lines.append(f"  Wall time:      {format_duration(plan.seconds)} at {limits}")
+
+    for error in plan.errors:
+        lines.append(f"  Skipped {error}")
+    return "\n".join(lines)
+
+
+def _format_cost(cost: Optional[float]) -> str:
+    return "unknown price" if cost is None else f"${cost:,.2f}"
@@ -0,0 +1,242 @@
+"""
+Progress events, throughput-based ETA and a terminal progress line
+"""
+
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Optional, TextIO
+
+from .concurrency import AdaptiveConcurrency
+from .utils import format_duration
+
+# Kinds of progress event, in the order a page usually goes through them
+PROGRESS_EVENTS = ("rendered", "submitted", "completed", "failed", "retried")
+
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    """
+    State of a conversion after something happened to one of its pages
+
+    kind is one of PROGRESS_EVENTS. A page is "failed" when an attempt at
+    it failed or it was unfinished at the deadline, and "retried" when a
+    failed page is sent again; completed and failed count pages, not
+    attempts, so a retried page leaves the failed count.
+    """
+
+    kind: str
+    page: int
+    total: int
+    completed: int
+    failed: int
+    in_flight: int
+    elapsed: float
+    # Completed pages per second over the recent pages, None until known
+    rate: Optional[float] = None
+    # Seconds until the remaining pages are done at that rate
+    eta: Optional[float] = None
+    # Pages allowed in flight by adaptive concurrency, None when it is off
+    concurrency_limit: Optional[int] = None
+
+    @property
+    def remaining(self) -> int:
+        """Pages neither completed nor failed"""
+        return self.total - self.completed - self.failed
+
+
+class ProgressTracker:
+    """
+    Counter of page progress that reports every change to a callback
+
+    The ETA divides the remaining pages by the throughput of the last
+    window completed pages, so it follows changes in speed such as rate
+    limiting rather than averaging over the whole job. Pages reused from a
+    previous run count as completed but not towards the throughput.
+
+    Usage:
+        tracker = ProgressTracker(total=40, callback=print)
+        tracker.rendered(1)
+        tracker.submitted(1)
+        tracker.completed(1)
+    """
+
+    def __init__(
+        self,
+        total: int,
+        callback: Callable[[ProgressEvent], None],
+        window: int = 20,
+        controller: Optional[AdaptiveConcurrency] = None,
+    ):
+        """
+        Initialize tracker for a job
+
+        Args:
+            total: Pages in the job
+            callback: Function receiving each ProgressEvent
+            window: Completed pages the throughput is measured over
+            controller: Adaptive concurrency controller whose current limit
+                events carry
+        """
+        self.total = total
+        self.callback = callback
+        self.controller = controller
+        self.completed_pages = 0
+        self.failed_pages = 0
+        self.in_flight = 0
+        self._started = time.monotonic()
+        self._finish_times: deque[float] = deque(maxlen=window + 1)
+
+    def rendered(self, page: int) -> None:
+        """Report a page rendered to images"""
+        self._emit("rendered", page)
+
+    def submitted(self, page: int) -> None:
+        """Report a page sent for transcription"""
+        self.in_flight += 1
+        self._emit("submitted", page)
+
+    def completed(self, page: int, reused: bool = False) -> None:
+        """
+        Report a page converted
+
+        Args:
+            page: Page number
+            reused: Whether the page was taken from a previous run
+                without being sent
+        """
+        self.completed_pages += 1
+        if not reused:
+            self.in_flight -= 1
+            self._finish_times.append(time.monotonic())
+        self._emit("completed", page)
+
+    def failed(self, page: int, started: bool = True) -> None:
+        """
+        Report a page failed or left unfinished
+
+        Args:
+            page: Page number
+            started: Whether the page had been sent
+        """
+        self.failed_pages += 1
+        if started:
+            self.in_flight -= 1
+        self._emit("failed", page)
+
+    def retried(self, page: int) -> None:
+        """Report a failed page sent again"""
+        self.failed_pages -= 1
+        self.in_flight += 1
+        self._emit("retried", page)
+
+    def rate(self) -> Optional[float]:
+        """
+        Completed pages per second over the recent window
+
+        Returns:
+            Pages per second, or None before the first page completes
+        """
+        times = self._finish_times
+        if not times:
+            return None
+        if len(times) == times.maxlen:
+            # Measure from the oldest completion in the window
+            start, pages = times[0], len(times) - 1
+        else:
+            start, pages = self._started, len(times)
+        seconds = times[-1] - start
+        if seconds <= 0:
+            return None
+        return pages / seconds
+
+    def _emit(self, kind: str, page: int) -> None:
+        rate = self.rate()
+        remaining = self.total - self.completed_pages - self.failed_pages
+        eta = remaining / rate if rate else None
+        self.callback(
+            ProgressEvent(
+                kind=kind,
+                page=page,
+                total=self.total,
+                completed=self.completed_pages,
+                failed=self.failed_pages,
+                in_flight=self.in_flight,
+                elapsed=time.monotonic() - self._started,
+                rate=rate,
+                eta=eta,
+                concurrency_limit=self.controller.limit if self.controller else None,
+            )
+        )
+
+
+class ProgressDisplay:
+    """
+    Single self-updating progress line for a terminal
+
+    Usage:
+        display = ProgressDisplay(sys.stderr)
+        convert_to_file(..., on_progress=display)
+        display.close()
+    """
+
+    def __init__(self, stream: TextIO, width: int = 24):
+        """
+        Initialize display
+
+        Args:
+            stream: Terminal stream to draw on
+            width: Characters of the progress bar
+        """
+        self.stream = stream
+        self.width = width
+        self._line = ""
+
+    def __call__(self, event: ProgressEvent) -> None:
+        """Redraw the line for a progress event"""
+        self._line = format_progress(event, self.width)
+        self.stream.write(f"\r\033[K{self._line}")
+        self.stream.flush()
+
+    def clear(self) -> None:
+        """Erase the line, so other output can be written"""
+        if self._line:
+            self.stream.write("\r\033[K")
+            self.stream.flush()
+
+    def close(self) -> None:
+        """Leave the last line on screen and move past it"""
+        if self._line:
+            self.stream.write(f"\r\033[K{self._line}\n")
+            self.stream.flush()
+            self._line = ""
+
+
+def format_progress(event: ProgressEvent, width: int = 24) -> str:
+    """
+    Describe a progress event on one line
+
+    Args:
+        event: ProgressEvent instance
+        width: Characters of the progress bar
+
+    Returns:
+        Line such as "[#####-----] 12/40 pages, 3 in flight (limit 4),
+        2.4 pages/min, ETA 11m 40s"
+    """
+    done = event.completed + event.failed
+    filled = width * done // event.total if event.total else width
+    line = f"[{'#' * filled}{'-' * (width - filled)}] {done}/{event.total} pages"
+    if event.failed:
+        line += f", {event.failed} failed"
+    if event.in_flight:
+        line += f", {event.in_flight} in flight"
+    if event.concurrency_limit is not None:
+        line += f" (limit {event.concurrency_limit})"
+    if event.rate:
+        line += f", {event.rate * 60:.1f} pages/min"
+    if event.eta is not None and event.remaining:
+        line += f", ETA {format_duration(event.eta)}"
+    elif not event.remaining:
+        line += f" in {format_duration(event.elapsed)}"
+    return line
@@ -0,0 +1,246 @@
+"""
+Host-wide request rate and concurrency limits shared through SQLite
+"""
+
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Optional
+
+from .deadline import Deadline, DeadlineExceeded
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS slots (
+    id TEXT PRIMARY KEY,
+    key TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS slots_key ON slots (key);
+"""
+
+# Longest pause between two checks for a free token or slot
+MAX_POLL_INTERVAL = 0.25
+
+
+def default_rate_limit_db() -> str:
+    """
+    Path of the rate limit database shared by all processes of a user
+
+    Returns:
+        Path in the system temporary directory
+    """
+    return os.path.join(tempfile.gettempdir(), "markpdfdown-ratelimit.db")
+
+
+class HostRateLimiter:
+    """
+    Token bucket and semaphore shared by every process on the host
+
+    All processes that open the same database file and key draw from one
+    bucket refilled at requests_per_minute and share max_concurrent request
+    slots, so together they stay within the provider quota instead of each
+    process spending it on its own. Slots of processes that died are
+    reclaimed, and every slot expires after lease_seconds in any case.
+
+    Usage:
+        limiter = HostRateLimiter("/tmp/limits.db", "gpt-4o", 500, 8)
+        with limiter.slot():
+            response = completion(...)
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        key: str,
+        requests_per_minute: Optional[float] = None,
+        max_concurrent: Optional[int] = None,
+        lease_seconds: float = 900.0,
+    ):
+        """
+        Initialize rate limiter, creating the database if needed
+
+        Args:
+            db_path: Path to the SQLite database file shared by processes
+            key: Quota the limits apply to, such as the model name
+            requests_per_minute: Requests started per minute across the
+                host, or None for no rate limit
+            max_concurrent: Requests in flight at once across the host, or
+                None for no concurrency limit
+            lease_seconds: Time after which a slot is freed even if its
+                holder never released it
+        """
+        self.db_path = db_path
+        self.key = key
+        self.requests_per_minute = requests_per_minute
+        self.max_concurrent = max_concurrent
+        self.lease_seconds = lease_seconds
+
+        # A second's worth of requests may start at once
+        self.rate = requests_per_minute / 60 if requests_per_minute else None
+        self.capacity = max(1.0, self.rate) if self.rate else None
+
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def acquire(self, deadline: Optional[Deadline] = None) -> str:
+        """
+        Wait for a token and a free slot, then take both
+
+        Args:
+            deadline: Deadline after which to stop waiting
+
+        Returns:
+            Slot id to pass to release
+
+        Raises:
+            DeadlineExceeded: If the deadline passes while waiting
+        """
+        slot_id = uuid.uuid4().hex
+        waited = False
+        with span("rate limit wait", key=self.key):
+            while True:
+                wait = self._try_acquire(slot_id)
+                if wait is None:
+                    if waited:
+                        logger.debug(f"Rate limit slot for {self.key} acquired")
+                    return slot_id
+
+                if not waited:
+                    logger.debug(f"Waiting for a rate limit slot for {self.key}")
+                    waited = True
+                pause = min(wait, MAX_POLL_INTERVAL)
+                if deadline is not None:
+                    remaining = deadline.remaining()
+                    if remaining is not None and remaining <= pause:
+                        raise DeadlineExceeded()
+                time.sleep(pause)
+
+    def _try_acquire(self, slot_id: str) -> Optional[float]:
+        # Returns None once acquired, otherwise the seconds to wait
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                wait = self._reserve(conn, slot_id, now)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        return wait
+
+    def _reserve(
+        self, conn: sqlite3.Connection, slot_id: str, now: float
+    ) -> Optional[float]:
+        if self.max_concurrent:
+            self._reclaim_slots(conn, now)
+            in_flight = conn.execute(
+                "SELECT COUNT(*) FROM slots WHERE key = ?", (self.key,)
+            ).fetchone()[0]
+            if in_flight >= self.max_concurrent:
+                return MAX_POLL_INTERVAL
+
+        if self.rate:
+            row = conn.execute(
+                "SELECT tokens, updated_at FROM buckets WHERE key = ?", (self.key,)
+            ).fetchone()
+            tokens = self.capacity
+            if row is not None:
+                elapsed = max(now - row["updated_at"], 0.0)
+                tokens = min(self.capacity, row["tokens"] + elapsed * self.rate)
+            if tokens < 1.0:
+                return (1.0 - tokens) / self.rate
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated_at) "
+                "VALUES (?, ?, ?)",
+                (self.key, tokens - 1.0, now),
+            )
+
+        if self.max_concurrent:
+            conn.execute(
+                "INSERT INTO slots (id, key, pid, expires_at) VALUES (?, ?, ?, ?)",
+                (slot_id, self.key, os.getpid(), now + self.lease_seconds),
+            )
+        return None
+
+    def _reclaim_slots(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute(
+            "DELETE FROM slots WHERE key = ? AND expires_at < ?", (self.key, now)
+        )
+        rows = conn.execute(
+            "SELECT DISTINCT pid FROM slots WHERE key = ?", (self.key,)
+        ).fetchall()
+        for row in rows:
+            if not _process_alive(row["pid"]):
+                logger.debug(
+                    f"Reclaiming rate limit slots of dead process {row['pid']}"
+                )
+                conn.execute("DELETE FROM slots WHERE pid = ?", (row["pid"],))
+
+    def release(self, slot_id: str) -> None:
+        """
+        Give back a slot taken by acquire
+
+        Args:
+            slot_id: Slot id returned by acquire
+        """
+        if not self.max_concurrent:
+            return
+        with self._connect() as conn:
+            conn.execute("DELETE FROM slots WHERE id = ?", (slot_id,))
+
+    @contextmanager
+    def slot(self, deadline: Optional[Deadline] = None) -> Iterator[None]:
+        """
+        Hold a slot for the duration of a request
+
+        Args:
+            deadline: Deadline after which to stop waiting
+
+        Raises:
+            DeadlineExceeded: If the deadline passes while waiting
+        """
+        slot_id = self.acquire(deadline)
+        try:
+            yield
+        finally:
+            self.release(slot_id)
+
+
+def _process_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    # Signal 0 only probes on POSIX; elsewhere rely on lease expiry
+    if os.name != "posix":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,105 @@
+"""
+Per-page results of a conversion
+"""
+
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from typing import NamedTuple, Optional
+
+from .progress import ProgressEvent
+
+# Page statuses
+CONVERTED = "converted"
+REUSED = "reused"
+FAILED = "failed"
+UNFINISHED = "unfinished"
+
+
+class PageResult(NamedTuple):
+    """
+    Outcome of one page
+
+    A named tuple rather than a dataclass, so a record costs about a hundred
+    bytes plus its Markdown and results of very long documents stay small.
+    """
+
+    page: int
+    status: str
+    # Page Markdown, or None when it was not kept (such as when it was
+    # written to a file) or the page has none
+    markdown: Optional[str] = None
+    # Model the page was sent to, None for reused pages
+    model: Optional[str] = None
+    requests: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    # Prompt tokens served from the provider's prompt cache
+    cached_tokens: int = 0
+    # Seconds of the last attempt, from submission to its last token
+    latency: float = 0.0
+    # Times the page was sent again after failing
+    retries: int = 0
+
+    @property
+    def ok(self) -> bool:
+        """Whether the page has its Markdown"""
+        return self.status in (CONVERTED, REUSED)
+
+    @property
+    def cache_hit(self) -> bool:
+        """Whether the page was reused or its prompt was read from cache"""
+        return self.status == REUSED or self.cached_tokens > 0
+
+
+@dataclass
+class ConversionResult:
+    """
+    Pages of a conversion in document order
+
+    The Markdown of the document is only joined when asked for, so holding
+    a result does not keep a second copy of every page.
+    """
+
+    pages: list[PageResult] = field(default_factory=list)
+    # Last and highest limit of adaptive concurrency, None when it was off
+    concurrency_limit: Optional[int] = None
+    peak_concurrency: Optional[int] = None
+
+    def __iter__(self) -> Iterator[PageResult]:
+        return iter(self.pages)
+
+    def __len__(self) -> int:
+        return len(self.pages)
+
+    def record_progress(self, event: ProgressEvent) -> None:
+        """Take the concurrency limit reported by a progress event"""
+        limit = event.concurrency_limit
+        if limit is None:
+            return
+        self.concurrency_limit = limit
+        self.peak_concurrency = max(self.peak_concurrency or 0, limit)
+
+    @property
+    def markdown(self) -> str:
+        """Markdown of the converted pages, without markers for missing ones"""
+        return "\n\n".join(page.markdown for page in self.pages if page.markdown)
+
+    @property
+    def failed_pages(self) -> list[int]:
+        """Pages that failed or were unfinished at the deadline"""
+        return [page.page for page in self.pages if not page.ok]
+
+    @property
+    def complete(self) -> bool:
+        """Whether every page was converted or reused"""
+        return all(page.ok for page in self.pages)
+
+    @property
+    def prompt_tokens(self) -> int:
+        """Prompt tokens over all pages"""
+        return sum(page.prompt_tokens for page in self.pages)
+
+    @property
+    def completion_tokens(self) -> int:
+        """Completion tokens over all pages"""
+        return sum(page.completion_tokens for page in self.pages)
@@ -0,0 +1,115 @@
+"""
+Page complexity classification for routing pages between models
+"""
+
+import logging
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+# Characters that rarely occur outside of formulas
+MATH_CHARS = frozenset(
+    "∑∏∫∮√∂∇∞≈≠≡≤≥±∓×÷∈∉⊂⊃⊆⊇∪∩∧∨¬∀∃→←↔⇒⇔∝∠⊥∥′″αβγδεζηθικλμνξπρστυφχψωΓΔΘΛΞΠΣΦΨΩ"
+)
+
+# Font name fragments of common math fonts (TeX, Cambria Math, Symbol)
+MATH_FONTS = ("math", "cmmi", "cmsy", "cmex", "msbm", "symbol", "stix")
+
+
+@dataclass
+class PageFeatures:
+    """Cheap signals extracted from a page without rendering it"""
+
+    text_chars: int = 0
+    # Line and rectangle segments drawn on the page (tables, diagrams)
+    drawing_segments: int = 0
+    # Share of the page area covered by raster images
+    image_coverage: float = 0.0
+    math_glyphs: int = 0
+    math_fonts: list[str] = field(default_factory=list)
+
+    @property
+    def has_text_layer(self) -> bool:
+        """Whether the page has extractable text"""
+        return self.text_chars > 0
+
+
+def extract_page_features(page) -> PageFeatures:
+    """
+    Extract complexity signals from a PDF page
+
+    Args:
+        page: PyMuPDF page
+
+    Returns:
+        PageFeatures instance
+    """
+    text = page.get_text("text")
+    chars = len("".join(text.split()))
+
+    get_drawings = getattr(page, "get_cdrawings", page.get_drawings)
+    segments = sum(
+        1
+        for drawing in get_drawings()
+        for item in drawing["items"]
+        if item[0] in ("l", "re", "qu")
+    )
+
+    page_area = abs(page.rect) or 1.0
+    covered = 0.0
+    for info in page.get_image_info():
+        bbox = page.rect & info["bbox"]
+        covered += abs(bbox)
+    coverage = min(covered / page_area, 1.0)
+
+    fonts = [
+        font[3]
+        for font in page.get_fonts()
+        if any(fragment in font[3].lower() for fragment in MATH_FONTS)
+    ]
+
+    return PageFeatures(
+        text_chars=chars,
+        drawing_segments=segments,
+        image_coverage=coverage,
+        math_glyphs=sum(1 for char in text if char in MATH_CHARS),
+        math_fonts=fonts,
+    )
+
+
+def classify_page(
+    features: PageFeatures,
+    max_simple_chars: int = 2500,
+    max_simple_segments: int = 8,
+    max_simple_image_coverage: float = 0.15,
+    max_simple_math_glyphs: int = 2,
+) -> tuple[bool, str]:
+    """
+    Decide whether a page needs the strong model
+
+    A page is simple when it has a text layer of moderate size and none of
+    the signals of tables, diagrams, formulas or large images.
+
+    Args:
+        features: Page features
+        max_simple_chars: Most text-layer characters of a simple page
+        max_simple_segments: Most line/rectangle segments of a simple page
+        max_simple_image_coverage: Largest image share of a simple page
+        max_simple_math_glyphs: Most formula glyphs of a simple page
+
+    Returns:
+        Tuple of (True if the page is complex, human-readable reason)
+    """
+    if not features.has_text_layer:
+        return True, "no text layer"
+    if features.math_fonts:
+        return True, f"math fonts ({features.math_fonts[0]})"
+    if features.math_glyphs > max_simple_math_glyphs:
+        return True, f"{features.math_glyphs} formula glyphs"
+    if features.drawing_segments > max_simple_segments:
+        return True, f"{features.drawing_segments} line/box segments"
+    if features.image_coverage > max_simple_image_coverage:
+        return True, f"images cover {features.image_coverage:.0%}"
+    if features.text_chars > max_simple_chars:
+        return True, f"{features.text_chars} characters"
+    return False, f"{features.text_chars} characters of plain text"
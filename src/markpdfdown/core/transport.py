@@ -0,0 +1,325 @@
+"""
+Transports sending chat completion requests to the provider
+"""
+
+import http.client
+import json
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from types import SimpleNamespace
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Names accepted by get_transport and Config.transport
+TRANSPORTS = ("litellm", "openai")
+
+DEFAULT_API_BASE = "https://api.openai.com/v1"
+
+# Seconds allowed for a request that sets no timeout
+DEFAULT_TIMEOUT = 600.0
+
+# LiteLLM-only request settings that are not sent to the endpoint
+_LITELLM_ONLY = ("timeout", "extra_headers", "api_base", "api_key")
+
+
+class TransportError(Exception):
+    """Error response from the provider, carrying its HTTP status"""
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class Transport(ABC):
+    """
+    Sender of chat completion requests
+
+    Requests are the keyword arguments of ``litellm.completion`` and
+    responses are shaped like LiteLLM's, so LLMClient and cassettes work the
+    same over every transport.
+    """
+
+    name = "transport"
+
+    @abstractmethod
+    def complete(self, **request) -> Any:
+        """
+        Send one chat completion request
+
+        Args:
+            **request: Keyword arguments of the completion call
+
+        Returns:
+            The completion response, or an iterator of chunks when the
+            request streams
+        """
+        pass
+
+    def close(self) -> None:
+        """Release connections held by the transport"""
+        # Transports holding nothing have nothing to release
+        return None
+
+
+class LiteLLMTransport(Transport):
+    """
+    Transport through LiteLLM, routing to any provider it supports
+    """
+
+    name = "litellm"
+
+    def complete(self, **request) -> Any:
+        # Looked up on each call, so patching llm_client.completion works
+        from . import llm_client
+
+        return llm_client.completion(**request)
+
+
+class OpenAITransport(Transport):
+    """
+    Direct transport to one OpenAI-compatible chat completions endpoint
+
+    Requests go over keep-alive connections from a pool shared by all
+    threads, without LiteLLM's import time, model routing or callbacks.
+    Only the endpoint's own model names are understood; an "openai/" prefix
+    is dropped so the same MODEL_NAME works with both transports.
+
+    Usage:
+        transport = OpenAITransport("http://localhost:8000/v1", "sk-...")
+        client = LLMClient("my-vision-model", transport=transport)
+    """
+
+    name = "openai"
+
+    def __init__(
+        self,
+        api_base: Optional[str] = None,
+        api_key: Optional[str] = None,
+        max_idle: int = 16,
+    ):
+        """
+        Initialize transport
+
+        Args:
+            api_base: Base URL of the API, such as "https://api.openai.com/v1"
+                (default: OPENAI_API_BASE or OPENAI_BASE_URL)
+            api_key: API key sent as a bearer token (default: OPENAI_API_KEY)
+            max_idle: Idle connections kept open for reuse
+        """
+        api_base = (
+            api_base
+            or os.getenv("OPENAI_API_BASE")
+            or os.getenv("OPENAI_BASE_URL")
+            or DEFAULT_API_BASE
+        )
+        url = urlsplit(api_base)
+        if url.scheme not in ("http", "https") or not url.hostname:
+            raise ValueError(f"Invalid API base URL: {api_base}")
+        self.api_base = api_base
+        self.api_key = api_key if api_key is not None else os.getenv("OPENAI_API_KEY")
+        self.max_idle = max_idle
+        self._https = url.scheme == "https"
+        self._host = url.hostname
+        self._port = url.port
+        self._path = url.path.rstrip("/") + "/chat/completions"
+        self._idle: list[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    def complete(self, **request) -> Any:
+        """
+        Send one chat completion request
+
+        Args:
+            **request: Keyword arguments of the completion call
+
+        Returns:
+            The completion response, or an iterator of chunks when the
+            request streams
+
+        Raises:
+            TransportError: If the endpoint answers with an error status
+        """
+        timeout = request.get("timeout") or DEFAULT_TIMEOUT
+        headers = {
+            "Content-Type": "application/json",
+            "Accept": "text/event-stream"
+            if request.get("stream")
+            else "application/json",
+        }
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        headers.update(request.get("extra_headers") or {})
+        body = json.dumps(_payload(request)).encode("utf-8")
+
+        connection, response = self._send(body, headers, timeout)
+        if response.status >= 400:
+            data = response.read()
+            self._release(connection, response)
+            raise TransportError(_error_message(response.status, data), response.status)
+
+        if request.get("stream"):
+            return self._stream(connection, response)
+
+        data = response.read()
+        self._release(connection, response)
+        return json.loads(data, object_hook=_namespace)
+
+    def close(self) -> None:
+        """Close the idle connections"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    def _send(
+        self, body: bytes, headers: dict, timeout: float
+    ) -> tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        # A pooled connection may have been closed by the server while
+        # idle; such a request is sent once more on a new connection
+        while True:
+            connection, reused = self._acquire(timeout)
+            try:
+                connection.request("POST", self._path, body, headers)
+                return connection, connection.getresponse()
+            except (ConnectionError, http.client.HTTPException):
+                connection.close()
+                if not reused:
+                    raise
+                logger.debug("Pooled connection was closed, reconnecting")
+            except BaseException:
+                connection.close()
+                raise
+
+    def _acquire(self, timeout: float) -> tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            connection = self._idle.pop() if self._idle else None
+        if connection is None:
+            cls = (
+                http.client.HTTPSConnection
+                if self._https
+                else http.client.HTTPConnection
+            )
+            return cls(self._host, self._port, timeout=timeout), False
+        connection.timeout = timeout
+        if connection.sock is not None:
+            connection.sock.settimeout(timeout)
+        return connection, True
+
+    def _release(
+        self, connection: http.client.HTTPConnection, response: http.client.HTTPResponse
+    ) -> None:
+        # Only a fully read response leaves the connection usable
+        if response.will_close or not response.isclosed():
+            connection.close()
+            return
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def _stream(
+        self, connection: http.client.HTTPConnection, response: http.client.HTTPResponse
+    ) -> Iterator[Any]:
+        # Server-sent events, one "data:" line per chunk until [DONE]
+        done = False
+        try:
+            for line in response:
+                line = line.strip()
+                if not line.startswith(b"data:"):
+                    continue
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    break
+                yield json.loads(data, object_hook=_namespace)
+            response.read()
+            done = True
+        finally:
+            if done:
+                self._release(connection, response)
+            else:
+                # Abandoned or failed mid-stream
+                connection.close()
+
+
+def _payload(request: dict) -> dict:
+    payload = {key: value for key, value in request.items() if key not in _LITELLM_ONLY}
+    model = payload.get("model", "")
+    if model.startswith("openai/"):
+        payload["model"] = model[len("openai/") :]
+    payload["messages"] = _strip_cache_control(payload.get("messages", []))
+    return payload
+
+
+def _strip_cache_control(value: Any) -> Any:
+    # Cache-control markers are an Anthropic extension that OpenAI-compatible
+    # endpoints may reject; they cache long prefixes on their own
+    if isinstance(value, dict):
+        return {
+            key: _strip_cache_control(item)
+            for key, item in value.items()
+            if key != "cache_control"
+        }
+    if isinstance(value, list):
+        return [_strip_cache_control(item) for item in value]
+    return value
+
+
+def _namespace(data: dict) -> SimpleNamespace:
+    return SimpleNamespace(**data)
+
+
+def _error_message(status: int, data: bytes) -> str:
+    try:
+        message = json.loads(data)["error"]["message"]
+    except (ValueError, KeyError, TypeError):
+        message = data.decode("utf-8", "replace").strip()[:200]
+    return f"HTTP {status}: {message}" if message else f"HTTP {status}"
+
+
+_transports: dict[tuple, Transport] = {}
+_transports_lock = threading.Lock()
+
+
+def get_transport(name: str = "litellm") -> Transport:
+    """
+    Shared transport of a kind
+
+    OpenAI transports are shared per API base and key, so every client of
+    a process draws from the same connection pool.
+
+    Args:
+        name: One of TRANSPORTS
+
+    Returns:
+        Transport instance
+
+    Raises:
+        ValueError: If the name is unknown
+    """
+    if name == "litellm":
+        key: tuple = (name,)
+    elif name == "openai":
+        api_base = (
+            os.getenv("OPENAI_API_BASE")
+            or os.getenv("OPENAI_BASE_URL")
+            or DEFAULT_API_BASE
+        )
+        key = (name, api_base, os.getenv("OPENAI_API_KEY"))
+    else:
+        raise ValueError(f"Unknown transport: {name} (expected one of {TRANSPORTS})")
+
+    with _transports_lock:
+        transport = _transports.get(key)
+        if transport is None:
+            if name == "litellm":
+                transport = LiteLLMTransport()
+            else:
+                transport = OpenAITransport(key[1], key[2])
+            _transports[key] = transport
+        return transport
@@ -32,6 +32,108 @@ def remove_markdown_wrap(text: str, language: str = "markdown") -> str:
     return text.strip()
 
 
+class MarkdownWrapStripper:
+    """
+    Streaming equivalent of remove_markdown_wrap
+
+    Text is fed in arbitrary fragments as it arrives from the model. An
+    opening code fence at the start of the response is dropped, output
+    stops at the closing fence, and surrounding whitespace is trimmed.
+    Only the few characters that could still turn out to be a fence or
+    trailing whitespace are held back. Unlike remove_markdown_wrap, an
+    opening fence that is never closed is dropped too, since the text
+    after it has already been emitted.
+
+    Usage:
+        stripper = MarkdownWrapStripper()
+        for fragment in fragments:
+            out.write(stripper.feed(fragment))
+        out.write(stripper.flush())
+    """
+
+    def __init__(self, language: str = "markdown"):
+        """
+        Initialize stripper
+
+        Args:
+            language: Expected language identifier in code block
+        """
+        self.fence = f"```{language}".lower()
+        self._state = "start"
+        self._pending = ""
+        self._started = False
+
+    def feed(self, text: str) -> str:
+        """
+        Consume a fragment of the response
+
+        Args:
+            text: Next fragment of model output
+
+        Returns:
+            Text that can be emitted now
+        """
+        if self._state == "done" or not text:
+            return ""
+
+        self._pending += text
+        if self._state == "start":
+            head = self._pending.lstrip()
+            if not head:
+                return ""
+            if len(head) < len(self.fence) and self.fence.startswith(head.lower()):
+                # Could still become the opening fence
+                return ""
+            if head.lower().startswith(self.fence):
+                self._state = "fenced"
+                self._pending = head[len(self.fence) :]
+            else:
+                self._state = "plain"
+                self._pending = head
+
+        if self._state == "fenced":
+            end = self._pending.find("```")
+            if end != -1:
+                self._state = "done"
+                body, self._pending = self._pending[:end].rstrip(), ""
+                return self._emit(body)
+
+        # Hold back a possible start of the closing fence and trailing
+        # whitespace, which is only known to be final once more text arrives
+        cut = len(self._pending)
+        if self._state == "fenced":
+            while cut > 0 and len(self._pending) - cut < 2:
+                if self._pending[cut - 1] != "`":
+                    break
+                cut -= 1
+        body = self._pending[:cut].rstrip()
+        self._pending = self._pending[len(body) :]
+        return self._emit(body)
+
+    def flush(self) -> str:
+        """
+        Signal the end of the response
+
+        Returns:
+            Any text still held back
+        """
+        if self._state == "start":
+            body = remove_markdown_wrap(self._pending, self.fence[3:])
+        elif self._state == "done":
+            body = ""
+        else:
+            body = self._pending.rstrip()
+        self._state = "done"
+        self._pending = ""
+        return self._emit(body)
+
+    def _emit(self, body: str) -> str:
+        if not self._started:
+            body = body.lstrip()
+            self._started = bool(body)
+        return body
+
+
 def detect_file_type(file_data: bytes) -> Optional[str]:
     """
     Detect file type from binary data
@@ -104,3 +206,133 @@ def validate_page_range(
         end_page = total_pages
 
     return start_page, end_page
+
+
+def parse_page_spec(spec: str) -> list[tuple[int, int]]:
+    """
+    Parse a page specification such as "1-3,17,40-45,200-"
+
+    Args:
+        spec: Comma separated page numbers and ranges (1-based). A range
+            with no end ("200-") runs to the last page.
+
+    Returns:
+        List of (start, end) tuples, where end 0 means last page
+
+    Raises:
+        ValueError: If the specification is malformed
+    """
+    ranges = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            raise ValueError(f"Empty entry in page specification: {spec!r}")
+
+        start_text, sep, end_text = part.partition("-")
+        try:
+            start = int(start_text)
+            if not sep:
+                end = start
+            elif end_text.strip():
+                end = int(end_text)
+            else:
+                end = 0
+        except ValueError:
+            raise ValueError(f"Invalid page specification entry: {part!r}") from None
+
+        if start < 1:
+            raise ValueError(f"Page numbers must be >= 1: {part!r}")
+        if end != 0 and end < start:
+            raise ValueError(f"End page must be >= start page: {part!r}")
+
+        ranges.append((start, end))
+
+    return ranges
+
+
+def select_pages(spec: str, total_pages: int) -> list[int]:
+    """
+    Resolve a page specification against a document
+
+    Each range is validated with validate_page_range, so ranges that run past
+    the end of the document are clamped and ranges that start past it raise.
+
+    Args:
+        spec: Page specification (see parse_page_spec)
+        total_pages: Total number of pages in document
+
+    Returns:
+        Sorted, de-duplicated list of 1-based page numbers
+
+    Raises:
+        ValueError: If the specification is malformed or out of range
+    """
+    pages = set()
+    for start, end in parse_page_spec(spec):
+        start, end = validate_page_range(start, end, total_pages)
+        pages.update(range(start, end + 1))
+
+    return sorted(pages)
+
+
+def stitch_tiles(parts: list[str], max_overlap_lines: int = 10) -> str:
+    """
+    Join the Markdown of neighbouring tiles, dropping duplicated lines
+
+    Tiles overlap slightly, so the last lines of one tile often reappear
+    as the first lines of the next. The longest such run (up to
+    max_overlap_lines) is removed from the later tile. Tiles are separated
+    by a blank line unless a table continues across the boundary.
+
+    Args:
+        parts: Tile Markdown in reading order
+        max_overlap_lines: Longest overlap to look for
+
+    Returns:
+        Stitched Markdown
+    """
+    stitched: list[str] = []
+    for part in parts:
+        lines = part.strip().splitlines()
+        if not lines:
+            continue
+
+        limit = min(max_overlap_lines, len(lines), len(stitched))
+        for size in range(limit, 0, -1):
+            tail = [line.strip() for line in stitched[-size:]]
+            head = [line.strip() for line in lines[:size]]
+            if tail == head and any(tail):
+                lines = lines[size:]
+                break
+
+        # Keep tables that continue across a tile boundary in one piece
+        continues_table = (
+            stitched
+            and lines
+            and stitched[-1].lstrip().startswith("|")
+            and lines[0].lstrip().startswith("|")
+        )
+        if stitched and lines and not continues_table:
+            stitched.append("")
+        stitched.extend(lines)
+
+    return "\n".join(stitched).strip()
+
+
+def format_duration(seconds: float) -> str:
+    """
+    Format a duration compactly, such as "42s", "3m 05s" or "2h 10m"
+
+    Args:
+        seconds: Duration in seconds
+
+    Returns:
+        Formatted duration
+    """
+    minutes, secs = divmod(round(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    if minutes:
+        return f"{minutes}m {secs:02d}s"
+    return f"{secs}s"
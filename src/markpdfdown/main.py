@@ -6,33 +6,59 @@ import logging
 import os
 import shutil
 import sys
+import tempfile
+import threading
 import time
-from typing import Optional
+from collections import deque
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from functools import partial
+from typing import TYPE_CHECKING, Callable, Optional, TextIO
 
-from .config import config
+from .core.cassette import Cassette, CassetteMiss
+from .core.concurrency import AdaptiveConcurrency
+from .core.deadline import Deadline, DeadlineExceeded
+from .core.errors import (
+    UNFINISHED_PAGE,
+    IncompleteConversionError,
+    PageConversionError,
+)
 from .core.file_worker import create_worker
-from .core.llm_client import LLMClient
-from .core.utils import detect_file_type, remove_markdown_wrap
+from .core.llm_client import LLMClient, TokenUsage
+from .core.manifest import PageManifest
+from .core.output_writer import MarkdownWriter, OrderedStreamWriter
+from .core.page_queue import PageQueue, PageTask, default_worker_id
+from .core.planner import ConversionPlan, plan_conversion
+from .core.progress import ProgressEvent, ProgressTracker
+from .core.rate_limit import HostRateLimiter, default_rate_limit_db
+from .core.results import (
+    CONVERTED,
+    FAILED,
+    REUSED,
+    UNFINISHED,
+    ConversionResult,
+    PageResult,
+)
+from .core.routing import classify_page
+from .core.tracing import span
+from .core.utils import (
+    MarkdownWrapStripper,
+    detect_file_type,
+    remove_markdown_wrap,
+    stitch_tiles,
+)
 
-logger = logging.getLogger(__name__)
+if TYPE_CHECKING:
+    from .config import Config
 
+logger = logging.getLogger(__name__)
 
-def convert_image_to_markdown(image_path: str, llm_client: LLMClient) -> str:
-    """
-    Convert a single image to Markdown format
 
-    Args:
-        image_path: Path to the image file
-        llm_client: LLM client instance
-
-    Returns:
-        Converted Markdown content
-    """
-    system_prompt = """
+SYSTEM_PROMPT = """
 You are a helpful assistant that can convert images to Markdown format. You are given an image, and you need to convert it to Markdown format. Please output the Markdown content only, without any other text.
 """
 
-    user_prompt = """
+USER_PROMPT = """
 Below is the image of one page of a document, please read the content in the image and transcribe it into plain Markdown format. Please note:
 1. Identify heading levels, text styles, formulas, and the format of table rows and columns
 2. Mathematical formulas should be transcribed using LaTeX syntax, ensuring consistency with the original
@@ -44,117 +70,871 @@ Output Example:
 ```
 """
 
-    try:
-        response = llm_client.completion(
-            user_message=user_prompt,
-            system_prompt=system_prompt,
-            image_paths=[image_path],
-            temperature=config.temperature,
-            max_tokens=config.max_tokens,
-            retry_times=config.retry_times,
+TILE_PROMPT = """
+Below is the image of region {index} of {total} of one page of a document. The page was split into overlapping horizontal bands from top to bottom, so content at the edges may be cut off or repeated. Please read the content in the image and transcribe it into plain Markdown format. Please note:
+1. Identify heading levels, text styles, formulas, and the format of table rows and columns
+2. Mathematical formulas should be transcribed using LaTeX syntax, ensuring consistency with the original
+3. Transcribe partially visible lines at the edges only if they are legible
+4. Please output the Markdown content only, without any other text.
+"""
+
+
+def convert_image_to_markdown(
+    image_path: str,
+    llm_client: LLMClient,
+    user_prompt: str = USER_PROMPT,
+    on_text: Optional[Callable[[str], None]] = None,
+    deadline: Optional[Deadline] = None,
+    raise_errors: bool = False,
+    usage: Optional[TokenUsage] = None,
+    config: Optional["Config"] = None,
+) -> str:
+    """
+    Convert a single image to Markdown format
+
+    Args:
+        image_path: Path to the image file
+        llm_client: LLM client instance
+        user_prompt: Instruction sent along with the image
+        on_text: Callback receiving the Markdown in fragments as the model
+            streams it. If the request fails part way, the fragments already
+            delivered are not withdrawn.
+        deadline: Deadline of the job the page belongs to
+        raise_errors: Raise when the request fails instead of returning an
+            empty string, even if a streamed page already delivered part of
+            its text. Without it, such a page is returned as far as it got.
+        usage: TokenUsage the tokens of the image's requests are added to
+        config: Config of this call (default: the process-wide config read
+            from the environment)
+
+    Returns:
+        Converted Markdown content
+
+    Raises:
+        DeadlineExceeded: If the deadline passes before the page is done
+    """
+    config = _resolve_config(config)
+
+    request = {
+        "user_message": user_prompt,
+        "system_prompt": SYSTEM_PROMPT,
+        "image_paths": [image_path],
+        "temperature": config.temperature,
+        "max_tokens": config.max_tokens,
+        "retry_times": config.retry_times,
+        "max_continuations": config.max_continuations,
+        "cache_prompt": config.prompt_caching,
+        "timeout": config.request_timeout,
+        "deadline": deadline,
+        "usage": usage,
+    }
+
+    if on_text is not None:
+        return _stream_image_to_markdown(
+            image_path, llm_client, request, on_text, raise_errors
         )
 
+    try:
+        response = llm_client.completion(**request)
+
         # Remove markdown wrapper if present
-        response = remove_markdown_wrap(response, "markdown")
+        with span("post-process"):
+            response = remove_markdown_wrap(response, "markdown")
         return response
 
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         logger.error(f"Failed to convert image {image_path}: {e}")
+        if raise_errors:
+            raise
         return ""
 
 
-def convert_to_markdown(
-    input_data: bytes,
-    start_page: int = 1,
-    end_page: int = 0,
-    input_filename: Optional[str] = None,
-    output_dir: Optional[str] = None,
-    cleanup: bool = True,
+def _stream_image_to_markdown(
+    image_path: str,
+    llm_client: LLMClient,
+    request: dict,
+    on_text: Callable[[str], None],
+    raise_errors: bool = False,
+) -> str:
+    stripper = MarkdownWrapStripper("markdown")
+    parts = []
+
+    def deliver(text: str) -> None:
+        if text:
+            parts.append(text)
+            on_text(text)
+
+    try:
+        for fragment in llm_client.completion_stream(**request):
+            deliver(stripper.feed(fragment))
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to convert image {image_path}: {e}")
+        if raise_errors:
+            raise
+    deliver(stripper.flush())
+    return "".join(parts)
+
+
+def convert_tiles_to_markdown(
+    tile_paths: list[str],
+    llm_client: LLMClient,
+    max_workers: int = 4,
+    deadline: Optional[Deadline] = None,
+    raise_errors: bool = False,
+    usage: Optional[TokenUsage] = None,
+    config: Optional["Config"] = None,
 ) -> str:
     """
-    Convert PDF or image data to Markdown format
+    Convert the tiles of one page concurrently and stitch them back together
 
     Args:
-        input_data: Binary file data
-        start_page: Starting page number (1-based)
-        end_page: Ending page number (1-based, 0 means last page)
-        input_filename: Original filename (for type detection)
-        output_dir: Output directory (if None, creates temporary directory)
-        cleanup: Whether to clean up temporary files
+        tile_paths: Tile image paths in reading order
+        llm_client: LLM client instance
+        max_workers: Number of tiles transcribed at once
+        deadline: Deadline of the job the page belongs to
+        raise_errors: Raise when a tile fails instead of leaving it out
+        usage: TokenUsage the tokens of every tile are added to
+        config: Config of this call (default: the process-wide config read
+            from the environment)
 
     Returns:
-        Converted Markdown content
+        Stitched Markdown content of the page
+    """
+    total = len(tile_paths)
 
-    Raises:
-        ValueError: If input data is invalid or unsupported
+    def convert_tile(item: tuple[int, str]) -> str:
+        index, tile_path = item
+        prompt = TILE_PROMPT.format(index=index, total=total)
+        return convert_image_to_markdown(
+            tile_path,
+            llm_client,
+            user_prompt=prompt,
+            deadline=deadline,
+            raise_errors=raise_errors,
+            usage=usage,
+            config=config,
+        )
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, total)) as executor:
+        parts = list(executor.map(convert_tile, enumerate(tile_paths, 1)))
+
+    with span("post-process", tiles=total):
+        return stitch_tiles(parts)
+
+
+SUPPORTED_EXTENSIONS = [".pdf", ".jpg", ".jpeg", ".png", ".bmp", ".gif"]
+
+
+def _resolve_input_ext(input_filename: Optional[str], header: bytes) -> str:
     """
-    if not input_data:
-        raise ValueError("No input data provided")
+    Resolve the input file extension from its name or its leading bytes
 
-    # Create output directory
-    if output_dir is None:
-        output_dir = f"output/{time.strftime('%Y%m%d%H%M%S')}"
-    os.makedirs(output_dir, exist_ok=True)
+    Args:
+        input_filename: Original filename (may be None)
+        header: Leading bytes of the file data
 
-    # Detect file type
+    Returns:
+        File extension (with dot)
+
+    Raises:
+        ValueError: If the file type is not supported
+    """
     input_ext = None
     if input_filename:
         input_ext = os.path.splitext(input_filename)[1].lower()
 
     # If no extension or unknown, detect from content
-    if not input_ext or input_ext not in [
-        ".pdf",
-        ".jpg",
-        ".jpeg",
-        ".png",
-        ".bmp",
-        ".gif",
-    ]:
-        input_ext = detect_file_type(input_data)
+    if not input_ext or input_ext not in SUPPORTED_EXTENSIONS:
+        input_ext = detect_file_type(header)
         if not input_ext:
             raise ValueError("Unsupported file type")
         logger.info(f"Detected file type: {input_ext}")
 
-    # Save input data to temporary file
-    input_path = os.path.join(output_dir, f"input{input_ext}")
-    with open(input_path, "wb") as f:
-        f.write(input_data)
+    return input_ext
+
+
+def _default_output_dir() -> str:
+    # Created with a unique name, so conversions running side by side in one
+    # process never share their scratch files
+    os.makedirs("output", exist_ok=True)
+    path = tempfile.mkdtemp(prefix=time.strftime("%Y%m%d%H%M%S-"), dir="output")
+    # Kept relative, as cleanup only removes directories under output/
+    return os.path.join("output", os.path.basename(path))
+
+
+def _stage_file(input_path: str) -> tuple[str, str]:
+    """
+    Copy an input file into a fresh scratch directory
+
+    The file is copied on disk rather than read into memory, so arbitrarily
+    large inputs are handled in constant memory.
+
+    Args:
+        input_path: Path to input file
+
+    Returns:
+        Tuple of (staged file path, scratch directory)
+
+    Raises:
+        ValueError: If the file is missing, empty or unsupported
+    """
+    if not os.path.exists(input_path):
+        raise ValueError(f"Input file not found: {input_path}")
+
+    if os.path.getsize(input_path) == 0:
+        raise ValueError("No input data provided")
+
+    # Only the leading bytes are needed for type detection
+    with open(input_path, "rb") as f:
+        header = f.read(16)
+    input_ext = _resolve_input_ext(os.path.basename(input_path), header)
+
+    output_dir = _default_output_dir()
+    os.makedirs(output_dir, exist_ok=True)
+
+    staged_path = os.path.join(output_dir, f"input{input_ext}")
+    shutil.copyfile(input_path, staged_path)
+    return staged_path, output_dir
+
+
+def _remove_scratch_dir(output_dir: str, running: list[Future]) -> None:
+    """
+    Remove a scratch directory once no page is using it
+
+    Pages abandoned at the deadline or on interrupt may still be reading
+    their images or writing their Markdown, so the directory is only
+    removed when the last of them has finished.
+
+    Args:
+        output_dir: Scratch directory of the conversion
+        running: Page futures that may still be running
+    """
+
+    def remove() -> None:
+        try:
+            shutil.rmtree(output_dir)
+            logger.debug(f"Cleaned up temporary directory: {output_dir}")
+        except Exception as e:
+            logger.warning(f"Failed to cleanup directory {output_dir}: {e}")
+
+    pending = [future for future in running if not future.done()]
+    if not pending:
+        remove()
+        return
+
+    logger.debug(
+        f"Removing {output_dir} once {len(pending)} abandoned pages have finished"
+    )
+    left = len(pending)
+    lock = threading.Lock()
+
+    def finished(_future: Future) -> None:
+        nonlocal left
+        with lock:
+            left -= 1
+            last = left == 0
+        if last:
+            remove()
+
+    for future in pending:
+        future.add_done_callback(finished)
+
+
+def _convert_page(
+    page_num: int,
+    img_paths: list[str],
+    llm_client: LLMClient,
+    input_path: str,
+    output_dir: str,
+    cleanup: bool,
+    tile_concurrency: int,
+    on_text: Optional[Callable[[str], None]] = None,
+    deadline: Optional[Deadline] = None,
+    usage: Optional[TokenUsage] = None,
+    config: Optional["Config"] = None,
+) -> str:
+    """
+    Transcribe one rendered page and remove its images
+
+    The images are kept when the page fails, so it can be retried.
+
+    Returns:
+        Page Markdown
+    """
+    with span("page", page=page_num):
+        img_name = os.path.basename(img_paths[0])
+        if len(img_paths) == 1:
+            logger.info(f"Converting page {page_num}: {img_name}")
+            content = convert_image_to_markdown(
+                img_paths[0],
+                llm_client,
+                on_text=on_text,
+                deadline=deadline,
+                raise_errors=True,
+                usage=usage,
+                config=config,
+            )
+        else:
+            # Tiles are stitched before anything can be shown, so tiled pages
+            # are delivered whole
+            img_name = f"page_{page_num:04d}_tiles"
+            logger.info(f"Converting page {page_num}: {len(img_paths)} tiles")
+            content = convert_tiles_to_markdown(
+                img_paths,
+                llm_client,
+                max_workers=tile_concurrency,
+                deadline=deadline,
+                raise_errors=True,
+                usage=usage,
+                config=config,
+            )
+
+        if cleanup:
+            for img_path in img_paths:
+                if img_path != input_path:
+                    os.remove(img_path)
+
+        if content:
+            # Save individual page markdown (optional)
+            page_md_path = os.path.join(output_dir, f"{img_name}.md")
+            with open(page_md_path, "w", encoding="utf-8") as f:
+                f.write(content)
+
+        return content
+
+
+def _resolve_config(config: Optional["Config"]) -> "Config":
+    if config is not None:
+        return config
+    # Imported here so that loading the CLI does not pull in pydantic
+    from .config import get_config
+
+    return get_config()
+
+
+def _create_cassette(config) -> Optional[Cassette]:
+    """
+    Open the configured cassette, shared by all clients of a run
+
+    Returns:
+        Cassette instance, or None when no cassette is configured
+    """
+    if not config.cassette:
+        return None
+    return Cassette(
+        config.cassette, mode=config.cassette_mode, latency=config.cassette_latency
+    )
+
+
+def _create_client(
+    model_name: str, config, cassette: Optional[Cassette] = None
+) -> LLMClient:
+    """
+    Create an LLM client bound by the host-wide limits of the model
+
+    Args:
+        model_name: Model name
+        config: Config instance
+        cassette: Cassette to record to or replay from
+
+    Returns:
+        LLMClient instance
+    """
+    rate_limiter = None
+    replaying = cassette is not None and cassette.mode == "replay"
+    if not replaying and (config.requests_per_minute or config.max_concurrent_requests):
+        rate_limiter = HostRateLimiter(
+            config.rate_limit_db or default_rate_limit_db(),
+            model_name,
+            requests_per_minute=config.requests_per_minute,
+            max_concurrent=config.max_concurrent_requests,
+        )
+    return LLMClient(
+        model_name, rate_limiter=rate_limiter, cassette=cassette, config=config
+    )
+
+
+def _route_pages(worker, config) -> dict[int, bool]:
+    """
+    Classify the pages a worker will render for model routing
+
+    Returns:
+        Mapping of page number to True for pages sent to the fast model
+    """
+    routes = {}
+    for page_num, features in worker.page_features():
+        if features is None:
+            complex_page, reason = True, "page contents unknown"
+        else:
+            complex_page, reason = classify_page(features)
+        model = config.model_name if complex_page else config.fast_model_name
+        kind = "complex" if complex_page else "simple"
+        logger.info(f"Routing page {page_num} to {model} ({kind}: {reason})")
+        routes[page_num] = not complex_page
+
+    simple = sum(routes.values())
+    logger.info(
+        f"Routed {simple} simple pages to {config.fast_model_name}, "
+        f"{len(routes) - simple} complex pages to {config.model_name}"
+    )
+    return routes
+
+
+def _throttle_count(clients: list[LLMClient]) -> int:
+    # Rate-limited requests so far, summed over the clients of a job
+    counts = (getattr(client, "throttled", 0) for client in clients)
+    return sum(count for count in counts if isinstance(count, int))
+
+
+def _log_token_usage(llm_client: LLMClient) -> None:
+    usage = getattr(llm_client, "usage", None)
+    if not isinstance(usage, TokenUsage) or not usage.requests:
+        return
+    message = (
+        f"Token usage ({llm_client.model_name}): {usage.prompt_tokens} prompt, "
+        f"{usage.completion_tokens} completion over {usage.requests} requests"
+    )
+    if usage.cached_tokens or usage.cache_write_tokens:
+        share = usage.cached_tokens / usage.prompt_tokens if usage.prompt_tokens else 0
+        message += (
+            f"; prompt cache: {usage.cached_tokens} tokens read ({share:.0%}), "
+            f"{usage.cache_write_tokens} written"
+        )
+    logger.info(message)
+
+
+def _ignore_progress(event: ProgressEvent) -> None:
+    pass
+
+
+def _convert_input_file(
+    input_path: str,
+    start_page: int,
+    end_page: int,
+    output_dir: str,
+    cleanup: bool,
+    pages: Optional[str] = None,
+    on_page: Optional[Callable[[int, str], None]] = None,
+    on_text: Optional[Callable[[int, str], None]] = None,
+    manifest: Optional[PageManifest] = None,
+    deadline: Optional[float] = None,
+    on_progress: Optional[Callable[[ProgressEvent], None]] = None,
+    on_result: Optional[Callable[[PageResult], None]] = None,
+    config: Optional["Config"] = None,
+) -> str:
+    """
+    Convert a file already staged in the output directory to Markdown
+
+    Pages are rendered lazily and up to CONCURRENCY of them are transcribed
+    at once; a page is only rendered once a slot is free. With
+    ADAPTIVE_CONCURRENCY the number of slots instead starts at CONCURRENCY
+    and follows the provider's latency and rate limits, up to
+    MAX_CONCURRENCY. Pages are
+    dispatched in page order, or with SCHEDULE=longest_first in order of
+    decreasing estimated cost. When cleanup is
+    enabled each rendered page image is deleted as soon as it has been
+    transcribed, so scratch disk usage does not grow with page count.
+    When on_page is given, each page is handed to it instead of being
+    collected, so memory use does not grow with the document either.
+    Pages whose conversion fails are set aside and retried after the main
+    pass, in up to PAGE_RETRIES rounds, so they do not hold up the other
+    pages. Once the deadline passes, no further pages are started and
+    requests in flight are abandoned. Pages still missing at the end are
+    marked in the output.
+
+    Args:
+        input_path: Path to the staged input file
+        start_page: Starting page number (1-based)
+        end_page: Ending page number (1-based, 0 means last page)
+        output_dir: Output directory holding the staged file
+        cleanup: Whether to clean up temporary files
+        pages: Page specification such as "1-3,17,40-" (overrides the range)
+        on_page: Callback receiving (0-based output index, page Markdown)
+            for every page, including pages that came back empty. Pages
+            arrive in order unless SCHEDULE is longest_first or a page had
+            to be retried.
+        on_text: Callback receiving (0-based output index, Markdown fragment)
+            while pages are streamed from the model. It is called from
+            worker threads and fragments of different pages interleave.
+        manifest: Fingerprints of the previous run. Pages whose fingerprint
+            it knows are taken from it without rendering or transcribing;
+            every page of this run is recorded in it.
+        deadline: Seconds allowed for the conversion (default: DEADLINE)
+        on_progress: Callback receiving a ProgressEvent each time a page is
+            rendered, submitted, completed, failed or retried, with the
+            counts so far and an ETA. It is called from the converting
+            thread.
+        on_result: Callback receiving the PageResult of each page once it
+            is converted, reused, failed for good or left unfinished
+        config: Config of this call (default: the process-wide config read
+            from the environment)
+
+    Returns:
+        Converted Markdown content, or an empty string when on_page is given
+
+    Raises:
+        DeadlineExceeded: If pages were unfinished at the deadline, carrying
+            the partial Markdown
+        PageConversionError: If pages still failed after their retries,
+            carrying the partial Markdown
+    """
+    config = _resolve_config(config)
+    job_deadline = Deadline(deadline if deadline is not None else config.deadline)
+    # Pages still being transcribed, which use files in output_dir
+    running: set[Future] = set()
 
     try:
         # Create file worker
-        worker = create_worker(input_path, start_page, end_page)
-
-        # Convert to images
-        img_paths = worker.convert_to_images()
-        if not img_paths:
-            raise ValueError("Failed to convert file to images")
+        with span("open document", file=os.path.basename(input_path)):
+            worker = create_worker(input_path, start_page, end_page, pages)
+        all_pages = list(worker.page_numbers)
+        tracker = ProgressTracker(len(all_pages), on_progress or _ignore_progress)
 
-        logger.info(f"Generated {len(img_paths)} images")
+        # Reuse pages whose content is unchanged since the previous run
+        fingerprints: dict[int, str] = {}
+        reused: dict[int, str] = {}
+        if manifest is not None:
+            fingerprints = dict(worker.page_fingerprints())
+            for page_num, fingerprint in fingerprints.items():
+                markdown = manifest.lookup(fingerprint)
+                if markdown is not None:
+                    reused[page_num] = markdown
+            worker.page_numbers = [n for n in all_pages if n not in reused]
+            manifest.reused = len(reused)
+            logger.info(
+                f"Reusing {len(reused)} unchanged pages, "
+                f"converting {len(worker.page_numbers)}"
+            )
 
         # Initialize LLM client
-        llm_client = LLMClient(config.model_name)
-
-        # Convert images to markdown
-        markdown_parts = []
-        for img_path in sorted(img_paths):
-            logger.info(f"Converting image: {os.path.basename(img_path)}")
-            content = convert_image_to_markdown(img_path, llm_client)
-            if content:
-                # Save individual page markdown (optional)
-                page_md_path = os.path.join(
-                    output_dir, f"{os.path.basename(img_path)}.md"
+        cassette = _create_cassette(config)
+        llm_client = _create_client(config.model_name, config, cassette)
+
+        # Send simple pages to the fast model, if one is configured
+        fast_client = None
+        routes: dict[int, bool] = {}
+        if config.fast_model_name:
+            fast_client = _create_client(config.fast_model_name, config, cassette)
+            routes = _route_pages(worker, config)
+
+        if config.tiling:
+            rendered_pages = worker.iter_page_tiles(
+                max_pixels=config.tile_max_pixels,
+                density_chars=config.tile_density_chars,
+                overlap=config.tile_overlap,
+            )
+        else:
+            rendered_pages = (
+                (page_num, [img_path]) for page_num, img_path in worker.iter_pages()
+            )
+
+        # Dispatch order: page order, or the most expensive pages first so
+        # the slowest pages do not start last and stretch the whole job
+        longest_first = config.schedule == "longest_first"
+        sequence = all_pages
+        if longest_first:
+            costs = dict(worker.page_costs())
+            dispatch = sorted(
+                worker.page_numbers, key=lambda n: costs.get(n, 0.0), reverse=True
+            )
+            worker.page_numbers = dispatch
+            sequence = [n for n in all_pages if n in reused] + dispatch
+            logger.info(f"Dispatching longest pages first: {dispatch[:10]}")
+        order = {page_num: index for index, page_num in enumerate(all_pages)}
+
+        markdown_parts: dict[int, str] = {}
+        unfinished: list[int] = []
+        # Pages failed without deferred retries, because the replayed
+        # cassette lacks their response or part of them was already shown
+        abandoned: list[int] = []
+        streamed: set[int] = set()
+        # Pages that raised, as (output index, page number), and the images
+        # of every page not yet converted
+        failed: list[tuple[int, int]] = []
+        page_images: dict[int, list[str]] = {}
+
+        def emit(index: int, content: str) -> None:
+            if on_page is not None:
+                on_page(index, content)
+            elif content:
+                markdown_parts[index] = content
+
+        # Usage, latency and retries of the pages in progress
+        page_usage: dict[int, TokenUsage] = {}
+        page_latency: dict[int, float] = {}
+        page_retries: dict[int, int] = {}
+
+        def page_client(page_num: int) -> LLMClient:
+            return fast_client if routes.get(page_num) else llm_client
+
+        def report_page(page_num: int, status: str, content: str = "") -> None:
+            usage = page_usage.pop(page_num, None) or TokenUsage()
+            latency = page_latency.pop(page_num, 0.0)
+            retries = page_retries.pop(page_num, 0)
+            if on_result is None:
+                return
+            sent = page_num in dispatched
+            on_result(
+                PageResult(
+                    page=page_num,
+                    status=status,
+                    markdown=content or None,
+                    model=page_client(page_num).model_name if sent else None,
+                    requests=usage.requests,
+                    prompt_tokens=usage.prompt_tokens,
+                    completion_tokens=usage.completion_tokens,
+                    cached_tokens=usage.cached_tokens,
+                    latency=latency,
+                    retries=retries,
                 )
-                with open(page_md_path, "w", encoding="utf-8") as f:
-                    f.write(content)
+            )
+
+        def mark_missing(index: int, page_num: int, reason: str) -> None:
+            content = UNFINISHED_PAGE.format(page_num=page_num, reason=reason)
+            if index in streamed:
+                # Part of the page was already shown
+                on_text(index, f"\n\n{content}")
+            emit(index, content)
+
+        def give_up(index: int, page_num: int, reason: str, error: Exception) -> None:
+            logger.error(f"Page {page_num} failed: {error}")
+            abandoned.append(page_num)
+            tracker.failed(page_num)
+            mark_missing(index, page_num, reason)
+            report_page(page_num, FAILED)
+
+        def collect(index: int, page_num: int, future) -> None:
+            try:
+                content = future.result(timeout=job_deadline.remaining())
+            except (DeadlineExceeded, FutureTimeoutError, CancelledError):
+                unfinished.append(page_num)
+                tracker.failed(page_num, started=page_num in dispatched)
+                mark_missing(index, page_num, "deadline exceeded")
+                report_page(page_num, UNFINISHED)
+                return
+            except Exception as e:
+                if isinstance(e, CassetteMiss):
+                    # Replaying again can never find the response
+                    give_up(index, page_num, "not in cassette", e)
+                elif index in streamed:
+                    # Text already shown cannot be withdrawn, so the page
+                    # is marked after it rather than retried
+                    give_up(index, page_num, "response interrupted", e)
+                else:
+                    logger.warning(f"Page {page_num} failed, will retry later: {e}")
+                    failed.append((index, page_num))
+                    tracker.failed(page_num)
+                return
+
+            page_images.pop(page_num, None)
+            tracker.completed(page_num, reused=page_num in reused)
+            report_page(page_num, REUSED if page_num in reused else CONVERTED, content)
+            # Empty pages are not recorded, so a blank response is retried
+            if manifest is not None and content:
+                manifest.record(page_num, fingerprints[page_num], content)
+            emit(index, content)
+
+        # Adjust the number of pages in flight to the provider's response
+        controller = None
+        if config.adaptive_concurrency:
+            controller = AdaptiveConcurrency(
+                initial=config.concurrency,
+                maximum=max(config.concurrency, config.max_concurrency),
+            )
+            tracker.controller = controller
+        clients = [client for client in (llm_client, fast_client) if client]
+
+        def window() -> int:
+            return controller.limit if controller else config.concurrency
+
+        def report(started: float, future: Future) -> None:
+            if future.cancelled() or isinstance(future.exception(), DeadlineExceeded):
+                return
+            controller.record(
+                started,
+                throttles=_throttle_count(clients),
+                failed=future.exception() is not None,
+            )
+
+        def timed_page(page_num: int, started: float, *args) -> str:
+            # Timed in the worker, so the latency is known before the result
+            try:
+                return _convert_page(page_num, *args)
+            finally:
+                page_latency[page_num] = time.monotonic() - started
+
+        def submit(page_num: int, on_fragment: Optional[Callable[[str], None]]):
+            started = time.monotonic()
+            future = executor.submit(
+                timed_page,
+                page_num,
+                started,
+                page_images[page_num],
+                page_client(page_num),
+                input_path,
+                output_dir,
+                cleanup,
+                config.tile_concurrency,
+                on_fragment,
+                job_deadline,
+                page_usage.setdefault(page_num, TokenUsage()),
+                config,
+            )
+            if controller is not None:
+                future.add_done_callback(partial(report, started))
+            running.add(future)
+            future.add_done_callback(running.discard)
+            return future
+
+        def page_text_callback(index: int) -> Optional[Callable[[str], None]]:
+            if on_text is None:
+                return None
 
-                markdown_parts.append(content)
+            def deliver(text: str) -> None:
+                streamed.add(index)
+                on_text(index, text)
+
+            return deliver
+
+        # Convert images to markdown as they are rendered, keeping at most
+        # window() pages in flight and collecting them in dispatch order
+        page_count = 0
+        in_flight: deque = deque()
+        pending_pages = deque(sequence if reused else [])
+
+        def next_index(page_num: int) -> int:
+            nonlocal page_count
+            index = order[page_num] if longest_first else page_count
+            page_count += 1
+            return index
+
+        def add_reused(before: Optional[int]) -> None:
+            # Slot reused pages in ahead of the next rendered one
+            while pending_pages and pending_pages[0] != before:
+                page_num = pending_pages.popleft()
+                future: Future = Future()
+                future.set_result(reused[page_num])
+                in_flight.append((next_index(page_num), page_num, future))
+            if pending_pages:
+                pending_pages.popleft()
+
+        executor = ThreadPoolExecutor(
+            max_workers=controller.maximum if controller else config.concurrency
+        )
+        dispatched: set[int] = set()
+        try:
+            for page_num, img_paths in rendered_pages:
+                tracker.rendered(page_num)
+                add_reused(page_num)
+                index = next_index(page_num)
+                page_images[page_num] = img_paths
+                future = submit(page_num, page_text_callback(index))
+                dispatched.add(page_num)
+                tracker.submitted(page_num)
+                in_flight.append((index, page_num, future))
+                while len(in_flight) >= window() or (
+                    in_flight and in_flight[0][2].done()
+                ):
+                    collect(*in_flight.popleft())
+                if job_deadline.expired:
+                    break
+
+            # Pages never started because the deadline passed
+            for page_num in worker.page_numbers:
+                if page_num not in dispatched:
+                    add_reused(page_num)
+                    future = Future()
+                    future.set_exception(DeadlineExceeded())
+                    in_flight.append((next_index(page_num), page_num, future))
+
+            add_reused(None)
+            while in_flight:
+                collect(*in_flight.popleft())
+
+            # Failed pages are retried only after the main pass, once rate
+            # limits or provider hiccups have had time to clear
+            for round_num in range(1, config.page_retries + 1):
+                if not failed or job_deadline.expired:
+                    break
+                retry = sorted(failed)
+                failed.clear()
+
+                delay = config.page_retry_delay * 2 ** (round_num - 1)
+                remaining = job_deadline.remaining()
+                if remaining is not None:
+                    delay = min(delay, remaining)
+                logger.info(
+                    f"Retrying {len(retry)} failed pages in {delay:g}s "
+                    f"(round {round_num}/{config.page_retries})"
+                )
+                with span("retry delay", round=round_num):
+                    time.sleep(delay)
+
+                # Retried pages are delivered whole rather than streamed
+                for index, page_num in retry:
+                    page_retries[page_num] = page_retries.get(page_num, 0) + 1
+                    in_flight.append((index, page_num, submit(page_num, None)))
+                    tracker.retried(page_num)
+                    while len(in_flight) >= window():
+                        collect(*in_flight.popleft())
+                while in_flight:
+                    collect(*in_flight.popleft())
+
+            failed_pages = sorted(abandoned + [page_num for _, page_num in failed])
+            for index, page_num in sorted(failed):
+                mark_missing(index, page_num, "conversion failed")
+                report_page(page_num, FAILED)
+        except BaseException:
+            # Interrupted or failed: pages in flight stop at their next
+            # deadline check instead of running on unobserved
+            job_deadline.cancel()
+            raise
+        finally:
+            # Requests abandoned at the deadline are not waited for
+            executor.shutdown(wait=not job_deadline.expired, cancel_futures=True)
+
+        if not page_count:
+            raise ValueError("Failed to convert file to images")
+
+        missing = sorted(unfinished + failed_pages)
+        logger.info(f"Converted {page_count - len(missing)} images")
+        _log_token_usage(llm_client)
+        if fast_client is not None:
+            _log_token_usage(fast_client)
+        if controller is not None:
+            logger.info(controller.summary())
 
         # Combine all markdown content
-        final_markdown = "\n\n".join(markdown_parts)
+        final_markdown = "\n\n".join(
+            markdown_parts[index] for index in sorted(markdown_parts)
+        )
+
+        if unfinished:
+            raise DeadlineExceeded(
+                f"Deadline exceeded with {len(missing)} of {page_count} pages "
+                f"unfinished: {', '.join(map(str, missing))}",
+                partial=final_markdown,
+                unfinished_pages=missing,
+            )
+        if failed_pages:
+            raise PageConversionError(
+                f"{len(failed_pages)} of {page_count} pages failed after "
+                f"retries: {', '.join(map(str, failed_pages))}",
+                partial=final_markdown,
+                unfinished_pages=failed_pages,
+            )
 
         logger.info("Conversion completed successfully")
         return final_markdown
 
+    except IncompleteConversionError as e:
+        logger.error(str(e))
+        raise
+
     except Exception as e:
         logger.error(f"Conversion failed: {e}")
         raise
@@ -162,19 +942,132 @@ def convert_to_markdown(
     finally:
         # Cleanup temporary files if requested
         if cleanup and output_dir.startswith("output/"):
-            try:
-                shutil.rmtree(output_dir)
-                logger.debug(f"Cleaned up temporary directory: {output_dir}")
-            except Exception as e:
-                logger.warning(f"Failed to cleanup directory {output_dir}: {e}")
+            _remove_scratch_dir(output_dir, list(running))
+
+
+def convert_to_markdown(
+    input_data: bytes,
+    start_page: int = 1,
+    end_page: int = 0,
+    input_filename: Optional[str] = None,
+    output_dir: Optional[str] = None,
+    cleanup: bool = True,
+    pages: Optional[str] = None,
+    stream: Optional[TextIO] = None,
+    deadline: Optional[float] = None,
+    on_progress: Optional[Callable[[ProgressEvent], None]] = None,
+    config: Optional["Config"] = None,
+) -> str:
+    """
+    Convert PDF or image data to Markdown format
+
+    Every setting comes from config, so one process can run conversions
+    with different models and limits side by side, each with its own
+    Config.
+
+    Args:
+        input_data: Binary file data
+        start_page: Starting page number (1-based)
+        end_page: Ending page number (1-based, 0 means last page)
+        input_filename: Original filename (for type detection)
+        output_dir: Output directory (if None, creates temporary directory)
+        cleanup: Whether to clean up temporary files
+        pages: Page specification such as "1-3,17,40-45,200-". Only the
+            listed pages are rendered and transcribed, in page order.
+            Overrides start_page and end_page.
+        stream: Text stream the Markdown is written to as the model
+            generates it. The first page in order is written token by
+            token while later pages are converted in the background.
+        deadline: Seconds allowed for the conversion (default: DEADLINE)
+        on_progress: Callback receiving a ProgressEvent each time a page is
+            rendered, submitted, completed, failed or retried, with the
+            counts so far and an ETA. It is called from the converting
+            thread.
+        config: Config of this call (default: the process-wide config read
+            from the environment)
 
+    Returns:
+        Converted Markdown content, or an empty string when streaming
 
-def convert_from_stdin() -> str:
+    Raises:
+        ValueError: If input data is invalid or unsupported
+        IncompleteConversionError: If pages were unfinished at the deadline
+            (DeadlineExceeded) or still failed after their retries
+            (PageConversionError). Its partial attribute holds the Markdown
+            of the finished pages with the missing ones marked; when
+            streaming, that was written.
+    """
+    if not input_data:
+        raise ValueError("No input data provided")
+
+    # Detect file type
+    input_ext = _resolve_input_ext(input_filename, input_data[:16])
+
+    # Create output directory
+    if output_dir is None:
+        output_dir = _default_output_dir()
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Save input data to temporary file
+    input_path = os.path.join(output_dir, f"input{input_ext}")
+    with open(input_path, "wb") as f:
+        f.write(input_data)
+
+    if stream is None:
+        return _convert_input_file(
+            input_path,
+            start_page,
+            end_page,
+            output_dir,
+            cleanup,
+            pages=pages,
+            deadline=deadline,
+            on_progress=on_progress,
+            config=config,
+        )
+
+    writer = OrderedStreamWriter(stream)
+    try:
+        _convert_input_file(
+            input_path,
+            start_page,
+            end_page,
+            output_dir,
+            cleanup,
+            pages=pages,
+            on_page=writer.finish_page,
+            on_text=writer.write_text,
+            deadline=deadline,
+            on_progress=on_progress,
+            config=config,
+        )
+    except IncompleteConversionError:
+        writer.close()
+        raise
+    writer.close()
+    return ""
+
+
+def convert_from_stdin(
+    stream: Optional[TextIO] = None,
+    pages: Optional[str] = None,
+    deadline: Optional[float] = None,
+    on_progress: Optional[Callable[[ProgressEvent], None]] = None,
+    config: Optional["Config"] = None,
+) -> str:
     """
     Convert file data from stdin to Markdown
 
+    Args:
+        stream: Text stream to write the Markdown to as it is generated
+        pages: Page specification such as "1-3,17,40-"
+        deadline: Seconds allowed for the conversion (default: DEADLINE)
+        on_progress: Callback receiving a ProgressEvent for every page event
+        config: Config of this call (default: the process-wide config read
+            from the environment)
+
     Returns:
-        Converted Markdown content
+        Converted Markdown content, or an empty string when streaming
     """
     # Read binary data from stdin
     input_data = sys.stdin.buffer.read()
@@ -186,10 +1079,26 @@ def convert_from_stdin() -> str:
     if input_filename == "<stdin>":
         input_filename = None
 
-    return convert_to_markdown(input_data, input_filename=input_filename)
+    return convert_to_markdown(
+        input_data,
+        input_filename=input_filename,
+        pages=pages,
+        stream=stream,
+        deadline=deadline,
+        on_progress=on_progress,
+        config=config,
+    )
 
 
-def convert_from_file(input_path: str, start_page: int = 1, end_page: int = 0) -> str:
+def convert_from_file(
+    input_path: str,
+    start_page: int = 1,
+    end_page: int = 0,
+    pages: Optional[str] = None,
+    deadline: Optional[float] = None,
+    on_progress: Optional[Callable[[ProgressEvent], None]] = None,
+    config: Optional["Config"] = None,
+) -> str:
     """
     Convert file to Markdown
 
@@ -197,21 +1106,452 @@ def convert_from_file(input_path: str, start_page: int = 1, end_page: int = 0) -
         input_path: Path to input file
         start_page: Starting page number
         end_page: Ending page number
+        pages: Page specification such as "1-3,17,40-" (overrides the range)
+        deadline: Seconds allowed for the conversion (default: DEADLINE)
+        on_progress: Callback receiving a ProgressEvent for every page event
+        config: Config of this call (default: the process-wide config read
+            from the environment)
 
     Returns:
         Converted Markdown content
     """
-    if not os.path.exists(input_path):
-        raise ValueError(f"Input file not found: {input_path}")
-
-    # Read file data
-    with open(input_path, "rb") as f:
-        input_data = f.read()
+    staged_path, output_dir = _stage_file(input_path)
 
-    return convert_to_markdown(
-        input_data,
+    return _convert_input_file(
+        staged_path,
         start_page=start_page,
         end_page=end_page,
-        input_filename=os.path.basename(input_path),
+        output_dir=output_dir,
         cleanup=True,
+        pages=pages,
+        deadline=deadline,
+        on_progress=on_progress,
+        config=config,
     )
+
+
+def convert_to_result(
+    input_path: str,
+    start_page: int = 1,
+    end_page: int = 0,
+    pages: Optional[str] = None,
+    deadline: Optional[float] = None,
+    on_progress: Optional[Callable[[ProgressEvent], None]] = None,
+    config: Optional["Config"] = None,
+) -> ConversionResult:
+    """
+    Convert file to per-page results instead of one Markdown string
+
+    Each page's Markdown is held once, in its record; the document is only
+    joined when ConversionResult.markdown is read. Pages that fail or are
+    unfinished at the deadline are reported in their records rather than
+    raised.
+
+    Args:
+        input_path: Path to input file
+        start_page: Starting page number
+        end_page: Ending page number
+        pages: Page specification such as "1-3,17,40-" (overrides the range)
+        deadline: Seconds allowed for the conversion (default: DEADLINE)
+        on_progress: Callback receiving a ProgressEvent for every page event
+        config: Config of this call (default: the process-wide config read
+            from the environment)
+
+    Returns:
+        ConversionResult with a PageResult per page, in page order
+    """
+    staged_path, output_dir = _stage_file(input_path)
+    result = ConversionResult()
+
+    try:
+        _convert_input_file(
+            staged_path,
+            start_page=start_page,
+            end_page=end_page,
+            output_dir=output_dir,
+            cleanup=True,
+            pages=pages,
+            # The records hold the Markdown, so it is not collected twice
+            on_page=_discard_page,
+            deadline=deadline,
+            on_progress=_observe_progress(result, on_progress),
+            on_result=result.pages.append,
+            config=config,
+        )
+    except IncompleteConversionError:
+        pass
+
+    result.pages.sort(key=lambda page: page.page)
+    return result
+
+
+def _discard_page(index: int, content: str) -> None:
+    pass
+
+
+def _observe_progress(
+    result: ConversionResult, on_progress: Optional[Callable[[ProgressEvent], None]]
+) -> Callable[[ProgressEvent], None]:
+    # Record the concurrency limit in the result, then pass the event on
+    def observe(event: ProgressEvent) -> None:
+        result.record_progress(event)
+        if on_progress is not None:
+            on_progress(event)
+
+    return observe
+
+
+def plan_files(
+    input_paths: list[str],
+    start_page: int = 1,
+    end_page: int = 0,
+    pages: Optional[str] = None,
+    config: Optional["Config"] = None,
+) -> ConversionPlan:
+    """
+    Estimate the tokens, cost and time of converting files, without
+    rendering pages or making any LLM request
+
+    Args:
+        input_paths: PDF and image files to convert
+        start_page: Starting page number
+        end_page: Ending page number
+        pages: Page specification such as "1-3,17,40-" (overrides the range)
+        config: Config of this call (default: the process-wide config read
+            from the environment)
+
+    Returns:
+        ConversionPlan for the configured models, concurrency and rate limit
+    """
+    return plan_conversion(
+        input_paths,
+        _resolve_config(config),
+        start_page=start_page,
+        end_page=end_page,
+        pages=pages,
+        prompt=SYSTEM_PROMPT + USER_PROMPT,
+    )
+
+
+def convert_to_file(
+    input_path: str,
+    output_path: str,
+    start_page: int = 1,
+    end_page: int = 0,
+    pages: Optional[str] = None,
+    manifest_path: Optional[str] = None,
+    deadline: Optional[float] = None,
+    on_progress: Optional[Callable[[ProgressEvent], None]] = None,
+    config: Optional["Config"] = None,
+) -> ConversionResult:
+    """
+    Convert file to a Markdown file, streaming pages to disk as they complete
+
+    Pages are appended to a temporary file next to output_path and the file
+    is atomically renamed into place once every page is done, so memory use
+    stays constant and an interrupted run never leaves a partial output.
+    The returned page records leave the Markdown out, as it is in the file.
+
+    Args:
+        input_path: Path to input file
+        output_path: Path of the Markdown file to write
+        start_page: Starting page number
+        end_page: Ending page number
+        pages: Page specification such as "1-3,17,40-" (overrides the range)
+        manifest_path: Page fingerprint manifest for incremental
+            reconversion. Unchanged pages recorded by the previous run are
+            reused, and the manifest is replaced once the output is written.
+        deadline: Seconds allowed for the conversion (default: DEADLINE)
+        on_progress: Callback receiving a ProgressEvent for every page event
+        config: Config of this call (default: the process-wide config read
+            from the environment)
+
+    Returns:
+        ConversionResult with the status, model, tokens and latency of each
+        page
+
+    Raises:
+        IncompleteConversionError: If pages were unfinished at the deadline
+            or still failed after their retries. The output is still
+            written, with the missing pages marked, and the exception's
+            result holds the page records.
+    """
+    manifest = PageManifest.load(manifest_path) if manifest_path else None
+    exceeded = None
+    result = ConversionResult()
+
+    def keep_record(page: PageResult) -> None:
+        result.pages.append(page._replace(markdown=None))
+
+    with MarkdownWriter(output_path) as writer:
+        staged_path, output_dir = _stage_file(input_path)
+        try:
+            _convert_input_file(
+                staged_path,
+                start_page=start_page,
+                end_page=end_page,
+                output_dir=output_dir,
+                cleanup=True,
+                pages=pages,
+                on_page=writer.write_page,
+                manifest=manifest,
+                deadline=deadline,
+                on_progress=_observe_progress(result, on_progress),
+                on_result=keep_record,
+                config=config,
+            )
+        except IncompleteConversionError as e:
+            # Keep the pages that did finish
+            exceeded = e
+
+    result.pages.sort(key=lambda page: page.page)
+    if manifest is not None:
+        manifest.save()
+    if exceeded is not None:
+        exceeded.result = result
+        raise exceeded
+    return result
+
+
+def enqueue_file(
+    db_path: str,
+    input_path: str,
+    output_path: str,
+    start_page: int = 1,
+    end_page: int = 0,
+    pages: Optional[str] = None,
+) -> int:
+    """
+    Add a file to the distributed page queue, one task per page
+
+    The input is not copied, so its path must be readable by every worker
+    host. Relative paths are stored as absolute paths.
+
+    Args:
+        db_path: Path to the SQLite queue database
+        input_path: Path to input file
+        output_path: Markdown file written when the document is assembled
+        start_page: Starting page number
+        end_page: Ending page number
+        pages: Page specification such as "1-3,17,40-" (overrides the range)
+
+    Returns:
+        Document id
+
+    Raises:
+        ValueError: If the input file is missing or unsupported
+    """
+    if not os.path.exists(input_path):
+        raise ValueError(f"Input file not found: {input_path}")
+
+    input_path = os.path.abspath(input_path)
+    worker = create_worker(input_path, start_page, end_page, pages)
+    page_numbers = list(worker.page_numbers)
+
+    queue = PageQueue(db_path)
+    return queue.enqueue(input_path, os.path.abspath(output_path), page_numbers)
+
+
+def _render_task(task: PageTask, worker, config) -> list[str]:
+    """
+    Render the page of a queue task with a worker opened on that page
+
+    Returns:
+        Image paths of the page (several when the page is tiled)
+    """
+    if config.tiling:
+        rendered = worker.iter_page_tiles(
+            max_pixels=config.tile_max_pixels,
+            density_chars=config.tile_density_chars,
+            overlap=config.tile_overlap,
+        )
+    else:
+        rendered = ((n, [path]) for n, path in worker.iter_pages())
+
+    for _, img_paths in rendered:
+        return img_paths
+    raise ValueError(f"Failed to render page {task.page_num}")
+
+
+def _keep_lease(queue: PageQueue, task: PageTask, stop: threading.Event) -> None:
+    while not stop.wait(queue.lease_seconds / 3):
+        if not queue.renew(task):
+            return
+
+
+def _queue_worker_loop(
+    queue: PageQueue,
+    worker_id: str,
+    llm_client: LLMClient,
+    fast_client: Optional[LLMClient],
+    scratch_dir: str,
+    poll_interval: float,
+    config,
+) -> int:
+    completed = 0
+    while True:
+        task = queue.claim(worker_id, max_attempts=config.page_retries + 1)
+        if task is None:
+            if not queue.has_unfinished():
+                return completed
+            # Pages are still leased by other workers and may come back
+            time.sleep(poll_interval)
+            continue
+
+        # Keep the lease alive while the page is being transcribed
+        stop = threading.Event()
+        keeper = threading.Thread(
+            target=_keep_lease, args=(queue, task, stop), daemon=True
+        )
+        keeper.start()
+        # Each task renders into its own directory, since pages of other
+        # documents, or this page's earlier attempt, use the same file names
+        task_dir = tempfile.mkdtemp(
+            prefix=f"doc{task.document_id}-{task.page_index}-", dir=scratch_dir
+        )
+        try:
+            worker = create_worker(task.input_path, pages=str(task.page_num))
+            worker.output_dir = task_dir
+            # Send simple pages to the fast model, if one is configured
+            client = llm_client
+            if fast_client is not None and _route_pages(worker, config).get(
+                task.page_num
+            ):
+                client = fast_client
+            img_paths = _render_task(task, worker, config)
+            content = _convert_page(
+                task.page_num,
+                img_paths,
+                client,
+                task.input_path,
+                task_dir,
+                True,
+                config.tile_concurrency,
+                config=config,
+            )
+        except Exception as e:
+            # Retried like the deferred rounds of file mode
+            queue.fail(
+                task,
+                str(e),
+                max_attempts=config.page_retries + 1,
+                retry_delay=config.page_retry_delay,
+            )
+            continue
+        finally:
+            stop.set()
+            keeper.join()
+            shutil.rmtree(task_dir, ignore_errors=True)
+
+        if queue.complete(task, content):
+            completed += 1
+        else:
+            logger.warning(
+                f"Discarding page {task.page_num} of document "
+                f"{task.document_id}: lease was lost"
+            )
+
+
+def run_queue_worker(
+    db_path: str,
+    worker_id: Optional[str] = None,
+    poll_interval: float = 2.0,
+    lease_seconds: float = 600.0,
+    config: Optional["Config"] = None,
+) -> int:
+    """
+    Claim and transcribe pages from the distributed queue until it drains
+
+    CONCURRENCY threads claim pages in parallel. Each page is rendered
+    straight from the original input into a private scratch directory,
+    transcribed and recorded in the queue. A page that fails is released
+    for PAGE_RETRIES more attempts, the first after PAGE_RETRY_DELAY
+    seconds and each further one after twice as long. The worker exits once
+    no page is pending or leased; pages leased by other workers are waited
+    for, since they return to the queue if their worker dies; such a lost
+    lease counts as one of the page's attempts.
+
+    Args:
+        db_path: Path to the SQLite queue database
+        worker_id: Identifier recorded with leases (default: host:pid)
+        poll_interval: Seconds to wait while other workers hold all pages
+        lease_seconds: Lease duration, renewed while a page is in progress
+        config: Config of this call (default: the process-wide config read
+            from the environment)
+
+    Returns:
+        Number of pages completed by this worker
+    """
+    config = _resolve_config(config)
+    queue = PageQueue(db_path, lease_seconds=lease_seconds)
+    cassette = _create_cassette(config)
+    llm_client = _create_client(config.model_name, config, cassette)
+    fast_client = None
+    if config.fast_model_name:
+        fast_client = _create_client(config.fast_model_name, config, cassette)
+    worker_id = worker_id or default_worker_id()
+    scratch_dir = tempfile.mkdtemp(prefix="markpdfdown-")
+
+    try:
+        with ThreadPoolExecutor(max_workers=config.concurrency) as executor:
+            futures = [
+                executor.submit(
+                    _queue_worker_loop,
+                    queue,
+                    f"{worker_id}/{slot}",
+                    llm_client,
+                    fast_client,
+                    scratch_dir,
+                    poll_interval,
+                    config,
+                )
+                for slot in range(config.concurrency)
+            ]
+            completed = sum(future.result() for future in futures)
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    logger.info(f"Worker {worker_id} completed {completed} pages")
+    _log_token_usage(llm_client)
+    if fast_client is not None:
+        _log_token_usage(fast_client)
+    return completed
+
+
+def assemble_queue(db_path: str) -> list[str]:
+    """
+    Write the Markdown of every finished, not yet assembled document
+
+    Documents with failed pages are written too, with each failed page
+    replaced by a marker, and reported once all documents are written.
+
+    Args:
+        db_path: Path to the SQLite queue database
+
+    Returns:
+        Paths of the written Markdown files
+
+    Raises:
+        PageConversionError: If pages of the assembled documents failed; its
+            unfinished_pages lists them in document order
+    """
+    queue = PageQueue(db_path)
+    output_paths = []
+    failed: list[tuple[str, list[int]]] = []
+    for document_id in queue.ready_documents():
+        output_path = queue.assemble(document_id)
+        output_paths.append(output_path)
+        failed_pages = queue.failed_pages(document_id)
+        if failed_pages:
+            failed.append((output_path, failed_pages))
+
+    if failed:
+        unfinished_pages = [page for _, pages in failed for page in pages]
+        documents = "; ".join(
+            f"{path} (pages {', '.join(map(str, pages))})" for path, pages in failed
+        )
+        raise PageConversionError(
+            f"{len(unfinished_pages)} pages failed after retries: {documents}",
+            unfinished_pages=unfinished_pages,
+        )
+    return output_paths
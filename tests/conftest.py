@@ -7,6 +7,9 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
+# Keep LiteLLM offline: never fetch the remote model cost map during tests
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
 
 @pytest.fixture
 def fixtures_dir():
@@ -44,6 +47,39 @@ def sample_pdf_path(pdfs_dir):
     return os.path.join(pdfs_dir, "input_tables.pdf")
 
 
+@pytest.fixture
+def multipage_pdf_path(tmp_path):
+    """Return the path of a generated 10-page PDF labelled "Page N" """
+    import fitz  # PyMuPDF
+
+    path = tmp_path / "multipage.pdf"
+    doc = fitz.open()
+    for page_num in range(10):
+        page = doc.new_page(width=144, height=144)
+        page.insert_text((10, 20), f"Page {page_num + 1}", fontsize=10)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+@pytest.fixture
+def make_labelled_pdf(tmp_path):
+    """Return a factory writing a PDF with one page per text label"""
+    import fitz  # PyMuPDF
+
+    def make(name, labels):
+        path = tmp_path / name
+        doc = fitz.open()
+        for label in labels:
+            page = doc.new_page(width=144, height=144)
+            page.insert_text((10, 20), label, fontsize=10)
+        doc.save(str(path))
+        doc.close()
+        return str(path)
+
+    return make
+
+
 @pytest.fixture
 def mock_llm_response():
     """Return a mock LLM response content"""
@@ -0,0 +1,138 @@
+"""
+Tests for the offline benchmark suite
+"""
+
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from benchmarks.mock_server import MockLLMServer, MockServerSettings
+from benchmarks.run import generate_pdf, percentile
+from benchmarks.transports import measure_calls, summarize
+
+
+def _post(url: str, payload: dict) -> tuple[int, dict]:
+    request = urllib.request.Request(
+        f"{url}/chat/completions",
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+class TestMockLLMServer:
+    """Tests for MockLLMServer"""
+
+    def test_returns_openai_completion(self):
+        """Test server answers with an OpenAI-style completion"""
+        settings = MockServerSettings(latency_mean=0.0, content="# Hello")
+        with MockLLMServer(settings) as server:
+            status, body = _post(server.base_url, {"model": "mock", "messages": []})
+
+        assert status == 200
+        assert body["choices"][0]["message"]["content"] == "# Hello"
+        assert body["choices"][0]["finish_reason"] == "stop"
+        assert body["usage"]["total_tokens"] > 0
+        assert server.stats.to_dict()["succeeded"] == 1
+
+    def test_stream(self):
+        """Test streaming requests are answered with server-sent events"""
+        settings = MockServerSettings(latency_mean=0.0, content="# Hello")
+        with MockLLMServer(settings) as server:
+            request = urllib.request.Request(
+                f"{server.base_url}/chat/completions",
+                data=json.dumps({"model": "mock", "stream": True}).encode("utf-8"),
+                method="POST",
+            )
+            with urllib.request.urlopen(request) as response:
+                lines = response.read().decode("utf-8").split("\n\n")
+
+        events = [line[len("data: ") :] for line in lines if line]
+        assert events[-1] == "[DONE]"
+        chunks = [json.loads(event) for event in events[:-1]]
+        text = "".join(c["choices"][0]["delta"].get("content", "") for c in chunks)
+        assert text == "# Hello"
+        assert chunks[-1]["choices"][0]["finish_reason"] == "stop"
+
+    def test_rate_limit_returns_429(self):
+        """Test injected rate limiting returns 429 with Retry-After"""
+        settings = MockServerSettings(latency_mean=0.0, rate_limit_rate=1.0)
+        with MockLLMServer(settings) as server:
+            status, _ = _post(server.base_url, {"model": "mock", "messages": []})
+
+        assert status == 429
+        assert server.stats.to_dict()["rate_limited"] == 1
+
+    def test_error_rate_returns_500(self):
+        """Test injected errors return 500"""
+        settings = MockServerSettings(latency_mean=0.0, error_rate=1.0)
+        with MockLLMServer(settings) as server:
+            status, _ = _post(server.base_url, {"model": "mock", "messages": []})
+
+        assert status == 500
+        assert server.stats.to_dict()["errors"] == 1
+
+    def test_outcomes_are_deterministic(self):
+        """Test the same seed produces the same outcome sequence"""
+
+        def outcomes():
+            settings = MockServerSettings(
+                latency_mean=0.0, error_rate=0.3, rate_limit_rate=0.2, seed=7
+            )
+            with MockLLMServer(settings) as server:
+                return [
+                    _post(server.base_url, {"model": "mock", "messages": []})[0]
+                    for _ in range(20)
+                ]
+
+        first = outcomes()
+        assert first == outcomes()
+        assert {200, 429, 500} <= set(first)
+
+    def test_requests_per_second_quota(self):
+        """Test hard requests-per-second quota rejects the excess"""
+        settings = MockServerSettings(latency_mean=0.0, rate_limit_rps=2)
+        with MockLLMServer(settings) as server:
+            statuses = [
+                _post(server.base_url, {"model": "mock", "messages": []})[0]
+                for _ in range(4)
+            ]
+
+        assert statuses.count(429) >= 1
+
+
+class TestBenchmarkHelpers:
+    """Tests for benchmark helper functions"""
+
+    def test_generate_pdf(self, tmp_path):
+        """Test synthetic PDF has the requested page count"""
+        fitz = pytest.importorskip("fitz")
+
+        path = generate_pdf(str(tmp_path / "doc.pdf"), 3)
+
+        with fitz.open(path) as doc:
+            assert len(doc) == 3
+
+    def test_percentile(self):
+        """Test percentile interpolation"""
+        values = [1.0, 2.0, 3.0, 4.0]
+        assert percentile(values, 0) == 1.0
+        assert percentile(values, 50) == 2.5
+        assert percentile(values, 100) == 4.0
+        assert percentile([], 50) == 0.0
+
+    def test_measure_calls(self, monkeypatch):
+        """Test per-call timings of the direct transport"""
+        with MockLLMServer(MockServerSettings(latency_mean=0.0)) as server:
+            monkeypatch.setenv("OPENAI_API_BASE", server.base_url)
+            seconds = measure_calls("openai", 3, stream=True)
+
+        assert len(seconds) == 3
+        assert summarize(seconds)["p50_ms"] > 0
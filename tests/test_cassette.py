@@ -0,0 +1,226 @@
+"""
+Tests for markpdfdown.core.cassette module
+"""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from markpdfdown.core.cassette import Cassette, CassetteMiss, request_fingerprint
+
+
+def _request(text="Convert this page", **overrides):
+    request = {
+        "model": "gpt-4o",
+        "messages": [
+            {"role": "system", "content": "You convert images"},
+            {"role": "user", "content": [{"type": "text", "text": text}]},
+        ],
+        "temperature": 0.3,
+        "max_tokens": 8192,
+    }
+    request.update(overrides)
+    return request
+
+
+def _response(content, finish_reason="stop"):
+    message = SimpleNamespace(content=content)
+    usage = SimpleNamespace(
+        prompt_tokens=1200,
+        completion_tokens=80,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=1024),
+    )
+    choice = SimpleNamespace(message=message, finish_reason=finish_reason)
+    return SimpleNamespace(choices=[choice], usage=usage)
+
+
+def _chunk(text, finish_reason=None, usage=None):
+    choice = SimpleNamespace(
+        delta=SimpleNamespace(content=text), finish_reason=finish_reason
+    )
+    return SimpleNamespace(choices=[choice], usage=usage)
+
+
+def _no_network(**kwargs):
+    raise AssertionError("Replay must not call the provider")
+
+
+class TestRequestFingerprint:
+    """Tests for request_fingerprint function"""
+
+    def test_transport_details_ignored(self):
+        """Test timeouts, headers and streaming do not change the fingerprint"""
+        plain = _request()
+        sent = _request(
+            timeout=30, stream=True, extra_headers={"X-Title": "MarkPDFdown"}
+        )
+
+        assert request_fingerprint(plain) == request_fingerprint(sent)
+
+    def test_cache_markers_ignored(self):
+        """Test requests with prompt-cache markers match plain ones"""
+        cached = _request()
+        cached["messages"][0]["content"] = [
+            {
+                "type": "text",
+                "text": "You convert images",
+                "cache_control": {"type": "ephemeral"},
+            }
+        ]
+        cached["messages"][1]["content"][0]["cache_control"] = {"type": "ephemeral"}
+
+        assert request_fingerprint(cached) == request_fingerprint(_request())
+
+    def test_content_changes_fingerprint(self):
+        """Test different prompts, models or limits get different fingerprints"""
+        base = request_fingerprint(_request())
+
+        assert request_fingerprint(_request("Other page")) != base
+        assert request_fingerprint(_request(model="gpt-4o-mini")) != base
+        assert request_fingerprint(_request(max_tokens=100)) != base
+
+
+class TestCassette:
+    """Tests for Cassette class"""
+
+    def test_record_then_replay(self, tmp_path):
+        """Test a recorded response is replayed without calling the provider"""
+        path = str(tmp_path / "run.cassette.gz")
+        send = MagicMock(return_value=_response("# Page 1"))
+
+        recorded = Cassette(path, mode="record").complete(send, **_request())
+        replayed = Cassette(path).complete(_no_network, **_request(timeout=5))
+
+        assert recorded is send.return_value
+        assert replayed.choices[0].message.content == "# Page 1"
+        assert replayed.choices[0].finish_reason == "stop"
+        assert replayed.usage.prompt_tokens == 1200
+        assert replayed.usage.completion_tokens == 80
+        assert replayed.usage.prompt_tokens_details.cached_tokens == 1024
+
+    def test_stream_record_then_replay(self, tmp_path):
+        """Test streamed responses are recorded whole and streamed back"""
+        path = str(tmp_path / "run.cassette.gz")
+        usage = SimpleNamespace(prompt_tokens=10, completion_tokens=40)
+        send = MagicMock(
+            return_value=iter(
+                [_chunk("# Title\n\n"), _chunk("x" * 40), _chunk(None, "stop", usage)]
+            )
+        )
+        request = _request(stream=True, stream_options={"include_usage": True})
+
+        chunks = list(Cassette(path, mode="record").complete(send, **request))
+        assert len(chunks) == 3
+
+        replayed = list(Cassette(path).complete(_no_network, **request))
+        text = "".join(c.choices[0].delta.content or "" for c in replayed)
+        assert text == "# Title\n\n" + "x" * 40
+        assert len(replayed) > 3
+        assert replayed[-1].choices[0].finish_reason == "stop"
+        assert replayed[-1].usage.completion_tokens == 40
+
+    def test_stream_and_plain_requests_interchangeable(self, tmp_path):
+        """Test a response recorded without streaming replays as a stream"""
+        path = str(tmp_path / "run.cassette.gz")
+        send = MagicMock(return_value=_response("# Page 1"))
+        Cassette(path, mode="record").complete(send, **_request())
+
+        replayed = Cassette(path).complete(_no_network, **_request(stream=True))
+
+        assert "".join(c.choices[0].delta.content or "" for c in replayed) == (
+            "# Page 1"
+        )
+
+    def test_abandoned_stream_not_recorded(self, tmp_path):
+        """Test a stream the caller stopped reading is not recorded"""
+        path = str(tmp_path / "run.cassette.gz")
+        response = MagicMock()
+        response.__iter__.return_value = iter([_chunk("first"), _chunk("second")])
+        send = MagicMock(return_value=response)
+
+        stream = Cassette(path, mode="record").complete(send, **_request(stream=True))
+        next(stream)
+        stream.close()
+
+        response.close.assert_called_once()
+        assert not (tmp_path / "run.cassette.gz").exists()
+
+    def test_repeated_requests_replayed_in_order(self, tmp_path):
+        """Test identical requests get their responses in recorded order"""
+        path = str(tmp_path / "run.cassette.gz")
+        recorder = Cassette(path, mode="record")
+        recorder.complete(MagicMock(return_value=_response("first")), **_request())
+        recorder.complete(MagicMock(return_value=_response("second")), **_request())
+
+        cassette = Cassette(path)
+        contents = [
+            cassette.complete(_no_network, **_request()).choices[0].message.content
+            for _ in range(3)
+        ]
+
+        assert contents == ["first", "second", "second"]
+
+    def test_unrecorded_request_raises(self, tmp_path):
+        """Test replaying a request that was never recorded raises"""
+        path = str(tmp_path / "run.cassette.gz")
+        Cassette(path, mode="record").complete(
+            MagicMock(return_value=_response("# Page 1")), **_request()
+        )
+
+        with pytest.raises(CassetteMiss, match="gpt-4o-mini"):
+            Cassette(path).complete(_no_network, **_request(model="gpt-4o-mini"))
+
+    def test_failed_request_not_recorded(self, tmp_path):
+        """Test provider errors are raised and leave nothing to replay"""
+        path = str(tmp_path / "run.cassette.gz")
+        send = MagicMock(side_effect=RuntimeError("API error"))
+
+        with pytest.raises(RuntimeError):
+            Cassette(path, mode="record").complete(send, **_request())
+
+        assert not (tmp_path / "run.cassette.gz").exists()
+
+    def test_recorded_latency_replayed(self, tmp_path):
+        """Test replay can take as long as the recorded request did"""
+        path = str(tmp_path / "run.cassette.gz")
+        with patch("markpdfdown.core.cassette.time.monotonic") as mock_clock:
+            mock_clock.side_effect = [100.0, 102.5]
+            Cassette(path, mode="record").complete(
+                MagicMock(return_value=_response("# Page 1")), **_request()
+            )
+
+        with patch("markpdfdown.core.cassette.time.sleep") as mock_sleep:
+            Cassette(path, latency=True).complete(_no_network, **_request())
+            mock_sleep.assert_called_once_with(2.5)
+
+            mock_sleep.reset_mock()
+            Cassette(path).complete(_no_network, **_request())
+            mock_sleep.assert_not_called()
+
+    def test_replayed_latency_past_timeout(self, tmp_path):
+        """Test a replayed request slower than its timeout times out"""
+        path = str(tmp_path / "run.cassette.gz")
+        with patch("markpdfdown.core.cassette.time.monotonic") as mock_clock:
+            mock_clock.side_effect = [100.0, 160.0]
+            Cassette(path, mode="record").complete(
+                MagicMock(return_value=_response("# Page 1")), **_request()
+            )
+
+        with patch("markpdfdown.core.cassette.time.sleep") as mock_sleep:
+            with pytest.raises(TimeoutError):
+                Cassette(path, latency=True).complete(
+                    _no_network, **_request(timeout=10)
+                )
+
+        mock_sleep.assert_called_once_with(10)
+
+    def test_missing_cassette_raises(self, tmp_path):
+        """Test replaying from a file that does not exist fails at once"""
+        with pytest.raises(FileNotFoundError):
+            Cassette(str(tmp_path / "missing.gz"))
+
+    def test_unknown_mode_raises(self, tmp_path):
+        """Test an unknown mode is rejected"""
+        with pytest.raises(ValueError, match="Unknown cassette mode"):
+            Cassette(str(tmp_path / "run.cassette.gz"), mode="rewind")
@@ -3,12 +3,16 @@ Tests for markpdfdown.cli module
 """
 
 import argparse
+import io
+import json
 import sys
 from unittest.mock import patch
 
 import pytest
 
-from markpdfdown.cli import create_parser, main, validate_args
+from markpdfdown.cli import EXIT_INCOMPLETE, create_parser, main, validate_args
+from markpdfdown.core.deadline import DeadlineExceeded
+from markpdfdown.core.errors import PageConversionError
 
 
 class TestCreateParser:
@@ -198,17 +202,410 @@ class TestValidateArgs:
         validate_args(args)
 
 
+class TestPagesArgument:
+    """Tests for the --pages option"""
+
+    def test_pages_argument(self):
+        """Test --pages argument parsing"""
+        parser = create_parser()
+        args = parser.parse_args(["--pages", "1-3,17,40-"])
+        assert args.pages == "1-3,17,40-"
+
+    def test_pages_default(self):
+        """Test --pages defaults to None"""
+        parser = create_parser()
+        args = parser.parse_args([])
+        assert args.pages is None
+
+    def test_invalid_pages_exits(self):
+        """Test malformed --pages causes exit"""
+        args = argparse.Namespace(
+            input="test.pdf", output="output.md", start=1, end=0, pages="1-x"
+        )
+        with pytest.raises(SystemExit) as exc_info:
+            validate_args(args)
+        assert exc_info.value.code == 1
+
+    def test_pages_with_range_exits(self):
+        """Test --pages combined with --start causes exit"""
+        args = argparse.Namespace(
+            input="test.pdf", output="output.md", start=2, end=0, pages="1-3"
+        )
+        with pytest.raises(SystemExit) as exc_info:
+            validate_args(args)
+        assert exc_info.value.code == 1
+
+    @patch("markpdfdown.cli.convert_to_file")
+    def test_file_mode_with_pages(self, mock_convert, tmp_path):
+        """Test --pages is passed to the conversion"""
+        input_file = tmp_path / "input.pdf"
+        output_file = tmp_path / "output.md"
+        input_file.write_bytes(b"%PDF-1.4")
+
+        with patch.object(
+            sys,
+            "argv",
+            ["markpdfdown", "-i", str(input_file), "-o", str(output_file)]
+            + ["--pages", "2,4-"],
+        ):
+            main()
+
+        assert mock_convert.call_args.kwargs["pages"] == "2,4-"
+
+
+class TestStreamArgument:
+    """Tests for the --stream option"""
+
+    def test_stream_default(self):
+        """Test --stream is off by default"""
+        parser = create_parser()
+        assert parser.parse_args([]).stream is False
+
+    def test_stream_with_input_exits(self):
+        """Test --stream is rejected in file mode"""
+        args = argparse.Namespace(
+            input="test.pdf", output="output.md", start=1, end=0, stream=True
+        )
+        with pytest.raises(SystemExit) as exc_info:
+            validate_args(args)
+        assert exc_info.value.code == 1
+
+    @patch("markpdfdown.cli.convert_from_stdin")
+    def test_pipe_mode_streams_to_stdout(self, mock_convert):
+        """Test --stream passes stdout to the conversion"""
+        mock_convert.return_value = ""
+
+        with patch.object(sys, "argv", ["markpdfdown", "--stream"]):
+            main()
+
+        mock_convert.assert_called_once_with(
+            stream=sys.stdout, pages=None, deadline=None, on_progress=None
+        )
+
+    @patch("markpdfdown.cli.convert_from_stdin")
+    def test_pipe_mode_passes_pages(self, mock_convert):
+        """Test --pages selects the pages of the piped document"""
+        mock_convert.return_value = "# Page 2"
+
+        with patch.object(sys, "argv", ["markpdfdown", "--pages", "2,4-"]):
+            main()
+
+        assert mock_convert.call_args.kwargs["pages"] == "2,4-"
+
+
+class TestIncrementalArgument:
+    """Tests for the --incremental option"""
+
+    @patch("markpdfdown.cli.convert_to_file")
+    def test_default_manifest_next_to_output(self, mock_convert, tmp_path):
+        """Test --incremental without a path uses <output>.pages.json"""
+        output = str(tmp_path / "out.md")
+        argv = ["markpdfdown", "-i", "in.pdf", "-o", output, "--incremental"]
+
+        with patch.object(sys, "argv", argv):
+            main()
+
+        assert mock_convert.call_args.kwargs["manifest_path"] == f"{output}.pages.json"
+
+    @patch("markpdfdown.cli.convert_to_file")
+    def test_explicit_manifest(self, mock_convert):
+        """Test --incremental accepts a manifest path"""
+        argv = ["markpdfdown", "-i", "in.pdf", "-o", "out.md"]
+        with patch.object(sys, "argv", argv + ["--incremental", "m.json"]):
+            main()
+
+        assert mock_convert.call_args.kwargs["manifest_path"] == "m.json"
+
+    def test_incremental_in_pipe_mode_exits(self):
+        """Test --incremental requires file mode"""
+        args = argparse.Namespace(
+            input=None, output=None, start=1, end=0, incremental=""
+        )
+        with pytest.raises(SystemExit):
+            validate_args(args)
+
+
+class TestQueueArguments:
+    """Tests for the --queue, --work and --assemble options"""
+
+    def _args(self, **kwargs):
+        values = {
+            "input": None,
+            "output": None,
+            "start": 1,
+            "end": 0,
+            "pages": None,
+            "stream": False,
+            "queue": None,
+            "work": False,
+            "assemble": False,
+        }
+        values.update(kwargs)
+        return argparse.Namespace(**values)
+
+    def test_work_without_queue_exits(self):
+        """Test --work requires --queue"""
+        with pytest.raises(SystemExit) as exc_info:
+            validate_args(self._args(work=True))
+        assert exc_info.value.code == 1
+
+    def test_queue_without_action_exits(self):
+        """Test --queue alone has nothing to do"""
+        with pytest.raises(SystemExit):
+            validate_args(self._args(queue="jobs.db"))
+
+    def test_queue_with_stream_exits(self):
+        """Test --stream cannot be used with --queue"""
+        with pytest.raises(SystemExit):
+            validate_args(self._args(queue="jobs.db", work=True, stream=True))
+
+    def test_valid_queue_args(self):
+        """Test enqueue plus work plus assemble is accepted"""
+        validate_args(
+            self._args(
+                queue="jobs.db",
+                input="a.pdf",
+                output="a.md",
+                work=True,
+                assemble=True,
+            )
+        )
+
+    @patch("markpdfdown.cli.assemble_queue")
+    @patch("markpdfdown.cli.run_queue_worker")
+    @patch("markpdfdown.cli.enqueue_file")
+    def test_queue_mode_runs_steps_in_order(
+        self, mock_enqueue, mock_work, mock_assemble
+    ):
+        """Test queue mode enqueues, works and assembles"""
+        calls = []
+        mock_enqueue.side_effect = lambda *a, **k: calls.append("enqueue") or 1
+        mock_work.side_effect = lambda *a, **k: calls.append("work") or 0
+        mock_assemble.side_effect = lambda *a, **k: calls.append("assemble") or []
+
+        argv = ["markpdfdown", "--queue", "jobs.db", "-i", "a.pdf", "-o", "a.md"]
+        with patch.object(sys, "argv", argv + ["--work", "--assemble"]):
+            main()
+
+        assert calls == ["enqueue", "work", "assemble"]
+        assert mock_enqueue.call_args.kwargs["input_path"] == "a.pdf"
+
+    @patch("markpdfdown.cli.assemble_queue")
+    def test_failed_pages_exit_status(self, mock_assemble):
+        """Test assembling documents with failed pages exits incomplete"""
+        mock_assemble.side_effect = PageConversionError(
+            "1 pages failed after retries: a.md (pages 2)", unfinished_pages=[2]
+        )
+        argv = ["markpdfdown", "--queue", "jobs.db", "--assemble"]
+        with patch.object(sys, "argv", argv):
+            with pytest.raises(SystemExit) as exc_info:
+                main()
+
+        assert exc_info.value.code == EXIT_INCOMPLETE
+
+
+class TestDeadlineArgument:
+    """Tests for the --deadline option"""
+
+    def test_deadline_default(self):
+        """Test there is no deadline by default"""
+        assert create_parser().parse_args([]).deadline is None
+
+    def test_non_positive_deadline_exits(self):
+        """Test --deadline must be positive"""
+        args = argparse.Namespace(input=None, output=None, start=1, end=0, deadline=0.0)
+        with pytest.raises(SystemExit) as exc_info:
+            validate_args(args)
+        assert exc_info.value.code == 1
+
+    @patch("markpdfdown.cli.convert_to_file")
+    def test_deadline_passed_to_conversion(self, mock_convert):
+        """Test --deadline is handed to the file conversion"""
+        argv = ["markpdfdown", "-i", "in.pdf", "-o", "out.md", "--deadline", "90"]
+        with patch.object(sys, "argv", argv):
+            main()
+
+        assert mock_convert.call_args.kwargs["deadline"] == 90.0
+
+    @patch("markpdfdown.cli.convert_to_file")
+    def test_file_mode_deadline_exit_status(self, mock_convert):
+        """Test an incomplete conversion exits with its own status"""
+        mock_convert.side_effect = DeadlineExceeded("Deadline exceeded")
+        argv = ["markpdfdown", "-i", "in.pdf", "-o", "out.md", "--deadline", "1"]
+
+        with patch.object(sys, "argv", argv):
+            with pytest.raises(SystemExit) as exc_info:
+                main()
+        assert exc_info.value.code == EXIT_INCOMPLETE
+
+    @patch("markpdfdown.cli.convert_from_stdin")
+    def test_pipe_mode_prints_partial_result(self, mock_convert, capsys):
+        """Test pipe mode prints the pages finished before the deadline"""
+        mock_convert.side_effect = DeadlineExceeded(
+            "Deadline exceeded", partial="# Page 1", unfinished_pages=[2]
+        )
+
+        with patch.object(sys, "argv", ["markpdfdown", "--deadline", "1"]):
+            with pytest.raises(SystemExit) as exc_info:
+                main()
+
+        assert exc_info.value.code == EXIT_INCOMPLETE
+        assert capsys.readouterr().out == "# Page 1\n"
+
+
+class TestDryRunArgument:
+    """Tests for the --dry-run option"""
+
+    def test_dry_run_default(self):
+        """Test conversions are not dry runs by default"""
+        assert create_parser().parse_args([]).dry_run is None
+
+    def test_dry_run_files(self):
+        """Test --dry-run takes any number of files"""
+        args = create_parser().parse_args(["--dry-run", "a.pdf", "b.pdf"])
+        assert args.dry_run == ["a.pdf", "b.pdf"]
+
+    def test_dry_run_without_output(self):
+        """Test --input does not need --output for a dry run"""
+        args = create_parser().parse_args(["-i", "a.pdf", "--dry-run"])
+        validate_args(args)
+
+    def test_dry_run_without_files_exits(self):
+        """Test a dry run needs something to plan"""
+        args = create_parser().parse_args(["--dry-run"])
+        with pytest.raises(SystemExit) as exc_info:
+            validate_args(args)
+        assert exc_info.value.code == 1
+
+    def test_dry_run_with_queue_exits(self):
+        """Test --dry-run cannot be combined with --queue"""
+        args = create_parser().parse_args(["--dry-run", "a.pdf", "--queue", "q.db"])
+        with pytest.raises(SystemExit) as exc_info:
+            validate_args(args)
+        assert exc_info.value.code == 1
+
+    @patch("markpdfdown.cli.convert_to_file")
+    @patch("markpdfdown.cli.plan_files")
+    def test_dry_run_prints_plan(self, mock_plan, mock_convert, capsys):
+        """Test a dry run prints the plan and converts nothing"""
+        from markpdfdown.core.planner import ConversionPlan
+
+        mock_plan.return_value = ConversionPlan(files=2, pages=7)
+        argv = ["markpdfdown", "-i", "a.pdf", "--dry-run", "b.pdf", "--pages", "1-3"]
+
+        with patch.object(sys, "argv", argv):
+            main()
+
+        mock_plan.assert_called_once_with(
+            ["a.pdf", "b.pdf"], start_page=1, end_page=0, pages="1-3"
+        )
+        mock_convert.assert_not_called()
+        assert "Pages:          7" in capsys.readouterr().out
+
+
+class TestTraceArgument:
+    """Tests for the --trace option"""
+
+    def test_trace_default(self):
+        """Test no trace is recorded by default"""
+        assert create_parser().parse_args([]).trace is None
+
+    @patch("markpdfdown.cli.convert_to_file")
+    def test_trace_saved(self, mock_convert, tmp_path):
+        """Test the trace is written after the conversion"""
+        from markpdfdown.core.tracing import span
+
+        def convert(**kwargs):
+            with span("page", page=1):
+                pass
+
+        mock_convert.side_effect = convert
+        trace = tmp_path / "trace.json"
+        argv = ["markpdfdown", "-i", "in.pdf", "-o", "out.md", "--trace", str(trace)]
+
+        with patch.object(sys, "argv", argv):
+            main()
+
+        events = json.loads(trace.read_text())["traceEvents"]
+        assert [event["name"] for event in events if event["ph"] == "X"] == ["page"]
+
+    @patch("markpdfdown.cli.convert_to_file")
+    def test_trace_saved_on_failure(self, mock_convert, tmp_path):
+        """Test the trace of a failed conversion is still written"""
+        mock_convert.side_effect = RuntimeError("API error")
+        trace = tmp_path / "trace.json"
+        argv = ["markpdfdown", "-i", "in.pdf", "-o", "out.md", "--trace", str(trace)]
+
+        with patch.object(sys, "argv", argv):
+            with pytest.raises(SystemExit):
+                main()
+
+        assert trace.exists()
+
+
+class TestProgressDisplay:
+    """Tests for the progress line on stderr"""
+
+    @patch("markpdfdown.cli.convert_to_file")
+    def test_progress_shown_on_terminal(self, mock_convert, monkeypatch):
+        """Test a terminal gets a progress line that ends with the last state"""
+        from markpdfdown.core.progress import ProgressDisplay, ProgressEvent
+
+        stderr = io.StringIO()
+        stderr.isatty = lambda: True
+        monkeypatch.setattr(sys, "stderr", stderr)
+
+        def convert(on_progress, **kwargs):
+            on_progress(ProgressEvent("completed", 1, 2, 1, 0, 0, 1.0, 1.0, 1.0))
+            on_progress(ProgressEvent("completed", 2, 2, 2, 0, 0, 2.0, 1.0, 0.0))
+
+        mock_convert.side_effect = convert
+        with patch.object(sys, "argv", ["markpdfdown", "-i", "a.pdf", "-o", "a.md"]):
+            main()
+
+        assert isinstance(mock_convert.call_args.kwargs["on_progress"], ProgressDisplay)
+        assert stderr.getvalue().endswith("2/2 pages, 60.0 pages/min in 2s\n")
+
+    @patch("markpdfdown.cli.convert_to_file")
+    def test_no_progress_when_redirected(self, mock_convert):
+        """Test no progress line is drawn when stderr is not a terminal"""
+        with patch.object(sys, "argv", ["markpdfdown", "-i", "a.pdf", "-o", "a.md"]):
+            main()
+
+        assert mock_convert.call_args.kwargs["on_progress"] is None
+
+
+class TestIncompleteOutput:
+    """Tests for conversions that end with pages missing"""
+
+    @patch("markpdfdown.cli.convert_to_file")
+    def test_failed_pages_exit_status(self, mock_convert):
+        """Test pages that failed after retries give a non-zero exit status"""
+        mock_convert.side_effect = PageConversionError(
+            "1 of 3 pages failed after retries: 2", unfinished_pages=[2]
+        )
+
+        with patch.object(sys, "argv", ["markpdfdown", "-i", "a.pdf", "-o", "a.md"]):
+            with pytest.raises(SystemExit) as exc_info:
+                main()
+        assert exc_info.value.code == EXIT_INCOMPLETE
+
+
 class TestMain:
     """Tests for main function"""
 
-    @patch("markpdfdown.cli.convert_from_file")
+    @patch("markpdfdown.cli.convert_to_file")
     def test_file_mode_success(self, mock_convert, tmp_path):
         """Test successful file mode conversion"""
         input_file = tmp_path / "input.pdf"
         output_file = tmp_path / "output.md"
         input_file.write_bytes(b"%PDF-1.4")
 
-        mock_convert.return_value = "# Converted Content"
+        def convert_to_file(output_path, **kwargs):
+            with open(output_path, "w", encoding="utf-8") as f:
+                f.write("# Converted Content")
+
+        mock_convert.side_effect = convert_to_file
 
         with patch.object(
             sys, "argv", ["markpdfdown", "-i", str(input_file), "-o", str(output_file)]
@@ -217,16 +614,16 @@ class TestMain:
 
         assert output_file.exists()
         assert output_file.read_text() == "# Converted Content"
+        assert mock_convert.call_args.kwargs["input_path"] == str(input_file)
+        assert mock_convert.call_args.kwargs["output_path"] == str(output_file)
 
-    @patch("markpdfdown.cli.convert_from_file")
+    @patch("markpdfdown.cli.convert_to_file")
     def test_file_mode_with_page_range(self, mock_convert, tmp_path):
         """Test file mode with page range"""
         input_file = tmp_path / "input.pdf"
         output_file = tmp_path / "output.md"
         input_file.write_bytes(b"%PDF-1.4")
 
-        mock_convert.return_value = "# Page Content"
-
         with patch.object(
             sys,
             "argv",
@@ -245,7 +642,14 @@ class TestMain:
             main()
 
         mock_convert.assert_called_once_with(
-            input_path=str(input_file), start_page=2, end_page=5
+            input_path=str(input_file),
+            output_path=str(output_file),
+            start_page=2,
+            end_page=5,
+            pages=None,
+            manifest_path=None,
+            deadline=None,
+            on_progress=None,
         )
 
     @patch("markpdfdown.cli.convert_from_stdin")
@@ -259,7 +663,7 @@ class TestMain:
         captured = capsys.readouterr()
         assert "# Pipe Content" in captured.out
 
-    @patch("markpdfdown.cli.convert_from_file")
+    @patch("markpdfdown.cli.convert_to_file")
     def test_conversion_exception_exits(self, mock_convert, tmp_path):
         """Test conversion exception causes exit"""
         input_file = tmp_path / "input.pdf"
@@ -275,7 +679,7 @@ class TestMain:
                 main()
             assert exc_info.value.code == 1
 
-    @patch("markpdfdown.cli.convert_from_file")
+    @patch("markpdfdown.cli.convert_to_file")
     def test_keyboard_interrupt_exits(self, mock_convert, tmp_path):
         """Test KeyboardInterrupt causes exit"""
         input_file = tmp_path / "input.pdf"
@@ -0,0 +1,96 @@
+"""
+Tests for markpdfdown.core.concurrency module
+"""
+
+from markpdfdown.core.concurrency import AdaptiveConcurrency
+
+
+def _healthy(controller: AdaptiveConcurrency, pages: int, latency: float = 1.0):
+    for _ in range(pages):
+        controller.record(100.0, 100.0 + latency)
+
+
+class TestAdaptiveConcurrency:
+    """Tests for AdaptiveConcurrency class"""
+
+    def test_increases_by_one_per_window(self):
+        """Test the limit grows by one after a full window of healthy pages"""
+        controller = AdaptiveConcurrency(initial=2, maximum=10)
+
+        _healthy(controller, 1)
+        assert controller.limit == 2
+        _healthy(controller, 1)
+        assert controller.limit == 3
+        _healthy(controller, 3)
+        assert controller.limit == 4
+        assert controller.increases == 2
+
+    def test_capped_at_maximum(self):
+        """Test the limit never exceeds the maximum"""
+        controller = AdaptiveConcurrency(initial=1, maximum=3)
+
+        _healthy(controller, 50)
+
+        assert controller.limit == 3
+        assert controller.peak == 3
+
+    def test_halved_when_throttled(self):
+        """Test a new rate-limit response halves the limit"""
+        controller = AdaptiveConcurrency(initial=8, maximum=16)
+
+        controller.record(100.0, 101.0, throttles=0)
+        controller.record(100.0, 101.0, throttles=1)
+
+        assert controller.limit == 4
+        assert controller.decreases == 1
+
+    def test_burst_of_throttles_counts_once(self):
+        """Test pages started before a cut do not cut the limit again"""
+        controller = AdaptiveConcurrency(initial=8, maximum=16)
+
+        controller.record(100.0, 101.0, throttles=1)
+        controller.record(100.5, 101.5, throttles=2)
+        controller.record(100.8, 101.8, failed=True)
+        assert controller.limit == 4
+
+        # A page started after the cut is throttled again
+        controller.record(102.0, 103.0, throttles=3)
+        assert controller.limit == 2
+
+    def test_never_below_minimum(self):
+        """Test repeated cuts stop at the minimum"""
+        controller = AdaptiveConcurrency(initial=4, maximum=16)
+
+        for n in range(5):
+            controller.record(100.0 + n * 2, 101.0 + n * 2, failed=True)
+
+        assert controller.limit == 1
+
+    def test_latency_spike_cuts_limit(self):
+        """Test a page far slower than the running average cuts the limit"""
+        controller = AdaptiveConcurrency(initial=4, maximum=4)
+        _healthy(controller, 10, latency=2.0)
+
+        controller.record(200.0, 210.0)
+
+        assert controller.limit == 2
+        assert controller.decreases == 1
+
+    def test_no_spike_before_enough_samples(self):
+        """Test the first pages only establish the latency baseline"""
+        controller = AdaptiveConcurrency(initial=4, maximum=4, min_samples=5)
+        _healthy(controller, 2, latency=1.0)
+
+        controller.record(200.0, 210.0)
+
+        assert controller.limit == 4
+
+    def test_summary(self):
+        """Test the summary reports the limit and its changes"""
+        controller = AdaptiveConcurrency(initial=1, maximum=4)
+        _healthy(controller, 1, latency=3.0)
+
+        assert controller.summary() == (
+            "Adaptive concurrency: final limit 2, peak 2, 1 increases, "
+            "0 decreases, average page latency 3.0s"
+        )
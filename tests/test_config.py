@@ -117,3 +117,172 @@ class TestConfigFromEnv:
 
         config = Config.from_env()
         assert config.model_name == "openrouter/anthropic/claude-3.5-sonnet"
+
+    def test_from_env_max_continuations(self, monkeypatch):
+        """Test the continuation cap is read from the environment"""
+        monkeypatch.setenv("MAX_CONTINUATIONS", "5")
+        assert Config.from_env().max_continuations == 5
+
+    def test_negative_max_continuations(self):
+        """Test max_continuations cannot be negative"""
+        with pytest.raises(ValidationError):
+            Config(model_name="gpt-4o", max_continuations=-1)
+
+    def test_from_env_concurrency(self, monkeypatch):
+        """Test page concurrency is read from the environment"""
+        monkeypatch.setenv("CONCURRENCY", "8")
+        assert Config.from_env().concurrency == 8
+
+    def test_from_env_prompt_caching(self, monkeypatch):
+        """Test prompt caching is enabled from the environment"""
+        monkeypatch.setenv("PROMPT_CACHING", "1")
+        assert Config.from_env().prompt_caching is True
+
+    def test_from_env_schedule(self, monkeypatch):
+        """Test the dispatch schedule is read from the environment"""
+        monkeypatch.setenv("SCHEDULE", "longest-first")
+        assert Config.from_env().schedule == "longest_first"
+
+    def test_from_env_transport(self, monkeypatch):
+        """Test the transport is read from the environment"""
+        assert Config.from_env().transport == "litellm"
+        monkeypatch.setenv("TRANSPORT", "OpenAI")
+        assert Config.from_env().transport == "openai"
+
+    def test_invalid_transport(self):
+        """Test unknown transports are rejected"""
+        with pytest.raises(ValidationError):
+            Config(model_name="gpt-4o", transport="grpc")
+
+    def test_from_env_fast_model_name(self, monkeypatch):
+        """Test the fast routing model is read from the environment"""
+        monkeypatch.setenv("FAST_MODEL_NAME", "gpt-4o-mini")
+        assert Config.from_env().fast_model_name == "gpt-4o-mini"
+
+    def test_fast_model_unset_by_default(self, monkeypatch):
+        """Test routing is disabled without a fast model"""
+        monkeypatch.delenv("FAST_MODEL_NAME", raising=False)
+        assert Config.from_env().fast_model_name is None
+
+    def test_from_env_time_limits(self, monkeypatch):
+        """Test request timeout and deadline are read from the environment"""
+        monkeypatch.setenv("REQUEST_TIMEOUT", "45")
+        monkeypatch.setenv("DEADLINE", "120.5")
+        config = Config.from_env()
+        assert config.request_timeout == 45.0
+        assert config.deadline == 120.5
+
+    def test_time_limits_unset_by_default(self, monkeypatch):
+        """Test there are no time limits unless configured"""
+        monkeypatch.delenv("REQUEST_TIMEOUT", raising=False)
+        monkeypatch.delenv("DEADLINE", raising=False)
+        config = Config.from_env()
+        assert config.request_timeout is None
+        assert config.deadline is None
+
+    def test_from_env_host_limits(self, monkeypatch):
+        """Test host-wide request limits are read from the environment"""
+        monkeypatch.setenv("REQUESTS_PER_MINUTE", "500")
+        monkeypatch.setenv("MAX_CONCURRENT_REQUESTS", "8")
+        monkeypatch.setenv("RATE_LIMIT_DB", "/tmp/limits.db")
+        config = Config.from_env()
+        assert config.requests_per_minute == 500.0
+        assert config.max_concurrent_requests == 8
+        assert config.rate_limit_db == "/tmp/limits.db"
+
+    def test_host_limits_unset_by_default(self, monkeypatch):
+        """Test requests are not limited across processes unless configured"""
+        monkeypatch.delenv("REQUESTS_PER_MINUTE", raising=False)
+        monkeypatch.delenv("MAX_CONCURRENT_REQUESTS", raising=False)
+        config = Config.from_env()
+        assert config.requests_per_minute is None
+        assert config.max_concurrent_requests is None
+
+    def test_from_env_adaptive_concurrency(self, monkeypatch):
+        """Test adaptive concurrency settings are read from the environment"""
+        monkeypatch.setenv("ADAPTIVE_CONCURRENCY", "true")
+        monkeypatch.setenv("MAX_CONCURRENCY", "32")
+        config = Config.from_env()
+        assert config.adaptive_concurrency is True
+        assert config.max_concurrency == 32
+
+    def test_from_env_cassette(self, monkeypatch):
+        """Test cassette settings are read from the environment"""
+        monkeypatch.setenv("CASSETTE", "run.cassette.gz")
+        monkeypatch.setenv("CASSETTE_MODE", "Record")
+        monkeypatch.setenv("CASSETTE_LATENCY", "1")
+        config = Config.from_env()
+        assert config.cassette == "run.cassette.gz"
+        assert config.cassette_mode == "record"
+        assert config.cassette_latency is True
+
+    def test_invalid_cassette_mode(self):
+        """Test unknown cassette modes are rejected"""
+        with pytest.raises(ValidationError):
+            Config(model_name="gpt-4o", cassette_mode="rewind")
+
+    def test_invalid_deadline(self):
+        """Test non-positive deadlines are rejected"""
+        with pytest.raises(ValidationError):
+            Config(model_name="gpt-4o", deadline=0)
+
+    def test_from_env_page_retries(self, monkeypatch):
+        """Test the deferred retry budget is read from the environment"""
+        monkeypatch.setenv("PAGE_RETRIES", "3")
+        monkeypatch.setenv("PAGE_RETRY_DELAY", "0.5")
+        config = Config.from_env()
+        assert config.page_retries == 3
+        assert config.page_retry_delay == 0.5
+
+    def test_invalid_schedule(self):
+        """Test unknown schedules are rejected"""
+        with pytest.raises(ValidationError):
+            Config(model_name="gpt-4o", schedule="random")
+
+    def test_from_env_tiling(self, monkeypatch):
+        """Test tiling options are read from the environment"""
+        monkeypatch.setenv("TILING", "true")
+        monkeypatch.setenv("TILE_MAX_PIXELS", "2048")
+        monkeypatch.setenv("TILE_DENSITY_CHARS", "0")
+        monkeypatch.setenv("TILE_OVERLAP", "0.1")
+        monkeypatch.setenv("TILE_CONCURRENCY", "2")
+
+        config = Config.from_env()
+        assert config.tiling is True
+        assert config.tile_max_pixels == 2048
+        assert config.tile_density_chars == 0
+        assert config.tile_overlap == 0.1
+        assert config.tile_concurrency == 2
+
+    def test_tiling_disabled_by_default(self, monkeypatch):
+        """Test tiling is off unless explicitly enabled"""
+        monkeypatch.delenv("TILING", raising=False)
+        assert Config.from_env().tiling is False
+
+    def test_invalid_tile_overlap(self):
+        """Test tile_overlap must stay below half a tile"""
+        with pytest.raises(ValidationError):
+            Config(model_name="gpt-4o", tile_overlap=0.5)
+
+
+class TestGetConfig:
+    """Tests for the lazily created global configuration"""
+
+    def test_get_config_is_cached(self):
+        """Test get_config returns the same instance on every call"""
+        from markpdfdown.config import get_config
+
+        assert get_config() is get_config()
+
+    def test_module_config_attribute(self):
+        """Test the legacy module-level config attribute still resolves"""
+        from markpdfdown import config as config_module
+
+        assert config_module.config is config_module.get_config()
+
+    def test_unknown_attribute_raises(self):
+        """Test unknown module attributes raise AttributeError"""
+        from markpdfdown import config as config_module
+
+        with pytest.raises(AttributeError):
+            config_module.not_a_setting  # noqa: B018
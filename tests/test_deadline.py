@@ -0,0 +1,56 @@
+"""
+Tests for markpdfdown.core.deadline module
+"""
+
+import time
+
+import pytest
+
+from markpdfdown.core.deadline import Deadline, DeadlineExceeded
+
+
+class TestDeadline:
+    """Tests for Deadline class"""
+
+    def test_no_limit(self):
+        """Test a deadline without seconds never expires"""
+        deadline = Deadline()
+
+        assert not deadline.expired
+        assert deadline.remaining() is None
+        assert deadline.timeout() is None
+        assert deadline.timeout(30) == 30
+
+    def test_timeout_capped_by_time_left(self):
+        """Test requests get the shorter of their timeout and the time left"""
+        deadline = Deadline(10)
+
+        assert 9 < deadline.timeout() <= 10
+        assert deadline.timeout(2) == 2
+        assert 9 < deadline.timeout(60) <= 10
+
+    def test_expired_deadline_raises(self):
+        """Test no request may start once the deadline passed"""
+        deadline = Deadline(0.01)
+        time.sleep(0.02)
+
+        assert deadline.expired
+        assert deadline.remaining() == 0.0
+        with pytest.raises(DeadlineExceeded):
+            deadline.timeout(30)
+
+    def test_cancel_expires_immediately(self):
+        """Test cancelling expires a deadline, even one without a limit"""
+        deadline = Deadline()
+        deadline.cancel()
+
+        assert deadline.expired
+        assert deadline.remaining() == 0.0
+
+    def test_exception_carries_partial_result(self):
+        """Test DeadlineExceeded is a TimeoutError holding the partial output"""
+        error = DeadlineExceeded("late", partial="# A", unfinished_pages=(2, 3))
+
+        assert isinstance(error, TimeoutError)
+        assert error.partial == "# A"
+        assert error.unfinished_pages == [2, 3]
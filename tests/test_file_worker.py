@@ -12,9 +12,38 @@ from markpdfdown.core.file_worker import (
     ImageWorker,
     PDFWorker,
     create_worker,
+    extract_page_image,
+    plan_tiles,
 )
 
 
+class TestFileWorker:
+    """Tests for FileWorker base class"""
+
+    def test_page_fingerprints_required(self, sample_image_path):
+        """Test workers must implement page_fingerprints"""
+
+        class Incomplete(FileWorker):
+            def iter_pages(self, **kwargs):
+                yield 1, self.input_path
+
+        with pytest.raises(TypeError, match="page_fingerprints"):
+            Incomplete(sample_image_path)
+
+    def test_page_image_sizes_required(self, sample_image_path):
+        """Test workers must implement page_image_sizes"""
+
+        class Incomplete(FileWorker):
+            def iter_pages(self, **kwargs):
+                yield 1, self.input_path
+
+            def page_fingerprints(self):
+                return [(1, "")]
+
+        with pytest.raises(TypeError, match="page_image_sizes"):
+            Incomplete(sample_image_path)
+
+
 class TestImageWorker:
     """Tests for ImageWorker class"""
 
@@ -155,52 +184,429 @@ class TestCreateWorker:
         assert isinstance(worker, ImageWorker)
 
 
-class TestPDFWorkerExtractPages:
-    """Tests for PDFWorker _extract_pages method"""
+class TestPDFWorkerPageSelection:
+    """Tests for PDFWorker page range and page specification handling"""
 
-    def test_extract_pages_creates_new_pdf(self, sample_pdf_path, tmp_path):
-        """Test _extract_pages creates new PDF file"""
-        worker = PDFWorker(sample_pdf_path, start_page=1, end_page=1)
+    def test_range_renders_from_original_file(self, multipage_pdf_path):
+        """Test a page range is rendered without extracting a new PDF"""
+        worker = PDFWorker(multipage_pdf_path, start_page=3, end_page=5)
+
+        assert worker.input_path == multipage_pdf_path
+        assert list(worker.page_numbers) == [3, 4, 5]
+
+    def test_page_spec_selects_sparse_pages(self, multipage_pdf_path):
+        """Test a page specification selects exactly the listed pages"""
+        worker = PDFWorker(multipage_pdf_path, pages="1-2,5,8-")
+
+        assert worker.page_numbers == [1, 2, 5, 8, 9, 10]
+        assert worker.start_page == 1
+        assert worker.end_page == 10
+
+    def test_page_spec_overrides_range(self, multipage_pdf_path):
+        """Test pages takes precedence over start_page/end_page"""
+        worker = PDFWorker(multipage_pdf_path, start_page=1, end_page=2, pages="7")
+        assert worker.page_numbers == [7]
+
+    def test_page_spec_out_of_range_raises(self, multipage_pdf_path):
+        """Test a page beyond the document raises ValueError"""
+        with pytest.raises(ValueError, match="exceeds total pages"):
+            PDFWorker(multipage_pdf_path, pages="2,11")
+
+    def test_iter_pages_labels_original_page_numbers(
+        self, multipage_pdf_path, tmp_path
+    ):
+        """Test rendered images carry their original page numbers"""
+        worker = PDFWorker(multipage_pdf_path, pages="2,9")
         worker.output_dir = str(tmp_path)
 
-        # Check that extracted file was created
-        assert os.path.exists(worker.input_path)
+        rendered = list(worker.iter_pages(dpi=36, fmt="png"))
 
-    def test_extract_pages_with_exception(self, sample_pdf_path, tmp_path, monkeypatch):
-        """Test _extract_pages handles exception gracefully"""
-        # Create worker first
-        worker = PDFWorker(sample_pdf_path)
+        assert [page for page, _ in rendered] == [2, 9]
+        assert [os.path.basename(path) for _, path in rendered] == [
+            "page_0002.png",
+            "page_0009.png",
+        ]
+        assert all(os.path.exists(path) for _, path in rendered)
+
+    def test_create_worker_passes_page_spec(self, multipage_pdf_path):
+        """Test create_worker forwards the page specification"""
+        worker = create_worker(multipage_pdf_path, pages="4-5")
+        assert worker.page_numbers == [4, 5]
+
+
+def _make_pdf(path, width, height, lines=0):
+    import fitz  # PyMuPDF
+
+    doc = fitz.open()
+    page = doc.new_page(width=width, height=height)
+    for line in range(lines):
+        page.insert_text((10, 12 + line * 4), "x" * 60, fontsize=3)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+class TestPlanTiles:
+    """Tests for plan_tiles function"""
+
+    def test_small_page_not_tiled(self, tmp_path):
+        """Test a page within the limits needs no tiles"""
+        import fitz
+
+        with fitz.open(_make_pdf(tmp_path / "a.pdf", 144, 144)) as doc:
+            assert plan_tiles(doc[0], dpi=72, max_pixels=200) == []
+
+    def test_oversized_page_split_into_bands(self, tmp_path):
+        """Test a page larger than max_pixels is split into full-width bands"""
+        import fitz
+
+        with fitz.open(_make_pdf(tmp_path / "a.pdf", 300, 500)) as doc:
+            page = doc[0]
+            clips = plan_tiles(page, dpi=72, max_pixels=200, overlap=0.1)
+
+            # 300 x 500 pixels hold 3.75 squares of 200 x 200: 4 bands,
+            # top to bottom, overlapping but inside the page
+            assert len(clips) == 4
+            assert all(clip.width == page.rect.width for clip in clips)
+            assert all(a.y0 < b.y0 < a.y1 for a, b in zip(clips, clips[1:]))
+            assert all(page.rect.contains(clip) for clip in clips)
+
+    def test_wide_table_rows_kept_whole(self, tmp_path):
+        """Test a landscape page with a wide table keeps every row in a tile"""
+        import fitz
+
+        rows = [
+            " ".join(f"r{row}c{col}" for col in range(1, 13)) for row in range(1, 25)
+        ]
+        doc = fitz.open()
+        page = doc.new_page(width=842, height=595)
+        for index, text in enumerate(rows):
+            y = 40 + index * 22
+            page.insert_text((20, y), text, fontsize=11)
+            page.draw_line((15, y + 6), (827, y + 6))
+        path = str(tmp_path / "wide.pdf")
+        doc.save(path)
+        doc.close()
+
+        with fitz.open(path) as doc:
+            page = doc[0]
+            # 3508 x 2480 pixels at 300 DPI, wider than max_pixels
+            clips = plan_tiles(page, dpi=300, max_pixels=2048)
+
+            assert len(clips) == 3
+            assert all(clip.width == page.rect.width for clip in clips)
+            for text in rows:
+                first, last = text.split()[0], text.split()[-1]
+                assert any(
+                    first in page.get_text("text", clip=clip)
+                    and last in page.get_text("text", clip=clip)
+                    for clip in clips
+                )
+
+    def test_dense_page_split_into_bands(self, tmp_path):
+        """Test a page with a dense text layer is split into horizontal bands"""
+        import fitz
+
+        with fitz.open(_make_pdf(tmp_path / "a.pdf", 300, 300, lines=60)) as doc:
+            page = doc[0]
+            clips = plan_tiles(page, dpi=72, max_pixels=4096, density_chars=1500)
+
+            assert len(clips) == 3
+            assert all(clip.width == page.rect.width for clip in clips)
+
+    def test_density_disabled(self, tmp_path):
+        """Test density_chars=0 ignores the text layer"""
+        import fitz
+
+        with fitz.open(_make_pdf(tmp_path / "a.pdf", 300, 300, lines=60)) as doc:
+            assert plan_tiles(doc[0], dpi=72, max_pixels=4096) == []
+
+
+class TestPDFWorkerPageTiles:
+    """Tests for PDFWorker iter_page_tiles method"""
+
+    def test_tiles_named_after_page(self, tmp_path):
+        """Test tiled pages yield one image per tile in reading order"""
+        worker = PDFWorker(_make_pdf(tmp_path / "a.pdf", 144, 288))
+        worker.output_dir = str(tmp_path / "out")
+
+        rendered = list(worker.iter_page_tiles(dpi=72, fmt="png", max_pixels=150))
+
+        assert len(rendered) == 1
+        page_num, paths = rendered[0]
+        assert page_num == 1
+        assert [os.path.basename(path) for path in paths] == [
+            "page_0001_tile_01.png",
+            "page_0001_tile_02.png",
+        ]
+        assert all(os.path.exists(path) for path in paths)
+
+    def test_untiled_page_rendered_whole(self, multipage_pdf_path, tmp_path):
+        """Test pages within the limits are rendered as in iter_pages"""
+        worker = PDFWorker(multipage_pdf_path, pages="3")
         worker.output_dir = str(tmp_path)
 
-        # Mock PyPDF2.PdfWriter to raise exception
-        def mock_writer_init(*args, **kwargs):
-            raise Exception("Write error")
+        rendered = list(worker.iter_page_tiles(dpi=36, fmt="png"))
 
-        import PyPDF2
+        assert rendered == [(3, [os.path.join(str(tmp_path), "page_0003.png")])]
 
-        monkeypatch.setattr(PyPDF2, "PdfWriter", mock_writer_init)
+    def test_image_worker_yields_single_tile(self, sample_image_path):
+        """Test workers without tiling support yield whole pages"""
+        worker = ImageWorker(sample_image_path)
+        assert list(worker.iter_page_tiles()) == [(1, [sample_image_path])]
 
-        # Call _extract_pages which should return empty string on error
-        result = worker._extract_pages()
-        assert result == ""
 
-    def test_extract_pages_failure_uses_original_file(
-        self, sample_pdf_path, monkeypatch
-    ):
-        """Test when extraction fails, original file is used"""
-        original_path = sample_pdf_path
+class TestPageFingerprints:
+    """Tests for page fingerprinting"""
 
-        # Mock _extract_pages to return empty string (failure)
-        def mock_extract_pages(self):
-            return ""
+    def test_unchanged_pages_keep_fingerprints(self, make_labelled_pdf):
+        """Test identical pages match across revisions even when moved"""
+        old = PDFWorker(make_labelled_pdf("v1.pdf", ["A", "B", "C"]))
+        new = PDFWorker(make_labelled_pdf("v2.pdf", ["A", "New", "B", "C*"]))
 
-        monkeypatch.setattr(PDFWorker, "_extract_pages", mock_extract_pages)
+        old_prints = dict(old.page_fingerprints())
+        new_prints = dict(new.page_fingerprints())
 
-        # Create worker with page range that would trigger extraction
-        worker = PDFWorker(sample_pdf_path, start_page=1, end_page=1)
+        assert new_prints[1] == old_prints[1]
+        assert new_prints[3] == old_prints[2]
+        assert new_prints[2] not in old_prints.values()
+        assert new_prints[4] != old_prints[3]
+
+    def test_fingerprints_follow_page_selection(self, multipage_pdf_path):
+        """Test only the selected pages are fingerprinted, in order"""
+        worker = PDFWorker(multipage_pdf_path, pages="2,7")
+        assert [page for page, _ in worker.page_fingerprints()] == [2, 7]
+
+    def test_image_fingerprint(self, sample_image_path, tmp_path):
+        """Test image fingerprints hash the file contents"""
+        copy = tmp_path / "copy.png"
+        copy.write_bytes(open(sample_image_path, "rb").read())
+
+        assert (
+            ImageWorker(sample_image_path).page_fingerprints()
+            == ImageWorker(str(copy)).page_fingerprints()
+        )
+
+
+class TestPageCosts:
+    """Tests for page cost estimation"""
+
+    def test_dense_text_costs_more(self, tmp_path):
+        """Test pages with more text are estimated as more expensive"""
+        import fitz
+
+        path = tmp_path / "doc.pdf"
+        doc = fitz.open()
+        for lines in [1, 40, 5]:
+            page = doc.new_page(width=300, height=300)
+            for line in range(lines):
+                page.insert_text((10, 12 + line * 7), "word " * 10, fontsize=6)
+        doc.save(str(path))
+        doc.close()
+
+        costs = dict(PDFWorker(str(path)).page_costs())
+        assert costs[2] > costs[3] > costs[1]
+
+    def test_scanned_page_costed_by_ink(self, tmp_path):
+        """Test pages without a text layer are costed from ink coverage"""
+        import fitz
+
+        path = tmp_path / "scan.pdf"
+        doc = fitz.open()
+        doc.new_page(width=300, height=300)
+        page = doc.new_page(width=300, height=300)
+        page.draw_rect(fitz.Rect(0, 0, 300, 150), color=(0, 0, 0), fill=(0, 0, 0))
+        doc.save(str(path))
+        doc.close()
+
+        costs = dict(PDFWorker(str(path)).page_costs(ink_chars=1000))
+        assert costs[1] == 0
+        assert 400 <= costs[2] <= 600
+
+    def test_image_worker_costs_uniform(self, sample_image_path):
+        """Test workers without estimates rate pages equally"""
+        assert ImageWorker(sample_image_path).page_costs() == [(1, 0.0)]
+
+
+class TestPageImageSizes:
+    """Tests for computing render sizes without rendering"""
+
+    def test_pdf_pages_at_dpi(self, multipage_pdf_path):
+        """Test page sizes follow the page geometry and resolution"""
+        worker = PDFWorker(multipage_pdf_path, pages="2-3")
+        assert worker.page_image_sizes(dpi=144) == [
+            (2, [(288, 288)]),
+            (3, [(288, 288)]),
+        ]
+
+    def test_tiled_pages(self, multipage_pdf_path):
+        """Test tiled pages report each tile"""
+        worker = PDFWorker(multipage_pdf_path, pages="1")
+        [(page_num, sizes)] = worker.page_image_sizes(max_pixels=300)
+        assert page_num == 1
+        # Full-width bands holding about as many pixels as a 300 x 300 tile
+        assert len(sizes) == 4
+        assert all(width == 600 and height <= 180 for width, height in sizes)
+
+    def test_image_size(self, sample_image_path):
+        """Test images report their pixel size"""
+        import fitz
+
+        pix = fitz.Pixmap(sample_image_path)
+        assert ImageWorker(sample_image_path).page_image_sizes() == [
+            (1, [(pix.width, pix.height)])
+        ]
+
+
+class TestPageFeatures:
+    """Tests for page feature extraction"""
+
+    def test_pdf_features_per_selected_page(self, multipage_pdf_path):
+        """Test features are extracted for the selected pages only"""
+        worker = PDFWorker(multipage_pdf_path)
+        worker.page_numbers = [2, 5]
+
+        features = worker.page_features()
+
+        assert [page_num for page_num, _ in features] == [2, 5]
+        assert all(f.text_chars == len("PageN") for _, f in features)
+
+    def test_image_worker_features_unknown(self, sample_image_path):
+        """Test workers without a text layer report no features"""
+        assert ImageWorker(sample_image_path).page_features() == [(1, None)]
+
+
+def _image_bytes(width, height, fmt="jpeg"):
+    import fitz  # PyMuPDF
+
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, width, height), 0)
+    pix.clear_with(180)
+    return pix.tobytes(fmt)
+
+
+def _make_scan(path, image, pages=1, edit=None):
+    """Write a PDF whose pages are a single full-page image"""
+    import fitz  # PyMuPDF
+
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page(width=300, height=400)
+        page.insert_image(page.rect, stream=image)
+        if edit is not None:
+            edit(page)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+class TestEmbeddedImagePassthrough:
+    """Tests for sending the embedded image of scanned pages as stored"""
+
+    def _pages(self, pdf_path, tmp_path, **kwargs):
+        worker = PDFWorker(pdf_path)
+        worker.output_dir = str(tmp_path / "pages")
+        return list(worker.iter_pages(**kwargs))
+
+    def test_scanned_page_passed_through(self, tmp_path):
+        """Test a full-page JPEG is written byte for byte"""
+        image = _image_bytes(600, 800)
+        pdf_path = _make_scan(tmp_path / "scan.pdf", image, pages=2)
+
+        pages = self._pages(pdf_path, tmp_path)
+
+        assert [os.path.basename(path) for _, path in pages] == [
+            "page_0001.jpg",
+            "page_0002.jpg",
+        ]
+        with open(pages[0][1], "rb") as f:
+            assert f.read() == image
+
+    def test_png_keeps_its_format(self, tmp_path):
+        """Test embedded PNG images are passed through as PNG"""
+        pdf_path = _make_scan(tmp_path / "scan.pdf", _image_bytes(600, 800, "png"))
+
+        [(_, path)] = self._pages(pdf_path, tmp_path)
+
+        assert path.endswith("page_0001.png")
+
+    def test_ocr_text_layer_allowed(self, tmp_path):
+        """Test an invisible OCR text layer does not prevent passthrough"""
+        image = _image_bytes(600, 800)
+        pdf_path = _make_scan(
+            tmp_path / "scan.pdf",
+            image,
+            edit=lambda page: page.insert_text((10, 20), "OCR text", render_mode=3),
+        )
+
+        [(_, path)] = self._pages(pdf_path, tmp_path)
+
+        with open(path, "rb") as f:
+            assert f.read() == image
+
+    @pytest.mark.parametrize(
+        "edit",
+        [
+            lambda page: page.insert_text((10, 20), "APPROVED"),
+            lambda page: page.draw_line((0, 200), (300, 200)),
+            lambda page: page.add_text_annot((50, 50), "note"),
+            lambda page: page.set_rotation(90),
+        ],
+        ids=["visible text", "drawing", "annotation", "rotation"],
+    )
+    def test_overlays_rendered(self, tmp_path, edit):
+        """Test pages with anything on top of the image are rendered"""
+        import fitz  # PyMuPDF
+
+        pdf_path = _make_scan(tmp_path / "scan.pdf", _image_bytes(600, 800), edit=edit)
+
+        with fitz.open(pdf_path) as doc:
+            assert extract_page_image(doc.load_page(0)) is None
+
+    def test_partial_image_rendered(self, tmp_path):
+        """Test an image covering only part of the page is rendered"""
+        import fitz  # PyMuPDF
+
+        path = tmp_path / "figure.pdf"
+        doc = fitz.open()
+        page = doc.new_page(width=300, height=400)
+        page.insert_image(fitz.Rect(0, 0, 300, 200), stream=_image_bytes(600, 400))
+        doc.save(str(path))
+        doc.close()
+
+        with fitz.open(str(path)) as doc:
+            assert extract_page_image(doc.load_page(0)) is None
+
+    def test_oversized_image_rendered(self, tmp_path):
+        """Test images larger than the rendered page are downsampled"""
+        # 300pt at 300 DPI renders 1250px wide
+        pdf_path = _make_scan(tmp_path / "scan.pdf", _image_bytes(2500, 3334))
+
+        [(_, path)] = self._pages(pdf_path, tmp_path)
+
+        import fitz  # PyMuPDF
+
+        assert fitz.Pixmap(path).width == 1250
+
+    def test_passthrough_disabled(self, tmp_path):
+        """Test passthrough=False always renders the page"""
+        image = _image_bytes(600, 800)
+        pdf_path = _make_scan(tmp_path / "scan.pdf", image)
+
+        [(_, path)] = self._pages(pdf_path, tmp_path, passthrough=False)
+
+        with open(path, "rb") as f:
+            assert f.read() != image
+
+    def test_untiled_page_passed_through_by_tiling(self, tmp_path):
+        """Test iter_page_tiles passes through scans that need no tiles"""
+        image = _image_bytes(600, 800)
+        worker = PDFWorker(_make_scan(tmp_path / "scan.pdf", image))
+        worker.output_dir = str(tmp_path / "pages")
+
+        [(_, [path])] = list(worker.iter_page_tiles())
 
-        # Should still have the original path since extraction "failed"
-        assert worker.input_path == original_path
+        with open(path, "rb") as f:
+            assert f.read() == image
 
 
 class TestPDFWorkerConvertToImages:
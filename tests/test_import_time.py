@@ -0,0 +1,60 @@
+"""
+Import-time regression tests for the CLI entry point
+"""
+
+import json
+import subprocess
+import sys
+import time
+
+# Modules that may only be imported once a conversion actually runs
+HEAVY_MODULES = ["litellm", "fitz", "pymupdf", "PyPDF2", "dotenv", "pydantic"]
+
+# Startup cost allowed on top of a bare interpreter, in seconds
+IMPORT_BUDGET_SECONDS = 0.5
+
+
+def _run(code: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+
+
+def _best_of(args: list[str], runs: int = 3) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(args, capture_output=True, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+class TestImportTime:
+    """Tests that the CLI starts without loading heavy dependencies"""
+
+    def test_cli_import_skips_heavy_modules(self):
+        """Test importing the package and CLI does not import heavy modules"""
+        result = _run(
+            "import json, sys\n"
+            "import markpdfdown, markpdfdown.cli\n"
+            f"heavy = {HEAVY_MODULES!r}\n"
+            "print(json.dumps([m for m in heavy if m in sys.modules]))"
+        )
+        assert json.loads(result.stdout) == []
+
+    def test_convert_to_markdown_still_importable(self):
+        """Test the lazily exported API resolves on attribute access"""
+        result = _run(
+            "from markpdfdown import convert_to_markdown\n"
+            "print(convert_to_markdown.__module__)"
+        )
+        assert result.stdout.strip() == "markpdfdown.main"
+
+    def test_version_within_budget(self):
+        """Test --version stays within the startup budget"""
+        baseline = _best_of([sys.executable, "-c", "pass"])
+        elapsed = _best_of([sys.executable, "-m", "markpdfdown", "--version"])
+
+        assert elapsed - baseline < IMPORT_BUDGET_SECONDS, (
+            f"--version took {elapsed - baseline:.3f}s over interpreter startup"
+        )
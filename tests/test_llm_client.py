@@ -8,7 +8,10 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
-from markpdfdown.core.llm_client import LLMClient
+from markpdfdown.core.cassette import Cassette, CassetteMiss
+from markpdfdown.core.deadline import Deadline, DeadlineExceeded
+from markpdfdown.core.llm_client import LLMClient, TokenUsage
+from markpdfdown.core.rate_limit import HostRateLimiter
 
 
 class TestLLMClientInit:
@@ -25,6 +28,45 @@ class TestLLMClientInit:
         assert client.model_name == "openrouter/anthropic/claude-3.5-sonnet"
 
 
+class TestLLMClientConfig:
+    """Tests for request settings taken from a client's Config"""
+
+    def test_model_from_config(self):
+        """Test the model defaults to the config's"""
+        from markpdfdown.config import Config
+
+        client = LLMClient(config=Config(model_name="gpt-4o-mini"))
+        assert client.model_name == "gpt-4o-mini"
+
+    def test_model_required(self):
+        """Test a client needs a model name or a config"""
+        with pytest.raises(ValueError, match="model name or a config"):
+            LLMClient()
+
+    def test_config_settings_used(self, mock_litellm_completion):
+        """Test requests use the config's settings unless the call sets them"""
+        from markpdfdown.config import Config
+
+        config = Config(temperature=0.9, max_tokens=100, request_timeout=12)
+        client = LLMClient("gpt-4o", config=config)
+
+        client.completion("Hello")
+        kwargs = mock_litellm_completion.call_args.kwargs
+        assert (kwargs["temperature"], kwargs["max_tokens"]) == (0.9, 100)
+        assert kwargs["timeout"] == 12
+
+        client.completion("Hello", temperature=0.0)
+        assert mock_litellm_completion.call_args.kwargs["temperature"] == 0.0
+
+    def test_defaults_without_config(self, mock_litellm_completion):
+        """Test clients without a config keep the built-in defaults"""
+        LLMClient("gpt-4o").completion("Hello")
+
+        kwargs = mock_litellm_completion.call_args.kwargs
+        assert (kwargs["temperature"], kwargs["max_tokens"]) == (0.3, 8192)
+        assert kwargs["timeout"] is None
+
+
 class TestLLMClientCompletion:
     """Tests for LLMClient.completion method"""
 
@@ -64,6 +106,22 @@ class TestLLMClientCompletion:
         assert user_content[1]["type"] == "image_url"
         assert "base64" in user_content[1]["image_url"]["url"]
 
+    def test_image_mime_type_from_extension(self, mock_litellm_completion, tmp_path):
+        """Test images are labelled with their real MIME type"""
+        png_path = tmp_path / "page_0001.png"
+        png_path.write_bytes(b"png")
+        jpg_path = tmp_path / "page_0002.jpg"
+        jpg_path.write_bytes(b"jpg")
+
+        client = LLMClient("gpt-4o")
+        client.completion("Describe", image_paths=[str(png_path), str(jpg_path)])
+
+        user_content = mock_litellm_completion.call_args.kwargs["messages"][0][
+            "content"
+        ]
+        assert user_content[1]["image_url"]["url"].startswith("data:image/png;base64,")
+        assert user_content[2]["image_url"]["url"].startswith("data:image/jpeg;base64,")
+
     def test_completion_with_multiple_images(self, mock_litellm_completion, images_dir):
         """Test completion with multiple images"""
         image_paths = [
@@ -143,6 +201,418 @@ class TestLLMClientCompletion:
                     client.completion("Hello", retry_times=1)
 
 
+def _response(content, finish_reason="stop"):
+    response = MagicMock()
+    response.choices = [MagicMock()]
+    response.choices[0].message.content = content
+    response.choices[0].finish_reason = finish_reason
+    return response
+
+
+class TestLLMClientContinuation:
+    """Tests for continuing responses truncated by max_tokens"""
+
+    def test_truncated_response_continued(self):
+        """Test a truncated response is continued and the parts joined"""
+        with patch("markpdfdown.core.llm_client.completion") as mock_completion:
+            mock_completion.side_effect = [
+                _response("# Title\n\nFirst half", "length"),
+                _response(" second half", "stop"),
+            ]
+
+            client = LLMClient("gpt-4o")
+            result = client.completion("Hello", max_continuations=2)
+
+        assert result == "# Title\n\nFirst half second half"
+        assert mock_completion.call_count == 2
+
+        messages = mock_completion.call_args.kwargs["messages"]
+        assert messages[-2] == {
+            "role": "assistant",
+            "content": "# Title\n\nFirst half",
+        }
+        assert messages[-1]["role"] == "user"
+
+    def test_continuations_capped(self):
+        """Test no more than max_continuations follow-up requests are made"""
+        with patch("markpdfdown.core.llm_client.completion") as mock_completion:
+            mock_completion.side_effect = [_response("x", "length")] * 5
+
+            client = LLMClient("gpt-4o")
+            result = client.completion("Hello", max_continuations=2)
+
+        assert result == "xxx"
+        assert mock_completion.call_count == 3
+
+    def test_continuation_disabled_by_default(self):
+        """Test truncated output is returned as is without max_continuations"""
+        with patch("markpdfdown.core.llm_client.completion") as mock_completion:
+            mock_completion.return_value = _response("partial", "length")
+
+            client = LLMClient("gpt-4o")
+            assert client.completion("Hello") == "partial"
+
+        mock_completion.assert_called_once()
+
+    def test_complete_response_not_continued(self):
+        """Test a response that finished normally is not continued"""
+        with patch("markpdfdown.core.llm_client.completion") as mock_completion:
+            mock_completion.return_value = _response("done", "stop")
+
+            client = LLMClient("gpt-4o")
+            assert client.completion("Hello", max_continuations=3) == "done"
+
+        mock_completion.assert_called_once()
+
+
+def _chunk(text, finish_reason=None):
+    chunk = MagicMock()
+    chunk.choices = [MagicMock()]
+    chunk.choices[0].delta.content = text
+    chunk.choices[0].finish_reason = finish_reason
+    return chunk
+
+
+class TestLLMClientCompletionStream:
+    """Tests for LLMClient.completion_stream method"""
+
+    def test_stream_yields_fragments(self):
+        """Test fragments are yielded as they arrive"""
+        with patch("markpdfdown.core.llm_client.completion") as mock_completion:
+            mock_completion.return_value = iter(
+                [_chunk("# Ti"), _chunk("tle"), _chunk(None, "stop")]
+            )
+
+            client = LLMClient("gpt-4o")
+            fragments = list(client.completion_stream("Hello"))
+
+        assert fragments == ["# Ti", "tle"]
+        assert mock_completion.call_args.kwargs["stream"] is True
+
+    def test_stream_retries_before_first_fragment(self):
+        """Test a request failing before any text arrives is retried"""
+        with patch("markpdfdown.core.llm_client.completion") as mock_completion:
+            mock_completion.side_effect = [
+                Exception("API Error"),
+                iter([_chunk("ok", "stop")]),
+            ]
+
+            client = LLMClient("gpt-4o")
+            with patch("markpdfdown.core.llm_client.time.sleep"):
+                fragments = list(client.completion_stream("Hello", retry_times=2))
+
+        assert fragments == ["ok"]
+        assert mock_completion.call_count == 2
+
+    def test_stream_error_after_text_raises(self):
+        """Test a failure mid-stream is raised instead of retried"""
+
+        def broken_stream():
+            yield _chunk("partial")
+            raise Exception("Connection reset")
+
+        with patch("markpdfdown.core.llm_client.completion") as mock_completion:
+            mock_completion.return_value = broken_stream()
+
+            client = LLMClient("gpt-4o")
+            stream = client.completion_stream("Hello", retry_times=3)
+            assert next(stream) == "partial"
+            with pytest.raises(Exception, match="Connection reset"):
+                next(stream)
+
+        mock_completion.assert_called_once()
+
+    def test_stream_continues_truncated_response(self):
+        """Test a truncated stream is continued with the partial output"""
+        with patch("markpdfdown.core.llm_client.completion") as mock_completion:
+            mock_completion.side_effect = [
+                iter([_chunk("first", "length")]),
+                iter([_chunk(" second", "stop")]),
+            ]
+
+            client = LLMClient("gpt-4o")
+            result = "".join(client.completion_stream("Hello", max_continuations=1))
+
+        assert result == "first second"
+        messages = mock_completion.call_args.kwargs["messages"]
+        assert messages[-2] == {"role": "assistant", "content": "first"}
+
+
+class TestLLMClientPromptCaching:
+    """Tests for prompt-prefix caching and token usage reporting"""
+
+    def test_cache_markers_on_static_prefix(
+        self, mock_litellm_completion, sample_image_path
+    ):
+        """Test system prompt and instruction text carry cache-control markers"""
+        client = LLMClient("gpt-4o")
+        client.completion(
+            "Instructions",
+            system_prompt="System",
+            image_paths=[sample_image_path],
+            cache_prompt=True,
+        )
+
+        system, user = mock_litellm_completion.call_args.kwargs["messages"]
+        assert system["content"] == [
+            {
+                "type": "text",
+                "text": "System",
+                "cache_control": {"type": "ephemeral"},
+            }
+        ]
+        assert user["content"][0]["cache_control"] == {"type": "ephemeral"}
+        assert user["content"][1]["type"] == "image_url"
+        assert "cache_control" not in user["content"][1]
+
+    def test_no_markers_by_default(self, mock_litellm_completion):
+        """Test messages keep their plain layout without cache_prompt"""
+        client = LLMClient("gpt-4o")
+        client.completion("Instructions", system_prompt="System")
+
+        system, user = mock_litellm_completion.call_args.kwargs["messages"]
+        assert system["content"] == "System"
+        assert "cache_control" not in user["content"][0]
+
+    def test_openai_cached_tokens_counted(self):
+        """Test cached tokens reported in prompt_tokens_details are summed"""
+        with patch("markpdfdown.core.llm_client.completion") as mock_completion:
+            response = _response("ok")
+            response.usage = MagicMock(
+                spec=["prompt_tokens", "completion_tokens", "prompt_tokens_details"],
+                prompt_tokens=1200,
+                completion_tokens=300,
+            )
+            response.usage.prompt_tokens_details.cached_tokens = 1024
+            mock_completion.return_value = response
+
+            client = LLMClient("gpt-4o")
+            client.completion("Hello", cache_prompt=True)
+            client.completion("Hello", cache_prompt=True)
+
+        assert client.usage == TokenUsage(
+            requests=2, prompt_tokens=2400, completion_tokens=600, cached_tokens=2048
+        )
+
+    def test_call_usage_counted_separately(self):
+        """Test a call's usage is also added to the TokenUsage passed in"""
+        with patch("markpdfdown.core.llm_client.completion") as mock_completion:
+            response = _response("ok")
+            response.usage = MagicMock(
+                spec=["prompt_tokens", "completion_tokens"],
+                prompt_tokens=1000,
+                completion_tokens=200,
+            )
+            mock_completion.return_value = response
+
+            client = LLMClient("gpt-4o")
+            page = TokenUsage()
+            client.completion("Hello", usage=page)
+            client.completion("Hello")
+
+        assert page == TokenUsage(requests=1, prompt_tokens=1000, completion_tokens=200)
+        assert client.usage.requests == 2
+
+    def test_anthropic_cache_tokens_counted(self):
+        """Test Anthropic-style cache read and write counts are summed"""
+        usage = MagicMock(
+            spec=[
+                "prompt_tokens",
+                "completion_tokens",
+                "cache_read_input_tokens",
+                "cache_creation_input_tokens",
+            ],
+            prompt_tokens=1500,
+            completion_tokens=100,
+            cache_read_input_tokens=0,
+            cache_creation_input_tokens=1100,
+        )
+        total = TokenUsage()
+        total.add(usage)
+        usage.cache_read_input_tokens = 1100
+        usage.cache_creation_input_tokens = 0
+        total.add(usage)
+
+        assert total.cached_tokens == 1100
+        assert total.cache_write_tokens == 1100
+        assert total.prompt_tokens == 3000
+
+    def test_stream_requests_usage_when_caching(self):
+        """Test streamed requests ask for and record usage with cache_prompt"""
+        final = _chunk(None, "stop")
+        final.usage = MagicMock(
+            spec=["prompt_tokens", "completion_tokens", "cache_read_input_tokens"],
+            prompt_tokens=10,
+            completion_tokens=2,
+            cache_read_input_tokens=8,
+        )
+        with patch("markpdfdown.core.llm_client.completion") as mock_completion:
+            mock_completion.return_value = iter([_chunk("ok"), final])
+
+            client = LLMClient("gpt-4o")
+            list(client.completion_stream("Hello", cache_prompt=True))
+
+        assert mock_completion.call_args.kwargs["stream_options"] == {
+            "include_usage": True
+        }
+        assert client.usage.cached_tokens == 8
+
+
+class TestLLMClientTimeouts:
+    """Tests for request timeouts and job deadlines"""
+
+    def test_request_timeout_passed(self):
+        """Test the request timeout is handed to the provider call"""
+        with patch("markpdfdown.core.llm_client.completion") as mock_completion:
+            mock_completion.return_value = _response("ok")
+
+            LLMClient("gpt-4o").completion("Hello", timeout=30)
+
+        assert mock_completion.call_args.kwargs["timeout"] == 30
+
+    def test_timeout_capped_by_deadline(self):
+        """Test requests get no more than the time left until the deadline"""
+        with patch("markpdfdown.core.llm_client.completion") as mock_completion:
+            mock_completion.return_value = _response("ok")
+
+            LLMClient("gpt-4o").completion("Hello", timeout=300, deadline=Deadline(5))
+
+        assert 0 < mock_completion.call_args.kwargs["timeout"] <= 5
+
+    def test_expired_deadline_sends_nothing(self):
+        """Test no request is made once the deadline has passed"""
+        deadline = Deadline()
+        deadline.cancel()
+
+        with patch("markpdfdown.core.llm_client.completion") as mock_completion:
+            with pytest.raises(DeadlineExceeded):
+                LLMClient("gpt-4o").completion("Hello", deadline=deadline)
+
+        mock_completion.assert_not_called()
+
+    def test_failure_at_deadline_not_retried(self):
+        """Test a request timing out at the deadline is not retried"""
+        deadline = Deadline()
+
+        def time_out(**kwargs):
+            deadline.cancel()
+            raise TimeoutError("Request timed out")
+
+        with patch("markpdfdown.core.llm_client.completion") as mock_completion:
+            mock_completion.side_effect = time_out
+            with pytest.raises(DeadlineExceeded):
+                LLMClient("gpt-4o").completion(
+                    "Hello", retry_times=3, deadline=deadline
+                )
+
+        mock_completion.assert_called_once()
+
+    def test_stream_abandoned_at_deadline(self):
+        """Test a stream stops being read once the deadline passes"""
+        deadline = Deadline()
+        response = MagicMock()
+        response.__iter__.return_value = iter(
+            [_chunk("first"), _chunk("second"), _chunk(None, "stop")]
+        )
+
+        with patch("markpdfdown.core.llm_client.completion") as mock_completion:
+            mock_completion.return_value = response
+
+            stream = LLMClient("gpt-4o").completion_stream("Hello", deadline=deadline)
+            assert next(stream) == "first"
+            deadline.cancel()
+            with pytest.raises(DeadlineExceeded):
+                next(stream)
+
+        response.close.assert_called_once()
+
+    def test_rate_limit_slot_held_per_request(self):
+        """Test every request waits for a host-wide rate limit slot"""
+        limiter = MagicMock()
+
+        with patch("markpdfdown.core.llm_client.completion") as mock_completion:
+            mock_completion.return_value = _response("ok")
+
+            LLMClient("gpt-4o", rate_limiter=limiter).completion(
+                "Hello", deadline=Deadline(5)
+            )
+
+        limiter.slot.assert_called_once()
+        assert isinstance(limiter.slot.call_args.args[0], Deadline)
+        limiter.slot.return_value.__exit__.assert_called_once()
+
+    def test_rate_limit_wait_past_deadline(self, tmp_path):
+        """Test a request still waiting for a slot at the deadline is dropped"""
+        limiter = HostRateLimiter(
+            str(tmp_path / "limits.db"), "gpt-4o", requests_per_minute=1
+        )
+        limiter.acquire()
+
+        with patch("markpdfdown.core.llm_client.completion") as mock_completion:
+            with pytest.raises(DeadlineExceeded):
+                LLMClient("gpt-4o", rate_limiter=limiter).completion(
+                    "Hello", retry_times=3, deadline=Deadline(0.5)
+                )
+
+        mock_completion.assert_not_called()
+
+    def test_rate_limit_responses_counted(self):
+        """Test requests rejected with HTTP 429 are counted"""
+        throttled = Exception("Rate limit exceeded")
+        throttled.status_code = 429
+
+        with patch("markpdfdown.core.llm_client.completion") as mock_completion:
+            mock_completion.side_effect = [
+                throttled,
+                Exception("Server error"),
+                _response("ok"),
+            ]
+            with patch("markpdfdown.core.llm_client.time.sleep"):
+                client = LLMClient("gpt-4o")
+                client.completion("Hello", retry_times=3)
+
+        assert client.throttled == 1
+
+
+class TestLLMClientCassette:
+    """Tests for recording and replaying responses"""
+
+    def test_replay_without_provider(self, tmp_path, sample_image_path):
+        """Test a recorded conversion is replayed with no provider calls"""
+        path = str(tmp_path / "run.cassette.gz")
+        with patch("markpdfdown.core.llm_client.completion") as mock_completion:
+            mock_completion.return_value = _response("# Page 1")
+            recorder = LLMClient("gpt-4o", cassette=Cassette(path, mode="record"))
+            recorder.completion("Convert", image_paths=[sample_image_path])
+
+        with patch("markpdfdown.core.llm_client.completion") as mock_completion:
+            client = LLMClient("gpt-4o", cassette=Cassette(path))
+            result = client.completion("Convert", image_paths=[sample_image_path])
+            streamed = "".join(
+                client.completion_stream("Convert", image_paths=[sample_image_path])
+            )
+
+        mock_completion.assert_not_called()
+        assert result == streamed == "# Page 1"
+
+    def test_replay_miss_not_retried(self, tmp_path):
+        """Test an unrecorded request fails at once instead of being retried"""
+        path = str(tmp_path / "run.cassette.gz")
+        with patch("markpdfdown.core.llm_client.completion") as mock_completion:
+            mock_completion.return_value = _response("# Page 1")
+            LLMClient("gpt-4o", cassette=Cassette(path, mode="record")).completion(
+                "Convert"
+            )
+
+        with patch("markpdfdown.core.llm_client.time.sleep") as mock_sleep:
+            with pytest.raises(CassetteMiss):
+                LLMClient("gpt-4o", cassette=Cassette(path)).completion(
+                    "Something else", retry_times=3
+                )
+
+        mock_sleep.assert_not_called()
+
+
 class TestLLMClientEncodeImage:
     """Tests for LLMClient._encode_image method"""
 
@@ -2,16 +2,25 @@
 Tests for markpdfdown.main module
 """
 
+import gzip
+import io
 import os
+import threading
+import time
 from unittest.mock import MagicMock, patch
 
 import pytest
 
 from markpdfdown.main import (
+    assemble_queue,
     convert_from_file,
     convert_from_stdin,
     convert_image_to_markdown,
+    convert_tiles_to_markdown,
+    convert_to_file,
     convert_to_markdown,
+    enqueue_file,
+    run_queue_worker,
 )
 
 
@@ -38,6 +47,46 @@ class TestConvertImageToMarkdown:
         call_kwargs = mock_client.completion.call_args.kwargs
         assert call_kwargs["image_paths"] == [sample_image_path]
 
+    def test_convert_image_passes_prompt_caching(self, sample_image_path, monkeypatch):
+        """Test the prompt caching setting is forwarded to the client"""
+        from markpdfdown.config import Config
+
+        config = Config(model_name="gpt-4o", prompt_caching=True)
+        monkeypatch.setattr("markpdfdown.config.get_config", lambda: config)
+        mock_client = MagicMock()
+        mock_client.completion.return_value = "# Content"
+
+        convert_image_to_markdown(sample_image_path, mock_client)
+
+        assert mock_client.completion.call_args.kwargs["cache_prompt"] is True
+
+    def test_convert_image_passes_request_timeout(self, sample_image_path, monkeypatch):
+        """Test the request timeout and job deadline reach the client"""
+        from markpdfdown.config import Config
+        from markpdfdown.core.deadline import Deadline
+
+        config = Config(model_name="gpt-4o", request_timeout=30)
+        monkeypatch.setattr("markpdfdown.config.get_config", lambda: config)
+        mock_client = MagicMock()
+        mock_client.completion.return_value = "# Content"
+        deadline = Deadline(60)
+
+        convert_image_to_markdown(sample_image_path, mock_client, deadline=deadline)
+
+        call_kwargs = mock_client.completion.call_args.kwargs
+        assert call_kwargs["timeout"] == 30
+        assert call_kwargs["deadline"] is deadline
+
+    def test_convert_image_deadline_propagates(self, sample_image_path):
+        """Test a page abandoned at the deadline is not mistaken for empty"""
+        from markpdfdown.core.deadline import DeadlineExceeded
+
+        mock_client = MagicMock()
+        mock_client.completion.side_effect = DeadlineExceeded()
+
+        with pytest.raises(DeadlineExceeded):
+            convert_image_to_markdown(sample_image_path, mock_client)
+
     def test_convert_image_failure_returns_empty(self, sample_image_path):
         """Test conversion failure returns empty string"""
         mock_client = MagicMock()
@@ -47,6 +96,53 @@ class TestConvertImageToMarkdown:
 
         assert result == ""
 
+    def test_convert_image_failure_raised_on_request(self, sample_image_path):
+        """Test raise_errors surfaces the failure instead of an empty page"""
+        mock_client = MagicMock()
+        mock_client.completion.side_effect = Exception("API Error")
+
+        with pytest.raises(Exception, match="API Error"):
+            convert_image_to_markdown(sample_image_path, mock_client, raise_errors=True)
+
+    def test_streamed_page_kept_after_late_failure(self, sample_image_path):
+        """Test a stream failing after text was shown returns that text"""
+
+        def broken_stream(**kwargs):
+            yield "# Partial"
+            raise Exception("Connection reset")
+
+        mock_client = MagicMock()
+        mock_client.completion_stream.side_effect = broken_stream
+        fragments = []
+
+        result = convert_image_to_markdown(
+            sample_image_path, mock_client, on_text=fragments.append
+        )
+
+        assert result == "# Partial"
+        assert fragments == ["# Partial"]
+
+    def test_streamed_late_failure_raised_on_request(self, sample_image_path):
+        """Test raise_errors surfaces a stream failing after text was shown"""
+
+        def broken_stream(**kwargs):
+            yield "# Partial"
+            raise Exception("Connection reset")
+
+        mock_client = MagicMock()
+        mock_client.completion_stream.side_effect = broken_stream
+        fragments = []
+
+        with pytest.raises(Exception, match="Connection reset"):
+            convert_image_to_markdown(
+                sample_image_path,
+                mock_client,
+                on_text=fragments.append,
+                raise_errors=True,
+            )
+
+        assert fragments == ["# Partial"]
+
     def test_convert_image_removes_markdown_wrap(self, sample_image_path):
         """Test markdown wrapper is removed from response"""
         mock_client = MagicMock()
@@ -77,7 +173,7 @@ class TestConvertToMarkdown:
         """Test converting PNG image"""
         # Setup mock worker
         mock_worker = MagicMock()
-        mock_worker.convert_to_images.return_value = [str(tmp_path / "image.png")]
+        mock_worker.iter_pages.return_value = [(1, str(tmp_path / "image.png"))]
         mock_create_worker.return_value = mock_worker
 
         # Setup mock LLM client
@@ -106,7 +202,7 @@ class TestConvertToMarkdown:
     ):
         """Test conversion uses filename extension"""
         mock_worker = MagicMock()
-        mock_worker.convert_to_images.return_value = [str(tmp_path / "image.png")]
+        mock_worker.iter_pages.return_value = [(1, str(tmp_path / "image.png"))]
         mock_create_worker.return_value = mock_worker
 
         mock_llm = MagicMock()
@@ -135,9 +231,9 @@ class TestConvertToMarkdown:
         (tmp_path / "page_002.png").write_bytes(b"\x89PNG" + b"\x00" * 100)
 
         mock_worker = MagicMock()
-        mock_worker.convert_to_images.return_value = [
-            str(tmp_path / "page_001.png"),
-            str(tmp_path / "page_002.png"),
+        mock_worker.iter_pages.return_value = [
+            (1, str(tmp_path / "page_001.png")),
+            (2, str(tmp_path / "page_002.png")),
         ]
         mock_create_worker.return_value = mock_worker
 
@@ -161,7 +257,7 @@ class TestConvertToMarkdown:
     def test_empty_images_raises(self, mock_create_worker, mock_llm_class, tmp_path):
         """Test empty images list raises ValueError"""
         mock_worker = MagicMock()
-        mock_worker.convert_to_images.return_value = []
+        mock_worker.iter_pages.return_value = []
         mock_create_worker.return_value = mock_worker
 
         png_data = b"\x89\x50\x4e\x47" + b"\x00" * 100
@@ -176,11 +272,12 @@ class TestConvertToMarkdown:
     @patch("markpdfdown.main.create_worker")
     @patch("markpdfdown.main.shutil.rmtree")
     def test_cleanup_removes_directory(
-        self, mock_rmtree, mock_create_worker, mock_llm_class, tmp_path
+        self, mock_rmtree, mock_create_worker, mock_llm_class, tmp_path, monkeypatch
     ):
         """Test cleanup=True removes output directory"""
+        monkeypatch.chdir(tmp_path)
         mock_worker = MagicMock()
-        mock_worker.convert_to_images.return_value = [str(tmp_path / "image.png")]
+        mock_worker.iter_pages.return_value = [(1, str(tmp_path / "image.png"))]
         mock_create_worker.return_value = mock_worker
 
         mock_llm = MagicMock()
@@ -202,11 +299,12 @@ class TestConvertToMarkdown:
     @patch("markpdfdown.main.create_worker")
     @patch("markpdfdown.main.shutil.rmtree")
     def test_cleanup_handles_exception(
-        self, mock_rmtree, mock_create_worker, mock_llm_class, tmp_path
+        self, mock_rmtree, mock_create_worker, mock_llm_class, tmp_path, monkeypatch
     ):
         """Test cleanup exception is handled gracefully"""
+        monkeypatch.chdir(tmp_path)
         mock_worker = MagicMock()
-        mock_worker.convert_to_images.return_value = [str(tmp_path / "image.png")]
+        mock_worker.iter_pages.return_value = [(1, str(tmp_path / "image.png"))]
         mock_create_worker.return_value = mock_worker
 
         mock_llm = MagicMock()
@@ -227,6 +325,1328 @@ class TestConvertToMarkdown:
         assert "# Content" in result
 
 
+class TestConvertPageSelection:
+    """Tests for sparse page selection through convert_to_markdown"""
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_only_listed_pages_transcribed(
+        self, mock_llm_class, multipage_pdf_path, tmp_path
+    ):
+        """Test exactly the listed pages are rendered and transcribed"""
+        transcribed = []
+
+        def completion(image_paths, **kwargs):
+            name = os.path.basename(image_paths[0])
+            transcribed.append(name)
+            return f"# {name}"
+
+        mock_llm_class.return_value.completion.side_effect = completion
+
+        with open(multipage_pdf_path, "rb") as f:
+            pdf_data = f.read()
+
+        result = convert_to_markdown(
+            pdf_data,
+            pages="2,5-6,9-",
+            output_dir=str(tmp_path / "out"),
+            cleanup=False,
+        )
+
+        expected = ["page_0002", "page_0005", "page_0006", "page_0009", "page_0010"]
+        assert transcribed == [f"{name}.jpg" for name in expected]
+        assert result == "\n\n".join(f"# {name}.jpg" for name in expected)
+
+
+class TestConvertTiles:
+    """Tests for transcribing tiled pages"""
+
+    def test_tiles_transcribed_concurrently_and_stitched(self):
+        """Test tiles run in parallel but are stitched in reading order"""
+        import threading
+        import time
+
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def completion(image_paths, user_message, **kwargs):
+            with lock:
+                active.append(image_paths[0])
+                peak.append(len(active))
+            # Later tiles finish first
+            time.sleep(0.05 * (4 - int(image_paths[0][-1])))
+            with lock:
+                active.remove(image_paths[0])
+            assert "region" in user_message
+            return f"Tile {image_paths[0][-1]}"
+
+        mock_client = MagicMock()
+        mock_client.completion.side_effect = completion
+
+        result = convert_tiles_to_markdown(
+            ["tile1", "tile2", "tile3"], mock_client, max_workers=3
+        )
+
+        assert result == "Tile 1\n\nTile 2\n\nTile 3"
+        assert max(peak) > 1
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_tiling_enabled_from_config(self, mock_llm_class, monkeypatch, tmp_path):
+        """Test tiled pages are converted and their tile images cleaned up"""
+        import fitz
+
+        from markpdfdown.config import Config
+
+        pdf_path = tmp_path / "tall.pdf"
+        doc = fitz.open()
+        doc.new_page(width=100, height=2000)
+        doc.save(str(pdf_path))
+        doc.close()
+
+        config = Config(model_name="gpt-4o", tiling=True, tile_max_pixels=5000)
+        monkeypatch.setattr("markpdfdown.config.get_config", lambda: config)
+        mock_llm_class.return_value.completion.side_effect = (
+            lambda image_paths, **kwargs: os.path.basename(image_paths[0])
+        )
+
+        output_dir = tmp_path / "out"
+        result = convert_to_markdown(
+            pdf_path.read_bytes(), output_dir=str(output_dir), cleanup=False
+        )
+
+        # 2000pt at 300 DPI is about 8300px, so the page becomes two tiles
+        assert result == "page_0001_tile_01.jpg\n\npage_0001_tile_02.jpg"
+        assert os.path.exists(output_dir / "page_0001_tiles.md")
+        assert sorted(n for n in os.listdir(output_dir) if n.endswith(".jpg")) == [
+            "page_0001_tile_01.jpg",
+            "page_0001_tile_02.jpg",
+        ]
+
+
+class TestConcurrentConversion:
+    """Tests for transcribing several pages at once"""
+
+    @pytest.fixture
+    def concurrent_config(self, monkeypatch):
+        from markpdfdown.config import Config
+
+        config = Config(model_name="gpt-4o", concurrency=4)
+        monkeypatch.setattr("markpdfdown.config.get_config", lambda: config)
+        return config
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_pages_converted_concurrently_in_order(
+        self, mock_llm_class, concurrent_config, multipage_pdf_path, tmp_path
+    ):
+        """Test pages overlap in flight but are returned in page order"""
+        import time
+
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def completion(image_paths, **kwargs):
+            name = os.path.basename(image_paths[0])
+            with lock:
+                active.append(name)
+                peak.append(len(active))
+            # Earlier pages take longer than later ones
+            time.sleep(0.02 * (11 - int(name[5:9])) / 10)
+            with lock:
+                active.remove(name)
+            return f"# {name}"
+
+        mock_llm_class.return_value.completion.side_effect = completion
+
+        with open(multipage_pdf_path, "rb") as f:
+            result = convert_to_markdown(
+                f.read(), output_dir=str(tmp_path / "out"), cleanup=False
+            )
+
+        expected = [f"# page_{n:04d}.jpg" for n in range(1, 11)]
+        assert result == "\n\n".join(expected)
+        assert 1 < max(peak) <= concurrent_config.concurrency
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_stream_writes_pages_in_order(
+        self, mock_llm_class, concurrent_config, multipage_pdf_path, tmp_path
+    ):
+        """Test streamed output is ordered and stripped of code fences"""
+
+        def completion_stream(image_paths, **kwargs):
+            name = os.path.basename(image_paths[0])
+            yield "```mark"
+            yield f"down\n# {name}"
+            yield "\n```"
+
+        client = mock_llm_class.return_value
+        client.completion_stream.side_effect = completion_stream
+        out = io.StringIO()
+
+        with open(multipage_pdf_path, "rb") as f:
+            result = convert_to_markdown(
+                f.read(),
+                pages="1-3",
+                output_dir=str(tmp_path / "out"),
+                cleanup=False,
+                stream=out,
+            )
+
+        assert result == ""
+        assert out.getvalue() == (
+            "# page_0001.jpg\n\n# page_0002.jpg\n\n# page_0003.jpg\n"
+        )
+        client.completion.assert_not_called()
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_stream_interrupted_page_marked(
+        self, mock_llm_class, concurrent_config, multipage_pdf_path, tmp_path
+    ):
+        """Test a page whose stream breaks is marked after its text and fails"""
+        from markpdfdown.core.errors import PageConversionError
+
+        def completion_stream(image_paths, **kwargs):
+            name = os.path.basename(image_paths[0])
+            yield f"# {name}"
+            if name == "page_0002.jpg":
+                raise Exception("Connection reset")
+
+        mock_llm_class.return_value.completion_stream.side_effect = completion_stream
+        out = io.StringIO()
+
+        with open(multipage_pdf_path, "rb") as f:
+            with pytest.raises(PageConversionError) as exc_info:
+                convert_to_markdown(
+                    f.read(),
+                    pages="1-3",
+                    output_dir=str(tmp_path / "out"),
+                    cleanup=False,
+                    stream=out,
+                )
+
+        assert exc_info.value.unfinished_pages == [2]
+        assert out.getvalue() == (
+            "# page_0001.jpg\n\n# page_0002.jpg\n\n"
+            "<!-- page 2 not converted: response interrupted -->\n\n"
+            "# page_0003.jpg\n"
+        )
+        # Pages with text already shown are not sent again
+        assert mock_llm_class.return_value.completion.call_count == 0
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_stream_head_page_shown_before_it_completes(
+        self, mock_llm_class, concurrent_config, multipage_pdf_path, tmp_path
+    ):
+        """Test the first page is visible while it is still being generated"""
+        out = io.StringIO()
+        seen_mid_stream = []
+
+        def completion_stream(image_paths, **kwargs):
+            name = os.path.basename(image_paths[0])
+            yield f"{name} start"
+            if name == "page_0001.jpg":
+                seen_mid_stream.append(out.getvalue())
+            yield " end"
+
+        mock_llm_class.return_value.completion_stream.side_effect = completion_stream
+
+        with open(multipage_pdf_path, "rb") as f:
+            convert_to_markdown(
+                f.read(),
+                pages="1-2",
+                output_dir=str(tmp_path / "out"),
+                cleanup=False,
+                stream=out,
+            )
+
+        assert seen_mid_stream == ["page_0001.jpg start"]
+
+
+class TestLongestFirstSchedule:
+    """Tests for dispatching expensive pages first"""
+
+    @pytest.fixture
+    def uneven_pdf(self, tmp_path):
+        import fitz
+
+        path = tmp_path / "uneven.pdf"
+        doc = fitz.open()
+        for lines in [1, 3, 30, 2, 20]:
+            page = doc.new_page(width=300, height=300)
+            for line in range(lines):
+                page.insert_text((10, 12 + line * 9), "word " * 10, fontsize=7)
+        doc.save(str(path))
+        doc.close()
+        return str(path)
+
+    @pytest.fixture
+    def schedule_config(self, monkeypatch):
+        from markpdfdown.config import Config
+
+        config = Config(model_name="gpt-4o", concurrency=2, schedule="longest_first")
+        monkeypatch.setattr("markpdfdown.config.get_config", lambda: config)
+        return config
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_expensive_pages_dispatched_first(
+        self, mock_llm_class, schedule_config, uneven_pdf, tmp_path
+    ):
+        """Test dispatch follows cost while output keeps page order"""
+        dispatched = []
+        lock = threading.Lock()
+
+        def completion(image_paths, **kwargs):
+            name = os.path.basename(image_paths[0])
+            with lock:
+                dispatched.append(name)
+            return f"# {name}"
+
+        mock_llm_class.return_value.completion.side_effect = completion
+
+        with open(uneven_pdf, "rb") as f:
+            result = convert_to_markdown(
+                f.read(), output_dir=str(tmp_path / "out"), cleanup=False
+            )
+
+        assert sorted(dispatched[:2]) == ["page_0003.jpg", "page_0005.jpg"]
+        assert dispatched.index("page_0001.jpg") >= 3
+        assert result == "\n\n".join(f"# page_{n:04d}.jpg" for n in range(1, 6))
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_file_output_in_page_order(
+        self, mock_llm_class, schedule_config, uneven_pdf, tmp_path, monkeypatch
+    ):
+        """Test out-of-order completion still writes pages in order"""
+        monkeypatch.chdir(tmp_path)
+        mock_llm_class.return_value.completion.side_effect = (
+            lambda image_paths, **kwargs: os.path.basename(image_paths[0])
+        )
+        output = tmp_path / "out.md"
+
+        convert_to_file(uneven_pdf, str(output), pages="2-5")
+
+        assert output.read_text(encoding="utf-8").split("\n\n") == [
+            f"page_{n:04d}.jpg" for n in range(2, 6)
+        ]
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_schedule_with_reused_pages(
+        self, mock_llm_class, schedule_config, uneven_pdf, tmp_path, monkeypatch
+    ):
+        """Test reused pages are slotted into their original positions"""
+        monkeypatch.chdir(tmp_path)
+        calls = []
+
+        def completion(image_paths, **kwargs):
+            calls.append(os.path.basename(image_paths[0]))
+            return calls[-1]
+
+        mock_llm_class.return_value.completion.side_effect = completion
+        output = tmp_path / "out.md"
+        manifest = str(tmp_path / "out.pages.json")
+
+        convert_to_file(uneven_pdf, str(output), pages="1-3", manifest_path=manifest)
+        calls.clear()
+        convert_to_file(uneven_pdf, str(output), manifest_path=manifest)
+
+        assert calls == ["page_0005.jpg", "page_0004.jpg"]
+        assert output.read_text(encoding="utf-8").split("\n\n") == [
+            f"page_{n:04d}.jpg" for n in range(1, 6)
+        ]
+
+
+class TestModelRouting:
+    """Tests for routing pages between a fast and a strong model"""
+
+    @pytest.fixture
+    def mixed_pdf(self, tmp_path):
+        import fitz
+
+        path = tmp_path / "mixed.pdf"
+        doc = fitz.open()
+        doc.new_page(width=300, height=300).insert_text((10, 20), "Plain text")
+        table = doc.new_page(width=300, height=300)
+        table.insert_text((10, 20), "Quarterly figures")
+        for row in range(10):
+            y = 30 + row * 20
+            table.draw_line(fitz.Point(10, y), fitz.Point(290, y))
+        doc.new_page(width=300, height=300)
+        doc.save(str(path))
+        doc.close()
+        return str(path)
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_pages_routed_by_complexity(
+        self, mock_llm_class, mixed_pdf, tmp_path, monkeypatch, caplog
+    ):
+        """Test simple pages use the fast model and complex pages the strong one"""
+        from markpdfdown.config import Config
+
+        config = Config(model_name="strong", fast_model_name="fast")
+        monkeypatch.setattr("markpdfdown.config.get_config", lambda: config)
+        calls = []
+
+        def make_client(model_name, **kwargs):
+            def completion(image_paths, **kwargs):
+                name = os.path.basename(image_paths[0])
+                calls.append((name, model_name))
+                return name
+
+            client = MagicMock()
+            client.completion.side_effect = completion
+            return client
+
+        mock_llm_class.side_effect = make_client
+
+        with caplog.at_level("INFO", logger="markpdfdown.main"):
+            with open(mixed_pdf, "rb") as f:
+                result = convert_to_markdown(
+                    f.read(), output_dir=str(tmp_path / "out"), cleanup=False
+                )
+
+        assert calls == [
+            ("page_0001.jpg", "fast"),
+            ("page_0002.jpg", "strong"),
+            ("page_0003.jpg", "strong"),
+        ]
+        assert result.split("\n\n") == [f"page_{n:04d}.jpg" for n in range(1, 4)]
+        assert "Routing page 2 to strong (complex:" in caplog.text
+        assert "Routed 1 simple pages to fast, 2 complex pages to strong" in caplog.text
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_queue_pages_routed_by_complexity(
+        self, mock_llm_class, mixed_pdf, tmp_path
+    ):
+        """Test queue workers route pages like file mode"""
+        from markpdfdown.config import Config
+
+        calls = []
+
+        def make_client(model_name, **kwargs):
+            def completion(image_paths, **kwargs):
+                calls.append((os.path.basename(image_paths[0]), model_name))
+                return "text"
+
+            client = MagicMock()
+            client.completion.side_effect = completion
+            return client
+
+        mock_llm_class.side_effect = make_client
+        db_path = str(tmp_path / "jobs.db")
+        enqueue_file(db_path, mixed_pdf, str(tmp_path / "mixed.md"))
+
+        config = Config(model_name="strong", fast_model_name="fast", concurrency=1)
+        assert run_queue_worker(db_path, poll_interval=0.01, config=config) == 3
+
+        assert calls == [
+            ("page_0001.jpg", "fast"),
+            ("page_0002.jpg", "strong"),
+            ("page_0003.jpg", "strong"),
+        ]
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_routing_disabled_without_fast_model(
+        self, mock_llm_class, mixed_pdf, tmp_path, monkeypatch
+    ):
+        """Test every page uses the configured model by default"""
+        from markpdfdown.config import Config
+
+        config = Config(model_name="strong")
+        monkeypatch.setattr("markpdfdown.config.get_config", lambda: config)
+        mock_llm_class.return_value.completion.return_value = "text"
+
+        with open(mixed_pdf, "rb") as f:
+            convert_to_markdown(f.read(), output_dir=str(tmp_path / "out"))
+
+        mock_llm_class.assert_called_once_with(
+            "strong", rate_limiter=None, cassette=None, config=config
+        )
+        assert mock_llm_class.return_value.completion.call_count == 3
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_host_limits_per_model(
+        self, mock_llm_class, mixed_pdf, tmp_path, monkeypatch
+    ):
+        """Test each model gets its own host-wide limiter when limits are set"""
+        from markpdfdown.config import Config
+
+        config = Config(
+            model_name="strong",
+            fast_model_name="fast",
+            requests_per_minute=60,
+            max_concurrent_requests=4,
+            rate_limit_db=str(tmp_path / "limits.db"),
+        )
+        monkeypatch.setattr("markpdfdown.config.get_config", lambda: config)
+        mock_llm_class.return_value.completion.return_value = "text"
+
+        with open(mixed_pdf, "rb") as f:
+            convert_to_markdown(f.read(), output_dir=str(tmp_path / "out"))
+
+        limiters = {
+            call.args[0]: call.kwargs["rate_limiter"]
+            for call in mock_llm_class.call_args_list
+        }
+        assert {name: limiter.key for name, limiter in limiters.items()} == {
+            "strong": "strong",
+            "fast": "fast",
+        }
+        assert limiters["strong"].requests_per_minute == 60
+        assert limiters["strong"].max_concurrent == 4
+        assert limiters["strong"].db_path == str(tmp_path / "limits.db")
+
+
+class TestDeadline:
+    """Tests for abandoning a conversion at its deadline"""
+
+    @pytest.fixture
+    def hanging_client(self, monkeypatch):
+        """Mock client answering pages 1-2 and hanging from page 3 on"""
+        from markpdfdown.config import Config
+
+        config = Config(model_name="gpt-4o", concurrency=2)
+        monkeypatch.setattr("markpdfdown.config.get_config", lambda: config)
+        release = threading.Event()
+
+        def completion(image_paths, **kwargs):
+            name = os.path.basename(image_paths[0])
+            if name not in ("page_0001.jpg", "page_0002.jpg"):
+                release.wait(5)
+            return f"# {name}"
+
+        def completion_stream(image_paths, **kwargs):
+            yield completion(image_paths)
+
+        with patch("markpdfdown.main.LLMClient") as mock_llm_class:
+            mock_llm_class.return_value.completion.side_effect = completion
+            mock_llm_class.return_value.completion_stream.side_effect = (
+                completion_stream
+            )
+            mock_llm_class.release = release
+            yield mock_llm_class
+        release.set()
+
+    def test_partial_result_at_deadline(
+        self, hanging_client, multipage_pdf_path, tmp_path
+    ):
+        """Test finished pages are returned in order with the rest marked"""
+        from markpdfdown.core.deadline import DeadlineExceeded
+
+        started = time.monotonic()
+        with open(multipage_pdf_path, "rb") as f:
+            with pytest.raises(DeadlineExceeded) as exc_info:
+                convert_to_markdown(
+                    f.read(), output_dir=str(tmp_path / "out"), deadline=0.5
+                )
+
+        assert time.monotonic() - started < 3
+        assert exc_info.value.unfinished_pages == list(range(3, 11))
+        assert exc_info.value.partial.split("\n\n") == [
+            "# page_0001.jpg",
+            "# page_0002.jpg",
+        ] + [
+            f"<!-- page {n} not converted: deadline exceeded -->" for n in range(3, 11)
+        ]
+
+    def test_file_written_with_unfinished_pages(
+        self, hanging_client, multipage_pdf_path, tmp_path, monkeypatch
+    ):
+        """Test file mode still writes the pages finished before the deadline"""
+        from markpdfdown.core.deadline import DeadlineExceeded
+
+        monkeypatch.chdir(tmp_path)
+        output = tmp_path / "out.md"
+
+        with pytest.raises(DeadlineExceeded):
+            convert_to_file(multipage_pdf_path, str(output), deadline=0.5)
+
+        lines = output.read_text(encoding="utf-8").split("\n\n")
+        assert lines[:2] == ["# page_0001.jpg", "# page_0002.jpg"]
+        assert lines[2] == "<!-- page 3 not converted: deadline exceeded -->"
+        assert len(lines) == 10
+
+    def test_stream_marks_unfinished_pages(
+        self, hanging_client, multipage_pdf_path, tmp_path
+    ):
+        """Test streamed output is terminated with the unfinished pages marked"""
+        from markpdfdown.core.deadline import DeadlineExceeded
+
+        out = io.StringIO()
+        with open(multipage_pdf_path, "rb") as f:
+            with pytest.raises(DeadlineExceeded):
+                convert_to_markdown(
+                    f.read(), output_dir=str(tmp_path / "out"), stream=out, deadline=0.5
+                )
+
+        text = out.getvalue()
+        assert text.startswith("# page_0001.jpg\n\n# page_0002.jpg\n\n")
+        assert text.endswith("<!-- page 10 not converted: deadline exceeded -->\n")
+
+    def test_scratch_dir_kept_for_abandoned_pages(
+        self, hanging_client, multipage_pdf_path, tmp_path, monkeypatch
+    ):
+        """Test the scratch directory outlives the requests left running"""
+        from markpdfdown.core.deadline import DeadlineExceeded
+
+        monkeypatch.chdir(tmp_path)
+
+        with pytest.raises(DeadlineExceeded):
+            convert_to_file(multipage_pdf_path, str(tmp_path / "out.md"), deadline=0.5)
+
+        # Pages 3 and 4 are still using their images
+        (scratch_dir,) = (tmp_path / "output").iterdir()
+        assert (scratch_dir / "page_0003.jpg").exists()
+
+        hanging_client.release.set()
+        for _ in range(100):
+            if not scratch_dir.exists():
+                break
+            time.sleep(0.02)
+        assert not scratch_dir.exists()
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_interrupt_cancels_requests_in_flight(
+        self, mock_llm_class, multipage_pdf_path, tmp_path, monkeypatch
+    ):
+        """Test an interrupt expires the deadline of the pages in flight"""
+        from markpdfdown.config import Config
+
+        config = Config(model_name="gpt-4o", concurrency=2)
+        monkeypatch.setattr("markpdfdown.config.get_config", lambda: config)
+        deadlines = []
+        release = threading.Event()
+
+        def completion(image_paths, **kwargs):
+            deadlines.append(kwargs["deadline"])
+            release.wait(5)
+            return "# Page"
+
+        def interrupt(event):
+            if event.kind == "submitted" and event.page == 2:
+                raise KeyboardInterrupt
+
+        mock_llm_class.return_value.completion.side_effect = completion
+
+        started = time.monotonic()
+        try:
+            with open(multipage_pdf_path, "rb") as f:
+                with pytest.raises(KeyboardInterrupt):
+                    convert_to_markdown(
+                        f.read(),
+                        output_dir=str(tmp_path / "out"),
+                        on_progress=interrupt,
+                    )
+        finally:
+            release.set()
+
+        assert time.monotonic() - started < 3
+        assert deadlines
+        assert all(deadline.expired for deadline in deadlines)
+
+
+class TestDeferredRetries:
+    """Tests for retrying failed pages after the main pass"""
+
+    @pytest.fixture
+    def retry_config(self, monkeypatch):
+        from markpdfdown.config import Config
+
+        config = Config(model_name="gpt-4o", concurrency=2, page_retry_delay=0)
+        monkeypatch.setattr("markpdfdown.config.get_config", lambda: config)
+        return config
+
+    def _flaky_client(self, mock_llm_class, failures):
+        """Fail each page in failures the given number of times"""
+        calls = []
+        lock = threading.Lock()
+
+        def completion(image_paths, **kwargs):
+            name = os.path.basename(image_paths[0])
+            with lock:
+                calls.append(name)
+                if failures.get(name, 0):
+                    failures[name] -= 1
+                    raise Exception("Rate limit exceeded")
+            return f"# {name}"
+
+        mock_llm_class.return_value.completion.side_effect = completion
+        return calls
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_failed_page_retried_after_main_pass(
+        self, mock_llm_class, retry_config, multipage_pdf_path, tmp_path
+    ):
+        """Test a failed page is retried last and lands in its place"""
+        calls = self._flaky_client(mock_llm_class, {"page_0003.jpg": 1})
+
+        with open(multipage_pdf_path, "rb") as f:
+            result = convert_to_markdown(
+                f.read(), output_dir=str(tmp_path / "out"), pages="1-5"
+            )
+
+        assert calls[-1] == "page_0003.jpg"
+        assert calls.count("page_0003.jpg") == 2
+        assert result == "\n\n".join(f"# page_{n:04d}.jpg" for n in range(1, 6))
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_persistent_failure_marked(
+        self, mock_llm_class, retry_config, multipage_pdf_path, tmp_path
+    ):
+        """Test pages failing every retry get a placeholder and raise"""
+        from markpdfdown.core.errors import PageConversionError
+
+        retry_config.page_retries = 2
+        calls = self._flaky_client(mock_llm_class, {"page_0002.jpg": 99})
+
+        with open(multipage_pdf_path, "rb") as f:
+            with pytest.raises(PageConversionError) as exc_info:
+                convert_to_markdown(
+                    f.read(), output_dir=str(tmp_path / "out"), pages="1-3"
+                )
+
+        assert calls.count("page_0002.jpg") == 3
+        assert exc_info.value.unfinished_pages == [2]
+        assert exc_info.value.partial.split("\n\n") == [
+            "# page_0001.jpg",
+            "<!-- page 2 not converted: conversion failed -->",
+            "# page_0003.jpg",
+        ]
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_retries_disabled(
+        self, mock_llm_class, retry_config, multipage_pdf_path, tmp_path
+    ):
+        """Test PAGE_RETRIES=0 fails pages without retrying them"""
+        from markpdfdown.core.errors import PageConversionError
+
+        retry_config.page_retries = 0
+        calls = self._flaky_client(mock_llm_class, {"page_0001.jpg": 1})
+
+        with open(multipage_pdf_path, "rb") as f:
+            with pytest.raises(PageConversionError):
+                convert_to_markdown(
+                    f.read(), output_dir=str(tmp_path / "out"), pages="1-2"
+                )
+
+        assert calls.count("page_0001.jpg") == 1
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_file_written_with_placeholder(
+        self, mock_llm_class, retry_config, multipage_pdf_path, tmp_path, monkeypatch
+    ):
+        """Test file mode writes the output with failed pages marked"""
+        from markpdfdown.core.errors import PageConversionError
+
+        monkeypatch.chdir(tmp_path)
+        self._flaky_client(mock_llm_class, {"page_0001.jpg": 99})
+        output = tmp_path / "out.md"
+
+        with pytest.raises(PageConversionError):
+            convert_to_file(multipage_pdf_path, str(output), pages="1-2")
+
+        assert output.read_text(encoding="utf-8") == (
+            "<!-- page 1 not converted: conversion failed -->\n\n# page_0002.jpg"
+        )
+
+
+class TestConvertToResult:
+    """Tests for per-page conversion results"""
+
+    @pytest.fixture
+    def usage_completion(self):
+        """Provider stub answering every page with its image's tokens"""
+
+        def completion(**kwargs):
+            response = MagicMock()
+            response.choices[0].message.content = "# Page"
+            response.choices[0].finish_reason = "stop"
+            response.usage = MagicMock(
+                spec=["prompt_tokens", "completion_tokens"],
+                prompt_tokens=1000,
+                completion_tokens=50,
+            )
+            return response
+
+        with patch("markpdfdown.core.llm_client.completion") as mock_completion:
+            mock_completion.side_effect = completion
+            yield mock_completion
+
+    def test_page_records(
+        self, multipage_pdf_path, usage_completion, tmp_path, monkeypatch
+    ):
+        """Test every page gets a record with its Markdown, model and tokens"""
+        monkeypatch.chdir(tmp_path)
+        from markpdfdown.config import Config
+        from markpdfdown.main import convert_to_result
+
+        config = Config(model_name="gpt-4o", concurrency=3)
+        monkeypatch.setattr("markpdfdown.config.get_config", lambda: config)
+
+        result = convert_to_result(multipage_pdf_path, pages="2-5")
+
+        assert [page.page for page in result] == [2, 3, 4, 5]
+        page = result.pages[0]
+        assert page.status == "converted"
+        assert page.markdown == "# Page"
+        assert page.model == "gpt-4o"
+        assert page.requests == 1
+        assert page.prompt_tokens == 1000
+        assert page.completion_tokens == 50
+        assert page.latency > 0
+        assert result.complete
+        assert result.prompt_tokens == 4000
+        assert result.markdown == "\n\n".join(["# Page"] * 4)
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_failed_page_reported(
+        self, mock_llm_class, multipage_pdf_path, tmp_path, monkeypatch
+    ):
+        """Test failed pages are reported in their record instead of raised"""
+        monkeypatch.chdir(tmp_path)
+        from markpdfdown.config import Config
+        from markpdfdown.main import convert_to_result
+
+        config = Config(concurrency=2, page_retries=1, page_retry_delay=0)
+
+        def completion(image_paths, **kwargs):
+            if image_paths[0].endswith("page_0002.jpg"):
+                raise Exception("Bad request")
+            return "# Page"
+
+        mock_llm_class.return_value.completion.side_effect = completion
+        mock_llm_class.return_value.model_name = "gpt-4o"
+        with patch("markpdfdown.config.get_config", return_value=config):
+            result = convert_to_result(multipage_pdf_path, pages="1-3")
+
+        failed = result.pages[1]
+        assert (failed.page, failed.status, failed.retries) == (2, "failed", 1)
+        assert failed.markdown is None
+        assert result.failed_pages == [2]
+        assert result.markdown == "# Page\n\n# Page"
+
+    def test_file_records_without_markdown(
+        self, multipage_pdf_path, usage_completion, tmp_path, monkeypatch
+    ):
+        """Test convert_to_file returns records and leaves the Markdown on disk"""
+        monkeypatch.chdir(tmp_path)
+        from markpdfdown.config import Config
+
+        config = Config(model_name="gpt-4o")
+        monkeypatch.setattr("markpdfdown.config.get_config", lambda: config)
+        output = tmp_path / "out.md"
+
+        result = convert_to_file(multipage_pdf_path, str(output), pages="1-3")
+
+        assert [page.status for page in result] == ["converted"] * 3
+        assert all(page.markdown is None for page in result)
+        assert result.completion_tokens == 150
+        assert output.read_text().count("# Page") == 3
+
+    def test_reused_pages(
+        self, multipage_pdf_path, usage_completion, tmp_path, monkeypatch
+    ):
+        """Test pages taken from the manifest are reported as reused"""
+        monkeypatch.chdir(tmp_path)
+        manifest = str(tmp_path / "pages.json")
+        output = str(tmp_path / "out.md")
+        convert_to_file(multipage_pdf_path, output, pages="1-2", manifest_path=manifest)
+
+        result = convert_to_file(
+            multipage_pdf_path, output, pages="1-2", manifest_path=manifest
+        )
+
+        assert [page.status for page in result] == ["reused", "reused"]
+        assert all(page.cache_hit and page.requests == 0 for page in result)
+
+
+class TestPerCallConfig:
+    """Tests for conversions with their own Config"""
+
+    def test_concurrent_configs(self, multipage_pdf_path, tmp_path):
+        """Test conversions in one process each use their own settings"""
+        from markpdfdown.config import Config
+
+        requests = []
+        lock = threading.Lock()
+
+        def completion(**kwargs):
+            with lock:
+                requests.append((kwargs["model"], kwargs["temperature"]))
+            response = MagicMock()
+            response.choices[0].message.content = f"# {kwargs['model']}"
+            response.choices[0].finish_reason = "stop"
+            return response
+
+        configs = {
+            "a": Config(model_name="gpt-4o", temperature=0.1, concurrency=2),
+            "b": Config(model_name="gpt-4o-mini", temperature=0.7, concurrency=2),
+        }
+        results = {}
+        with open(multipage_pdf_path, "rb") as f:
+            data = f.read()
+
+        def run(tenant):
+            results[tenant] = convert_to_markdown(
+                data,
+                output_dir=str(tmp_path / tenant),
+                pages="1-4",
+                config=configs[tenant],
+            )
+
+        with patch("markpdfdown.config.get_config") as mock_get_config:
+            with patch("markpdfdown.core.llm_client.completion") as mock_completion:
+                mock_completion.side_effect = completion
+                threads = [threading.Thread(target=run, args=(t,)) for t in configs]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+        mock_get_config.assert_not_called()
+        assert results["a"] == "\n\n".join(["# gpt-4o"] * 4)
+        assert results["b"] == "\n\n".join(["# gpt-4o-mini"] * 4)
+        assert sorted(set(requests)) == [("gpt-4o", 0.1), ("gpt-4o-mini", 0.7)]
+        assert len(requests) == 8
+
+    def test_concurrent_staged_conversions(
+        self, multipage_pdf_path, tmp_path, monkeypatch
+    ):
+        """Test files converted side by side are staged in their own dirs"""
+        from markpdfdown.config import Config
+        from markpdfdown.main import convert_to_result
+
+        monkeypatch.chdir(tmp_path)
+
+        def completion(**kwargs):
+            # Keep both conversions in flight at the same time
+            time.sleep(0.02)
+            response = MagicMock()
+            response.choices[0].message.content = f"# {kwargs['model']}"
+            response.choices[0].finish_reason = "stop"
+            return response
+
+        configs = {
+            "a": Config(model_name="gpt-4o", concurrency=2),
+            "b": Config(model_name="gpt-4o-mini", concurrency=2),
+        }
+        results = {}
+
+        def run(tenant):
+            results[tenant] = convert_to_result(
+                multipage_pdf_path, pages="1-4", config=configs[tenant]
+            )
+
+        with patch("markpdfdown.core.llm_client.completion") as mock_completion:
+            mock_completion.side_effect = completion
+            threads = [threading.Thread(target=run, args=(t,)) for t in configs]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert results["a"].failed_pages == []
+        assert results["b"].failed_pages == []
+        assert results["a"].markdown == "\n\n".join(["# gpt-4o"] * 4)
+        assert results["b"].markdown == "\n\n".join(["# gpt-4o-mini"] * 4)
+        assert os.listdir(tmp_path / "output") == []
+
+    def test_tiles_use_call_config(self, sample_image_path):
+        """Test tile requests carry the call's settings"""
+        from markpdfdown.config import Config
+
+        config = Config(max_tokens=123)
+        client = MagicMock()
+        client.completion.return_value = "text"
+
+        with patch("markpdfdown.config.get_config") as mock_get_config:
+            convert_tiles_to_markdown(
+                [sample_image_path, sample_image_path], client, config=config
+            )
+
+        mock_get_config.assert_not_called()
+        for call in client.completion.call_args_list:
+            assert call.kwargs["max_tokens"] == 123
+
+
+class TestProgressEvents:
+    """Tests for progress events of a conversion"""
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_events_with_retry(self, mock_llm_class, multipage_pdf_path, tmp_path):
+        """Test every page is rendered, submitted and completed, with retries"""
+        from markpdfdown.config import Config
+
+        config = Config(concurrency=2, page_retry_delay=0)
+        failures = {"page_0002.jpg": 1}
+
+        def completion(image_paths, **kwargs):
+            name = os.path.basename(image_paths[0])
+            if failures.pop(name, 0):
+                raise Exception("Rate limit exceeded")
+            return f"# {name}"
+
+        mock_llm_class.return_value.completion.side_effect = completion
+        events = []
+        with patch("markpdfdown.config.get_config", return_value=config):
+            with open(multipage_pdf_path, "rb") as f:
+                convert_to_markdown(
+                    f.read(),
+                    output_dir=str(tmp_path / "out"),
+                    pages="1-4",
+                    on_progress=events.append,
+                )
+
+        kinds = [event.kind for event in events]
+        assert kinds.count("rendered") == kinds.count("submitted") == 4
+        assert kinds.count("completed") == 4
+        assert [e.page for e in events if e.kind in ("failed", "retried")] == [2, 2]
+        assert kinds.index("failed") < kinds.index("retried")
+        assert all(event.total == 4 for event in events)
+        assert events[-1].completed == 4
+        assert events[-1].failed == events[-1].in_flight == 0
+
+
+class TestAdaptiveConcurrency:
+    """Tests for tuning the pages in flight to the provider's feedback"""
+
+    def _tracking_client(self, mock_llm_class, throttle_at=()):
+        """Record pages in flight; raise the throttle count on given pages"""
+        state = {"active": 0, "peak": 0}
+        lock = threading.Lock()
+        client = mock_llm_class.return_value
+        client.throttled = 0
+
+        def completion(image_paths, **kwargs):
+            name = os.path.basename(image_paths[0])
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+                if name in throttle_at:
+                    client.throttled += 1
+            time.sleep(0.02)
+            with lock:
+                state["active"] -= 1
+            return f"# {name}"
+
+        client.completion.side_effect = completion
+        return state
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_limit_grows_while_healthy(
+        self, mock_llm_class, multipage_pdf_path, tmp_path, monkeypatch, caplog
+    ):
+        """Test more pages are put in flight while the provider keeps up"""
+        from markpdfdown.config import Config
+
+        config = Config(
+            model_name="gpt-4o", adaptive_concurrency=True, max_concurrency=8
+        )
+        monkeypatch.setattr("markpdfdown.config.get_config", lambda: config)
+        state = self._tracking_client(mock_llm_class)
+
+        with caplog.at_level("INFO", logger="markpdfdown.main"):
+            with open(multipage_pdf_path, "rb") as f:
+                result = convert_to_markdown(f.read(), output_dir=str(tmp_path / "out"))
+
+        assert state["peak"] > 1
+        assert result == "\n\n".join(f"# page_{n:04d}.jpg" for n in range(1, 11))
+        assert "Adaptive concurrency: final limit" in caplog.text
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_limit_in_progress_and_result(
+        self, mock_llm_class, multipage_pdf_path, tmp_path, monkeypatch
+    ):
+        """Test the live limit reaches progress events and the result"""
+        monkeypatch.chdir(tmp_path)
+        from markpdfdown.config import Config
+        from markpdfdown.main import convert_to_result
+
+        config = Config(
+            model_name="gpt-4o", adaptive_concurrency=True, max_concurrency=8
+        )
+        monkeypatch.setattr("markpdfdown.config.get_config", lambda: config)
+        self._tracking_client(mock_llm_class)
+        events = []
+
+        result = convert_to_result(multipage_pdf_path, on_progress=events.append)
+
+        limits = [event.concurrency_limit for event in events]
+        assert None not in limits
+        assert limits[0] == 1
+        assert result.concurrency_limit == limits[-1]
+        assert result.peak_concurrency == max(limits) > 1
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_limit_cut_when_throttled(
+        self, mock_llm_class, multipage_pdf_path, tmp_path, monkeypatch, caplog
+    ):
+        """Test rate-limit responses lower the number of pages in flight"""
+        from markpdfdown.config import Config
+
+        config = Config(
+            model_name="gpt-4o",
+            concurrency=4,
+            adaptive_concurrency=True,
+            max_concurrency=4,
+        )
+        monkeypatch.setattr("markpdfdown.config.get_config", lambda: config)
+        self._tracking_client(mock_llm_class, throttle_at={"page_0002.jpg"})
+
+        with caplog.at_level("INFO"):
+            with open(multipage_pdf_path, "rb") as f:
+                convert_to_markdown(f.read(), output_dir=str(tmp_path / "out"))
+
+        assert "Concurrency limit lowered from 4 to 2 (rate limited)" in caplog.text
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_fixed_concurrency_by_default(
+        self, mock_llm_class, multipage_pdf_path, tmp_path, monkeypatch
+    ):
+        """Test CONCURRENCY is a fixed limit unless adaptive mode is enabled"""
+        from markpdfdown.config import Config
+
+        config = Config(model_name="gpt-4o", concurrency=2)
+        monkeypatch.setattr("markpdfdown.config.get_config", lambda: config)
+        state = self._tracking_client(mock_llm_class)
+
+        with open(multipage_pdf_path, "rb") as f:
+            convert_to_markdown(f.read(), output_dir=str(tmp_path / "out"))
+
+        assert state["peak"] <= 2
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_no_limit_reported_when_fixed(
+        self, mock_llm_class, multipage_pdf_path, tmp_path, monkeypatch
+    ):
+        """Test results carry no limit without adaptive concurrency"""
+        monkeypatch.chdir(tmp_path)
+        from markpdfdown.config import Config
+        from markpdfdown.main import convert_to_result
+
+        config = Config(model_name="gpt-4o", concurrency=2)
+        monkeypatch.setattr("markpdfdown.config.get_config", lambda: config)
+        self._tracking_client(mock_llm_class)
+
+        result = convert_to_result(multipage_pdf_path, pages="1-2")
+
+        assert result.concurrency_limit is None
+        assert result.peak_concurrency is None
+
+
+class TestCassetteReplay:
+    """Tests for replaying a recorded conversion offline"""
+
+    def test_recorded_conversion_replayed(
+        self, multipage_pdf_path, tmp_path, monkeypatch
+    ):
+        """Test a replayed conversion matches the recording without the API"""
+        from markpdfdown.config import Config
+
+        path = str(tmp_path / "run.cassette.gz")
+        config = Config(model_name="gpt-4o", concurrency=3, cassette=path)
+        monkeypatch.setattr("markpdfdown.config.get_config", lambda: config)
+        with open(multipage_pdf_path, "rb") as f:
+            data = f.read()
+
+        def completion(**kwargs):
+            text = kwargs["messages"][-1]["content"][-1]["image_url"]["url"][-12:]
+            response = MagicMock()
+            response.choices[0].message.content = f"# {text}"
+            response.choices[0].finish_reason = "stop"
+            return response
+
+        config.cassette_mode = "record"
+        with patch("markpdfdown.core.llm_client.completion") as mock_completion:
+            mock_completion.side_effect = completion
+            recorded = convert_to_markdown(
+                data, output_dir=str(tmp_path / "rec"), pages="1-4"
+            )
+
+        config.cassette_mode = "replay"
+        with patch("markpdfdown.core.llm_client.completion") as mock_completion:
+            replayed = convert_to_markdown(
+                data, output_dir=str(tmp_path / "play"), pages="1-4"
+            )
+
+        mock_completion.assert_not_called()
+        assert replayed == recorded
+        assert len(recorded.split("\n\n")) == 4
+
+    def test_unrecorded_page_fails_without_retry(
+        self, multipage_pdf_path, tmp_path, monkeypatch
+    ):
+        """Test pages missing from the cassette fail at once, not after retries"""
+        from markpdfdown.config import Config
+        from markpdfdown.core.errors import PageConversionError
+
+        path = str(tmp_path / "empty.cassette.gz")
+        gzip.open(path, "wt").close()
+        config = Config(
+            model_name="gpt-4o",
+            cassette=path,
+            page_retries=3,
+            page_retry_delay=60,
+        )
+        with open(multipage_pdf_path, "rb") as f:
+            data = f.read()
+
+        with patch("markpdfdown.main.time.sleep") as mock_sleep:
+            with pytest.raises(PageConversionError) as exc_info:
+                convert_to_markdown(
+                    data, output_dir=str(tmp_path / "out"), pages="1-2", config=config
+                )
+
+        mock_sleep.assert_not_called()
+        assert exc_info.value.unfinished_pages == [1, 2]
+        assert "not in cassette" in exc_info.value.partial
+
+
+class TestQueueMode:
+    """Tests for the distributed page queue workflow"""
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_enqueue_work_assemble(self, mock_llm_class, multipage_pdf_path, tmp_path):
+        """Test several workers drain the queue and the output is in order"""
+        mock_llm_class.return_value.completion.side_effect = (
+            lambda image_paths, **kwargs: f"# {os.path.basename(image_paths[0])}"
+        )
+        db_path = str(tmp_path / "jobs.db")
+        output = tmp_path / "doc.md"
+
+        enqueue_file(db_path, multipage_pdf_path, str(output), pages="2-4,9")
+
+        results = []
+        workers = [
+            threading.Thread(
+                target=lambda n=n: results.append(
+                    run_queue_worker(db_path, worker_id=f"w{n}", poll_interval=0.01)
+                )
+            )
+            for n in range(3)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        assert sum(results) == 4
+        assert assemble_queue(db_path) == [str(output)]
+        assert output.read_text(encoding="utf-8") == "\n\n".join(
+            f"# page_{n:04d}.jpg" for n in [2, 3, 4, 9]
+        )
+        assert assemble_queue(db_path) == []
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_documents_with_same_page_numbers(
+        self, mock_llm_class, multipage_pdf_path, tmp_path
+    ):
+        """Test concurrent tasks of several documents keep their own images"""
+        from markpdfdown.config import Config
+
+        def completion(image_paths, **kwargs):
+            # Overlap the tasks so a shared image would be overwritten
+            size = os.path.getsize(image_paths[0])
+            time.sleep(0.05)
+            assert os.path.getsize(image_paths[0]) == size
+            return f"# {os.path.basename(image_paths[0])}"
+
+        mock_llm_class.return_value.completion.side_effect = completion
+        db_path = str(tmp_path / "jobs.db")
+        outputs = [tmp_path / f"doc{n}.md" for n in range(3)]
+        for output in outputs:
+            enqueue_file(db_path, multipage_pdf_path, str(output), pages="1-2")
+
+        config = Config(concurrency=4, page_retries=0)
+        assert run_queue_worker(db_path, poll_interval=0.01, config=config) == 6
+        assert assemble_queue(db_path) == [str(output) for output in outputs]
+        for output in outputs:
+            assert output.read_text(encoding="utf-8") == (
+                "# page_0001.jpg\n\n# page_0002.jpg"
+            )
+
+    def test_enqueue_missing_file_raises(self, tmp_path):
+        """Test enqueueing a missing file raises ValueError"""
+        with pytest.raises(ValueError, match="Input file not found"):
+            enqueue_file(
+                str(tmp_path / "jobs.db"),
+                str(tmp_path / "missing.pdf"),
+                str(tmp_path / "out.md"),
+            )
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_render_failure_retried(
+        self, mock_llm_class, multipage_pdf_path, tmp_path, monkeypatch
+    ):
+        """Test a page whose input vanished is failed after its attempts"""
+        from markpdfdown.config import Config
+        from markpdfdown.core.page_queue import PageQueue
+
+        pdf_copy = tmp_path / "doc.pdf"
+        pdf_copy.write_bytes(open(multipage_pdf_path, "rb").read())
+        db_path = str(tmp_path / "jobs.db")
+        enqueue_file(db_path, str(pdf_copy), str(tmp_path / "doc.md"), pages="1")
+        pdf_copy.unlink()
+
+        config = Config(page_retries=2, page_retry_delay=0.0)
+        assert run_queue_worker(db_path, poll_interval=0.01, config=config) == 0
+        assert PageQueue(db_path).counts()["failed"] == 1
+        assert mock_llm_class.return_value.completion.call_count == 0
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_failed_pages_assembled_and_reported(
+        self, mock_llm_class, multipage_pdf_path, tmp_path
+    ):
+        """Test pages failing every attempt are marked and raised after assembly"""
+        from markpdfdown.config import Config
+        from markpdfdown.core.errors import PageConversionError
+
+        def completion(image_paths, **kwargs):
+            name = os.path.basename(image_paths[0])
+            if name == "page_0002.jpg":
+                raise Exception("Rate limit exceeded")
+            return f"# {name}"
+
+        client = mock_llm_class.return_value
+        client.completion.side_effect = completion
+        db_path = str(tmp_path / "jobs.db")
+        output = tmp_path / "doc.md"
+        enqueue_file(db_path, multipage_pdf_path, str(output), pages="1-3")
+
+        config = Config(concurrency=1, page_retries=1, page_retry_delay=0.0)
+        assert run_queue_worker(db_path, poll_interval=0.01, config=config) == 2
+        with pytest.raises(PageConversionError, match="pages 2") as exc_info:
+            assemble_queue(db_path)
+
+        assert exc_info.value.unfinished_pages == [2]
+        assert output.read_text(encoding="utf-8") == (
+            "# page_0001.jpg\n\n<!-- page 2 not converted: conversion failed -->"
+            "\n\n# page_0003.jpg"
+        )
+        # Two attempts at page 2 only, as PAGE_RETRIES allows
+        assert client.completion.call_count == 4
+        assert assemble_queue(db_path) == []
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_transcription_failure_requeued(
+        self, mock_llm_class, multipage_pdf_path, tmp_path
+    ):
+        """Test a page the model failed on is retried instead of stored empty"""
+        from markpdfdown.config import Config
+
+        mock_llm_class.return_value.completion.side_effect = [
+            Exception("Rate limit exceeded"),
+            "# Page 1",
+        ]
+        db_path = str(tmp_path / "jobs.db")
+        output = tmp_path / "doc.md"
+        enqueue_file(db_path, multipage_pdf_path, str(output), pages="1")
+
+        config = Config(page_retry_delay=0.0)
+        assert run_queue_worker(db_path, poll_interval=0.01, config=config) == 1
+        assemble_queue(db_path)
+        assert output.read_text(encoding="utf-8") == "# Page 1"
+
+
 class TestConvertFromFile:
     """Tests for convert_from_file function"""
 
@@ -235,9 +1655,20 @@ class TestConvertFromFile:
         with pytest.raises(ValueError, match="Input file not found"):
             convert_from_file("/nonexistent/file.pdf")
 
-    @patch("markpdfdown.main.convert_to_markdown")
-    def test_reads_file_and_converts(self, mock_convert, sample_image_path):
-        """Test file is read and passed to convert_to_markdown"""
+    def test_empty_file_raises(self, tmp_path):
+        """Test empty file raises ValueError"""
+        empty = tmp_path / "empty.pdf"
+        empty.write_bytes(b"")
+
+        with pytest.raises(ValueError, match="No input data provided"):
+            convert_from_file(str(empty))
+
+    @patch("markpdfdown.main._convert_input_file")
+    def test_stages_file_and_converts(
+        self, mock_convert, sample_image_path, tmp_path, monkeypatch
+    ):
+        """Test file is copied to the scratch directory and converted"""
+        monkeypatch.chdir(tmp_path)
         mock_convert.return_value = "# Markdown"
 
         result = convert_from_file(sample_image_path)
@@ -245,13 +1676,18 @@ class TestConvertFromFile:
         assert result == "# Markdown"
         mock_convert.assert_called_once()
 
-        # Check the file data was read
-        call_args = mock_convert.call_args
-        assert len(call_args[0][0]) > 0  # input_data is not empty
+        # Check the staged copy matches the input
+        staged_path = mock_convert.call_args[0][0]
+        assert staged_path.endswith("input.png")
+        with open(staged_path, "rb") as f, open(sample_image_path, "rb") as g:
+            assert f.read() == g.read()
 
-    @patch("markpdfdown.main.convert_to_markdown")
-    def test_passes_page_range(self, mock_convert, sample_image_path):
-        """Test page range is passed to convert_to_markdown"""
+    @patch("markpdfdown.main._convert_input_file")
+    def test_passes_page_range(
+        self, mock_convert, sample_image_path, tmp_path, monkeypatch
+    ):
+        """Test page range is passed to the conversion"""
+        monkeypatch.chdir(tmp_path)
         mock_convert.return_value = "# Markdown"
 
         convert_from_file(sample_image_path, start_page=2, end_page=5)
@@ -259,16 +1695,164 @@ class TestConvertFromFile:
         call_kwargs = mock_convert.call_args.kwargs
         assert call_kwargs["start_page"] == 2
         assert call_kwargs["end_page"] == 5
+        assert call_kwargs["cleanup"] is True
 
-    @patch("markpdfdown.main.convert_to_markdown")
-    def test_passes_filename(self, mock_convert, sample_image_path):
-        """Test filename is passed to convert_to_markdown"""
+    @patch("markpdfdown.main._convert_input_file")
+    def test_detects_type_from_content(
+        self, mock_convert, sample_image_path, tmp_path, monkeypatch
+    ):
+        """Test file type is detected from content when extension is unknown"""
+        monkeypatch.chdir(tmp_path)
         mock_convert.return_value = "# Markdown"
+        unknown = tmp_path / "scan.dat"
+        with open(sample_image_path, "rb") as f:
+            unknown.write_bytes(f.read())
 
-        convert_from_file(sample_image_path)
+        convert_from_file(str(unknown))
 
-        call_kwargs = mock_convert.call_args.kwargs
-        assert call_kwargs["input_filename"] == os.path.basename(sample_image_path)
+        assert mock_convert.call_args[0][0].endswith("input.png")
+
+    @patch("markpdfdown.main.LLMClient")
+    @patch("markpdfdown.main.create_worker")
+    def test_rendered_pages_removed_after_transcription(
+        self, mock_create_worker, mock_llm_class, tmp_path, monkeypatch
+    ):
+        """Test each rendered page is deleted before the next one is rendered"""
+        monkeypatch.chdir(tmp_path)
+        input_file = tmp_path / "doc.pdf"
+        input_file.write_bytes(b"%PDF-1.4" + b"\x00" * 100)
+        seen = []
+
+        def iter_pages():
+            for i in range(3):
+                path = tmp_path / f"page_{i}.jpg"
+                path.write_bytes(b"\xff\xd8\xff\xe0")
+                seen.append(path)
+                # Every previously rendered page must already be gone
+                assert not any(p.exists() for p in seen[:-1])
+                yield i + 1, str(path)
+
+        mock_worker = MagicMock()
+        mock_worker.iter_pages.side_effect = iter_pages
+        mock_create_worker.return_value = mock_worker
+        mock_llm_class.return_value.completion.return_value = "# Page"
+
+        result = convert_from_file(str(input_file))
+
+        assert result == "# Page\n\n# Page\n\n# Page"
+        assert not any(p.exists() for p in seen)
+
+
+class TestConvertToFile:
+    """Tests for convert_to_file function"""
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_streams_pages_to_output(
+        self, mock_llm_class, multipage_pdf_path, tmp_path, monkeypatch
+    ):
+        """Test every page is written to the output file in order"""
+        monkeypatch.chdir(tmp_path)
+        output_file = tmp_path / "result.md"
+
+        def completion(image_paths, **kwargs):
+            return f"# {os.path.basename(image_paths[0])}"
+
+        mock_llm_class.return_value.completion.side_effect = completion
+
+        convert_to_file(multipage_pdf_path, str(output_file), pages="3-4")
+
+        assert output_file.read_text(encoding="utf-8") == (
+            "# page_0003.jpg\n\n# page_0004.jpg"
+        )
+        assert not [n for n in os.listdir(tmp_path) if n.endswith(".tmp")]
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_failure_keeps_previous_output(
+        self, mock_llm_class, multipage_pdf_path, tmp_path, monkeypatch
+    ):
+        """Test a crash mid-document leaves the existing output intact"""
+        monkeypatch.chdir(tmp_path)
+        output_file = tmp_path / "result.md"
+        output_file.write_text("previous", encoding="utf-8")
+
+        calls = []
+
+        def completion(image_paths, **kwargs):
+            calls.append(image_paths[0])
+            if len(calls) == 3:
+                raise KeyboardInterrupt()
+            return "# Page"
+
+        mock_llm_class.return_value.completion.side_effect = completion
+
+        with pytest.raises(KeyboardInterrupt):
+            convert_to_file(multipage_pdf_path, str(output_file))
+
+        assert output_file.read_text(encoding="utf-8") == "previous"
+        assert not [n for n in os.listdir(tmp_path) if n.endswith(".tmp")]
+
+
+class TestIncrementalConversion:
+    """Tests for reconverting only changed pages"""
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_only_changed_pages_transcribed(
+        self, mock_llm_class, make_labelled_pdf, tmp_path, monkeypatch
+    ):
+        """Test a revision reuses unchanged pages and converts the rest"""
+        monkeypatch.chdir(tmp_path)
+        output_file = tmp_path / "manual.md"
+        manifest_path = str(tmp_path / "manual.pages.json")
+        run = {"name": "v1", "calls": []}
+
+        def completion(image_paths, **kwargs):
+            name = os.path.basename(image_paths[0])
+            run["calls"].append(name)
+            return f"{run['name']}:{name}"
+
+        mock_llm_class.return_value.completion.side_effect = completion
+
+        v1 = make_labelled_pdf("v1.pdf", ["A", "B", "C", "D", "E"])
+        convert_to_file(v1, str(output_file), manifest_path=manifest_path)
+        assert len(run["calls"]) == 5
+
+        # Revision inserts a page after B and edits D
+        run.update(name="v2", calls=[])
+        v2 = make_labelled_pdf("v2.pdf", ["A", "B", "X", "C", "D*", "E"])
+        convert_to_file(v2, str(output_file), manifest_path=manifest_path)
+
+        assert run["calls"] == ["page_0003.jpg", "page_0005.jpg"]
+        assert output_file.read_text(encoding="utf-8").split("\n\n") == [
+            "v1:page_0001.jpg",
+            "v1:page_0002.jpg",
+            "v2:page_0003.jpg",
+            "v1:page_0003.jpg",
+            "v2:page_0005.jpg",
+            "v1:page_0005.jpg",
+        ]
+
+        # Nothing changed: no page is transcribed again
+        run.update(name="v3", calls=[])
+        convert_to_file(v2, str(output_file), manifest_path=manifest_path)
+        assert run["calls"] == []
+        assert output_file.read_text(encoding="utf-8").startswith("v1:page_0001")
+
+    @patch("markpdfdown.main.LLMClient")
+    def test_failed_conversion_keeps_manifest(
+        self, mock_llm_class, make_labelled_pdf, tmp_path, monkeypatch
+    ):
+        """Test the manifest is only replaced after a successful run"""
+        monkeypatch.chdir(tmp_path)
+        manifest_path = tmp_path / "doc.pages.json"
+        mock_llm_class.return_value.completion.side_effect = KeyboardInterrupt()
+
+        pdf = make_labelled_pdf("doc.pdf", ["A", "B"])
+        with pytest.raises(KeyboardInterrupt):
+            convert_to_file(
+                pdf, str(tmp_path / "doc.md"), manifest_path=str(manifest_path)
+            )
+
+        assert not manifest_path.exists()
 
 
 class TestConvertFromStdin:
@@ -307,3 +1891,15 @@ class TestConvertFromStdin:
 
         call_kwargs = mock_convert.call_args.kwargs
         assert call_kwargs["input_filename"] is None
+
+    @patch("markpdfdown.main.convert_to_markdown")
+    @patch("markpdfdown.main.sys.stdin")
+    def test_stdin_passes_pages(self, mock_stdin, mock_convert):
+        """Test the page specification is passed to the conversion"""
+        mock_convert.return_value = "# Content"
+        mock_stdin.buffer.read.return_value = b"%PDF-1.4" + b"\x00" * 100
+        mock_stdin.buffer.name = "<stdin>"
+
+        convert_from_stdin(pages="1-3,7")
+
+        assert mock_convert.call_args.kwargs["pages"] == "1-3,7"
@@ -0,0 +1,52 @@
+"""
+Tests for markpdfdown.core.manifest module
+"""
+
+import json
+
+from markpdfdown.core.manifest import PageManifest
+
+
+class TestPageManifest:
+    """Tests for PageManifest class"""
+
+    def test_missing_manifest_is_empty(self, tmp_path):
+        """Test loading a manifest that does not exist yet"""
+        manifest = PageManifest.load(str(tmp_path / "doc.pages.json"))
+        assert manifest.lookup("abc") is None
+
+    def test_round_trip(self, tmp_path):
+        """Test recorded pages can be looked up after saving and loading"""
+        path = str(tmp_path / "doc.pages.json")
+        manifest = PageManifest.load(path)
+        manifest.record(1, "aaa", "# One")
+        manifest.record(2, "bbb", "# Two")
+        manifest.save()
+
+        loaded = PageManifest.load(path)
+        assert loaded.lookup("aaa") == "# One"
+        assert loaded.lookup("bbb") == "# Two"
+        assert loaded.pages == []
+        assert [p.name for p in tmp_path.iterdir()] == ["doc.pages.json"]
+
+    def test_save_replaces_previous_run(self, tmp_path):
+        """Test only pages of the latest run are kept"""
+        path = str(tmp_path / "doc.pages.json")
+        first = PageManifest.load(path)
+        first.record(1, "old", "# Old")
+        first.save()
+
+        second = PageManifest.load(path)
+        second.record(1, "new", "# New")
+        second.save()
+
+        assert PageManifest.load(path).previous == {"new": "# New"}
+
+    def test_corrupt_manifest_ignored(self, tmp_path):
+        """Test an unreadable manifest falls back to a full conversion"""
+        path = tmp_path / "doc.pages.json"
+        path.write_text("{not json", encoding="utf-8")
+        assert PageManifest.load(str(path)).previous == {}
+
+        path.write_text(json.dumps({"version": 99, "pages": []}), encoding="utf-8")
+        assert PageManifest.load(str(path)).previous == {}
@@ -0,0 +1,179 @@
+"""
+Tests for markpdfdown.core.output_writer module
+"""
+
+import io
+import os
+from unittest.mock import patch
+
+import pytest
+
+from markpdfdown.core.output_writer import MarkdownWriter, OrderedStreamWriter
+
+
+def _temp_files(directory):
+    return [name for name in os.listdir(directory) if name.endswith(".tmp")]
+
+
+class TestMarkdownWriter:
+    """Tests for MarkdownWriter class"""
+
+    def test_pages_joined_in_order(self, tmp_path):
+        """Test pages are joined with the separator in order"""
+        output = tmp_path / "out.md"
+
+        with MarkdownWriter(str(output)) as writer:
+            writer.write_page(0, "# One")
+            writer.write_page(1, "# Two")
+
+        assert output.read_text(encoding="utf-8") == "# One\n\n# Two"
+        assert _temp_files(tmp_path) == []
+
+    def test_out_of_order_pages_are_reordered(self, tmp_path):
+        """Test pages completing out of order are written in order"""
+        output = tmp_path / "out.md"
+
+        with MarkdownWriter(str(output)) as writer:
+            writer.write_page(2, "C")
+            writer.write_page(0, "A")
+            assert writer.pages_written == 1
+            writer.write_page(1, "B")
+            assert writer.pages_written == 3
+
+        assert output.read_text(encoding="utf-8") == "A\n\nB\n\nC"
+
+    def test_empty_pages_are_skipped(self, tmp_path):
+        """Test empty pages advance the order without adding separators"""
+        output = tmp_path / "out.md"
+
+        with MarkdownWriter(str(output)) as writer:
+            writer.write_page(0, "")
+            writer.write_page(1, "A")
+            writer.write_page(2, "")
+            writer.write_page(3, "B")
+
+        assert output.read_text(encoding="utf-8") == "A\n\nB"
+
+    def test_target_untouched_until_commit(self, tmp_path):
+        """Test the target only changes when the writer commits"""
+        output = tmp_path / "out.md"
+        output.write_text("previous", encoding="utf-8")
+
+        writer = MarkdownWriter(str(output))
+        writer.write_page(0, "new")
+        assert output.read_text(encoding="utf-8") == "previous"
+
+        writer.commit()
+        assert output.read_text(encoding="utf-8") == "new"
+
+    def test_exception_discards_temp_file(self, tmp_path):
+        """Test a failed run leaves the existing target and no temp file"""
+        output = tmp_path / "out.md"
+        output.write_text("previous", encoding="utf-8")
+
+        with pytest.raises(RuntimeError):
+            with MarkdownWriter(str(output)) as writer:
+                writer.write_page(0, "partial")
+                raise RuntimeError("crash")
+
+        assert output.read_text(encoding="utf-8") == "previous"
+        assert _temp_files(tmp_path) == []
+
+    def test_commit_with_missing_page_raises(self, tmp_path):
+        """Test committing with a gap in the sequence raises"""
+        output = tmp_path / "out.md"
+        writer = MarkdownWriter(str(output))
+        writer.write_page(1, "B")
+
+        with pytest.raises(ValueError, match="page 0 is missing"):
+            writer.commit()
+
+        assert not output.exists()
+        assert _temp_files(tmp_path) == []
+
+    def test_duplicate_page_raises(self, tmp_path):
+        """Test writing the same page twice raises"""
+        writer = MarkdownWriter(str(tmp_path / "out.md"))
+        writer.write_page(0, "A")
+
+        with pytest.raises(ValueError, match="already written"):
+            writer.write_page(0, "A")
+        writer.abort()
+
+    def test_periodic_fsync(self, tmp_path):
+        """Test the temp file is fsynced every fsync_pages pages"""
+        writer = MarkdownWriter(
+            str(tmp_path / "out.md"), fsync_pages=2, fsync_seconds=0
+        )
+
+        with patch("markpdfdown.core.output_writer.os.fsync") as mock_fsync:
+            for index in range(5):
+                writer.write_page(index, f"page {index}")
+            assert mock_fsync.call_count == 2
+        writer.abort()
+
+    def test_missing_output_directory_raises(self, tmp_path):
+        """Test an unwritable target fails before any work is done"""
+        with pytest.raises(OSError):
+            MarkdownWriter(str(tmp_path / "missing" / "out.md"))
+
+
+class TestOrderedStreamWriter:
+    """Tests for OrderedStreamWriter class"""
+
+    def test_head_page_written_through(self):
+        """Test fragments of the first page are written immediately"""
+        out = io.StringIO()
+        writer = OrderedStreamWriter(out)
+
+        writer.write_text(0, "# Tit")
+        assert out.getvalue() == "# Tit"
+        writer.write_text(0, "le")
+        assert out.getvalue() == "# Title"
+
+    def test_later_pages_buffered_until_head_finishes(self):
+        """Test background pages appear only once earlier pages finish"""
+        out = io.StringIO()
+        writer = OrderedStreamWriter(out)
+
+        writer.write_text(1, "B1")
+        writer.write_text(2, "C")
+        writer.finish_page(2, "C")
+        writer.write_text(0, "A")
+        assert out.getvalue() == "A"
+
+        writer.finish_page(0, "A")
+        assert out.getvalue() == "A\n\nB1"
+
+        writer.write_text(1, "B2")
+        writer.finish_page(1, "B1B2")
+        writer.close()
+        assert out.getvalue() == "A\n\nB1B2\n\nC\n"
+        assert writer.pages_written == 3
+
+    def test_unstreamed_page_written_whole(self):
+        """Test pages delivered without fragments are written on finish"""
+        out = io.StringIO()
+        writer = OrderedStreamWriter(out)
+
+        writer.finish_page(0, "")
+        writer.finish_page(1, "Whole page")
+        writer.close()
+
+        assert out.getvalue() == "Whole page\n"
+
+    def test_close_with_unfinished_page_raises(self):
+        """Test closing while a page is outstanding raises"""
+        writer = OrderedStreamWriter(io.StringIO())
+        writer.finish_page(1, "B")
+
+        with pytest.raises(ValueError, match="page 0 is missing"):
+            writer.close()
+
+    def test_text_after_finish_raises(self):
+        """Test fragments for a finished page are rejected"""
+        writer = OrderedStreamWriter(io.StringIO())
+        writer.finish_page(0, "A")
+
+        with pytest.raises(ValueError, match="already finished"):
+            writer.write_text(0, "late")
@@ -0,0 +1,199 @@
+"""
+Tests for markpdfdown.core.page_queue module
+"""
+
+import multiprocessing
+import sqlite3
+import time
+
+import pytest
+
+from markpdfdown.core.page_queue import PageQueue
+
+
+def _claim_all(db_path: str, worker: str) -> list[int]:
+    queue = PageQueue(db_path)
+    claimed = []
+    while (task := queue.claim(worker)) is not None:
+        claimed.append(task.page_num)
+        queue.complete(task, f"# {task.page_num}")
+    return claimed
+
+
+class TestPageQueue:
+    """Tests for PageQueue class"""
+
+    def test_claim_in_page_order(self, tmp_path):
+        """Test pages are claimed one at a time in document order"""
+        queue = PageQueue(str(tmp_path / "jobs.db"))
+        queue.enqueue("/data/a.pdf", "/data/a.md", [3, 5])
+        queue.enqueue("/data/b.pdf", "/data/b.md", [1])
+
+        claimed = [queue.claim("w1") for _ in range(4)]
+
+        assert [(t.input_path, t.page_num) for t in claimed[:3]] == [
+            ("/data/a.pdf", 3),
+            ("/data/a.pdf", 5),
+            ("/data/b.pdf", 1),
+        ]
+        assert claimed[3] is None
+        assert queue.counts()["leased"] == 3
+
+    def test_expired_lease_reclaimed(self, tmp_path):
+        """Test a page whose lease expired is handed to another worker"""
+        queue = PageQueue(str(tmp_path / "jobs.db"), lease_seconds=0.05)
+        queue.enqueue("/data/a.pdf", "/data/a.md", [1])
+
+        stale = queue.claim("w1")
+        assert PageQueue(queue.db_path).claim("w2") is None
+
+        time.sleep(0.1)
+        task = queue.claim("w2")
+        assert task.page_num == 1
+        assert task.attempts == 2
+
+        # The late result of the first worker is discarded
+        assert queue.complete(stale, "stale") is False
+        assert queue.complete(task, "fresh") is True
+
+    def test_expired_lease_counts_as_attempt(self, tmp_path):
+        """Test a page whose leases keep expiring is failed after its attempts"""
+        queue = PageQueue(str(tmp_path / "jobs.db"), lease_seconds=0.05)
+        document_id = queue.enqueue("/data/a.pdf", "/data/a.md", [1, 2])
+
+        assert queue.claim("w1", max_attempts=2).page_num == 1
+        assert queue.claim("w1", max_attempts=2).page_num == 2
+        time.sleep(0.1)
+        assert queue.claim("w2", max_attempts=2).attempts == 2
+        time.sleep(0.1)
+
+        # Page 1 used up its attempts; page 2 gets its second one
+        assert queue.claim("w3", max_attempts=2).page_num == 2
+        assert queue.failed_pages(document_id) == [1]
+        time.sleep(0.1)
+
+        assert queue.claim("w4", max_attempts=2) is None
+        assert queue.failed_pages(document_id) == [1, 2]
+        assert not queue.has_unfinished()
+        assert queue.ready_documents() == [document_id]
+
+    def test_renew_extends_lease(self, tmp_path):
+        """Test renewing keeps a page from being reclaimed"""
+        queue = PageQueue(str(tmp_path / "jobs.db"), lease_seconds=0.2)
+        queue.enqueue("/data/a.pdf", "/data/a.md", [1])
+
+        task = queue.claim("w1")
+        time.sleep(0.15)
+        assert queue.renew(task) is True
+        time.sleep(0.1)
+        assert queue.claim("w2") is None
+
+    def test_failed_page_retried_then_marked_failed(self, tmp_path):
+        """Test failed pages return to the queue until attempts run out"""
+        queue = PageQueue(str(tmp_path / "jobs.db"))
+        queue.enqueue("/data/a.pdf", "/data/a.md", [1])
+
+        queue.fail(queue.claim("w1"), "boom", max_attempts=2)
+        assert queue.counts()["pending"] == 1
+
+        queue.fail(queue.claim("w1"), "boom", max_attempts=2)
+        assert queue.counts()["failed"] == 1
+        assert queue.claim("w1") is None
+        assert not queue.has_unfinished()
+
+    def test_failed_page_retried_after_delay(self, tmp_path):
+        """Test a failed page is held back for a delay doubling per attempt"""
+        queue = PageQueue(str(tmp_path / "jobs.db"))
+        queue.enqueue("/data/a.pdf", "/data/a.md", [1])
+
+        queue.fail(queue.claim("w1"), "boom", max_attempts=3, retry_delay=0.05)
+        assert queue.claim("w1") is None
+        assert queue.has_unfinished()
+        time.sleep(0.06)
+        task = queue.claim("w1")
+        assert task.attempts == 2
+
+        queue.fail(task, "boom", max_attempts=3, retry_delay=0.05)
+        time.sleep(0.06)
+        assert queue.claim("w1") is None
+        time.sleep(0.05)
+        assert queue.claim("w1").attempts == 3
+
+    def test_assemble_writes_pages_in_order(self, tmp_path):
+        """Test assemble writes the ordered Markdown of a finished document"""
+        queue = PageQueue(str(tmp_path / "jobs.db"))
+        output = tmp_path / "a.md"
+        document_id = queue.enqueue("/data/a.pdf", str(output), [1, 2, 3])
+
+        tasks = [queue.claim("w1") for _ in range(3)]
+        for task in reversed(tasks):
+            queue.complete(task, "" if task.page_num == 2 else f"# {task.page_num}")
+
+        assert queue.ready_documents() == [document_id]
+        assert queue.assemble(document_id) == str(output)
+        assert output.read_text(encoding="utf-8") == "# 1\n\n# 3"
+        assert queue.ready_documents() == []
+
+    def test_assemble_unfinished_raises(self, tmp_path):
+        """Test assembling a document with open pages raises"""
+        queue = PageQueue(str(tmp_path / "jobs.db"))
+        document_id = queue.enqueue("/data/a.pdf", str(tmp_path / "a.md"), [1, 2])
+        queue.complete(queue.claim("w1"), "# 1")
+
+        with pytest.raises(ValueError, match=r"unfinished pages: 2 \(pending\)"):
+            queue.assemble(document_id)
+        assert queue.ready_documents() == []
+
+    def test_assemble_marks_failed_pages(self, tmp_path):
+        """Test a document with failed pages is assembled with markers"""
+        queue = PageQueue(str(tmp_path / "jobs.db"))
+        output = tmp_path / "a.md"
+        document_id = queue.enqueue("/data/a.pdf", str(output), [4, 5])
+        queue.fail(queue.claim("w1"), "boom", max_attempts=1)
+        assert queue.ready_documents() == []
+
+        queue.complete(queue.claim("w1"), "# 5")
+
+        assert queue.ready_documents() == [document_id]
+        assert queue.failed_pages(document_id) == [4]
+        queue.assemble(document_id)
+        assert output.read_text(encoding="utf-8") == (
+            "<!-- page 4 not converted: conversion failed -->\n\n# 5"
+        )
+
+    def test_database_without_backoff_column_upgraded(self, tmp_path):
+        """Test queues created before retry backoff keep working"""
+        db_path = str(tmp_path / "jobs.db")
+        conn = sqlite3.connect(db_path)
+        conn.executescript(
+            "CREATE TABLE tasks (document_id INTEGER NOT NULL, page_index INTEGER "
+            "NOT NULL, page_num INTEGER NOT NULL, status TEXT NOT NULL DEFAULT "
+            "'pending', worker TEXT, lease_expires REAL, attempts INTEGER NOT NULL "
+            "DEFAULT 0, content TEXT, error TEXT, "
+            "PRIMARY KEY (document_id, page_index));"
+        )
+        conn.close()
+
+        queue = PageQueue(db_path)
+        queue.enqueue("/data/a.pdf", "/data/a.md", [1])
+
+        assert queue.claim("w1").page_num == 1
+
+    def test_enqueue_without_pages_raises(self, tmp_path):
+        """Test enqueueing an empty page list raises"""
+        queue = PageQueue(str(tmp_path / "jobs.db"))
+        with pytest.raises(ValueError, match="No pages"):
+            queue.enqueue("/data/a.pdf", "/data/a.md", [])
+
+    def test_processes_never_claim_the_same_page(self, tmp_path):
+        """Test concurrent worker processes split the pages without overlap"""
+        db_path = str(tmp_path / "jobs.db")
+        queue = PageQueue(db_path)
+        queue.enqueue("/data/a.pdf", str(tmp_path / "a.md"), list(range(1, 61)))
+
+        with multiprocessing.get_context("fork").Pool(4) as pool:
+            results = pool.starmap(_claim_all, [(db_path, f"w{n}") for n in range(4)])
+
+        claimed = sorted(page for pages in results for page in pages)
+        assert claimed == list(range(1, 61))
+        assert queue.counts()["done"] == 60
@@ -0,0 +1,165 @@
+"""
+Tests for markpdfdown.core.planner module
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from markpdfdown.config import Config
+from markpdfdown.core.planner import (
+    ConversionPlan,
+    ModelEstimate,
+    estimate_image_tokens,
+    format_plan,
+    plan_conversion,
+)
+
+
+@pytest.fixture
+def prices():
+    """Fixed prices of $1 / $4 per million tokens for every model"""
+    with patch("markpdfdown.core.planner.model_prices") as mock_prices:
+        mock_prices.return_value = (1e-6, 4e-6)
+        yield mock_prices
+
+
+class TestEstimateImageTokens:
+    """Tests for estimate_image_tokens function"""
+
+    def test_openai_tiles(self):
+        """Test OpenAI-style images are billed per 512-pixel tile"""
+        # 1024 x 1024 is scaled to 768 x 768: 4 tiles
+        assert estimate_image_tokens(1024, 1024, "gpt-4o") == 4 * 170 + 85
+        # A4 at 300 DPI is scaled to 768 x 1086: 6 tiles
+        assert estimate_image_tokens(2480, 3508, "gpt-4o") == 6 * 170 + 85
+
+    def test_anthropic_area(self):
+        """Test Anthropic images are billed by downscaled area"""
+        assert estimate_image_tokens(750, 1000, "anthropic/claude-3-haiku") == 1000
+        # The long side is capped at 1568 pixels
+        assert estimate_image_tokens(2480, 3508, "claude-3-5-sonnet") == 2318
+
+    def test_empty_image(self):
+        """Test zero-sized images cost nothing"""
+        assert estimate_image_tokens(0, 100, "gpt-4o") == 0
+
+
+class TestPlanConversion:
+    """Tests for plan_conversion function"""
+
+    def test_pages_and_tokens(self, multipage_pdf_path, prices):
+        """Test every selected page is one request with prompt and image tokens"""
+        config = Config(model_name="gpt-4o")
+
+        plan = plan_conversion(
+            [multipage_pdf_path], config, pages="1-4", prompt="x" * 400
+        )
+
+        # 144pt pages render at 600 x 600 pixels: 4 tiles
+        assert plan.files == 1
+        assert plan.pages == plan.requests == 4
+        assert plan.input_tokens == 4 * (100 + 4 * 170 + 85)
+        assert 0 < plan.output_tokens < 4 * 10
+        assert plan.cost == pytest.approx(
+            plan.input_tokens * 1e-6 + plan.output_tokens * 4e-6
+        )
+
+    def test_no_llm_calls(self, multipage_pdf_path, prices):
+        """Test planning never sends a request"""
+        with patch("markpdfdown.core.llm_client.completion") as mock_completion:
+            plan_conversion([multipage_pdf_path], Config(model_name="gpt-4o"))
+
+        mock_completion.assert_not_called()
+
+    def test_tiling_adds_requests(self, multipage_pdf_path, prices):
+        """Test tiled pages count one request per tile"""
+        config = Config(model_name="gpt-4o", tiling=True, tile_max_pixels=300)
+
+        plan = plan_conversion([multipage_pdf_path], config, pages="1")
+
+        assert plan.pages == 1
+        assert plan.requests == 4
+
+    def test_pages_routed_to_fast_model(self, make_labelled_pdf, prices):
+        """Test pages are attributed to the model routing would pick"""
+        # The blank page has no text layer and goes to the strong model
+        path = make_labelled_pdf("mixed.pdf", ["Plain text", ""])
+        config = Config(model_name="gpt-4o", fast_model_name="gpt-4o-mini")
+
+        plan = plan_conversion([path], config)
+
+        pages = {estimate.model: estimate.pages for estimate in plan.models}
+        assert pages == {"gpt-4o": 1, "gpt-4o-mini": 1}
+
+    def test_unreadable_file_reported(self, multipage_pdf_path, tmp_path, prices):
+        """Test files that cannot be opened are skipped and reported"""
+        broken = tmp_path / "broken.pdf"
+        broken.write_bytes(b"not a pdf")
+
+        plan = plan_conversion([multipage_pdf_path, str(broken)], Config())
+
+        assert plan.files == 1
+        assert plan.pages == 10
+        assert len(plan.errors) == 1
+        assert "broken.pdf" in plan.errors[0]
+
+    def test_image_input(self, sample_image_path, prices):
+        """Test images are planned at their own size"""
+        plan = plan_conversion([sample_image_path], Config(model_name="gpt-4o"))
+
+        assert plan.pages == plan.requests == 1
+        assert plan.output_tokens == 500
+
+    def test_unknown_price(self, multipage_pdf_path, prices):
+        """Test the cost is unknown when a model has no listed price"""
+        prices.return_value = None
+
+        plan = plan_conversion([multipage_pdf_path], Config(model_name="local-model"))
+
+        assert plan.cost is None
+        assert "unknown price" in format_plan(plan)
+
+
+class TestConversionPlan:
+    """Tests for ConversionPlan class"""
+
+    def test_time_spread_over_concurrency(self):
+        """Test request time is divided among the concurrent slots"""
+        plan = ConversionPlan(concurrency=4, models=[ModelEstimate("gpt-4o", 100, 100)])
+        plan.models[0].request_seconds = 800.0
+
+        assert plan.seconds == 200.0
+
+    def test_time_bound_by_rate_limit(self):
+        """Test the rate limit bounds the wall time when it is the bottleneck"""
+        plan = ConversionPlan(
+            concurrency=16,
+            requests_per_minute=60,
+            models=[ModelEstimate("gpt-4o", 600, 600, request_seconds=1200.0)],
+        )
+
+        assert plan.seconds == 600.0
+
+    def test_format(self):
+        """Test the report lists totals, cost and wall time"""
+        plan = ConversionPlan(
+            files=2,
+            pages=1200,
+            concurrency=8,
+            requests_per_minute=500,
+            models=[
+                ModelEstimate(
+                    "gpt-4o", 1200, 1200, 1_500_000, 400_000, 9600.0, cost=7.75
+                )
+            ],
+        )
+
+        report = format_plan(plan)
+
+        assert "Pages:          1,200" in report
+        assert "gpt-4o: 1,200 pages, 1,500,000 input + 400,000 output" in report
+        assert "$7.75" in report
+        assert "Wall time:      20m 00s at concurrency 8, 500 requests/minute" in (
+            report
+        )
@@ -0,0 +1,159 @@
+"""
+Tests for markpdfdown.core.progress module
+"""
+
+import io
+from unittest.mock import patch
+
+import pytest
+
+from markpdfdown.core.progress import (
+    ProgressDisplay,
+    ProgressEvent,
+    ProgressTracker,
+    format_progress,
+)
+
+
+@pytest.fixture
+def clock():
+    """Controllable monotonic clock for the progress module"""
+    now = [100.0]
+    with patch("markpdfdown.core.progress.time.monotonic", lambda: now[0]):
+        yield now
+
+
+class TestProgressTracker:
+    """Tests for ProgressTracker class"""
+
+    def test_counts(self, clock):
+        """Test events carry the counts after each change"""
+        events = []
+        tracker = ProgressTracker(3, events.append)
+
+        tracker.rendered(1)
+        tracker.submitted(1)
+        tracker.submitted(2)
+        tracker.failed(2)
+        tracker.retried(2)
+        tracker.completed(3, reused=True)
+
+        assert [e.kind for e in events] == [
+            "rendered",
+            "submitted",
+            "submitted",
+            "failed",
+            "retried",
+            "completed",
+        ]
+        assert [(e.completed, e.failed, e.in_flight) for e in events] == [
+            (0, 0, 0),
+            (0, 0, 1),
+            (0, 0, 2),
+            (0, 1, 1),
+            (0, 0, 2),
+            (1, 0, 2),
+        ]
+
+    def test_eta_from_throughput(self, clock):
+        """Test the ETA divides the remaining pages by the page rate"""
+        events = []
+        tracker = ProgressTracker(10, events.append)
+
+        for page in (1, 2):
+            clock[0] += 3.0
+            tracker.completed(page)
+
+        assert events[-1].rate == pytest.approx(2 / 6)
+        assert events[-1].eta == pytest.approx(8 * 3)
+
+    def test_eta_follows_recent_pages(self, clock):
+        """Test the rate covers only the last window of pages"""
+        events = []
+        tracker = ProgressTracker(100, events.append, window=4)
+
+        for page in range(1, 11):
+            clock[0] += 1.0
+            tracker.completed(page)
+        # The provider slows down to one page every 10 seconds
+        for page in range(11, 15):
+            clock[0] += 10.0
+            tracker.completed(page)
+
+        assert events[-1].rate == pytest.approx(0.1)
+        assert events[-1].eta == pytest.approx(86 * 10)
+
+    def test_reused_pages_not_in_rate(self, clock):
+        """Test pages reused from a previous run do not inflate the rate"""
+        events = []
+        tracker = ProgressTracker(4, events.append)
+
+        tracker.completed(1, reused=True)
+        tracker.completed(2, reused=True)
+
+        assert events[-1].completed == 2
+        assert events[-1].rate is None
+        assert events[-1].eta is None
+
+    def test_concurrency_limit(self, clock):
+        """Test events carry the controller's current limit"""
+        from markpdfdown.core.concurrency import AdaptiveConcurrency
+
+        events = []
+        controller = AdaptiveConcurrency(initial=4, maximum=8)
+        tracker = ProgressTracker(2, events.append, controller=controller)
+
+        tracker.submitted(1)
+        controller.limit = 2
+        tracker.completed(1)
+
+        assert [event.concurrency_limit for event in events] == [4, 2]
+        assert ProgressTracker(1, events.append)._emit("rendered", 1) is None
+        assert events[-1].concurrency_limit is None
+
+
+class TestFormatProgress:
+    """Tests for format_progress function"""
+
+    def test_running(self):
+        """Test the line shows the bar, counts, rate and ETA"""
+        event = ProgressEvent("completed", 12, 40, 10, 2, 3, 60.0, 0.2, 140.0)
+
+        assert format_progress(event, width=10) == (
+            "[###-------] 12/40 pages, 2 failed, 3 in flight, "
+            "12.0 pages/min, ETA 2m 20s"
+        )
+
+    def test_concurrency_limit(self):
+        """Test the adaptive limit is shown next to the pages in flight"""
+        event = ProgressEvent("submitted", 3, 10, 1, 0, 3, 5.0, concurrency_limit=4)
+
+        assert format_progress(event, width=10) == (
+            "[#---------] 1/10 pages, 3 in flight (limit 4)"
+        )
+
+    def test_finished(self):
+        """Test the final line shows the elapsed time instead of an ETA"""
+        event = ProgressEvent("completed", 4, 4, 4, 0, 0, 75.0, 0.05, 0.0)
+
+        assert format_progress(event, width=4) == (
+            "[####] 4/4 pages, 3.0 pages/min in 1m 15s"
+        )
+
+
+class TestProgressDisplay:
+    """Tests for ProgressDisplay class"""
+
+    def test_redraws_one_line(self):
+        """Test each event overwrites the line and close moves past it"""
+        stream = io.StringIO()
+        display = ProgressDisplay(stream, width=4)
+
+        display(ProgressEvent("submitted", 1, 2, 0, 0, 1, 0.5))
+        display(ProgressEvent("completed", 1, 2, 1, 0, 0, 1.0))
+        display.close()
+
+        output = stream.getvalue()
+        assert output.count("\r\033[K") == 3
+        assert "\n" not in output[:-1]
+        assert output.endswith("[##--] 1/2 pages\n")
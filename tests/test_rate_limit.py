@@ -0,0 +1,122 @@
+"""
+Tests for markpdfdown.core.rate_limit module
+"""
+
+import multiprocessing
+import sqlite3
+import time
+
+import pytest
+
+from markpdfdown.core.deadline import Deadline, DeadlineExceeded
+from markpdfdown.core.rate_limit import HostRateLimiter
+
+
+def _hold_slot(db_path: str, hold: float) -> tuple[float, float]:
+    limiter = HostRateLimiter(db_path, "gpt-4o", max_concurrent=2)
+    with limiter.slot():
+        start = time.time()
+        time.sleep(hold)
+        return start, time.time()
+
+
+class TestHostRateLimiter:
+    """Tests for HostRateLimiter class"""
+
+    def test_concurrency_shared_between_instances(self, tmp_path):
+        """Test limiters on the same database share the concurrency budget"""
+        db_path = str(tmp_path / "limits.db")
+        first = HostRateLimiter(db_path, "gpt-4o", max_concurrent=1)
+        second = HostRateLimiter(db_path, "gpt-4o", max_concurrent=1)
+
+        slot_id = first.acquire()
+        deadline = Deadline(0.5)
+        with pytest.raises(DeadlineExceeded):
+            second.acquire(deadline)
+
+        first.release(slot_id)
+        second.release(second.acquire())
+
+    def test_concurrency_across_processes(self, tmp_path):
+        """Test processes never hold more slots than the limit together"""
+        db_path = str(tmp_path / "limits.db")
+        HostRateLimiter(db_path, "gpt-4o", max_concurrent=2)
+
+        with multiprocessing.get_context("fork").Pool(4) as pool:
+            spans = pool.starmap(_hold_slot, [(db_path, 0.3)] * 4)
+
+        for start, _ in spans:
+            overlapping = sum(1 for s, e in spans if s <= start < e)
+            assert overlapping <= 2
+
+    def test_rate_paced(self, tmp_path):
+        """Test requests beyond the burst wait for the bucket to refill"""
+        limiter = HostRateLimiter(
+            str(tmp_path / "limits.db"), "gpt-4o", requests_per_minute=120
+        )
+
+        start = time.monotonic()
+        for _ in range(4):
+            limiter.release(limiter.acquire())
+        elapsed = time.monotonic() - start
+
+        # Two requests start at once, the other two half a second apart
+        assert 0.9 <= elapsed < 2.0
+
+    def test_rate_shared_between_instances(self, tmp_path):
+        """Test limiters on the same database draw from one bucket"""
+        db_path = str(tmp_path / "limits.db")
+        first = HostRateLimiter(db_path, "gpt-4o", requests_per_minute=6)
+        second = HostRateLimiter(db_path, "gpt-4o", requests_per_minute=6)
+
+        first.acquire()
+        with pytest.raises(DeadlineExceeded):
+            second.acquire(Deadline(0.5))
+
+    def test_keys_independent(self, tmp_path):
+        """Test each model has its own budget"""
+        db_path = str(tmp_path / "limits.db")
+        first = HostRateLimiter(db_path, "gpt-4o", 6, max_concurrent=1)
+        second = HostRateLimiter(db_path, "gpt-4o-mini", 6, max_concurrent=1)
+
+        first.acquire()
+        second.acquire(Deadline(0.5))
+
+    def test_dead_process_slots_reclaimed(self, tmp_path):
+        """Test slots of processes that exited are given back"""
+        db_path = str(tmp_path / "limits.db")
+        limiter = HostRateLimiter(db_path, "gpt-4o", max_concurrent=1)
+        process = multiprocessing.get_context("fork").Process(
+            target=time.sleep, args=(0,)
+        )
+        process.start()
+        process.join()
+
+        with sqlite3.connect(db_path) as conn:
+            conn.execute(
+                "INSERT INTO slots (id, key, pid, expires_at) VALUES (?, ?, ?, ?)",
+                ("stale", "gpt-4o", process.pid, time.time() + 900),
+            )
+
+        limiter.release(limiter.acquire(Deadline(0.5)))
+
+    def test_expired_lease_reclaimed(self, tmp_path):
+        """Test slots are given back once their lease runs out"""
+        db_path = str(tmp_path / "limits.db")
+        first = HostRateLimiter(db_path, "gpt-4o", max_concurrent=1, lease_seconds=0.2)
+        second = HostRateLimiter(db_path, "gpt-4o", max_concurrent=1)
+
+        first.acquire()
+        second.release(second.acquire(Deadline(2)))
+
+    def test_slot_released_on_error(self, tmp_path):
+        """Test the slot is given back when the request fails"""
+        limiter = HostRateLimiter(
+            str(tmp_path / "limits.db"), "gpt-4o", max_concurrent=1
+        )
+
+        with pytest.raises(RuntimeError):
+            with limiter.slot():
+                raise RuntimeError("API error")
+
+        limiter.release(limiter.acquire(Deadline(0.5)))
@@ -0,0 +1,58 @@
+"""
+Tests for markpdfdown.core.results module
+"""
+
+import sys
+
+from markpdfdown.core.progress import ProgressEvent
+from markpdfdown.core.results import ConversionResult, PageResult
+
+
+class TestPageResult:
+    """Tests for PageResult class"""
+
+    def test_compact(self):
+        """Test a record is a small tuple without an instance dict"""
+        page = PageResult(1, "converted", "# Title", "gpt-4o", 1, 1000, 50)
+
+        assert not hasattr(page, "__dict__")
+        assert sys.getsizeof(page) <= 160
+
+    def test_cache_hit(self):
+        """Test reused pages and prompt cache reads count as cache hits"""
+        assert PageResult(1, "reused").cache_hit
+        assert PageResult(2, "converted", cached_tokens=1024).cache_hit
+        assert not PageResult(3, "converted").cache_hit
+
+
+class TestConversionResult:
+    """Tests for ConversionResult class"""
+
+    def test_summary(self):
+        """Test the result joins Markdown and lists missing pages"""
+        result = ConversionResult(
+            [
+                PageResult(1, "converted", "# One", prompt_tokens=10),
+                PageResult(2, "failed"),
+                PageResult(3, "reused", "# Three"),
+                PageResult(4, "unfinished"),
+            ]
+        )
+
+        assert result.markdown == "# One\n\n# Three"
+        assert result.failed_pages == [2, 4]
+        assert not result.complete
+        assert result.prompt_tokens == 10
+        assert len(result) == 4
+
+    def test_concurrency_limit(self):
+        """Test the last and highest limit of the progress events are kept"""
+        result = ConversionResult()
+
+        for limit in (None, 2, 5, 3):
+            result.record_progress(
+                ProgressEvent("completed", 1, 4, 1, 0, 0, 1.0, concurrency_limit=limit)
+            )
+
+        assert result.concurrency_limit == 3
+        assert result.peak_concurrency == 5
@@ -0,0 +1,109 @@
+"""
+Tests for markpdfdown.core.routing module
+"""
+
+import pytest
+
+from markpdfdown.core.routing import (
+    PageFeatures,
+    classify_page,
+    extract_page_features,
+)
+
+
+@pytest.fixture
+def pdf_page():
+    """Return a factory for a fresh 300x300pt PyMuPDF page"""
+    import fitz
+
+    docs = []
+
+    def make():
+        doc = fitz.open()
+        docs.append(doc)
+        return doc.new_page(width=300, height=300)
+
+    yield make
+    for doc in docs:
+        doc.close()
+
+
+class TestExtractPageFeatures:
+    """Tests for extract_page_features function"""
+
+    def test_plain_text_page(self, pdf_page):
+        """Test a page of prose has text and no other signals"""
+        page = pdf_page()
+        page.insert_text((10, 20), "Plain body text", fontsize=10)
+
+        features = extract_page_features(page)
+
+        assert features.text_chars == len("Plainbodytext")
+        assert features.drawing_segments == 0
+        assert features.image_coverage == 0.0
+        assert features.math_fonts == []
+
+    def test_table_rules_counted(self, pdf_page):
+        """Test ruling lines and boxes are counted as drawing segments"""
+        import fitz
+
+        page = pdf_page()
+        for row in range(5):
+            page.draw_line(
+                fitz.Point(10, 10 + row * 20), fitz.Point(290, 10 + row * 20)
+            )
+        page.draw_rect(fitz.Rect(10, 10, 290, 90))
+
+        assert extract_page_features(page).drawing_segments >= 6
+
+    def test_image_coverage(self, pdf_page, sample_image_path):
+        """Test the share of the page covered by images is measured"""
+        import fitz
+
+        page = pdf_page()
+        page.insert_image(
+            fitz.Rect(0, 0, 300, 150), filename=sample_image_path, keep_proportion=False
+        )
+
+        features = extract_page_features(page)
+        assert features.image_coverage == pytest.approx(0.5, abs=0.01)
+        assert not features.has_text_layer
+
+    def test_math_font_detected(self, pdf_page):
+        """Test text set in a symbol font is reported"""
+        page = pdf_page()
+        page.insert_text((10, 20), "abc", fontname="symb", fontsize=10)
+
+        assert extract_page_features(page).math_fonts == ["Symbol"]
+
+
+class TestClassifyPage:
+    """Tests for classify_page function"""
+
+    def test_short_plain_text_is_simple(self):
+        """Test a page of moderate plain text goes to the fast model"""
+        complex_page, reason = classify_page(PageFeatures(text_chars=800))
+        assert complex_page is False
+        assert "plain text" in reason
+
+    @pytest.mark.parametrize(
+        "features, reason",
+        [
+            (PageFeatures(), "no text layer"),
+            (PageFeatures(text_chars=100, math_fonts=["CMMI10"]), "math fonts"),
+            (PageFeatures(text_chars=100, math_glyphs=12), "formula glyphs"),
+            (PageFeatures(text_chars=100, drawing_segments=40), "segments"),
+            (PageFeatures(text_chars=100, image_coverage=0.6), "images cover 60%"),
+            (PageFeatures(text_chars=9000), "9000 characters"),
+        ],
+    )
+    def test_complex_signals(self, features, reason):
+        """Test each complexity signal sends the page to the strong model"""
+        complex_page, message = classify_page(features)
+        assert complex_page is True
+        assert reason in message
+
+    def test_thresholds_configurable(self):
+        """Test limits can be raised to accept more pages as simple"""
+        features = PageFeatures(text_chars=100, drawing_segments=40)
+        assert classify_page(features, max_simple_segments=50)[0] is False
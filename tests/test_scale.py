@@ -0,0 +1,160 @@
+"""
+Large-document scale tests for the conversion pipeline
+
+The default run converts a small synthetic PDF. Set MARKPDFDOWN_SCALE_TESTS=1
+to also run the 1k-10k page cases, which take several minutes.
+"""
+
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from markpdfdown.main import convert_from_file
+
+SCALE_ENV = "MARKPDFDOWN_SCALE_TESTS"
+
+# Ceilings that must hold for every page count
+RSS_CEILING_MB = 64
+SCRATCH_HEADROOM_BYTES = 1024 * 1024
+SECONDS_PER_PAGE = 0.05
+
+heavy = [
+    pytest.mark.scale,
+    pytest.mark.skipif(
+        not os.getenv(SCALE_ENV), reason=f"set {SCALE_ENV}=1 to run scale tests"
+    ),
+]
+
+pytestmark = pytest.mark.skipif(
+    not os.path.exists("/proc/self/statm"), reason="RSS sampling needs /proc"
+)
+
+
+def _rss_bytes() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _dir_bytes(path: str) -> int:
+    with os.scandir(path) as entries:
+        return sum(e.stat().st_size for e in entries if e.is_file())
+
+
+class _PeakRSS:
+    """Track peak RSS on a background thread"""
+
+    def __init__(self):
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, _rss_bytes())
+            self._stop.wait(0.01)
+
+    def __enter__(self):
+        self.peak = _rss_bytes()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+class _StubLLMClient:
+    """Instant LLM stand-in that samples scratch disk usage"""
+
+    sample_every = 50
+
+    def __init__(self, model_name: str, **kwargs):
+        self.calls = 0
+        self.peak_scratch = 0
+        self.peak_images = 0
+
+    def completion(self, image_paths, **kwargs):
+        self.calls += 1
+        if self.calls == 1 or self.calls % self.sample_every == 0:
+            scratch = os.path.dirname(image_paths[0])
+            self.peak_scratch = max(self.peak_scratch, _dir_bytes(scratch))
+            images = [n for n in os.listdir(scratch) if n.startswith("page_")]
+            images = [n for n in images if not n.endswith(".md")]
+            self.peak_images = max(self.peak_images, len(images))
+        name = os.path.basename(image_paths[0]).rsplit(".", 1)[0]
+        return f"# {name}"
+
+
+def _generate_pdf(path: str, pages: int) -> str:
+    import fitz  # PyMuPDF
+
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page(width=144, height=144)
+        page.insert_text((10, 20), f"Page {page_num + 1}", fontsize=10)
+        page.draw_line((10, 40), (134, 40))
+    doc.save(path)
+    doc.close()
+    return path
+
+
+@pytest.fixture
+def warm_pipeline(tmp_path, monkeypatch):
+    """Run one tiny conversion so imports and caches do not count as growth"""
+    monkeypatch.chdir(tmp_path)
+    pdf = _generate_pdf(str(tmp_path / "warm.pdf"), 2)
+    with patch("markpdfdown.main.LLMClient", _StubLLMClient):
+        convert_from_file(pdf)
+
+
+@pytest.mark.parametrize(
+    "pages",
+    [
+        100,
+        pytest.param(1000, marks=heavy),
+        pytest.param(5000, marks=heavy),
+        pytest.param(10000, marks=heavy),
+    ],
+)
+def test_large_document_bounds(pages, tmp_path, warm_pipeline):
+    """Test RSS, scratch disk and wall time stay bounded as page count grows"""
+    pdf_path = _generate_pdf(str(tmp_path / f"doc_{pages}.pdf"), pages)
+    input_bytes = os.path.getsize(pdf_path)
+    clients = []
+
+    def make_client(model_name, **kwargs):
+        client = _StubLLMClient(model_name)
+        clients.append(client)
+        return client
+
+    with patch("markpdfdown.main.LLMClient", side_effect=make_client):
+        baseline = _rss_bytes()
+        start = time.perf_counter()
+        with _PeakRSS() as rss:
+            result = convert_from_file(pdf_path)
+        elapsed = time.perf_counter() - start
+
+    client = clients[0]
+    markdown_bytes = len(result.encode("utf-8"))
+
+    # Every page is transcribed, in order
+    assert client.calls == pages
+    assert result.startswith("# page_0001")
+    assert result.endswith(f"# page_{pages:04d}")
+
+    # Memory does not scale with page count
+    growth_mb = (rss.peak - baseline) / (1024 * 1024)
+    assert growth_mb < RSS_CEILING_MB, f"RSS grew by {growth_mb:.1f} MB"
+
+    # At most one rendered page is on disk at any time
+    assert client.peak_images <= 1
+    assert client.peak_scratch <= input_bytes + markdown_bytes + SCRATCH_HEADROOM_BYTES
+
+    # Wall time grows linearly
+    assert elapsed < pages * SECONDS_PER_PAGE + 10, f"took {elapsed:.1f}s"
+
+    # Scratch directory is removed after the run
+    assert not os.listdir(tmp_path / "output")
@@ -0,0 +1,148 @@
+"""
+Tests for markpdfdown.core.tracing module
+"""
+
+import json
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from markpdfdown.core.tracing import Tracer, span, start_tracing, stop_tracing
+
+
+@pytest.fixture
+def tracer():
+    """Record spans for the duration of a test"""
+    tracer = start_tracing()
+    yield tracer
+    stop_tracing()
+
+
+def _spans(tracer, name=None):
+    events = [event for event in tracer.events() if event["ph"] == "X"]
+    if name is not None:
+        events = [event for event in events if event["name"] == name]
+    return events
+
+
+class TestTracer:
+    """Tests for Tracer class"""
+
+    def test_nested_spans(self):
+        """Test an inner span lies within its outer span on the same thread"""
+        tracer = Tracer()
+        with tracer.span("page", page=3):
+            with tracer.span("request", attempt=1):
+                pass
+
+        outer, inner = _spans(tracer)
+        assert outer["name"] == "page"
+        assert outer["args"] == {"page": 3}
+        assert inner["args"] == {"attempt": 1}
+        assert outer["tid"] == inner["tid"] == threading.get_native_id()
+        assert outer["ts"] <= inner["ts"]
+        assert inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+
+    def test_threads_named(self):
+        """Test spans carry their thread id and each thread is named once"""
+        tracer = Tracer()
+
+        def work():
+            with tracer.span("render page"):
+                pass
+
+        thread = threading.Thread(target=work, name="renderer")
+        thread.start()
+        thread.join()
+        with tracer.span("page"):
+            pass
+
+        names = {
+            event["tid"]: event["args"]["name"]
+            for event in tracer.events()
+            if event["ph"] == "M"
+        }
+        assert len(names) == 2
+        assert "renderer" in names.values()
+        assert {event["tid"] for event in _spans(tracer)} == set(names)
+
+    def test_error_recorded(self):
+        """Test a span left by an exception records the error and re-raises"""
+        tracer = Tracer()
+        with pytest.raises(TimeoutError):
+            with tracer.span("request"):
+                raise TimeoutError()
+
+        assert _spans(tracer)[0]["args"] == {"error": "TimeoutError"}
+
+    def test_save(self, tmp_path):
+        """Test the trace is saved as Chrome trace-event JSON"""
+        tracer = Tracer()
+        with tracer.span("encode image", path=tmp_path):
+            pass
+        path = tmp_path / "trace.json"
+
+        tracer.save(str(path))
+
+        data = json.loads(path.read_text())
+        assert data["displayTimeUnit"] == "ms"
+        event = data["traceEvents"][-1]
+        assert event["ph"] == "X"
+        assert event["args"] == {"path": str(tmp_path)}
+        assert event["dur"] >= 0
+
+
+class TestSpan:
+    """Tests for span function"""
+
+    def test_disabled_is_shared_noop(self):
+        """Test spans cost no allocation or recording while tracing is off"""
+        assert span("page", page=1) is span("request")
+        with span("page", page=1):
+            pass
+
+    def test_recorded_while_tracing(self, tracer):
+        """Test spans are recorded between start and stop"""
+        with span("post-process"):
+            pass
+
+        assert stop_tracing() is tracer
+        with span("ignored"):
+            pass
+
+        assert [event["name"] for event in _spans(tracer)] == ["post-process"]
+
+    def test_conversion_spans(self, multipage_pdf_path, tmp_path, tracer):
+        """Test a conversion records document, page, render and request spans"""
+        from markpdfdown.main import convert_to_markdown
+
+        response = MagicMock()
+        response.choices[0].message.content = "# Page"
+        response.choices[0].finish_reason = "stop"
+        with open(multipage_pdf_path, "rb") as f:
+            data = f.read()
+
+        with patch("markpdfdown.core.llm_client.completion") as mock_completion:
+            mock_completion.return_value = response
+            convert_to_markdown(data, output_dir=str(tmp_path), pages="1-3")
+
+        names = {event["name"] for event in _spans(tracer)}
+        assert {
+            "open document",
+            "render page",
+            "page",
+            "encode image",
+            "request",
+            "post-process",
+        } <= names
+        pages = sorted(event["args"]["page"] for event in _spans(tracer, "page"))
+        assert pages == [1, 2, 3]
+        # Requests run inside their page's span on the same thread
+        for request in _spans(tracer, "request"):
+            assert any(
+                page["tid"] == request["tid"]
+                and page["ts"] <= request["ts"]
+                and request["ts"] + request["dur"] <= page["ts"] + page["dur"]
+                for page in _spans(tracer, "page")
+            )
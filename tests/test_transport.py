@@ -0,0 +1,241 @@
+"""
+Tests for markpdfdown.core.transport module
+"""
+
+import json
+import socket
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from benchmarks.mock_server import MockLLMServer, MockServerSettings
+from markpdfdown.core.llm_client import LLMClient
+from markpdfdown.core.transport import (
+    LiteLLMTransport,
+    OpenAITransport,
+    Transport,
+    TransportError,
+    _payload,
+    get_transport,
+)
+
+
+@pytest.fixture
+def server():
+    """Stub OpenAI-compatible server answering without delay"""
+    settings = MockServerSettings(latency_mean=0.0, content="# Page")
+    with MockLLMServer(settings) as server:
+        yield server
+
+
+class TestOpenAITransport:
+    """Tests for OpenAITransport class"""
+
+    def test_completion(self, server):
+        """Test a response is shaped like LiteLLM's"""
+        transport = OpenAITransport(server.base_url, "sk-test")
+
+        response = transport.complete(
+            model="openai/mock", messages=[{"role": "user", "content": "Hi"}]
+        )
+
+        assert response.choices[0].message.content == "# Page"
+        assert response.choices[0].finish_reason == "stop"
+        assert response.usage.prompt_tokens > 0
+
+    def test_stream(self, server):
+        """Test a streamed response yields delta chunks and usage"""
+        transport = OpenAITransport(server.base_url, "sk-test")
+
+        chunks = list(
+            transport.complete(
+                model="mock",
+                messages=[],
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+        )
+
+        text = "".join(
+            getattr(chunk.choices[0].delta, "content", "") for chunk in chunks
+        )
+        assert text == "# Page"
+        assert chunks[-1].choices[0].finish_reason == "stop"
+        assert chunks[-1].usage.completion_tokens > 0
+
+    def test_connections_reused(self, server):
+        """Test sequential requests share one pooled connection"""
+        transport = OpenAITransport(server.base_url, "sk-test")
+
+        transport.complete(model="mock", messages=[])
+        connection = transport._idle[0]
+        list(transport.complete(model="mock", messages=[], stream=True))
+        transport.complete(model="mock", messages=[])
+
+        assert transport._idle == [connection]
+        transport.close()
+        assert transport._idle == []
+
+    def test_closed_connection_replaced(self, server):
+        """Test a pooled connection closed while idle is replaced"""
+        transport = OpenAITransport(server.base_url, "sk-test")
+        transport.complete(model="mock", messages=[])
+        transport._idle[0].sock.shutdown(socket.SHUT_RDWR)
+
+        response = transport.complete(model="mock", messages=[])
+
+        assert response.choices[0].message.content == "# Page"
+
+    def test_abandoned_stream_not_pooled(self, server):
+        """Test a stream closed before its end does not return its connection"""
+        transport = OpenAITransport(server.base_url, "sk-test")
+
+        stream = transport.complete(model="mock", messages=[], stream=True)
+        next(stream)
+        stream.close()
+
+        assert transport._idle == []
+
+    def test_rate_limit_status(self):
+        """Test error responses raise TransportError with the HTTP status"""
+        settings = MockServerSettings(latency_mean=0.0, rate_limit_rate=1.0)
+        with MockLLMServer(settings) as server:
+            transport = OpenAITransport(server.base_url, "sk-test")
+            with pytest.raises(TransportError, match="Rate limit") as exc_info:
+                transport.complete(model="mock", messages=[])
+
+        assert exc_info.value.status_code == 429
+
+    def test_headers(self, server):
+        """Test the key and extra headers are sent and timeout is not"""
+        transport = OpenAITransport(server.base_url, "sk-test")
+        connection = MagicMock()
+        connection.getresponse.return_value.status = 200
+        connection.getresponse.return_value.read.return_value = b'{"choices": []}'
+
+        with patch.object(transport, "_acquire", return_value=(connection, False)):
+            transport.complete(
+                model="mock", messages=[], timeout=5, extra_headers={"X-Title": "T"}
+            )
+
+        _, path, body, headers = connection.request.call_args.args
+        assert path == "/v1/chat/completions"
+        assert headers["Authorization"] == "Bearer sk-test"
+        assert headers["X-Title"] == "T"
+        assert "timeout" not in json.loads(body)
+
+    def test_invalid_api_base(self):
+        """Test API bases that are not HTTP URLs are rejected"""
+        with pytest.raises(ValueError, match="Invalid API base"):
+            OpenAITransport("localhost:8000")
+
+
+class TestTransport:
+    """Tests for Transport base class"""
+
+    def test_complete_required(self):
+        """Test transports without complete cannot be created"""
+
+        class Incomplete(Transport):
+            pass
+
+        with pytest.raises(TypeError, match="complete"):
+            Incomplete()
+
+
+class TestPayload:
+    """Tests for request payload conversion"""
+
+    def test_model_prefix_and_cache_control(self):
+        """Test the openai/ prefix and cache-control markers are dropped"""
+        payload = _payload(
+            {
+                "model": "openai/gpt-4o",
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": [
+                            {
+                                "type": "text",
+                                "text": "Hi",
+                                "cache_control": {"type": "ephemeral"},
+                            }
+                        ],
+                    }
+                ],
+                "timeout": 30,
+            }
+        )
+
+        assert payload == {
+            "model": "gpt-4o",
+            "messages": [{"role": "user", "content": [{"type": "text", "text": "Hi"}]}],
+        }
+
+
+class TestGetTransport:
+    """Tests for get_transport function"""
+
+    def test_litellm_default(self):
+        """Test LiteLLM is the shared default transport"""
+        assert isinstance(get_transport(), LiteLLMTransport)
+        assert get_transport() is get_transport("litellm")
+
+    def test_openai_shared_per_endpoint(self, monkeypatch):
+        """Test OpenAI transports are shared per API base"""
+        monkeypatch.setenv("OPENAI_API_BASE", "http://127.0.0.1:1/v1")
+        transport = get_transport("openai")
+        assert transport is get_transport("openai")
+        assert transport.api_base == "http://127.0.0.1:1/v1"
+
+        monkeypatch.setenv("OPENAI_API_BASE", "http://127.0.0.1:2/v1")
+        assert get_transport("openai") is not transport
+
+    def test_unknown(self):
+        """Test unknown transport names are rejected"""
+        with pytest.raises(ValueError, match="Unknown transport"):
+            get_transport("grpc")
+
+
+class TestLLMClientTransport:
+    """Tests for LLMClient over a transport"""
+
+    def test_litellm_by_default(self, mock_litellm_completion, mock_llm_response):
+        """Test clients without a transport go through LiteLLM"""
+        client = LLMClient("gpt-4o")
+
+        assert isinstance(client.transport, LiteLLMTransport)
+        assert client.completion("Hello") == mock_llm_response
+
+    def test_transport_from_config(self, monkeypatch):
+        """Test the config's transport is used"""
+        from markpdfdown.config import Config
+
+        monkeypatch.setenv("OPENAI_API_BASE", "http://127.0.0.1:1/v1")
+        client = LLMClient(config=Config(transport="openai"))
+
+        assert isinstance(client.transport, OpenAITransport)
+
+    def test_completion_over_openai(self, server):
+        """Test plain and streaming completions over the direct transport"""
+        client = LLMClient(
+            "openai/mock", transport=OpenAITransport(server.base_url, "sk-test")
+        )
+
+        assert client.completion("Hello", cache_prompt=True) == "# Page"
+        assert "".join(client.completion_stream("Hello", cache_prompt=True)) == (
+            "# Page"
+        )
+        assert client.usage.requests == 2
+
+    def test_rate_limit_counted(self):
+        """Test 429 responses of the direct transport count as throttled"""
+        settings = MockServerSettings(latency_mean=0.0, rate_limit_rate=1.0)
+        with MockLLMServer(settings) as server:
+            client = LLMClient(
+                "mock", transport=OpenAITransport(server.base_url, "sk-test")
+            )
+            with pytest.raises(TransportError):
+                client.completion("Hello", retry_times=1)
+
+        assert client.throttled == 1
@@ -5,8 +5,13 @@ Tests for markpdfdown.core.utils module
 import pytest
 
 from markpdfdown.core.utils import (
+    MarkdownWrapStripper,
     detect_file_type,
+    format_duration,
+    parse_page_spec,
     remove_markdown_wrap,
+    select_pages,
+    stitch_tiles,
     validate_page_range,
 )
 
@@ -157,3 +162,115 @@ class TestValidatePageRange:
         start, end = validate_page_range(10, 10, 10)
         assert start == 10
         assert end == 10
+
+
+class TestParsePageSpec:
+    """Tests for parse_page_spec function"""
+
+    def test_mixed_spec(self):
+        """Test pages, closed ranges and open ranges together"""
+        assert parse_page_spec("1-3,17,40-45,200-") == [
+            (1, 3),
+            (17, 17),
+            (40, 45),
+            (200, 0),
+        ]
+
+    def test_whitespace_is_ignored(self):
+        """Test whitespace around entries is ignored"""
+        assert parse_page_spec(" 2 , 4 - 6 ") == [(2, 2), (4, 6)]
+
+    @pytest.mark.parametrize("spec", ["", "1,,2", "a", "1-b", "-5", "3-1", "0"])
+    def test_invalid_spec_raises(self, spec):
+        """Test malformed specifications raise ValueError"""
+        with pytest.raises(ValueError):
+            parse_page_spec(spec)
+
+
+class TestSelectPages:
+    """Tests for select_pages function"""
+
+    def test_sorted_and_deduplicated(self):
+        """Test overlapping and unordered entries are merged"""
+        assert select_pages("5,1-3,2,9-", 10) == [1, 2, 3, 5, 9, 10]
+
+    def test_range_end_clamped(self):
+        """Test a range running past the end is clamped"""
+        assert select_pages("8-20", 10) == [8, 9, 10]
+
+    def test_page_beyond_document_raises(self):
+        """Test a page past the end of the document raises"""
+        with pytest.raises(ValueError, match="exceeds total pages"):
+            select_pages("3,12", 10)
+
+
+class TestStitchTiles:
+    """Tests for stitch_tiles function"""
+
+    def test_parts_joined_with_blank_line(self):
+        """Test tiles without overlap are separated by a blank line"""
+        assert stitch_tiles(["# Title", "Body text"]) == "# Title\n\nBody text"
+
+    def test_overlapping_lines_removed(self):
+        """Test lines repeated at the start of the next tile are dropped"""
+        parts = ["Line 1\nLine 2\nLine 3", "Line 2\nLine 3\nLine 4"]
+        assert stitch_tiles(parts) == "Line 1\nLine 2\nLine 3\n\nLine 4"
+
+    def test_table_continued_across_tiles(self):
+        """Test a table split across tiles is kept in one piece"""
+        parts = ["| a | b |\n| --- | --- |\n| 1 | 2 |", "| 1 | 2 |\n| 3 | 4 |"]
+        assert stitch_tiles(parts) == "| a | b |\n| --- | --- |\n| 1 | 2 |\n| 3 | 4 |"
+
+    def test_empty_tiles_skipped(self):
+        """Test empty tile transcriptions are ignored"""
+        assert stitch_tiles(["", "A", "  ", "B"]) == "A\n\nB"
+
+
+class TestFormatDuration:
+    """Tests for format_duration function"""
+
+    def test_units(self):
+        """Test durations use the two largest units"""
+        assert format_duration(42.4) == "42s"
+        assert format_duration(185) == "3m 05s"
+        assert format_duration(7800) == "2h 10m"
+
+
+def _strip_in_chunks(text, size):
+    stripper = MarkdownWrapStripper("markdown")
+    out = "".join(stripper.feed(text[i : i + size]) for i in range(0, len(text), size))
+    return out + stripper.flush()
+
+
+class TestMarkdownWrapStripper:
+    """Tests for MarkdownWrapStripper class"""
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "```markdown\n# Title\n\nSome ``code`` here\n```",
+            "```Markdown\n\n  Body  \n\n```\ntrailing text",
+            "  plain text without fences \n\n",
+            "text mentioning ``` in the middle",
+            "```mark",
+            "",
+        ],
+    )
+    @pytest.mark.parametrize("size", [1, 2, 3, 7, 1000])
+    def test_matches_remove_markdown_wrap(self, text, size):
+        """Test chunked output equals the non-streaming result"""
+        assert _strip_in_chunks(text, size) == remove_markdown_wrap(text)
+
+    def test_text_released_before_end(self):
+        """Test content is emitted before the response completes"""
+        stripper = MarkdownWrapStripper("markdown")
+
+        assert stripper.feed("```mark") == ""
+        assert stripper.feed("down\n# Title\nMore") == "# Title\nMore"
+        assert stripper.feed(" text\n``") == " text"
+        assert stripper.feed("`\nignored") == ""
+        assert stripper.flush() == ""
+
+    def test_unclosed_fence_dropped(self):
+        """Test an opening fence without a closing one is still removed"""
+        assert _strip_in_chunks("```markdown\n# Title\n", 4) == "# Title"